@@ -0,0 +1,431 @@
+"""
+Ingestion throughput of the file pipeline, without API keys or servers.
+
+Generates a synthetic corpus (plain text, markdown, HTML and zipped bundles),
+ingests it with FileIngestionService using the deterministic ``fake``
+embedding model and the in-process NumPy vector store, and reports per-stage
+time (detect, load, split, embed, upsert), documents and chunks per second
+and peak RSS:
+
+    PYTHONPATH=.:src python benchmarks/ingestion_benchmark.py --docs 500
+
+    # Record a baseline, then judge a change against it
+    PYTHONPATH=.:src python benchmarks/ingestion_benchmark.py \
+        --save-baseline benchmarks/baselines/ingestion.json
+    PYTHONPATH=.:src python benchmarks/ingestion_benchmark.py \
+        --baseline benchmarks/baselines/ingestion.json --fail-on-regression
+
+Stage times are busy seconds summed over a stage's concurrent workers, so
+they show where work goes rather than adding up to the wall time. Use
+``--latency-ms`` to simulate a remote embedding provider's round trip.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+# Measure the pipeline, not the embedding cache or the optional BM25 index
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ.setdefault("LEXICAL_INDEX_ENABLED", "false")
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter  # noqa: E402
+
+from app.core.constants import EmbeddingType  # noqa: E402
+from app.db.vector.numpy_store import NumpyVectorDB  # noqa: E402
+from app.db.vector.providers.embedding_provider import (  # noqa: E402
+    DictConfigProvider,
+    EmbeddingFactory,
+)
+from app.infrastructure.ingestion.archive_reader import (  # noqa: E402
+    ArchiveLimits,
+    ArchiveReader,
+)
+from app.infrastructure.ingestion.file_data_source_util import (  # noqa: E402
+    _construct_mapping,
+)
+from app.infrastructure.ingestion.file_ingestion_service import (  # noqa: E402
+    FILE_DEFAULTS,
+    FileIngestionService,
+)
+from app.infrastructure.ingestion.file_manifest import FileManifest  # noqa: E402
+from app.infrastructure.ingestion.pipeline import PipelineConfig  # noqa: E402
+from app.infrastructure.ingestion.sync_state import SyncStateStore  # noqa: E402
+
+FORMATS = ("txt", "md", "html", "zip")
+STAGES = ("detect", "load", "split", "embed", "upsert")
+
+WORDS = (
+    "agent token deploy cluster latency request retry cache index vector query "
+    "service payment invoice customer schedule release rollback incident alert "
+    "database replica shard migration config secret policy audit tenant region "
+    "pipeline batch stream worker queue timeout budget owner review runbook"
+).split()
+
+# (metric path, higher is better)
+METRICS = [
+    (("totals", "seconds"), False),
+    (("totals", "documents_per_second"), True),
+    (("totals", "chunks_per_second"), True),
+    (("totals", "peak_rss_mb"), False),
+] + [(("stages", stage, "seconds"), False) for stage in STAGES]
+
+
+# Corpus
+
+
+def _paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))).capitalize()
+        + "."
+        for _ in range(sentences)
+    )
+
+
+def _body(rng: random.Random, size: int) -> List[str]:
+    paragraphs, length = [], 0
+    while length < size:
+        paragraph = _paragraph(rng)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return paragraphs
+
+
+def _render(fmt: str, title: str, paragraphs: List[str]) -> str:
+    if fmt == "md":
+        sections = [
+            f"## Section {n}\n\n{p}" if n % 3 == 0 else p
+            for n, p in enumerate(paragraphs)
+        ]
+        return f"# {title}\n\n" + "\n\n".join(sections) + "\n"
+    if fmt == "html":
+        body = "\n".join(f"<p>{p}</p>" for p in paragraphs)
+        return (
+            f"<!DOCTYPE html>\n<html><head><title>{title}</title></head>"
+            f"<body><h1>{title}</h1>\n{body}\n</body></html>\n"
+        )
+    return f"{title}\n\n" + "\n\n".join(paragraphs) + "\n"
+
+
+def generate_corpus(
+    root: Path, docs: int, doc_kb: float, formats, seed: int, bundle_size: int = 4
+) -> Dict[str, Any]:
+    """Write ``docs`` files cycling through ``formats`` under nested folders.
+
+    A ``zip`` entry is a bundle of ``bundle_size`` text and markdown members.
+    The corpus is identical for the same arguments.
+    """
+    rng = random.Random(seed)
+    size = int(doc_kb * 1024)
+    counts: Dict[str, int] = {}
+    total_bytes = 0
+    for n in range(docs):
+        fmt = formats[n % len(formats)]
+        folder = root / f"team-{n % 7}" / f"area-{n % 3}"
+        folder.mkdir(parents=True, exist_ok=True)
+        title = f"Document {n} {rng.choice(WORDS)} {rng.choice(WORDS)}"
+        if fmt == "zip":
+            path = folder / f"bundle-{n}.zip"
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+                for member in range(bundle_size):
+                    member_fmt = "md" if member % 2 else "txt"
+                    bundle.writestr(
+                        f"part-{member}.{member_fmt}",
+                        _render(member_fmt, f"{title} part {member}", _body(rng, size)),
+                    )
+            path.write_bytes(buffer.getvalue())
+        else:
+            path = folder / f"doc-{n}.{fmt}"
+            path.write_text(_render(fmt, title, _body(rng, size)), encoding="utf-8")
+        counts[fmt] = counts.get(fmt, 0) + 1
+        total_bytes += path.stat().st_size
+    return {"files": docs, "formats": counts, "bytes": total_bytes}
+
+
+# Instrumented service
+
+
+class BenchmarkFileIngestion(FileIngestionService):
+    """FileIngestionService over a local corpus, fake embeddings and NumPy store.
+
+    Skips the settings-driven source lookup; everything else (discovery,
+    manifest, parsing, archive reading, splitting, the pipeline) is the
+    production code path.
+    """
+
+    def __init__(self, corpus: Path, workdir: Path, args):
+        self.config = SimpleNamespace(sources=[str(corpus)])
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap
+        )
+        self._processed_files = {}
+        self._loader_mapping = _construct_mapping()
+        self._vector_store = NumpyVectorDB()
+        self._vector_store.config = {
+            **self._vector_store.config,
+            "path": str(workdir / "vectors"),
+            "collection_name": "benchmark",
+            "embedding_dimension": args.dimension,
+        }
+        self._embedding_type = EmbeddingType.FAKE
+        self._pipeline_config = PipelineConfig.from_settings()
+        self._file_config = {**FILE_DEFAULTS, "parse_workers": args.parse_workers}
+        self._manifest = FileManifest(SyncStateStore(str(workdir / "manifest.db")))
+        self._process_pool = None
+        self._archive_reader = ArchiveReader(
+            self._loader_mapping, ArchiveLimits.from_config(None)
+        )
+        self.pipeline = None
+        self.detect_seconds = 0.0
+        self.documents = 0
+        self._lock = threading.Lock()
+
+    def _build_pipeline(self):
+        self.pipeline = super()._build_pipeline()
+        return self.pipeline
+
+    def _detect_file_type(self, file_path: str):
+        started = time.perf_counter()
+        try:
+            return super()._detect_file_type(file_path)
+        finally:
+            with self._lock:
+                self.detect_seconds += time.perf_counter() - started
+
+    async def _fetch_file(self, source) -> tuple:
+        path, documents = await super()._fetch_file(source)
+        self.documents += len(documents)
+        return path, documents
+
+
+# Measurement
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _stage_report(service: BenchmarkFileIngestion) -> Dict[str, Dict[str, Any]]:
+    stats = service.pipeline.get_stats() if service.pipeline else {}
+
+    def stage(name: str, seconds: float, processed: int) -> Dict[str, Any]:
+        return {
+            "seconds": round(seconds, 4),
+            "processed": processed,
+            "per_second": round(processed / seconds, 2) if seconds > 0 else 0.0,
+        }
+
+    fetch = stats.get("fetch", {})
+    fetched = fetch.get("processed", 0)
+    detect = service.detect_seconds
+    return {
+        "detect": stage("detect", detect, fetched),
+        # Parsing happens inside fetch, after type detection
+        "load": stage(
+            "load", max(0.0, fetch.get("busy_seconds", 0.0) - detect), fetched
+        ),
+        **{
+            name: stage(
+                name,
+                stats.get(source, {}).get("busy_seconds", 0.0),
+                stats.get(source, {}).get("processed", 0),
+            )
+            for name, source in (
+                ("split", "chunk"),
+                ("embed", "embed"),
+                ("upsert", "upsert"),
+            )
+        },
+    }
+
+
+async def _ingest(service: BenchmarkFileIngestion) -> bool:
+    try:
+        return await service.ingest()
+    finally:
+        await service.close()
+
+
+def run(args) -> Dict[str, Any]:
+    EmbeddingFactory.set_config_provider(
+        DictConfigProvider(
+            {
+                EmbeddingType.FAKE: {
+                    "dimensions": args.dimension,
+                    "latency_ms": args.latency_ms,
+                }
+            }
+        )
+    )
+    with tempfile.TemporaryDirectory(prefix="ingestion-bench-") as tmp:
+        workdir = Path(args.workdir or tmp)
+        corpus_dir = workdir / "corpus"
+        print(f"Generating {args.docs} documents in {corpus_dir}...")
+        corpus = generate_corpus(
+            corpus_dir, args.docs, args.doc_kb, args.formats, args.seed
+        )
+        service = BenchmarkFileIngestion(corpus_dir, workdir, args)
+
+        print("Ingesting...")
+        started = time.perf_counter()
+        success = asyncio.run(_ingest(service))
+        seconds = time.perf_counter() - started
+
+    stats = service.pipeline.get_stats() if service.pipeline else {}
+    chunks = stats.get("upsert", {}).get("processed", 0)
+    return {
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "docs",
+                "doc_kb",
+                "formats",
+                "seed",
+                "dimension",
+                "latency_ms",
+                "parse_workers",
+                "chunk_size",
+                "chunk_overlap",
+            )
+        },
+        "corpus": corpus,
+        "totals": {
+            "success": success,
+            "files": corpus["files"],
+            "documents": service.documents,
+            "chunks": chunks,
+            "seconds": round(seconds, 4),
+            "documents_per_second": round(service.documents / seconds, 2),
+            "chunks_per_second": round(chunks / seconds, 2),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "peak_child_rss_mb": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        },
+        "stages": _stage_report(service),
+    }
+
+
+# Reporting
+
+
+def _lookup(results: Dict[str, Any], path) -> Any:
+    for key in path:
+        results = (results or {}).get(key)
+    return results
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    totals, corpus = results["totals"], results["corpus"]
+    print(
+        f"\n{corpus['files']} files ({corpus['bytes'] / 2**20:.1f} MB) -> "
+        f"{totals['documents']} documents -> {totals['chunks']} chunks "
+        f"in {totals['seconds']:.2f}s"
+        + ("" if totals["success"] else "  [some files failed]")
+    )
+    print(
+        f"{totals['documents_per_second']:.1f} docs/s, "
+        f"{totals['chunks_per_second']:.1f} chunks/s, "
+        f"peak RSS {totals['peak_rss_mb']:.0f} MB\n"
+    )
+    header = f"{'stage':<8}{'seconds':>10}{'items':>9}{'items/s':>11}"
+    print(header)
+    print("-" * len(header))
+    for name in STAGES:
+        stage = results["stages"][name]
+        print(
+            f"{name:<8}{stage['seconds']:>10.3f}{stage['processed']:>9}"
+            f"{stage['per_second']:>11.1f}"
+        )
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Print current vs baseline and return the metrics that regressed."""
+    if baseline.get("config") != results["config"]:
+        print("\nWarning: baseline was recorded with different settings")
+    header = f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}"
+    print(f"\n{header}\n{'-' * len(header)}")
+    regressions = []
+    for path, higher_is_better in METRICS:
+        before, after = _lookup(baseline, path), _lookup(results, path)
+        if not before or after is None:
+            continue
+        change = (after - before) / before * 100
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(".".join(path))
+        print(
+            f"{'.'.join(path[1:]):<24}{before:>12.3f}{after:>12.3f}"
+            f"{change:>+9.1f}%{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=200, help="Files to generate")
+    parser.add_argument("--doc-kb", type=float, default=8.0, help="Text per file")
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Simulated embed round trip"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=-1,
+        help="Process pool for PDF/Office/HTML; 0 = CPU count, -1 = threads only",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--workdir", help="Keep the corpus and store here")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare against a saved results file")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=10.0, help="Allowed regression in percent"
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with status 1 when a metric regressed beyond the tolerance",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = run(args)
+    print_results(results)
+
+    for target in filter(None, (args.output, args.save_baseline)):
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        Path(target).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nWrote {target}")
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+        if regressions and args.fail_on_regression:
+            sys.exit(f"\nRegressed beyond {args.tolerance}%: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
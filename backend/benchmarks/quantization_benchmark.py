@@ -0,0 +1,152 @@
+"""
+Recall/latency/memory trade-off of the vector quantization modes.
+
+Embeds a corpus (or generates clustered synthetic vectors), holds out some
+chunks as queries and compares every mode in app.db.vector.quantization
+against exact float32 search:
+
+    PYTHONPATH=.:src python benchmarks/quantization_benchmark.py \
+        --corpus ./docs --embedding openai --k 10
+
+    PYTHONPATH=.:src python benchmarks/quantization_benchmark.py \
+        --synthetic 100000 --dimension 1536
+
+Memory is that of the searched codes; rescoring reads the full-precision
+rows of the candidates only, which can stay on disk (or in Postgres/Qdrant).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from app.db.vector.quantization import (
+    QUANTIZATION_MODES,
+    QuantizationConfig,
+    VectorQuantizer,
+    normalize,
+)
+
+TEXT_SUFFIXES = {".txt", ".md", ".rst", ".html", ".json", ".csv", ".py"}
+
+
+def load_chunks(corpus: Path, chunk_size: int, chunk_overlap: int) -> List[str]:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+    chunks: List[str] = []
+    for path in sorted(corpus.rglob("*")):
+        if path.is_file() and path.suffix.lower() in TEXT_SUFFIXES:
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            chunks.extend(c for c in splitter.split_text(text) if c.strip())
+    return chunks
+
+
+def embed_corpus(args) -> np.ndarray:
+    from app.core.constants import EmbeddingType
+    from app.db.vector.embeddings.embedding import EmbeddingFactory
+
+    chunks = load_chunks(Path(args.corpus), args.chunk_size, args.chunk_overlap)
+    if len(chunks) <= args.queries:
+        sys.exit(f"Corpus has {len(chunks)} chunks, need more than {args.queries}")
+    print(f"Embedding {len(chunks)} chunks with {args.embedding}...")
+    model = EmbeddingFactory.get_embedding_model(EmbeddingType(args.embedding))
+    return np.asarray(model.embed_documents(chunks), dtype=np.float32)
+
+
+def synthetic_vectors(count: int, dimension: int, seed: int) -> np.ndarray:
+    """Clustered vectors: embeddings of a corpus concentrate around topics."""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(max(1, count // 200), dimension))
+    assignment = rng.integers(0, len(topics), size=count)
+    noise = rng.normal(scale=0.5, size=(count, dimension))
+    return (topics[assignment] + noise).astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    return len(set(found.tolist()) & set(expected.tolist())) / len(expected)
+
+
+def run(vectors: np.ndarray, args) -> None:
+    queries, corpus = vectors[: args.queries], vectors[args.queries :]
+    full = normalize(corpus)
+    exact = [np.argsort(-(full @ q))[: args.k] for q in normalize(queries)]
+
+    print(
+        f"\n{len(corpus)} vectors x {corpus.shape[1]} dims, "
+        f"{len(queries)} queries, k={args.k}, oversampling={args.oversampling}\n"
+    )
+    header = (
+        f"{'mode':<8}{'rescore':>8}{'memory MB':>12}{'ratio':>8}"
+        f"{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    baseline = full.nbytes
+    for mode in args.modes:
+        for rescore in (True, False) if mode != "none" else (False,):
+            config = QuantizationConfig(
+                mode=mode, oversampling=args.oversampling, rescore=rescore
+            )
+            quantizer = VectorQuantizer(config)
+            quantizer.fit_transform(corpus)
+
+            latencies, recalls = [], []
+            for query, expected in zip(queries, exact):
+                started = time.perf_counter()
+                ids, _ = quantizer.search(
+                    query, args.k, full_vectors=full if rescore else None
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(recall_at_k(ids, expected))
+
+            memory = quantizer.memory_bytes()
+            print(
+                f"{mode:<8}{'yes' if rescore else 'no':>8}"
+                f"{memory / 2**20:>12.1f}{baseline / memory:>7.1f}x"
+                f"{np.mean(recalls):>10.3f}"
+                f"{np.percentile(latencies, 50):>9.2f}"
+                f"{np.percentile(latencies, 95):>9.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--corpus", help="Directory of text documents to embed")
+    source.add_argument(
+        "--synthetic", type=int, metavar="N", help="Generate N clustered vectors"
+    )
+    parser.add_argument("--embedding", default="openai", help="EmbeddingType value")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=4.0)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=list(QUANTIZATION_MODES),
+        choices=QUANTIZATION_MODES,
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.corpus:
+        vectors = embed_corpus(args)
+    else:
+        vectors = synthetic_vectors(
+            args.synthetic + args.queries, args.dimension, args.seed
+        )
+    run(vectors, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Throughput and chunk-size spread of the ingestion text splitters.
+
+Splits a synthetic corpus of markdown documents (prose, lists, headings,
+fenced code and tables) with the previous character splitter
+(RecursiveCharacterTextSplitter, 1000/200 characters) and with the
+token-sized StructuredTokenSplitter, in-process and in the process pool, and
+reports documents and MB per second plus the token-count distribution of the
+chunks (mean, standard deviation, coefficient of variation, percentiles and
+chunks over the token budget):
+
+    PYTHONPATH=.:src python benchmarks/splitter_benchmark.py --docs 2000
+
+Token counts use the configured encoding (``--encoding``); without a tiktoken
+cache and network access the splitter's approximation is used for both
+splitting and measuring, which the report states.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from langchain.schema import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.infrastructure.ingestion.token_splitter import (
+    StructuredTokenSplitter,
+    get_tokenizer,
+    shutdown_pool,
+)
+
+WORDS = (
+    "agent token deploy cluster latency request retry cache index vector query "
+    "service payment invoice customer schedule release rollback incident alert "
+    "database replica shard migration config secret policy audit tenant region "
+    "pipeline batch stream worker queue timeout budget owner review runbook"
+).split()
+
+
+# Corpus
+
+
+def _sentence(rng: random.Random) -> str:
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18)))
+    return words.capitalize() + "."
+
+
+def _block(rng: random.Random) -> str:
+    kind = rng.choices(["prose", "list", "code", "table", "heading"], [6, 2, 1, 1, 2])[
+        0
+    ]
+    if kind == "list":
+        return "\n".join(f"- {_sentence(rng)}" for _ in range(rng.randint(3, 8)))
+    if kind == "code":
+        lines = [
+            f"    {rng.choice(WORDS)}_{n} = client.{rng.choice(WORDS)}"
+            f"({rng.randint(0, 999)}, retries={rng.randint(1, 5)})"
+            for n in range(rng.randint(4, 40))
+        ]
+        return "```python\ndef handler(event):\n" + "\n".join(lines) + "\n```"
+    if kind == "table":
+        rows = [
+            f"| {rng.choice(WORDS)} | {rng.randint(0, 10**6)} | {rng.choice(WORDS)} |"
+            for _ in range(rng.randint(3, 30))
+        ]
+        return "| name | value | owner |\n|------|-------|-------|\n" + "\n".join(rows)
+    if kind == "heading":
+        return f"{'#' * rng.randint(1, 3)} {rng.choice(WORDS).capitalize()} notes"
+    return " ".join(_sentence(rng) for _ in range(rng.randint(2, 9)))
+
+
+def generate_corpus(docs: int, doc_kb: float, seed: int) -> List[Document]:
+    """``docs`` markdown documents of about ``doc_kb`` KB each."""
+    rng = random.Random(seed)
+    size = int(doc_kb * 1024)
+    corpus = []
+    for n in range(docs):
+        blocks, length = [f"# Document {n}"], 0
+        while length < size:
+            blocks.append(_block(rng))
+            length += len(blocks[-1]) + 2
+        corpus.append(Document(page_content="\n\n".join(blocks), metadata={"doc": n}))
+    return corpus
+
+
+# Measurement
+
+
+def _distribution(counts: List[int], budget: int) -> Dict[str, Any]:
+    ordered = sorted(counts)
+
+    def percentile(p: float) -> int:
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    mean = statistics.fmean(counts)
+    stdev = statistics.pstdev(counts)
+    return {
+        "mean": round(mean, 1),
+        "stdev": round(stdev, 1),
+        "cv": round(stdev / mean, 3) if mean else 0.0,
+        "p5": percentile(5),
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "max": ordered[-1],
+        "over_budget": sum(1 for c in counts if c > budget),
+    }
+
+
+def measure(name: str, splitter, docs: List[Document], budget: int, tokenizer):
+    started = time.perf_counter()
+    chunks = splitter.split_documents(docs)
+    seconds = time.perf_counter() - started
+    megabytes = sum(len(d.page_content.encode()) for d in docs) / 2**20
+    counts = tokenizer.count_many([c.page_content for c in chunks])
+    return {
+        "splitter": name,
+        "seconds": round(seconds, 3),
+        "documents_per_second": round(len(docs) / seconds, 1),
+        "mb_per_second": round(megabytes / seconds, 2),
+        "chunks": len(chunks),
+        "tokens": _distribution(counts, budget),
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    docs = generate_corpus(args.docs, args.doc_kb, args.seed)
+    tokenizer = get_tokenizer(args.encoding)
+    workers = args.workers or os.cpu_count() or 1
+    splitters = [
+        (
+            "character",
+            RecursiveCharacterTextSplitter(
+                chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap
+            ),
+        ),
+        (
+            "token",
+            StructuredTokenSplitter(
+                chunk_size=args.chunk_tokens,
+                chunk_overlap=args.overlap_tokens,
+                encoding=args.encoding,
+                parallel_workers=-1,
+            ),
+        ),
+        (
+            f"token x{workers}",
+            StructuredTokenSplitter(
+                chunk_size=args.chunk_tokens,
+                chunk_overlap=args.overlap_tokens,
+                encoding=args.encoding,
+                parallel_workers=workers,
+                parallel_min_chars=0,
+            ),
+        ),
+    ]
+    # Start the pool's workers before timing
+    splitters[-1][1].split_documents(docs[: workers * 2])
+    try:
+        rows = [
+            measure(name, splitter, docs, args.chunk_tokens, tokenizer)
+            for name, splitter in splitters
+        ]
+    finally:
+        shutdown_pool()
+    return {
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "docs",
+                "doc_kb",
+                "seed",
+                "encoding",
+                "chunk_tokens",
+                "overlap_tokens",
+                "chunk_size",
+                "chunk_overlap",
+            )
+        },
+        "tokenizer": tokenizer.name,
+        "corpus_mb": round(sum(len(d.page_content.encode()) for d in docs) / 2**20, 2),
+        "results": rows,
+    }
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    config = results["config"]
+    print(
+        f"\n{config['docs']} documents ({results['corpus_mb']:.1f} MB), "
+        f"token budget {config['chunk_tokens']}, tokenizer {results['tokenizer']}"
+    )
+    header = (
+        f"{'splitter':<12}{'seconds':>9}{'docs/s':>9}{'MB/s':>8}{'chunks':>8}"
+        f"{'mean':>7}{'stdev':>7}{'cv':>7}{'p5':>6}{'p95':>6}{'max':>6}{'over':>6}"
+    )
+    print(f"\n{header}\n{'-' * len(header)}")
+    for row in results["results"]:
+        tokens = row["tokens"]
+        print(
+            f"{row['splitter']:<12}{row['seconds']:>9.2f}"
+            f"{row['documents_per_second']:>9.1f}{row['mb_per_second']:>8.2f}"
+            f"{row['chunks']:>8}{tokens['mean']:>7.0f}{tokens['stdev']:>7.0f}"
+            f"{tokens['cv']:>7.2f}{tokens['p5']:>6}{tokens['p95']:>6}"
+            f"{tokens['max']:>6}{tokens['over_budget']:>6}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--doc-kb", type=float, default=16.0, help="Text per document")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Characters")
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="Characters")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Pool processes; 0 = CPU count"
+    )
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results = run(args)
+    print_results(results)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
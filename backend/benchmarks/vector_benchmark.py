@@ -0,0 +1,482 @@
+"""
+Ingest throughput, query latency, recall and footprint of the vector stores.
+
+Loads one vector set (clustered synthetic vectors, sampled chunks of a corpus
+embedded with a configured model, or a saved ``.npy`` of real embeddings),
+holds out queries and computes their exact top-k by brute force. Each target
+is then written through the production ``add_embedded_documents`` path and
+queried through ``search_by_vector`` at several concurrency levels:
+
+    # In-process NumPy store, exact and IVF
+    PYTHONPATH=.:src python benchmarks/vector_benchmark.py --synthetic 100000 \
+        --dimension 384 --target numpy \
+        --target "numpy-ivf=numpy,ivf.enabled=true,ivf.min_rows=0"
+
+    # Local containers (docker compose up qdrant postgres), real embeddings
+    PYTHONPATH=.:src python benchmarks/vector_benchmark.py --corpus ./docs \
+        --embedding fake --dimension 384 --target qdrant --target pgvector \
+        --target "pg-ivf=pgvector,index.type=ivfflat" --output report.json
+
+A target is ``[label=]provider[,key=value...]``; the overrides are dotted keys
+into the provider's ``vector.<provider>`` block and apply to the store's own
+configuration (collection creation on Qdrant and Chroma follows the yaml).
+Every target writes to a ``vector_benchmark`` collection that is dropped
+before and after the run, or kept with ``--keep``.
+
+Per target the report has ingest vectors per second, index build seconds
+(pgvector ``reindex``, Qdrant optimizer until green; the NumPy store and
+Chroma build as they insert), the growth of this process's RSS, the on-disk
+or server-side size, and per concurrency level queries per second,
+p50/p95/p99 latency and recall@k against the exact results. RSS only
+reflects in-process stores; server memory is the container's.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+COLLECTION = "vector_benchmark"
+TEXT_SUFFIXES = {".txt", ".md", ".rst", ".html", ".json", ".csv", ".py"}
+
+# Settings resolve ${VAR:default} when first loaded, so these are set before
+# any app import. Collections are created with the benchmark's dimension.
+COLLECTION_ENV = (
+    "QDRANT_COLLECTION_NAME",
+    "PGVECTOR_COLLECTION_NAME",
+    "CHROMADB_COLLECTION_NAME",
+    "NUMPY_COLLECTION_NAME",
+)
+DIMENSION_ENV = (
+    "QDRANT_EMBEDDING_DIMENSION",
+    "PGVECTOR_EMBEDDING_DIMENSION",
+    "NUMPY_EMBEDDING_DIMENSION",
+)
+
+
+# Vectors
+
+
+def synthetic_vectors(count: int, dimension: int, seed: int) -> np.ndarray:
+    """Clustered vectors: embeddings of a corpus concentrate around topics."""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(max(1, count // 200), dimension))
+    assignment = rng.integers(0, len(topics), size=count)
+    noise = rng.normal(scale=0.5, size=(count, dimension))
+    return (topics[assignment] + noise).astype(np.float32)
+
+
+def embed_corpus(args) -> np.ndarray:
+    """Embed up to ``--sample`` random chunks of the corpus."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from app.core.constants import EmbeddingType
+    from app.db.vector.embeddings.embedding import EmbeddingFactory
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap
+    )
+    chunks: List[str] = []
+    for path in sorted(Path(args.corpus).rglob("*")):
+        if path.is_file() and path.suffix.lower() in TEXT_SUFFIXES:
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            chunks.extend(c for c in splitter.split_text(text) if c.strip())
+    if args.sample and len(chunks) > args.sample:
+        chunks = random.Random(args.seed).sample(chunks, args.sample)
+    print(f"Embedding {len(chunks)} chunks with {args.embedding}...")
+    model = EmbeddingFactory.get_embedding_model(EmbeddingType(args.embedding))
+    return np.asarray(model.embed_documents(chunks), dtype=np.float32)
+
+
+def load_vectors(args) -> np.ndarray:
+    if args.vectors:
+        vectors = np.load(args.vectors, mmap_mode="r")
+        if args.sample and len(vectors) > args.sample:
+            rows = np.random.default_rng(args.seed).choice(
+                len(vectors), args.sample, replace=False
+            )
+            vectors = vectors[np.sort(rows)]
+        vectors = np.asarray(vectors, dtype=np.float32)
+    elif args.corpus:
+        vectors = embed_corpus(args)
+    else:
+        vectors = synthetic_vectors(
+            args.synthetic + args.queries, args.dimension, args.seed
+        )
+    if vectors.shape[1] != args.dimension:
+        sys.exit(
+            f"Vectors have {vectors.shape[1]} dimensions; "
+            f"run again with --dimension {vectors.shape[1]}"
+        )
+    if len(vectors) <= args.queries:
+        sys.exit(f"Have {len(vectors)} vectors, need more than {args.queries}")
+    return vectors
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force cosine top-k rows of ``corpus`` for each query."""
+
+    def unit(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    scores = unit(queries) @ unit(corpus).T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(-scores, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+# Targets
+
+
+def parse_target(spec: str) -> Tuple[str, str, Dict[str, Any]]:
+    """``[label=]provider[,key=value...]`` into label, provider and overrides."""
+    head, *pairs = [part.strip() for part in spec.split(",") if part.strip()]
+    label, _, provider = head.rpartition("=")
+    overrides = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected key=value, got {pair!r}")
+        overrides[key.strip()] = yaml.safe_load(value)
+    return label or provider, provider.lower(), overrides
+
+
+def _apply_overrides(config: Dict[str, Any], overrides: Dict[str, Any]) -> None:
+    for key, value in overrides.items():
+        node = config
+        *parents, leaf = key.split(".")
+        for parent in parents:
+            if not isinstance(node.get(parent), dict):
+                node[parent] = {}
+            node = node[parent]
+        node[leaf] = value
+
+
+async def _maybe_await(result):
+    # ChromaDB writes synchronously
+    return await result if inspect.isawaitable(result) else result
+
+
+async def _drop_collection(provider: str, store) -> None:
+    """Remove the benchmark collection from a server-backed store."""
+    if provider == "qdrant":
+        await asyncio.to_thread(store._connection_manager.delete_collection, COLLECTION)
+    elif provider == "pgvector":
+        from app.db.repositories.pgvector_repo import _table
+
+        await store.get_connection()
+        async with store._repo._pool.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {_table(COLLECTION)}")
+    elif provider == "chroma":
+        client = store._connection_manager.connect()
+        if COLLECTION in [c.name for c in client.list_collections()]:
+            client.delete_collection(COLLECTION)
+
+
+async def _build_index(provider: str, store, timeout: float) -> None:
+    """Wait for the provider's vector index to cover the ingested rows."""
+    if provider == "pgvector":
+        await store.reindex(concurrently=False)
+    elif provider == "qdrant":
+        from qdrant_client.models import CollectionStatus
+
+        client = await store.get_connection()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            info = await client.get_collection(COLLECTION)
+            if info.status == CollectionStatus.GREEN:
+                return
+            await asyncio.sleep(0.2)
+        logging.getLogger(__name__).warning("Qdrant index not green in time")
+
+
+def _disk_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+async def _footprint(provider: str, store) -> Dict[str, Any]:
+    """Size of the stored collection, as the provider can report it."""
+    if provider == "numpy":
+        stats = await store.get_index_stats()
+        return {
+            "disk_bytes": _disk_bytes(Path(stats["path"])),
+            "vector_bytes": stats["matrix_bytes"] + stats["quantized_bytes"],
+        }
+    if provider == "pgvector":
+        stats = await store.get_index_stats()
+        return {
+            "disk_bytes": stats["total_size_bytes"],
+            "index_bytes": sum(index["size_bytes"] for index in stats["indexes"]),
+        }
+    if provider == "qdrant":
+        client = await store.get_connection()
+        info = await client.get_collection(COLLECTION)
+        return {
+            "points": info.points_count,
+            "indexed_vectors": info.indexed_vectors_count,
+            "segments": info.segments_count,
+        }
+    if provider == "chroma" and store.config.get("persist_directory"):
+        return {"disk_bytes": _disk_bytes(Path(store.config["persist_directory"]))}
+    return {}
+
+
+def _rss_bytes() -> int:
+    """Current resident set size, falling back to the peak off Linux."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _create_store(provider: str, overrides: Dict[str, Any], workdir: Path):
+    from app.core.constants import VectorDBType
+    from app.db.vector.providers.db_provider import VectorStoreFactory
+
+    store = VectorStoreFactory.get_vector_store(VectorDBType(provider))
+    store.config = {**store.config, "collection_name": COLLECTION}
+    if provider == "numpy":
+        store.config["path"] = str(workdir)
+    _apply_overrides(store.config, overrides)
+    return store
+
+
+# Measurement
+
+
+def _percentile(latencies: List[float], p: float) -> float:
+    return round(float(np.percentile(latencies, p)), 2)
+
+
+async def _ingest(store, vectors: np.ndarray, batch_size: int) -> None:
+    from langchain.schema import Document
+
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start : start + batch_size]
+        docs = [
+            Document(
+                page_content=f"Benchmark vector {row}",
+                metadata={"row": row, "document_id": f"benchmark-{row}"},
+            )
+            for row in range(start, start + len(batch))
+        ]
+        await _maybe_await(store.add_embedded_documents(docs, batch.tolist()))
+
+
+async def _query(
+    store, queries: np.ndarray, exact: np.ndarray, k: int, concurrency: int
+) -> Dict[str, Any]:
+    """Run every query once with ``concurrency`` searches in flight."""
+    latencies = [0.0] * len(queries)
+    recalls = [0.0] * len(queries)
+    pending = iter(range(len(queries)))
+
+    async def worker():
+        for n in pending:
+            started = time.perf_counter()
+            docs = await store.search_by_vector(queries[n].tolist(), k=k)
+            latencies[n] = (time.perf_counter() - started) * 1000
+            found = {doc.metadata.get("row") for doc in docs}
+            recalls[n] = len(found & set(exact[n].tolist())) / k
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "queries_per_second": round(len(queries) / seconds, 1),
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+    }
+
+
+async def run_target(
+    spec: str, corpus: np.ndarray, queries: np.ndarray, exact: np.ndarray, args
+) -> Dict[str, Any]:
+    label, provider, overrides = parse_target(spec)
+    with tempfile.TemporaryDirectory(prefix="vector-bench-") as workdir:
+        store = _create_store(provider, overrides, Path(workdir))
+        connected = False
+        try:
+            if provider != "numpy":
+                await _drop_collection(provider, store)
+                await store.close_connection()
+                store = _create_store(provider, overrides, Path(workdir))
+            await store.get_connection()
+            connected = True
+
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            await _ingest(store, corpus, args.batch_size)
+            ingest_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            await _build_index(provider, store, args.build_timeout)
+            build_seconds = time.perf_counter() - started
+
+            # Warm caches and lazily opened files before timing queries
+            await _query(store, queries[: args.k], exact, args.k, 1)
+            levels = [
+                await _query(store, queries, exact, args.k, concurrency)
+                for concurrency in args.concurrency
+            ]
+            return {
+                "target": label,
+                "provider": provider,
+                "overrides": overrides,
+                "vectors": len(corpus),
+                "ingest_seconds": round(ingest_seconds, 3),
+                "ingest_vectors_per_second": round(len(corpus) / ingest_seconds, 1),
+                "build_seconds": round(build_seconds, 3),
+                "rss_growth_bytes": _rss_bytes() - rss_before,
+                "footprint": await _footprint(provider, store),
+                "queries": levels,
+            }
+        finally:
+            if connected and provider != "numpy" and not args.keep:
+                await _drop_collection(provider, store)
+            await store.close_connection()
+
+
+def run(args) -> Dict[str, Any]:
+    vectors = load_vectors(args)
+    queries, corpus = vectors[: args.queries], vectors[args.queries :]
+    exact = exact_top_k(corpus, queries, args.k)
+    print(
+        f"\n{len(corpus)} vectors x {corpus.shape[1]} dims, "
+        f"{len(queries)} queries, k={args.k}"
+    )
+
+    results = []
+    for spec in args.target:
+        print(f"Running {spec}...")
+        try:
+            results.append(asyncio.run(run_target(spec, corpus, queries, exact, args)))
+        except Exception as e:
+            if not args.skip_unavailable:
+                raise
+            print(f"  skipped: {type(e).__name__}: {e}")
+    return {
+        "config": {
+            "vectors": len(corpus),
+            "dimension": int(corpus.shape[1]),
+            "queries": len(queries),
+            "k": args.k,
+            "source": (
+                args.vectors
+                or (args.corpus and f"{args.corpus} ({args.embedding})")
+                or "synthetic"
+            ),
+            "batch_size": args.batch_size,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def _mb(value: Optional[int]) -> str:
+    return f"{value / 2**20:.1f}" if value is not None else "-"
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    header = (
+        f"{'target':<16}{'provider':<10}{'ingest/s':>10}{'build s':>9}"
+        f"{'RSS MB':>9}{'disk MB':>9}{'index MB':>10}"
+    )
+    print(f"\n{header}\n{'-' * len(header)}")
+    for row in results["results"]:
+        footprint = row["footprint"]
+        print(
+            f"{row['target']:<16}{row['provider']:<10}"
+            f"{row['ingest_vectors_per_second']:>10.0f}{row['build_seconds']:>9.2f}"
+            f"{_mb(row['rss_growth_bytes']):>9}"
+            f"{_mb(footprint.get('disk_bytes')):>9}"
+            f"{_mb(footprint.get('index_bytes')):>10}"
+        )
+
+    header = (
+        f"{'target':<16}{'conc':>6}{'qps':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'recall@k':>10}"
+    )
+    print(f"\n{header}\n{'-' * len(header)}")
+    for row in results["results"]:
+        for level in row["queries"]:
+            print(
+                f"{row['target']:<16}{level['concurrency']:>6}"
+                f"{level['queries_per_second']:>9.1f}{level['p50_ms']:>9.2f}"
+                f"{level['p95_ms']:>9.2f}{level['p99_ms']:>9.2f}"
+                f"{level['recall_at_k']:>10.3f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--corpus", help="Directory of text documents to embed")
+    source.add_argument("--vectors", help="Saved .npy matrix of embeddings")
+    source.add_argument(
+        "--synthetic", type=int, metavar="N", help="Generate N clustered vectors"
+    )
+    parser.add_argument("--embedding", default="fake", help="EmbeddingType value")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--sample", type=int, default=0, help="Use N random vectors")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--target",
+        action="append",
+        help="[label=]provider[,key=value...]; repeatable, default numpy",
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--build-timeout", type=float, default=600.0)
+    parser.add_argument("--keep", action="store_true", help="Keep server collections")
+    parser.add_argument(
+        "--skip-unavailable",
+        action="store_true",
+        help="Report targets that fail to connect instead of stopping",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+    args.target = args.target or ["numpy"]
+
+    for name in COLLECTION_ENV:
+        os.environ[name] = COLLECTION
+    for name in DIMENSION_ENV:
+        os.environ[name] = str(args.dimension)
+    # Measure the stores, not the embedding cache or the optional BM25 index
+    os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+    os.environ.setdefault("LEXICAL_INDEX_ENABLED", "false")
+    logging.disable(logging.WARNING)
+
+    results = run(args)
+    print_results(results)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
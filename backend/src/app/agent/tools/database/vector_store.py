@@ -1,28 +1,160 @@
 """
 Vector store tools for information retrieval and semantic search.
+
+Retrieval runs on the configured default vector store
+(``vector.default.provider``). The store, its connection and its embedding
+model are created once and reused: every search runs on the process-wide
+shared store loop (app.core.utils.background_loop), so async clients,
+connection pools and the query embedding batcher stay bound to the loop that
+created them whether the agent calls the tool synchronously or awaits it.
+Each vector search goes through ``get_connection``, which reconnects when the
+cached client or pool was closed underneath the store. Results are rendered
+compactly and capped at a character budget. Settings live under ``tools.vector.retrieval``
+in application-tools.yaml.
+
+With the lexical index enabled (``vector.lexical``), queries made of exact
+identifiers are answered from its BM25 index without an embedding call, and
+other queries fuse the BM25 and vector rankings (see app.db.vector.lexical_index).
+
+When ``vector.federated`` lists sources, federated_retrieve searches all of
+them concurrently and returns one rank-fused list (see app.db.vector.federated).
 """
 
+import asyncio
+import inspect
 import json
-from typing import Any, Dict, List
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
-from langchain.tools import Tool
+from langchain.schema import Document
+from langchain.tools import StructuredTool
+from pydantic import BaseModel, Field
 
 from app.agent.tools.base.registry import ToolRegistry
-from app.core.constants import VectorDBType
+from app.core.config.framework.settings import settings
+from app.core.utils.background_loop import shared_loop
+from app.core.utils.logger import get_logger
 from app.db.vector import VectorStoreFactory
+from app.db.vector.federated import FederatedSearch
+from app.db.vector.lexical_index import hybrid_rank, is_keyword_query, lexical_index_for
+
+logger = get_logger(__name__)
 
 # Defer vector store initialization until needed
 _vector_store = None
+_store_lock = threading.Lock()
 
 
 def get_vector_store():
-    """Get or initialize the vector store."""
+    """Get or initialize the configured default vector store."""
     global _vector_store
-    if _vector_store is None:
-        _vector_store = VectorStoreFactory.get_vector_store(VectorDBType.QDRANT)
+    with _store_lock:
+        if _vector_store is None:
+            _vector_store = VectorStoreFactory.get_default_vector_store()
     return _vector_store
 
 
+_federated_search = None
+
+SEARCH_MODES = ("auto", "vector", "keyword", "hybrid")
+
+
+def get_federated_search() -> FederatedSearch:
+    """Get or initialize the federated search over ``vector.federated`` sources."""
+    global _federated_search
+    with _store_lock:
+        if _federated_search is None:
+            _federated_search = FederatedSearch()
+    return _federated_search
+
+
+@dataclass
+class RetrievalConfig:
+    """Defaults and output budget of the retrieve_information tool."""
+
+    k: int = 4
+    max_k: int = 20
+    score_threshold: float = 0.0
+    max_chars: int = 6000
+    max_chunk_chars: int = 1500
+    timeout_seconds: float = 30.0
+    # auto: keyword for identifier queries, hybrid otherwise (vector without
+    # a lexical index)
+    mode: str = "auto"
+    rrf_k: int = 60
+    metadata_fields: Tuple[str, ...] = (
+        "title",
+        "source",
+        "source_path",
+        "url",
+        "page_id",
+        "space_key",
+    )
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "RetrievalConfig":
+        config = config or {}
+        defaults = cls()
+        fields = config.get("metadata_fields")
+        return cls(
+            k=int(config.get("k", defaults.k)),
+            max_k=int(config.get("max_k", defaults.max_k)),
+            score_threshold=float(
+                config.get("score_threshold") or defaults.score_threshold
+            ),
+            max_chars=int(config.get("max_chars", defaults.max_chars)),
+            max_chunk_chars=int(
+                config.get("max_chunk_chars", defaults.max_chunk_chars)
+            ),
+            timeout_seconds=float(
+                config.get("timeout_seconds", defaults.timeout_seconds)
+            ),
+            metadata_fields=tuple(fields) if fields else defaults.metadata_fields,
+            mode=str(config.get("mode") or defaults.mode).lower(),
+            rrf_k=int(config.get("rrf_k", defaults.rrf_k)),
+        )
+
+
+class RetrieveInformationInput(BaseModel):
+    """Input schema for semantic retrieval from the knowledge base."""
+
+    query: str = Field(description="Natural-language search query")
+    k: Optional[int] = Field(
+        default=None, description="Number of results to return (default 4)"
+    )
+    score_threshold: Optional[float] = Field(
+        default=None,
+        description="Minimum similarity (0-1) a result needs to be returned",
+    )
+    filters: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description=(
+            "Optional metadata filters, e.g. {'space_key': 'ENG'} or "
+            "{'source_path': '/docs/setup.md'}"
+        ),
+    )
+    mode: Optional[str] = Field(
+        default=None,
+        description=(
+            "'keyword' for exact identifiers (ticket keys, error codes, config "
+            "names), 'vector' for meaning, 'hybrid' for both; default picks one"
+        ),
+    )
+
+
+class FederatedRetrieveInput(BaseModel):
+    """Input schema for federated retrieval across knowledge sources."""
+
+    query: str = Field(description="Natural-language search query")
+    k: Optional[int] = Field(
+        default=None, description="Number of merged results to return (default 4)"
+    )
+    filters: Optional[Dict[str, Any]] = Field(
+        default=None, description="Optional metadata filters applied in every source"
+    )
+
+
 @ToolRegistry.register("vector", "database")
 class VectorStoreTools:
     """Vector store operations and semantic search tools."""
@@ -30,11 +162,15 @@ class VectorStoreTools:
     def __init__(self, config: Dict[str, Any] = None):
         """Initialize with optional configuration."""
         self.config = config or {}
+        self.retrieval = RetrievalConfig.from_config(
+            self.config.get("retrieval")
+            or settings.get_section("tools.tools.vector.retrieval", {})
+        )
 
-    def get_tools(self) -> List[Tool]:
+    def get_tools(self) -> List[StructuredTool]:
         """Return list of vector store tools."""
-        return [
-            Tool(
+        tools = [
+            StructuredTool(
                 name="retrieve_information",
                 description=(
                     "Retrieve information from the vector store using semantic search across all embedded documents, "
@@ -44,27 +180,218 @@ class VectorStoreTools:
                     "vector store content may be stale."
                 ),
                 func=self._retrieve_information,
+                coroutine=self._aretrieve_information,
+                args_schema=RetrieveInformationInput,
             )
         ]
+        if get_federated_search().enabled:
+            tools.append(
+                StructuredTool(
+                    name="federated_retrieve",
+                    description=(
+                        "Search several knowledge sources at once (e.g. Confluence, uploaded files, "
+                        "GitHub docs kept in separate collections) and return one merged ranking. "
+                        "Use when the answer may live in any of them; slow sources are skipped."
+                    ),
+                    func=self._federated_retrieve,
+                    coroutine=self._afederated_retrieve,
+                    args_schema=FederatedRetrieveInput,
+                )
+            )
+        return tools
 
-    def _retrieve_information(self, query: str) -> str:
+    def _retrieve_information(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+    ) -> str:
         """
         Retrieve information from the vector store based on the provided query.
         This information includes relevant confluence docs, knowledge base articles, and other related data.
 
         Args:
             query (str): The query string to search in the vector store.
+            k (int): Number of results to return.
+            score_threshold (float): Minimum similarity of returned results.
+            filters (dict): Metadata equality filters.
+            mode (str): vector, keyword, hybrid or auto.
+
+        Returns:
+            str: The retrieved information as a string.
+        """
+        try:
+            docs = shared_loop.run(
+                self._search(query, k, filters, mode), self.retrieval.timeout_seconds
+            )
+            return self._format(self._above_threshold(docs, score_threshold))
+        except Exception as e:
+            return self._error(e)
+
+    async def _aretrieve_information(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+    ) -> str:
+        """Async variant of _retrieve_information for async agents."""
+        try:
+            docs = await shared_loop.run_async(
+                self._search(query, k, filters, mode), self.retrieval.timeout_seconds
+            )
+            return self._format(self._above_threshold(docs, score_threshold))
+        except Exception as e:
+            return self._error(e)
+
+    async def _search(
+        self,
+        query: str,
+        k: Optional[int],
+        filters: Optional[Dict[str, Any]],
+        mode: Optional[str] = None,
+    ) -> List[Document]:
+        """Search the cached store and lexical index; runs on the shared store loop."""
+        store = get_vector_store()
+        k = self._clamp(k)
+        requested = str(mode or self.retrieval.mode).lower()
+        if requested not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search mode '{mode}': use one of {', '.join(SEARCH_MODES)}"
+            )
+        lexical = None if requested == "vector" else lexical_index_for(store)
+        if lexical is None:
+            return await self._vector_search(store, query, k, filters)
+
+        automatic = requested == "auto"
+        if automatic:
+            requested = "keyword" if is_keyword_query(query) else "hybrid"
+        candidates = k if requested == "keyword" else min(2 * k, self.retrieval.max_k)
+        keyword_docs = await asyncio.to_thread(
+            lexical.search_documents, query, candidates, filters or None
+        )
+        if requested == "keyword":
+            # No embedding call; automatic keyword searches without a hit
+            # fall back to the vector store
+            if keyword_docs or not automatic:
+                return keyword_docs
+            return await self._vector_search(store, query, k, filters)
+        vector_docs = await self._vector_search(store, query, candidates, filters)
+        return hybrid_rank(vector_docs, keyword_docs, k, self.retrieval.rrf_k)
+
+    @staticmethod
+    async def _vector_search(
+        store, query: str, k: int, filters: Optional[Dict[str, Any]]
+    ) -> List[Document]:
+        await store.get_connection()
+        # Some stores search synchronously
+        result = store.search_similar(query, k=k, filter_criteria=filters or None)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _federated_retrieve(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Search every configured federated source and return fused results.
+
+        Args:
+            query (str): The query string to search for.
+            k (int): Number of fused results to return.
+            filters (dict): Metadata equality filters applied in every source.
 
         Returns:
             str: The retrieved information as a string.
         """
-        vector_store_class = get_vector_store()
-        vector_db = vector_store_class.as_retriever(search_kwargs={"k": 4})
-        docs = vector_db.get_relevant_documents(query)
-        formatted = []
-        for d in docs:
-            formatted.append(
-                f"CONTENT:\n{d.page_content}\n\nMETADATA:\n{json.dumps(d.metadata)}"
+        try:
+            docs = get_federated_search().search_sync(
+                query, self._clamp(k), filters or None
+            )
+            return self._format(docs)
+        except Exception as e:
+            return self._error(e)
+
+    async def _afederated_retrieve(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Async variant of _federated_retrieve for async agents."""
+        try:
+            docs = await get_federated_search().search(
+                query, self._clamp(k), filters or None
             )
+            return self._format(docs)
+        except Exception as e:
+            return self._error(e)
+
+    def _clamp(self, k: Optional[int]) -> int:
+        return max(1, min(int(k or self.retrieval.k), self.retrieval.max_k))
+
+    def _above_threshold(
+        self, docs: List[Document], score_threshold: Optional[float] = None
+    ) -> List[Document]:
+        threshold = (
+            self.retrieval.score_threshold
+            if score_threshold is None
+            else float(score_threshold)
+        )
+        return [
+            doc
+            for doc in docs
+            if doc.metadata.get("similarity") is None
+            or doc.metadata["similarity"] >= threshold
+        ]
+
+    def _format(self, hits: List[Document]) -> str:
+        """Render results compactly, within the configured character budget."""
+        if not hits:
+            return "No relevant information found."
+
+        sections, used = [], 0
+        for position, doc in enumerate(hits, start=1):
+            section = self._render(position, doc)
+            if sections and used + len(section) > self.retrieval.max_chars:
+                sections.append(f"[{len(hits) - position + 1} more results omitted]")
+                break
+            sections.append(section[: self.retrieval.max_chars])
+            used += len(section)
+        return "\n\n---\n\n".join(sections)
+
+    def _render(self, position: int, doc: Document) -> str:
+        metadata = doc.metadata
+        details = [
+            f"{key}: {metadata[key]}"
+            for key in self.retrieval.metadata_fields
+            if metadata.get(key) not in (None, "")
+        ]
+        if metadata.get("federated_sources"):
+            details.insert(0, f"from: {', '.join(metadata['federated_sources'])}")
+        if metadata.get("similarity") is not None:
+            details.append(f"score: {metadata['similarity']:.3f}")
+        elif metadata.get("bm25_score") is not None:
+            details.append(f"bm25: {metadata['bm25_score']:.2f}")
+        content = doc.page_content.strip()
+        if len(content) > self.retrieval.max_chunk_chars:
+            content = content[: self.retrieval.max_chunk_chars].rstrip() + " …"
+        header = f"[{position}] " + (" | ".join(details) if details else "result")
+        return f"{header}\n{content}"
 
-        return "\n\n---\n\n".join(formatted)
+    @staticmethod
+    def _error(error: Exception) -> str:
+        logger.error(f"Error retrieving information: {error}")
+        message = str(error) or type(error).__name__
+        return json.dumps(
+            {
+                "status": "error",
+                "message": f"Error retrieving information: {message}",
+            }
+        )
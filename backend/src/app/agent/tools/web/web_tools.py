@@ -142,6 +142,7 @@ class WebTools:
 
                 # Get chunking configuration (with defaults)
                 chunk_size, chunk_overlap = self._get_chunking_config()
+                unit = self._get_chunking_unit()
 
                 # Create cache provider for web content
                 cache = CacheFactory.create_cache(
@@ -154,11 +155,12 @@ class WebTools:
                     chunk_overlap=chunk_overlap,
                     cache_provider=cache,
                     cache_ttl=cache_ttl,
+                    unit=unit,
                 )
 
                 logger.debug(
                     f"WebContentChunker initialized with cache "
-                    f"(chunk_size: {chunk_size}, chunk_overlap: {chunk_overlap}, TTL: {cache_ttl}s)"
+                    f"(chunk_size: {chunk_size} {unit}, chunk_overlap: {chunk_overlap}, TTL: {cache_ttl}s)"
                 )
 
             except Exception as e:
@@ -659,3 +661,21 @@ class WebTools:
             pass
 
         return (1000, 200)  # Default values
+
+    def _get_chunking_unit(self) -> str:
+        """
+        Get the unit chunk_size and chunk_overlap are given in.
+
+        Returns:
+            "characters" (default) or "tokens"
+        """
+        try:
+            if hasattr(settings, "tools") and hasattr(settings.tools, "tools"):
+                web_config = getattr(settings.tools.tools, "web", None)
+                if web_config and hasattr(web_config, "chunking"):
+                    return getattr(web_config.chunking, "unit", "characters")
+
+        except Exception:
+            pass
+
+        return "characters"
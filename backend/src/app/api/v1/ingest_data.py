@@ -1,16 +1,148 @@
-from fastapi import APIRouter
+import asyncio
+from typing import Optional
 
-from app.core.constants import DataSourceType
-from app.infrastructure.ingestion.rag_data_provider import RagDataProvider
+from fastapi import APIRouter, Depends, Request
+
+from app.core.constants import DataSourceType, EmbeddingType, VectorDBType
+from app.core.exceptions import NotFoundError
+from app.core.security import get_current_user
+from app.core.utils.background_loop import shared_loop
+from app.db.models.user import UserInDB
+from app.db.vector.embeddings import EmbeddingFactory
+from app.db.vector.embeddings.embedding_cache import get_embedding_cache
+from app.db.vector.embeddings.query_batcher import QueryEmbeddingBatcher
+from app.db.vector.providers.db_provider import VectorStoreFactory
+from app.infrastructure.ingestion.dedup import get_dedup_index
+from app.infrastructure.ingestion.jobs import get_job_manager
+from app.infrastructure.ingestion.upload import get_upload_receiver
 
 router = APIRouter()
 
 
-@router.post("/load/{data_source}")
-async def load_data(data_source: DataSourceType):
-    rag_data_loader = RagDataProvider.get_class(data_source)()
-    success = await rag_data_loader.ingest()
-    if success:
-        return {"message": "Data loaded successfully"}
-    else:
-        return {"message": "Data loading failed"}
+@router.post("/load/{data_source}", status_code=202)
+async def load_data(
+    data_source: DataSourceType, current_user: UserInDB = Depends(get_current_user)
+):
+    """Queue an ingestion job for the data source; poll it under /jobs/{id}."""
+    try:
+        job = await asyncio.to_thread(get_job_manager().submit, data_source)
+    except ValueError as e:
+        raise NotFoundError(message=str(e))
+    return {"message": "Ingestion job queued", **job.to_dict()}
+
+
+@router.post("/upload", status_code=202)
+async def upload_data(
+    request: Request, current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Stream multipart files to staging and queue an ingestion job for them.
+
+    Files are written to disk as they arrive and never held in memory; poll
+    the returned job under /jobs/{id}.
+    """
+    content_length = request.headers.get("content-length")
+    upload = await get_upload_receiver().receive(
+        request.headers.get("content-type"),
+        request.stream(),
+        int(content_length) if content_length and content_length.isdigit() else None,
+    )
+    job = await asyncio.to_thread(
+        get_job_manager().submit,
+        DataSourceType.UPLOAD,
+        {"upload_id": upload.upload_id},
+    )
+    return {
+        "message": "Upload ingestion job queued",
+        **upload.to_dict(),
+        **job.to_dict(),
+    }
+
+
+@router.get("/jobs")
+async def list_ingestion_jobs(limit: int = 20):
+    """Most recent ingestion jobs first."""
+    jobs = await asyncio.to_thread(get_job_manager().list_jobs, limit)
+    return {"jobs": [job.to_dict() for job in jobs]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """Status, item counts, chunks embedded, throughput, ETA and errors."""
+    job = await asyncio.to_thread(get_job_manager().get, job_id)
+    if job is None:
+        raise NotFoundError(message=f"Ingestion job '{job_id}' not found")
+    return job.to_dict()
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_ingestion_job(
+    job_id: str, current_user: UserInDB = Depends(get_current_user)
+):
+    """Cancel a queued or running job; finished items stay ingested."""
+    job = await asyncio.to_thread(get_job_manager().cancel, job_id)
+    if job is None:
+        raise NotFoundError(message=f"Ingestion job '{job_id}' not found")
+    return job.to_dict()
+
+
+@router.get("/dedup/stats")
+async def get_dedup_stats():
+    """Canonical and duplicate chunk counts and dedup ratios per source."""
+    index = get_dedup_index()
+    if index is None:
+        return {"enabled": False}
+    return {"enabled": True, **await asyncio.to_thread(index.stats)}
+
+
+@router.get("/embeddings/models")
+async def get_embedding_models():
+    """Loaded embedding models with their memory use, plus cache and batching stats."""
+    cache = get_embedding_cache()
+    return {
+        **EmbeddingFactory.get_model_stats(),
+        "cache": cache.get_stats() if cache else None,
+        "query_batching": QueryEmbeddingBatcher.get_all_stats(),
+    }
+
+
+@router.post("/embeddings/models/reload")
+async def reload_embedding_models(
+    embedding_type: Optional[EmbeddingType] = None,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Rebuild loaded embedding models, e.g. after a configuration change."""
+    reloaded = await asyncio.to_thread(EmbeddingFactory.reload, embedding_type)
+    return {"reloaded": reloaded, **EmbeddingFactory.get_model_stats()}
+
+
+async def _on_pgvector_store(operation):
+    """Run ``operation(store)`` on the shared store loop that owns the pool."""
+
+    async def run():
+        store = VectorStoreFactory.get_vector_store(VectorDBType.PGVECTOR)
+        await store.get_connection()
+        return await operation(store)
+
+    return await shared_loop.run_async(run())
+
+
+@router.get("/vector/pgvector/indexes")
+async def get_pgvector_indexes():
+    """Rows, table size and each index's definition and size."""
+    return await _on_pgvector_store(lambda store: store.get_index_stats())
+
+
+@router.post("/vector/pgvector/indexes/reindex")
+async def reindex_pgvector(
+    concurrently: bool = True, current_user: UserInDB = Depends(get_current_user)
+):
+    """Build, rebuild or REINDEX the vector index to match configuration."""
+
+    async def reindex(store):
+        return {
+            **await store.reindex(concurrently=concurrently),
+            "stats": await store.get_index_stats(),
+        }
+
+    return await _on_pgvector_store(reindex)
@@ -25,6 +25,7 @@ class VectorDBType(str, Enum):
     PGVECTOR = "pgvector"
     CHROMA = "chroma"
     QDRANT = "qdrant"
+    NUMPY = "numpy"
     MILVUS = "milvus"
     REDIS = "redis"
     OPENSEARCH = "opensearch"
@@ -61,6 +62,7 @@ class EmbeddingType(str, Enum):
     COHERE = "cohere"  # For Cohere embeddings
     TENSORFLOW = "tensorflow"  # For TensorFlow Hub models
     VERTEX = "vertex"  # For Google Cloud Vertex AI embeddings
+    FAKE = "fake"  # Deterministic hashing embeddings for benchmarks and tests
     DEFAULT = "openai"  # Application default embedding
 
 
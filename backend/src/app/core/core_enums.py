@@ -16,6 +16,7 @@ class DataSourceType(str, Enum):
     URL = "url"
     WEB = "web"
     JIRA = "jira"
+    UPLOAD = "upload"
 
 
 class ModelProvider(str, Enum):
@@ -36,6 +37,7 @@ class VectorDBType(str, Enum):
     QDRANT = "qdrant"
     CHROMA = "chroma"
     PGVECTOR = "pgvector"
+    NUMPY = "numpy"
 
 
 class DatabaseType(str, Enum):
@@ -12,7 +12,9 @@ Exception Hierarchy:
     │   ├── AuthorizationError
     │   ├── NotFoundError
     │   ├── ConflictError
-    │   └── RateLimitError
+    │   ├── RateLimitError
+    │   ├── PayloadTooLargeError
+    │   └── UnsupportedMediaTypeError
     ├── ServerError (5xx - server's fault)
     │   ├── InternalError
     │   ├── ServiceUnavailableError
@@ -39,7 +41,9 @@ from .client_errors import (
     BadRequestError,
     ConflictError,
     NotFoundError,
+    PayloadTooLargeError,
     RateLimitError,
+    UnsupportedMediaTypeError,
     ValidationError,
 )
 from .domain_errors import (
@@ -79,6 +83,8 @@ __all__ = [
     "ConflictError",
     "RateLimitError",
     "BadRequestError",
+    "PayloadTooLargeError",
+    "UnsupportedMediaTypeError",
     # Server errors (5xx)
     "InternalError",
     "ServiceUnavailableError",
@@ -152,3 +152,51 @@ class BadRequestError(ClientError):
 
     def __init__(self, message: str = "Bad request", **kwargs):
         super().__init__(message, **kwargs)
+
+
+class PayloadTooLargeError(ClientError):
+    """
+    Raised when a request body or uploaded file exceeds a size limit.
+    HTTP Status: 413 Payload Too Large
+    """
+
+    status_code: int = 413
+    error_code: str = "PAYLOAD_TOO_LARGE"
+    error_type: str = "payload_too_large_error"
+
+    def __init__(
+        self,
+        message: str = "Payload too large",
+        limit_bytes: Optional[int] = None,
+        **kwargs,
+    ):
+        details = kwargs.get("details", {})
+        if limit_bytes:
+            details["limit_bytes"] = limit_bytes
+
+        kwargs["details"] = details
+        super().__init__(message, **kwargs)
+
+
+class UnsupportedMediaTypeError(ClientError):
+    """
+    Raised when a request body or uploaded file has a type that is not accepted.
+    HTTP Status: 415 Unsupported Media Type
+    """
+
+    status_code: int = 415
+    error_code: str = "UNSUPPORTED_MEDIA_TYPE"
+    error_type: str = "unsupported_media_type_error"
+
+    def __init__(
+        self,
+        message: str = "Unsupported media type",
+        media_type: Optional[str] = None,
+        **kwargs,
+    ):
+        details = kwargs.get("details", {})
+        if media_type:
+            details["media_type"] = media_type
+
+        kwargs["details"] = details
+        super().__init__(message, **kwargs)
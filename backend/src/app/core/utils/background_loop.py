@@ -0,0 +1,93 @@
+"""
+A long-lived event loop on a daemon thread.
+
+Async clients and connection pools (Qdrant, asyncpg, the query embedding
+batcher) are bound to the loop that created them. Components that cache such
+clients and are called from both sync code and arbitrary event loops submit
+all of their work to the process-wide ``shared_loop`` instead, so the cached
+clients only ever see a single loop. Do not start private loops for work that
+touches the cached stores or connection managers.
+
+The exception is long, self-contained work such as an ingestion job: it runs
+on a loop of its own, builds its own stores (the connection managers keep a
+pool and client per loop) and stops the loop when it is done, so it never
+competes with retrieval on ``shared_loop``.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundLoop:
+    """Runs coroutines on one lazily started event loop thread."""
+
+    def __init__(self, name: str = "background-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._run_forever, args=(loop,), name=self.name, daemon=True
+                ).start()
+                self._loop = loop
+        return self._loop
+
+    @staticmethod
+    def _run_forever(loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def stop(self) -> None:
+        """Stop the loop once its pending tasks have finished, then close it."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+
+        async def drain() -> None:
+            current = asyncio.current_task()
+            pending = [task for task in asyncio.all_tasks() if task is not current]
+            await asyncio.gather(*pending, return_exceptions=True)
+            loop.stop()
+
+        loop.call_soon_threadsafe(loop.create_task, drain())
+
+    def in_loop(self) -> bool:
+        """Whether the caller is running on this loop."""
+        try:
+            return self._loop is not None and asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop and return its future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block for its result."""
+        if self.in_loop():
+            coro.close()
+            raise RuntimeError(
+                f"{self.name}: blocking run() called from its own loop; "
+                "await run_async() instead"
+            )
+        return self.submit(coro).result(timeout=timeout)
+
+    async def run_async(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and await its result from any loop."""
+        if self.in_loop():
+            # Already on the loop (e.g. federated search from a retrieval)
+            return await asyncio.wait_for(coro, timeout)
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(coro)), timeout)
+
+
+# The one loop for all I/O against cached vector stores and connection managers
+shared_loop = BackgroundLoop("store-io")
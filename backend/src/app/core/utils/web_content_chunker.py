@@ -34,6 +34,7 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from app.core.utils.logger import get_logger
 from app.infrastructure.cache.base_cache_provider import BaseCacheProvider
+from app.infrastructure.ingestion.token_splitter import StructuredTokenSplitter
 
 logger = get_logger(__name__)
 
@@ -49,8 +50,9 @@ class WebContentChunker:
     - Optional caching to reduce network overhead
 
     Attributes:
-        chunk_size: Maximum size of each text chunk in characters
-        chunk_overlap: Number of characters to overlap between chunks
+        chunk_size: Maximum size of each text chunk in characters (or tokens)
+        chunk_overlap: Number of characters (or tokens) to overlap between chunks
+        unit: "characters" or "tokens"
         cache_provider: Optional cache provider for storing fetched content
         cache_ttl: Time-to-live for cached content in seconds
         text_splitter: Text splitter instance for chunking
@@ -62,6 +64,8 @@ class WebContentChunker:
         chunk_overlap: int = 200,
         cache_provider: Optional[BaseCacheProvider] = None,
         cache_ttl: int = 3600,
+        unit: str = "characters",
+        encoding: str = "cl100k_base",
     ):
         """
         Initialize the web content chunker.
@@ -71,6 +75,9 @@ class WebContentChunker:
             chunk_overlap: Overlap between chunks to maintain context (default: 200)
             cache_provider: Optional cache provider for content caching
             cache_ttl: Cache time-to-live in seconds (default: 3600 = 1 hour)
+            unit: "tokens" sizes chunks in tokens of ``encoding`` with the
+                  ingestion StructuredTokenSplitter (default: "characters")
+            encoding: tiktoken encoding or model name for token sizing
 
         Example:
             >>> from app.infrastructure.cache.cache_factory import CacheFactory
@@ -86,17 +93,27 @@ class WebContentChunker:
         self.chunk_overlap = chunk_overlap
         self.cache_provider = cache_provider
         self.cache_ttl = cache_ttl
+        self.unit = unit
 
         # Initialize text splitter with same configuration as ingestion system
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            is_separator_regex=False,
-        )
+        if unit == "tokens":
+            self.text_splitter = StructuredTokenSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                encoding=encoding,
+            )
+        elif unit == "characters":
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=len,
+                is_separator_regex=False,
+            )
+        else:
+            raise ValueError(f"Unknown chunk size unit: {unit}")
 
         logger.debug(
-            f"WebContentChunker initialized: chunk_size={chunk_size}, "
+            f"WebContentChunker initialized: chunk_size={chunk_size} {unit}, "
             f"chunk_overlap={chunk_overlap}, caching={'enabled' if cache_provider else 'disabled'}"
         )
 
@@ -197,6 +214,10 @@ class WebContentChunker:
                     "chunk_size": len(chunk.page_content),
                 }
             )
+            if self.unit == "tokens":
+                chunk.metadata["chunk_tokens"] = self.text_splitter.count_tokens(
+                    chunk.page_content
+                )
 
         logger.info(
             f"Successfully chunked content from {url} into {len(chunks)} pieces"
@@ -0,0 +1,186 @@
+"""
+Index configuration and SQL for pgvector collection tables.
+
+Vector indexes are built once data exists rather than on the empty table:
+IVFFlat derives its cluster centroids from the rows present at build time, so
+an index built on an empty table has poor recall, and its ``lists`` should
+track the row count (rows / 1000 up to 1M rows, sqrt(rows) beyond). HNSW has
+no such dependency but still builds much faster after a bulk load than
+row by row.
+
+With a compact quantization mode the index is built over an expression
+(``embedding::halfvec(d)`` or ``binary_quantize(embedding)::bit(d)``) while
+the full-precision column stays in the table for re-ranking.
+
+Configuration lives under ``pgvector.index`` and ``pgvector.quantization`` in
+application-vector.yaml.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.core.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.db.vector.quantization import QuantizationConfig
+
+logger = get_logger(__name__)
+
+INDEX_TYPES = ("hnsw", "ivfflat", "none")
+
+# Operator class per distance strategy; it must match the search operator
+OPERATOR_CLASSES = {
+    "cosine": "vector_cosine_ops",
+    "euclidean": "vector_l2_ops",
+    "inner_product": "vector_ip_ops",
+    "dot_product": "vector_ip_ops",
+}
+
+HALFVEC_OPERATOR_CLASSES = {
+    "cosine": "halfvec_cosine_ops",
+    "euclidean": "halfvec_l2_ops",
+    "inner_product": "halfvec_ip_ops",
+    "dot_product": "halfvec_ip_ops",
+}
+
+_LISTS = re.compile(r"lists\s*=\s*'?(\d+)")
+
+
+@dataclass
+class PgVectorIndexConfig:
+    """How the embedding and metadata indexes are built and queried."""
+
+    type: str = "hnsw"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    hnsw_ef_search: int = 40
+    ivfflat_probes: int = 10
+    # IVFFlat is only worth building once the table has this many rows
+    ivfflat_min_rows: int = 1000
+    metadata_gin: bool = True
+    build_after_load: bool = True
+    maintenance_work_mem: str = ""
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "PgVectorIndexConfig":
+        config = config or {}
+        hnsw = config.get("hnsw") or {}
+        ivfflat = config.get("ivfflat") or {}
+        defaults = cls()
+
+        index_type = str(config.get("type", defaults.type)).lower()
+        if index_type not in INDEX_TYPES:
+            logger.warning(f"Unknown pgvector index type '{index_type}', using hnsw")
+            index_type = "hnsw"
+
+        return cls(
+            type=index_type,
+            hnsw_m=int(hnsw.get("m", defaults.hnsw_m)),
+            hnsw_ef_construction=int(
+                hnsw.get("ef_construction", defaults.hnsw_ef_construction)
+            ),
+            hnsw_ef_search=int(hnsw.get("ef_search", defaults.hnsw_ef_search)),
+            ivfflat_probes=int(ivfflat.get("probes", defaults.ivfflat_probes)),
+            ivfflat_min_rows=int(ivfflat.get("min_rows", defaults.ivfflat_min_rows)),
+            metadata_gin=_as_bool(config.get("metadata_gin", defaults.metadata_gin)),
+            build_after_load=_as_bool(
+                config.get("build_after_load", defaults.build_after_load)
+            ),
+            maintenance_work_mem=str(config.get("maintenance_work_mem") or ""),
+        )
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def ivfflat_lists(row_count: int) -> int:
+    """pgvector's guideline: rows / 1000 up to 1M rows, sqrt(rows) above."""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def parse_lists(index_definition: str) -> Optional[int]:
+    match = _LISTS.search(index_definition or "")
+    return int(match.group(1)) if match else None
+
+
+def vector_index_name(table: str) -> str:
+    return f"{table}_embedding_idx"
+
+
+def metadata_index_name(table: str) -> str:
+    return f"{table}_metadata_gin_idx"
+
+
+def compact_expression(
+    quantization: Optional["QuantizationConfig"], dimension: int, operand: str
+) -> Optional[str]:
+    """The compact form of ``operand`` searched by the index, if quantized."""
+    mode = quantization.mode if quantization else "none"
+    if mode in ("half", "scalar"):
+        # pgvector has no int8 type; halfvec is its closest compact form
+        return f"({operand})::halfvec({int(dimension)})"
+    if mode == "binary":
+        return f"binary_quantize({operand})::bit({int(dimension)})"
+    return None
+
+
+def vector_index_sql(
+    table: str,
+    config: PgVectorIndexConfig,
+    distance_strategy: str,
+    row_count: int,
+    name: Optional[str] = None,
+    concurrently: bool = False,
+    quantization: Optional["QuantizationConfig"] = None,
+    dimension: int = 1536,
+) -> str:
+    """CREATE INDEX statement for the configured vector index type."""
+    expression = compact_expression(quantization, dimension, "embedding")
+    if expression is None:
+        column = (
+            f"embedding {OPERATOR_CLASSES.get(distance_strategy, 'vector_cosine_ops')}"
+        )
+    elif quantization.mode == "binary":
+        column = f"({expression}) bit_hamming_ops"
+    else:
+        opclass = HALFVEC_OPERATOR_CLASSES.get(distance_strategy, "halfvec_cosine_ops")
+        column = f"({expression}) {opclass}"
+
+    if config.type == "hnsw":
+        method = "hnsw"
+        params = f"m = {config.hnsw_m}, ef_construction = {config.hnsw_ef_construction}"
+    else:
+        method = "ivfflat"
+        params = f"lists = {ivfflat_lists(row_count)}"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{name or vector_index_name(table)} ON {table} "
+        f"USING {method} ({column}) WITH ({params})"
+    )
+
+
+def metadata_index_sql(table: str) -> str:
+    return (
+        f"CREATE INDEX IF NOT EXISTS {metadata_index_name(table)} "
+        f"ON {table} USING gin (metadata jsonb_path_ops)"
+    )
+
+
+def search_settings_sql(
+    config: PgVectorIndexConfig,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+) -> Optional[str]:
+    """SET LOCAL statement tuning the vector index for one query."""
+    if config.type == "hnsw":
+        return f"SET LOCAL hnsw.ef_search = {int(ef_search or config.hnsw_ef_search)}"
+    if config.type == "ivfflat":
+        return f"SET LOCAL ivfflat.probes = {int(probes or config.ivfflat_probes)}"
+    return None
@@ -1,36 +1,146 @@
+"""
+Repository for pgvector collection tables.
+
+All operations run on the shared asyncpg pool of PgVectorConnectionManager,
+whose connections carry the binary ``vector`` codec, so embeddings travel as
+packed float32 rather than text. Inserts use binary ``COPY`` (or a batched
+``executemany`` upsert), and searches are a single parameterized
+``ORDER BY embedding <op> $1 LIMIT k`` query with JSONB containment filters.
+
+Vector and metadata indexes are managed here too (see pgvector_index): they
+are built after bulk loads, tuned per query and rebuilt through reindex().
+With a compact quantization mode, searches take ``k * oversampling``
+candidates from the halfvec/bit index and re-rank them on the full vectors.
+"""
+
+import json
+import re
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
 from langchain.schema import Document
-from langchain_community.vectorstores import PGVector
+
+from app.core.utils.logger import get_logger
+from app.db.repositories.pgvector_index import (
+    PgVectorIndexConfig,
+    compact_expression,
+    ivfflat_lists,
+    metadata_index_sql,
+    parse_lists,
+    search_settings_sql,
+    vector_index_name,
+    vector_index_sql,
+)
+
+if TYPE_CHECKING:
+    from app.db.vector.quantization import QuantizationConfig
+
+logger = get_logger(__name__)
+
+# pgvector distance operator per configured distance strategy
+DISTANCE_OPERATORS = {
+    "cosine": "<=>",
+    "euclidean": "<->",
+    "inner_product": "<#>",
+    "dot_product": "<#>",
+}
+
+INSERT_COLUMNS = ("id", "content", "metadata", "embedding")
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,62}$")
+_MEMORY_SETTING = re.compile(r"^\d+\s*(kB|MB|GB)$")
+
+
+def _table(collection_name: str) -> str:
+    """Collection names are interpolated into SQL, so only plain identifiers pass."""
+    if not _IDENTIFIER.match(collection_name):
+        raise ValueError(f"Invalid pgvector collection name: {collection_name!r}")
+    return collection_name
+
+
+def _metadata_json(metadata: Dict[str, Any]) -> str:
+    return json.dumps(metadata, default=str)
+
+
+def _document_condition(document_id: str) -> Tuple[str, List[str]]:
+    """WHERE clause matching a document's chunks, served by the metadata GIN index."""
+    tagged = _metadata_json({"document_id": document_id})
+    try:
+        uuid.UUID(str(document_id))
+    except ValueError:
+        # Not a row ID; comparing it with the uuid column would fail
+        return "metadata @> $1::jsonb", [tagged]
+    return "(id = $1::uuid OR metadata @> $2::jsonb)", [document_id, tagged]
 
 
 class PgVectorRepository:
-    """Repository for PgVector operations."""
+    """Repository for PgVector operations.
 
-    def __init__(self, connection):
-        self._connection = connection
+    Args:
+        pool: asyncpg pool with the pgvector codec registered on each connection.
+        distance_strategy: cosine, euclidean or inner_product/dot_product.
+        insert_method: ``copy`` for binary COPY, ``executemany`` for upserts.
+        insert_batch_size: Rows per COPY or executemany round trip.
+        index_config: Vector and metadata index settings.
+        quantization: Compact index mode and candidate oversampling.
+        embedding_dimension: Vector dimension, needed by halfvec/bit casts.
+    """
 
-    async def create_collection(self, collection_name: str, embedding_dimension: int):
-        await self._connection.execute("CREATE EXTENSION IF NOT EXISTS vector")
-        await self._connection.execute(
-            f"""
-        CREATE TABLE IF NOT EXISTS {collection_name} (
-            id TEXT PRIMARY KEY,
-            embedding vector({embedding_dimension}),
-            metadata JSONB,
-            embedded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        )
-        """
-        )
-        await self._connection.execute(
-            f"""
-        CREATE INDEX IF NOT EXISTS {collection_name}_embedding_idx
-        ON {collection_name}
-        USING ivfflat (embedding vector_cosine_ops)
-        WITH (lists = 100)
-        """
+    def __init__(
+        self,
+        pool,
+        distance_strategy: str = "cosine",
+        insert_method: str = "copy",
+        insert_batch_size: int = 1000,
+        index_config: Optional[PgVectorIndexConfig] = None,
+        quantization: Optional["QuantizationConfig"] = None,
+        embedding_dimension: int = 1536,
+    ):
+        self._pool = pool
+        self.index_config = index_config or PgVectorIndexConfig()
+        # Imported here: app.db.vector imports this module on package init
+        from app.db.vector.quantization import QuantizationConfig
+
+        self.quantization = quantization or QuantizationConfig()
+        self.embedding_dimension = int(embedding_dimension)
+        if self.quantization.mode == "scalar":
+            logger.warning("pgvector has no int8 vectors; using halfvec storage")
+        self.distance_strategy = (
+            distance_strategy if distance_strategy in DISTANCE_OPERATORS else "cosine"
         )
+        self.insert_method = insert_method
+        self.insert_batch_size = max(1, insert_batch_size)
+
+    @property
+    def distance_operator(self) -> str:
+        return DISTANCE_OPERATORS[self.distance_strategy]
+
+    def similarity(self, distance: float) -> float:
+        """Convert a pgvector distance into a higher-is-better score."""
+        if self.distance_strategy == "cosine":
+            return 1 - distance
+        if self.distance_operator == "<#>":
+            # <#> returns the negative inner product
+            return -distance
+        return 1 / (1 + distance)
+
+    async def create_collection(self, collection_name: str, embedding_dimension: int):
+        table = _table(collection_name)
+        async with self._pool.acquire() as conn:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await conn.execute(
+                f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                content TEXT NOT NULL,
+                metadata JSONB,
+                embedding vector({int(embedding_dimension)}),
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+            )
+        await self.ensure_indexes(collection_name)
 
     async def add_documents(
         self,
@@ -39,17 +149,54 @@ class PgVectorRepository:
         embeddings: List[List[float]],
         ids: Optional[List[str]] = None,
     ) -> bool:
+        if len(documents) != len(embeddings):
+            raise ValueError(
+                f"Got {len(embeddings)} embeddings for {len(documents)} documents"
+            )
         if ids is None:
             ids = [str(uuid.uuid4()) for _ in range(len(documents))]
-        PGVector.from_documents(
-            collection_name=collection_name,
-            connection_string=self._connection.dsn,  # Use connection string
-            embedding_function=embeddings,  # Placeholder, actual embedding done outside
-            documents=documents,
-            ids=ids,
-        )
+        table = _table(collection_name)
+        records = [
+            (doc_id, doc.page_content, _metadata_json(doc.metadata), embedding)
+            for doc_id, doc, embedding in zip(ids, documents, embeddings)
+        ]
+
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                for start in range(0, len(records), self.insert_batch_size):
+                    batch = records[start : start + self.insert_batch_size]
+                    if self.insert_method == "copy":
+                        await self._copy(conn, table, batch)
+                    else:
+                        await self._upsert(conn, table, batch)
+        logger.debug(f"Inserted {len(records)} rows into {table}")
+
+        if self.index_config.build_after_load:
+            await self.build_vector_index(collection_name)
         return True
 
+    @staticmethod
+    async def _copy(conn, table: str, records: Sequence[tuple]) -> None:
+        # Binary COPY: vectors use the pgvector codec, jsonb takes the JSON text
+        await conn.copy_records_to_table(
+            table, records=records, columns=list(INSERT_COLUMNS)
+        )
+
+    @staticmethod
+    async def _upsert(conn, table: str, records: Sequence[tuple]) -> None:
+        await conn.executemany(
+            f"""
+            INSERT INTO {table} (id, content, metadata, embedding)
+            VALUES ($1, $2, $3::jsonb, $4)
+            ON CONFLICT (id) DO UPDATE SET
+                content = EXCLUDED.content,
+                metadata = EXCLUDED.metadata,
+                embedding = EXCLUDED.embedding,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            records,
+        )
+
     async def update_document(
         self,
         collection_name: str,
@@ -58,25 +205,63 @@ class PgVectorRepository:
         embedding: List[float],
     ) -> bool:
         query = f"""
-        UPDATE {collection_name}
-        SET embedding = $1, metadata = $2
-        WHERE id = $3
+        UPDATE {_table(collection_name)}
+        SET embedding = $1, metadata = $2::jsonb, content = $3,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = $4
         """
-        result = await self._connection.execute(
-            query, embedding, document.metadata, document_id
-        )
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(
+                query,
+                embedding,
+                _metadata_json(document.metadata),
+                document.page_content,
+                document_id,
+            )
         return result.split()[-1] != "0"
 
     async def delete_document(self, collection_name: str, document_id: str) -> bool:
-        query = f"DELETE FROM {collection_name} WHERE id = $1"
-        result = await self._connection.execute(query, document_id)
+        """Delete a row by ID and every chunk tagged with the document_id."""
+        condition, args = _document_condition(document_id)
+        query = f"DELETE FROM {_table(collection_name)} WHERE {condition}"
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(query, *args)
         return result.split()[-1] != "0"
 
+    async def get_chunk_hashes(
+        self, collection_name: str, document_id: str
+    ) -> List[Tuple[str, Optional[str]]]:
+        """``(id, chunk_hash)`` of every chunk of a document."""
+        condition, args = _document_condition(document_id)
+        query = (
+            f"SELECT id, metadata->>'chunk_hash' AS chunk_hash "
+            f"FROM {_table(collection_name)} WHERE {condition}"
+        )
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, *args)
+        return [(str(row["id"]), row["chunk_hash"]) for row in rows]
+
+    async def delete_chunks(self, collection_name: str, chunk_ids: List[str]) -> int:
+        if not chunk_ids:
+            return 0
+        query = f"DELETE FROM {_table(collection_name)} WHERE id = ANY($1::uuid[])"
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(query, list(chunk_ids))
+        return int(result.split()[-1])
+
     async def get_document_metadata(
         self, collection_name: str, document_id: str
     ) -> Optional[Dict[str, Any]]:
-        query = f"SELECT metadata FROM {collection_name} WHERE id = $1"
-        return await self._connection.fetchval(query, document_id)
+        query = f"SELECT metadata FROM {_table(collection_name)} WHERE id = $1"
+        async with self._pool.acquire() as conn:
+            metadata = await conn.fetchval(query, document_id)
+        return self._load_metadata(metadata)
+
+    @staticmethod
+    def _load_metadata(metadata) -> Optional[Dict[str, Any]]:
+        if isinstance(metadata, str):
+            return json.loads(metadata)
+        return dict(metadata) if metadata is not None else None
 
     async def search_similar(
         self,
@@ -84,15 +269,259 @@ class PgVectorRepository:
         query_embedding: List[float],
         k: int = 5,
         filter_criteria: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
     ) -> List[Document]:
-        vector_store = PGVector(
-            collection_name=collection_name,
-            connection_string=self._connection.dsn,
-            embedding_function=lambda x: query_embedding,  # embeddings already computed
+        """
+        Nearest rows to ``query_embedding``.
+
+        ``ef_search`` (HNSW) and ``probes`` (IVFFlat) trade recall for speed
+        on this query only; they default to the index configuration.
+        """
+        op = self.distance_operator
+        table = _table(collection_name)
+        params: List[Any] = [query_embedding, k]
+        where = ""
+        if filter_criteria:
+            # Containment: every filter key/value must appear in the metadata
+            params.append(_metadata_json(filter_criteria))
+            where = f"WHERE metadata @> ${len(params)}::jsonb"
+
+        compact = self._compact_order()
+        if compact is None:
+            query = f"""
+            SELECT id, content, metadata, embedding {op} $1 AS distance
+            FROM {table}
+            {where}
+            ORDER BY embedding {op} $1
+            LIMIT $2
+            """
+        else:
+            # Candidates from the compact index, re-ranked on full precision
+            candidates = (
+                self.quantization.candidates(k) if self.quantization.rescore else k
+            )
+            params.append(candidates)
+            query = f"""
+            SELECT id, content, metadata, embedding {op} $1 AS distance
+            FROM (
+                SELECT id, content, metadata, embedding
+                FROM {table}
+                {where}
+                ORDER BY {compact}
+                LIMIT ${len(params)}
+            ) candidates
+            ORDER BY distance
+            LIMIT $2
+            """
+            if self.index_config.type == "hnsw":
+                # HNSW returns at most ef_search rows per scan
+                ef_search = max(
+                    ef_search or self.index_config.hnsw_ef_search, candidates
+                )
+
+        settings_sql = search_settings_sql(self.index_config, ef_search, probes)
+        async with self._pool.acquire() as conn:
+            # SET LOCAL scopes the index tuning to this query's transaction
+            async with conn.transaction():
+                if settings_sql:
+                    await conn.execute(settings_sql)
+                rows = await conn.fetch(query, *params)
+
+        docs = []
+        for row in rows:
+            metadata = self._load_metadata(row["metadata"]) or {}
+            metadata.setdefault("document_id", str(row["id"]))
+            metadata["similarity"] = self.similarity(float(row["distance"]))
+            docs.append(Document(page_content=row["content"], metadata=metadata))
+        return docs
+
+    def _compact_order(self) -> Optional[str]:
+        """ORDER BY clause over the compact index expression, if quantized."""
+        dimension = self.embedding_dimension
+        column = compact_expression(self.quantization, dimension, "embedding")
+        if column is None:
+            return None
+        query = compact_expression(self.quantization, dimension, "$1::vector")
+        operator = (
+            "<~>" if self.quantization.mode == "binary" else self.distance_operator
+        )
+        return f"{column} {operator} {query}"
+
+    # Index management
+
+    async def ensure_indexes(self, collection_name: str) -> None:
+        """Create the metadata index, and the vector index once rows exist."""
+        table = _table(collection_name)
+        if self.index_config.metadata_gin:
+            async with self._pool.acquire() as conn:
+                await conn.execute(metadata_index_sql(table))
+        await self.build_vector_index(collection_name)
+
+    async def build_vector_index(
+        self, collection_name: str, concurrently: bool = False
+    ) -> Optional[str]:
+        """
+        Build the vector index if it is missing and the table is ready for it.
+
+        Returns:
+            The CREATE INDEX statement that ran, or None
+        """
+        if self.index_config.type == "none":
+            return None
+        table = _table(collection_name)
+        async with self._pool.acquire() as conn:
+            if await self._index_definition(conn, table, vector_index_name(table)):
+                return None
+            rows = await conn.fetchval(f"SELECT count(*) FROM {table}")
+            if not rows or (
+                self.index_config.type == "ivfflat"
+                and rows < self.index_config.ivfflat_min_rows
+            ):
+                return None
+            statement = vector_index_sql(
+                table,
+                self.index_config,
+                self.distance_strategy,
+                rows,
+                concurrently=concurrently,
+                quantization=self.quantization,
+                dimension=self.embedding_dimension,
+            )
+            await self._create_index(conn, statement, concurrently)
+        logger.info(f"Built vector index on {table} ({rows} rows): {statement}")
+        return statement
+
+    async def get_index_stats(self, collection_name: str) -> Dict[str, Any]:
+        """Row count, table size and each index's definition and size."""
+        table = _table(collection_name)
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetchval(f"SELECT count(*) FROM {table}")
+            table_bytes = await conn.fetchval(
+                "SELECT pg_total_relation_size($1::regclass)", table
+            )
+            indexes = await conn.fetch(
+                """
+                SELECT indexname, indexdef,
+                       pg_relation_size(
+                           quote_ident(schemaname) || '.' || quote_ident(indexname)
+                       ) AS size_bytes
+                FROM pg_indexes
+                WHERE tablename = $1
+                ORDER BY indexname
+                """,
+                table,
+            )
+
+        stats = {
+            "collection": table,
+            "rows": rows,
+            "total_size_bytes": table_bytes,
+            "index_type": self.index_config.type,
+            "quantization": self.quantization.mode,
+            "indexes": [
+                {
+                    "name": index["indexname"],
+                    "definition": index["indexdef"],
+                    "size_bytes": index["size_bytes"],
+                }
+                for index in indexes
+            ],
+        }
+        if self.index_config.type == "ivfflat":
+            stats["recommended_lists"] = ivfflat_lists(rows or 0)
+        return stats
+
+    async def reindex(
+        self, collection_name: str, concurrently: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Bring the vector index in line with the configuration and row count.
+
+        A missing index is built; an index of the wrong type or with stale
+        IVFFlat ``lists`` is rebuilt side by side and swapped in; otherwise the
+        index is rebuilt in place with REINDEX. Concurrent variants keep the
+        table writable throughout.
+        """
+        table = _table(collection_name)
+        name = vector_index_name(table)
+        keyword = "CONCURRENTLY " if concurrently else ""
+        result: Dict[str, Any] = {"collection": table, "index": name}
+
+        if self.index_config.metadata_gin:
+            async with self._pool.acquire() as conn:
+                await conn.execute(metadata_index_sql(table))
+
+        async with self._pool.acquire() as conn:
+            definition = await self._index_definition(conn, table, name)
+            if definition is None or self.index_config.type == "none":
+                result["action"] = "none"
+            else:
+                rows = await conn.fetchval(f"SELECT count(*) FROM {table}")
+                if self._needs_rebuild(definition, rows or 0):
+                    replacement = f"{name}_new"
+                    await conn.execute(f"DROP INDEX {keyword}IF EXISTS {replacement}")
+                    await self._create_index(
+                        conn,
+                        vector_index_sql(
+                            table,
+                            self.index_config,
+                            self.distance_strategy,
+                            rows or 0,
+                            name=replacement,
+                            concurrently=concurrently,
+                            quantization=self.quantization,
+                            dimension=self.embedding_dimension,
+                        ),
+                        concurrently,
+                    )
+                    await conn.execute(f"DROP INDEX {keyword}{name}")
+                    await conn.execute(f"ALTER INDEX {replacement} RENAME TO {name}")
+                    result["action"] = "rebuilt"
+                else:
+                    await conn.execute(f"REINDEX INDEX {keyword}{name}")
+                    result["action"] = "reindexed"
+
+        if result["action"] == "none":
+            built = await self.build_vector_index(collection_name, concurrently)
+            result["action"] = "built" if built else "none"
+        logger.info(f"Vector index maintenance on {table}: {result['action']}")
+        return result
+
+    def _needs_rebuild(self, definition: str, rows: int) -> bool:
+        if f"USING {self.index_config.type} " not in definition:
+            return True
+        marker = {"none": None, "binary": "binary_quantize"}.get(
+            self.quantization.mode, "halfvec"
         )
-        docs_with_scores = vector_store.similarity_search_with_score(
-            query_embedding, k=k, filter=filter_criteria
+        compact_markers = ("halfvec", "binary_quantize")
+        if marker is None and any(m in definition for m in compact_markers):
+            return True
+        if marker is not None and marker not in definition:
+            return True
+        if self.index_config.type == "ivfflat":
+            current = parse_lists(definition)
+            wanted = ivfflat_lists(rows)
+            # Only rebuild when the row count has drifted by 2x or more
+            return current is None or not (wanted / 2 <= current <= wanted * 2)
+        return False
+
+    async def _create_index(self, conn, statement: str, concurrently: bool) -> None:
+        memory = self.index_config.maintenance_work_mem
+        if concurrently or not memory:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            await conn.execute(statement)
+            return
+        if not _MEMORY_SETTING.match(memory):
+            raise ValueError(f"Invalid maintenance_work_mem: {memory!r}")
+        async with conn.transaction():
+            await conn.execute(f"SET LOCAL maintenance_work_mem = '{memory}'")
+            await conn.execute(statement)
+
+    @staticmethod
+    async def _index_definition(conn, table: str, index_name: str) -> Optional[str]:
+        return await conn.fetchval(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = $1 AND indexname = $2",
+            table,
+            index_name,
         )
-        for doc, score in docs_with_scores:
-            doc.metadata["similarity"] = 1 - score
-        return [doc for doc, _ in docs_with_scores]
@@ -8,10 +8,11 @@ Available implementations:
 - PgVectorDB: PostgreSQL with pgvector extension
 - ChromaDB: ChromaDB implementation
 - QdrantDB: Qdrant implementation
+- NumpyVectorDB: In-process memory-mapped NumPy store
 """
 
 # Import vector database implementations to trigger registration decorators
-from . import chromadb, pgvector, qdrant
+from . import chromadb, numpy_store, pgvector, qdrant
 from .base import DocumentMetadata, VectorDB
 from .embeddings import EmbeddingFactory as EmbeddingFactoryAlias
 
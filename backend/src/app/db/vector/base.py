@@ -8,13 +8,18 @@ import inspect
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from langchain.schema import Document
 from langchain.schema.retriever import BaseRetriever
 
 from ...core.constants import EmbeddingType
+from ...core.utils.logger import get_logger
+from .chunk_diff import ChunkDiff, StoredChunks, annotate_chunks, diff_chunks
+from .embeddings.batch_embedder import BatchEmbedder
+from .embeddings.query_batcher import QueryEmbeddingBatcher
+
+logger = get_logger(__name__)
 
 
 @dataclass
@@ -32,48 +37,6 @@ class DocumentMetadata:
         """Create SHA-256 hash of content for change detection."""
         return hashlib.sha256(content.encode()).hexdigest()
 
-    @classmethod
-    def get_change_detection_info(cls, source_path: str) -> Dict[str, Any]:
-        """
-        Get change detection information appropriate for the sources type.
-        Uses efficient file metadata instead of expensive hashing.
-
-        Args:
-            source_path: Path to sources
-
-        Returns:
-            Dict with change detection metadata
-        """
-        info = {
-            "source_path": source_path,
-            "source_type": "url" if "://" in source_path else "local_file",
-            "timestamp": datetime.now().isoformat(),
-        }
-
-        # For local files, add file metadata (fast operations)
-        if info["source_type"] == "local_file":
-            try:
-                path_obj = Path(source_path)
-                if path_obj.exists():
-                    stat = path_obj.stat()
-                    info.update(
-                        {
-                            "file_size": stat.st_size,
-                            "modified_time": datetime.fromtimestamp(
-                                stat.st_mtime
-                            ).isoformat(),
-                            "creation_time": datetime.fromtimestamp(
-                                stat.st_ctime
-                            ).isoformat(),
-                            "inode": stat.st_ino,  # Additional change detection
-                            # Removed file_hash - it's expensive and unnecessary!
-                        }
-                    )
-            except (OSError, ValueError):
-                pass
-
-        return info
-
     @classmethod
     def generate_document_id(cls, source_path: str) -> str:
         """
@@ -134,6 +97,63 @@ class VectorDB(ABC):
         """
         pass
 
+    async def add_embedded_documents(
+        self, docs: List[Document], embeddings: List[List[float]]
+    ) -> List[str]:
+        """
+        Save documents whose embeddings were computed by the caller.
+
+        Lets the ingestion pipeline embed in its own stage and batch writes
+        separately. Stores that do not override this are written through
+        save_and_embed instead.
+
+        Args:
+            docs: Documents to save
+            embeddings: One vector per document, in the same order
+
+        Returns:
+            List of IDs that were created
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not accept precomputed embeddings"
+        )
+
+    def supports_precomputed_embeddings(self) -> bool:
+        """Whether this store overrides add_embedded_documents."""
+        return type(self).add_embedded_documents is not VectorDB.add_embedded_documents
+
+    async def _embed_documents(
+        self, embedding_type: EmbeddingType, docs: List[Document]
+    ) -> List[List[float]]:
+        """
+        Embed document contents in batched, rate-limited embed_documents calls.
+
+        Args:
+            embedding_type: Type of embedding to use
+            docs: Documents to embed
+
+        Returns:
+            One vector per document, in the same order
+        """
+        embedder = BatchEmbedder.for_embedding_type(embedding_type)
+        return await embedder.embed_documents([doc.page_content for doc in docs])
+
+    async def _embed_query(
+        self, embedding_type: EmbeddingType, query: str
+    ) -> List[float]:
+        """
+        Embed a search query, micro-batched with concurrent searches.
+
+        Args:
+            embedding_type: Type of embedding to use
+            query: Query text
+
+        Returns:
+            Query vector
+        """
+        batcher = QueryEmbeddingBatcher.for_embedding_type(embedding_type)
+        return await batcher.embed_query(query)
+
     @abstractmethod
     async def update_document(
         self, document_id: str, updated_doc: Document, embedding_type: EmbeddingType
@@ -200,7 +220,7 @@ class VectorDB(ABC):
         self, source_path: str, new_docs: List[Document], embedding_type: EmbeddingType
     ) -> bool:
         """
-        Re-embed a document by replacing all its chunks with new ones.
+        Re-embed a document, touching only the chunks that changed.
         This is the recommended way to update documents.
 
         Args:
@@ -211,13 +231,141 @@ class VectorDB(ABC):
         Returns:
             True if re-embedding was successful
         """
-        # First, delete all existing chunks of this document
-        await self.delete_document_by_file_path(source_path)
+        if not self.supports_chunk_diff():
+            # Replace all existing chunks of this document
+            await self.delete_document_by_file_path(source_path)
+            chunk_ids = await self.save_and_embed(embedding_type, new_docs)
+            return len(chunk_ids) > 0
+
+        document_id = next(
+            (
+                d.metadata["document_id"]
+                for d in new_docs
+                if d.metadata.get("document_id")
+            ),
+            DocumentMetadata.create_hash(f"file:{source_path}")[:32],
+        )
+        diff = await self.sync_document_chunks(document_id, new_docs, embedding_type)
+        return bool(diff.added or diff.unchanged)
+
+    # Chunk-level change detection
+
+    async def get_chunk_hashes(self, document_id: str) -> StoredChunks:
+        """
+        Stored chunk IDs of a document, grouped by content hash.
 
-        # Then embed the new document chunks
-        chunk_ids = await self.save_and_embed(embedding_type, new_docs)
+        Args:
+            document_id: Document whose chunks to list
 
-        return len(chunk_ids) > 0
+        Returns:
+            Chunk IDs per ``chunk_hash`` (None for chunks stored without one)
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support chunk-level diffs"
+        )
+
+    async def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """
+        Delete individual chunks by their store IDs.
+
+        Args:
+            chunk_ids: IDs returned by get_chunk_hashes
+
+        Returns:
+            Number of chunks deleted
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support chunk-level diffs"
+        )
+
+    def supports_chunk_diff(self) -> bool:
+        """Whether this store overrides get_chunk_hashes and delete_chunks."""
+        cls = type(self)
+        return (
+            cls.get_chunk_hashes is not VectorDB.get_chunk_hashes
+            and cls.delete_chunks is not VectorDB.delete_chunks
+        )
+
+    async def diff_document_chunks(
+        self, document_id: str, docs: List[Document]
+    ) -> ChunkDiff:
+        """
+        Hash a document's new chunks and delete stored chunks that vanished.
+
+        Args:
+            document_id: Document the chunks belong to
+            docs: The document's complete new set of chunks
+
+        Returns:
+            The diff; ``added`` still needs to be embedded and saved
+        """
+        annotate_chunks(docs)
+        stored = await self.get_chunk_hashes(document_id)
+        diff = diff_chunks(document_id, docs, stored)
+        if diff.deleted_ids:
+            await self.delete_chunks(diff.deleted_ids)
+        logger.info(f"Chunk diff for document {document_id}: {diff.summary()}")
+        return diff
+
+    async def prune_unchanged_chunks(
+        self, docs: List[Document], document_ids: Iterable[str] = ()
+    ) -> List[Document]:
+        """
+        Drop chunks that are already stored unchanged, per ``document_id``.
+
+        Stored chunks that no longer appear are deleted. ``document_ids``
+        names documents whose complete new chunk set is in ``docs``; those
+        without any chunk there have every stored chunk deleted. Chunks
+        without a document_id are passed through. Returns the chunks left to
+        embed.
+        """
+        groups: Dict[str, List[Document]] = {
+            document_id: [] for document_id in document_ids
+        }
+        passthrough = []
+        for doc in docs:
+            document_id = doc.metadata.get("document_id")
+            if document_id:
+                groups.setdefault(document_id, []).append(doc)
+            else:
+                passthrough.append(doc)
+        added = []
+        for document_id, group in groups.items():
+            added.extend((await self.diff_document_chunks(document_id, group)).added)
+        return added + passthrough
+
+    async def sync_document_chunks(
+        self, document_id: str, docs: List[Document], embedding_type: EmbeddingType
+    ) -> ChunkDiff:
+        """
+        Make the stored chunks of a document match ``docs``.
+
+        Only new or changed chunks are embedded. Stores without chunk-level
+        support have every chunk replaced.
+
+        Args:
+            document_id: Document to update
+            docs: The document's complete new set of chunks
+            embedding_type: Type of embedding to use
+
+        Returns:
+            What was added, deleted and left unchanged
+        """
+        for doc in docs:
+            doc.metadata["document_id"] = document_id
+        if not self.supports_chunk_diff():
+            annotate_chunks(docs)
+            deleted = self.delete_by_document_id(document_id)
+            if inspect.isawaitable(deleted):
+                await deleted
+            if docs:
+                await self.save_and_embed(embedding_type, docs)
+            return ChunkDiff(document_id=document_id, added=list(docs))
+
+        diff = await self.diff_document_chunks(document_id, docs)
+        if diff.added:
+            await self.save_and_embed(embedding_type, diff.added)
+        return diff
 
     @abstractmethod
     async def search_similar(
@@ -236,6 +384,33 @@ class VectorDB(ABC):
         """
         pass
 
+    async def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+    ) -> List[Document]:
+        """
+        Search with a query vector that was already embedded.
+
+        Lets callers embed a query once and search several stores with it.
+
+        Args:
+            embedding: Query vector, from this store's embedding model
+            k: Number of results to return
+            filter_criteria: Optional metadata filters
+
+        Returns:
+            List of similar documents
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support searching by vector"
+        )
+
+    def supports_vector_search(self) -> bool:
+        """Whether this store overrides search_by_vector."""
+        return type(self).search_by_vector is not VectorDB.search_by_vector
+
     @abstractmethod
     def as_retriever(self, **kwargs) -> BaseRetriever:
         """
@@ -249,8 +424,20 @@ class VectorDB(ABC):
         """
         pass
 
+    def _connection_is_open(self) -> bool:
+        """
+        Whether the cached connection can still be used.
+
+        Stores whose client or pool can be closed underneath them override
+        this, so get_connection reconnects instead of reusing a dead one.
+        """
+        return True
+
     async def get_connection(self):
-        """Get or create database connection."""
+        """Get or create database connection, reopening one that was closed."""
+        if self._connection is not None and not self._connection_is_open():
+            logger.warning(f"{type(self).__name__} connection was closed, reconnecting")
+            self._connection = None
         if self._connection is None:
             # Check if _create_connection is async or sync
             if inspect.iscoroutinefunction(self._create_connection):
@@ -2,6 +2,7 @@
 ChromaDB implementation of VectorDB.
 """
 
+import asyncio
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
@@ -14,6 +15,7 @@ from app.infrastructure.connections.factory.connection_factory import Connection
 
 from ...core.constants import ConnectionType, EmbeddingType, VectorDBType
 from .base import DocumentMetadata, VectorDB
+from .chunk_diff import CHUNK_HASH_KEY, StoredChunks, group_stored_chunks
 from .providers.db_provider import VectorDBRegistry
 
 
@@ -22,9 +24,11 @@ class ChromaDB(VectorDB):
     """ChromaDB implementation."""
 
     def __init__(self):
+        # get_vector_db_config() runs in super().__init__ and sets the manager
+        self._connection_manager = None
         super().__init__()
         self._collection = None
-        self._connection_manager = None
+        self._chroma_collection = None
 
     def get_vector_db_config(self) -> Dict[str, Any]:
         """Get vector database configuration via connection manager."""
@@ -54,6 +58,11 @@ class ChromaDB(VectorDB):
             persist_directory=self.config.get("persist_directory", None),
             client=chroma_client,
         )
+        # Raw chromadb collection for writes with precomputed embeddings and
+        # metadata queries the LangChain wrapper does not expose
+        self._chroma_collection = chroma_client.get_collection(
+            name=self.config["collection_name"], embedding_function=None
+        )
         return self._collection
 
     def _close_connection(self):
@@ -61,43 +70,73 @@ class ChromaDB(VectorDB):
         if self._connection_manager:
             self._connection_manager.disconnect()
             self._collection = None
+            self._chroma_collection = None
             self._connection_manager = None  # Reset manager for clean state
 
-    def save_and_embed(
+    async def save_and_embed(
         self, embedding_type: EmbeddingType, docs: List[Document]
     ) -> List[str]:
         if not self._collection:
             self._create_connection()
 
+        # Chunks of one document share its document_id, so each gets its own ID
         ids, enhanced_docs = [], []
         for doc in docs:
-            doc_id = doc.metadata.get("document_id") or str(uuid.uuid4())
+            chunk_id = str(uuid.uuid4())
             metadata = {
+                "document_id": chunk_id,
                 **doc.metadata,
                 "embedded_at": datetime.now().isoformat(),
-                "document_id": doc_id,
             }
             enhanced_docs.append(
                 Document(page_content=doc.page_content, metadata=metadata)
             )
-            ids.append(doc_id)
+            ids.append(chunk_id)
 
-        # Add documents to ChromaDB (sync operation)
-        self._collection.add_documents(enhanced_docs, ids=ids)
+        embeddings = await self._embed_documents(embedding_type, docs)
+        await asyncio.to_thread(self._upsert, ids, enhanced_docs, embeddings)
         return ids
 
-    def update_document(
+    async def add_embedded_documents(
+        self, docs: List[Document], embeddings: List[List[float]]
+    ) -> List[str]:
+        if not self._collection:
+            self._create_connection()
+
+        ids = [str(uuid.uuid4()) for _ in docs]
+        enhanced_docs = [
+            Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "embedded_at": datetime.now().isoformat()},
+            )
+            for doc in docs
+        ]
+        await asyncio.to_thread(self._upsert, ids, enhanced_docs, embeddings)
+        return ids
+
+    def _upsert(
+        self, ids: List[str], docs: List[Document], embeddings: List[List[float]]
+    ) -> None:
+        # Write through the chromadb collection to skip re-embedding
+        self._chroma_collection.upsert(
+            ids=ids,
+            embeddings=[list(vector) for vector in embeddings],
+            metadatas=[doc.metadata for doc in docs],
+            documents=[doc.page_content for doc in docs],
+        )
+
+    async def update_document(
         self, document_id: str, updated_doc: Document, embedding_type: EmbeddingType
     ) -> bool:
-        # ChromaDB doesn't support direct update, so delete and re-add
+        # Unchanged content is kept; otherwise the old chunks are replaced
         try:
             if not self._collection:
                 self._create_connection()
 
-            self._collection.delete(ids=[document_id])
-            updated_doc.metadata["document_id"] = document_id
-            self.save_and_embed(embedding_type, [updated_doc])
-            return True
+            diff = await self.sync_document_chunks(
+                document_id, [updated_doc], embedding_type
+            )
+            return bool(diff.added or diff.unchanged)
         except Exception:
             return False
 
@@ -106,11 +145,35 @@ class ChromaDB(VectorDB):
             if not self._collection:
                 self._create_connection()
 
-            self._collection.delete(ids=[document_id])
+            self._chroma_collection.delete(ids=[document_id])
+            self._chroma_collection.delete(where={"document_id": document_id})
             return True
         except Exception:
             return False
 
+    async def get_chunk_hashes(self, document_id: str) -> StoredChunks:
+        if not self._collection:
+            self._create_connection()
+
+        result = await asyncio.to_thread(
+            self._chroma_collection.get,
+            where={"document_id": document_id},
+            include=["metadatas"],
+        )
+        return group_stored_chunks(
+            (chunk_id, (metadata or {}).get(CHUNK_HASH_KEY))
+            for chunk_id, metadata in zip(result["ids"], result["metadatas"])
+        )
+
+    async def delete_chunks(self, chunk_ids: List[str]) -> int:
+        if not chunk_ids:
+            return 0
+        if not self._collection:
+            self._create_connection()
+
+        await asyncio.to_thread(self._chroma_collection.delete, ids=list(chunk_ids))
+        return len(chunk_ids)
+
     def get_document_metadata(self, document_id: str) -> Optional[DocumentMetadata]:
         # ChromaDB doesn't have a direct way to get metadata by ID
         # This would require querying and filtering, which is not straightforward
@@ -127,6 +190,19 @@ class ChromaDB(VectorDB):
         results = self._collection.similarity_search(query, k=k, filter=filter_criteria)
         return results
 
+    async def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+    ) -> List[Document]:
+        if not self._collection:
+            self._create_connection()
+
+        return self._collection.similarity_search_by_vector(
+            embedding, k=k, filter=filter_criteria
+        )
+
     def as_retriever(self, embedding_type: EmbeddingType, **kwargs):
         embedding_model = EmbeddingFactory.get_embedding_model(embedding_type)
         vector_store = Chroma(
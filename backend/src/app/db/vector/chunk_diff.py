@@ -0,0 +1,104 @@
+"""
+Chunk-level change detection for re-ingested documents.
+
+Every stored chunk carries a content hash in its metadata. When a document
+is ingested again, its new chunks are matched against the stored hashes:
+only chunks whose hash is new are embedded, stored chunks whose hash vanished
+are deleted, and the rest are left untouched. Chunks stored before hashes
+existed have no hash, never match, and are replaced once.
+
+Chunks also carry the position they had in their document when they were
+written. Matching ignores it and unchanged chunks are not rewritten, so a
+chunk that shifted because text was inserted above it keeps its old
+``chunk_index``; it orders chunks written together, not the current document.
+"""
+
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from langchain.schema import Document
+
+CHUNK_HASH_KEY = "chunk_hash"
+CHUNK_INDEX_KEY = "chunk_index"
+
+# Stored chunk IDs per content hash (None for chunks stored without one)
+StoredChunks = Dict[Optional[str], List[str]]
+
+
+@dataclass
+class ChunkDiff:
+    """What a re-ingest of one document changes in the store."""
+
+    document_id: str
+    added: List[Document] = field(default_factory=list)
+    deleted_ids: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.deleted_ids)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "deleted": len(self.deleted_ids),
+            "unchanged": self.unchanged,
+        }
+
+
+def chunk_hash(content: str) -> str:
+    """SHA-256 of a chunk's text."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def annotate_chunks(docs: List[Document]) -> List[Document]:
+    """Stamp each chunk with its content hash and write-time position."""
+    positions: Dict[Optional[str], int] = defaultdict(int)
+    for doc in docs:
+        document_id = doc.metadata.get("document_id")
+        doc.metadata[CHUNK_HASH_KEY] = chunk_hash(doc.page_content)
+        doc.metadata[CHUNK_INDEX_KEY] = positions[document_id]
+        positions[document_id] += 1
+    return docs
+
+
+def diff_chunks(
+    document_id: str, docs: List[Document], stored: StoredChunks
+) -> ChunkDiff:
+    """
+    Match annotated chunks against the stored ones by hash.
+
+    A hash occurring n times in the new chunks keeps up to n stored chunks
+    with that hash; extra stored copies are deleted, missing ones added.
+    Kept chunks are matched by hash alone and keep their stored metadata,
+    including the ``chunk_index`` they were written with.
+
+    Args:
+        document_id: Document the chunks belong to
+        docs: The document's new chunks, annotated
+        stored: Stored chunk IDs per hash
+
+    Returns:
+        Chunks to embed, stored IDs to delete and the unchanged count
+    """
+    remaining = {key: list(ids) for key, ids in stored.items()}
+    diff = ChunkDiff(document_id=document_id)
+    for doc in docs:
+        matches = remaining.get(doc.metadata.get(CHUNK_HASH_KEY))
+        if matches:
+            matches.pop(0)
+            diff.unchanged += 1
+        else:
+            diff.added.append(doc)
+    diff.deleted_ids = [chunk_id for ids in remaining.values() for chunk_id in ids]
+    return diff
+
+
+def group_stored_chunks(rows) -> StoredChunks:
+    """Build StoredChunks from ``(chunk_id, chunk_hash)`` pairs."""
+    stored: StoredChunks = defaultdict(list)
+    for chunk_id, hash_value in rows:
+        stored[hash_value].append(str(chunk_id))
+    return dict(stored)
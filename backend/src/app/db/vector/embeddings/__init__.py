@@ -7,8 +7,19 @@ to ensure they are registered with the EmbeddingFactory.
 
 # Import the embedding implementations to trigger registration
 from . import embedding
+from .batch_embedder import BatchEmbedder, BatchEmbeddingConfig
 from .embedding import EmbeddingFactory
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .fake_embedding import HashingEmbeddings
+from .query_batcher import QueryBatchingConfig, QueryEmbeddingBatcher
 
 __all__ = [
+    "BatchEmbedder",
+    "BatchEmbeddingConfig",
+    "CachedEmbeddings",
+    "EmbeddingCache",
     "EmbeddingFactory",
+    "HashingEmbeddings",
+    "QueryBatchingConfig",
+    "QueryEmbeddingBatcher",
 ]
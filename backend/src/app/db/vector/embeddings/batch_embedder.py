@@ -0,0 +1,368 @@
+"""
+Batched, rate-limited document embedding.
+
+Vector stores used to embed chunks one ``embed_query`` call at a time. The
+``BatchEmbedder`` groups texts into ``embed_documents`` calls of
+``batch_size`` texts, runs up to ``max_concurrency`` of them at once and keeps
+every provider within its requests-per-minute and tokens-per-minute budget.
+Failed batches are retried with exponential backoff.
+
+Rate limiters are shared per embedding type, so concurrent ingestion jobs
+writing into different stores still respect one provider limit.
+
+Configuration comes from ``batching`` in application-embeddings.yaml; the
+provider's own block (e.g. ``openai``) can override any of the keys.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.constants import EmbeddingType
+from app.core.utils.logger import get_logger
+from app.db.vector.embeddings.embedding_cache import CachedEmbeddings
+
+logger = get_logger(__name__)
+
+RATE_WINDOW_SECONDS = 60.0
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class BatchEmbeddingConfig:
+    """Batching, concurrency, rate-limit and retry settings for one provider.
+
+    A ``requests_per_minute`` or ``tokens_per_minute`` of 0 disables that limit.
+    """
+
+    batch_size: int = 100
+    max_concurrency: int = 4
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    max_retries: int = 3
+    retry_backoff_seconds: float = 1.0
+    max_retry_backoff_seconds: float = 30.0
+
+    @classmethod
+    def from_config(cls, *configs: Optional[Dict[str, Any]]) -> "BatchEmbeddingConfig":
+        """Build from config dicts; later dicts override earlier ones."""
+        values: Dict[str, Any] = {}
+        for config in configs:
+            values.update(config or {})
+        kwargs = {}
+        for f in fields(cls):
+            if values.get(f.name) in (None, ""):
+                continue
+            kwargs[f.name] = (
+                f.type(values[f.name]) if f.type in (int, float) else values[f.name]
+            )
+        return cls(**kwargs)
+
+    @classmethod
+    def from_settings(cls, embedding_type: EmbeddingType) -> "BatchEmbeddingConfig":
+        """Read ``embeddings.batching`` overlaid with ``embeddings.<provider>``."""
+        try:
+            from app.core.config.framework.settings import settings
+
+            return cls.from_config(
+                settings.get_section("embeddings.batching", {}),
+                settings.get_section(f"embeddings.{embedding_type.value.lower()}", {}),
+            )
+        except Exception as e:
+            logger.warning(
+                f"Failed to load embedding batching config, using defaults: {e}"
+            )
+            return cls()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for tokens-per-minute accounting."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class RateLimiter:
+    """Sliding one-minute window over request and token counts."""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._tokens = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Limiters are shared process-wide and may outlive an event loop
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _expire(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= RATE_WINDOW_SECONDS:
+            _, tokens = self._events.popleft()
+            self._tokens -= tokens
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a request of ``tokens`` fits in the window, 0 if now."""
+        waits = [0.0]
+        if self.requests_per_minute and len(self._events) >= self.requests_per_minute:
+            oldest = self._events[len(self._events) - self.requests_per_minute][0]
+            waits.append(oldest + RATE_WINDOW_SECONDS - now)
+        if self.tokens_per_minute and self._events:
+            # A single request larger than the budget is let through on an
+            # empty window rather than blocking forever
+            excess = self._tokens + tokens - self.tokens_per_minute
+            released = 0
+            for timestamp, event_tokens in self._events:
+                if released >= excess:
+                    break
+                released += event_tokens
+                waits.append(timestamp + RATE_WINDOW_SECONDS - now)
+        return max(waits)
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Wait until one request of ``tokens`` is allowed; returns seconds waited."""
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        async with self._get_lock():
+            while True:
+                now = self._clock()
+                self._expire(now)
+                delay = self._wait_time(tokens, now)
+                if delay <= 0:
+                    self._events.append((now, tokens))
+                    self._tokens += tokens
+                    return waited
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+@dataclass
+class EmbeddingStats:
+    """Counters for one ``embed_documents`` call or a whole embedder."""
+
+    texts: int = 0
+    cache_hits: int = 0
+    batches: int = 0
+    retries: int = 0
+    failed_batches: int = 0
+    rate_limited_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def embeddings_per_second(self) -> float:
+        return self.texts / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def merge(self, other: "EmbeddingStats") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "texts": self.texts,
+            "cache_hits": self.cache_hits,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed_batches": self.failed_batches,
+            "rate_limited_seconds": round(self.rate_limited_seconds, 3),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "embeddings_per_second": round(self.embeddings_per_second, 1),
+        }
+
+
+@dataclass
+class _ProviderState:
+    limiter: RateLimiter
+    stats: EmbeddingStats = field(default_factory=EmbeddingStats)
+
+
+class BatchEmbedder:
+    """Embed many texts through ``embed_documents`` in concurrent batches.
+
+    Args:
+        model: LangChain ``Embeddings`` instance.
+        config: Batching, concurrency, rate-limit and retry settings.
+        limiter: Shared rate limiter; a private one is created when omitted.
+        name: Used in log lines.
+        totals: Stats accumulated across calls; shared per provider when
+            built with ``for_embedding_type``.
+    """
+
+    _providers: Dict[EmbeddingType, _ProviderState] = {}
+
+    def __init__(
+        self,
+        model,
+        config: Optional[BatchEmbeddingConfig] = None,
+        limiter: Optional[RateLimiter] = None,
+        name: str = "embeddings",
+        totals: Optional[EmbeddingStats] = None,
+    ):
+        self.model = model
+        self.config = config or BatchEmbeddingConfig()
+        self.limiter = limiter or RateLimiter(
+            self.config.requests_per_minute, self.config.tokens_per_minute
+        )
+        self.name = name
+        self.stats = totals or EmbeddingStats()
+
+    @classmethod
+    def for_embedding_type(
+        cls, embedding_type: EmbeddingType, model=None
+    ) -> "BatchEmbedder":
+        """Embedder for a provider, sharing its rate limiter and stats."""
+        if model is None:
+            from app.db.vector.embeddings.embedding import EmbeddingFactory
+
+            model = EmbeddingFactory.get_embedding_model(embedding_type)
+        config = BatchEmbeddingConfig.from_settings(embedding_type)
+        state = cls._providers.get(embedding_type)
+        if state is None:
+            state = _ProviderState(
+                RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+            )
+            cls._providers[embedding_type] = state
+        return cls(
+            model,
+            config,
+            limiter=state.limiter,
+            name=str(embedding_type.value),
+            totals=state.stats,
+        )
+
+    @classmethod
+    def get_provider_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Cumulative stats per embedding type since process start."""
+        return {
+            str(embedding_type.value): state.stats.to_dict()
+            for embedding_type, state in cls._providers.items()
+        }
+
+    @classmethod
+    def reset_providers(cls) -> None:
+        """Drop shared rate limiters and stats (used by tests)."""
+        cls._providers.clear()
+
+    async def embed_documents(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed ``texts``, preserving order.
+
+        Raises:
+            Exception: The last error of a batch that still failed after
+                ``max_retries`` retries.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        call_stats = EmbeddingStats(texts=len(texts))
+        started = time.perf_counter()
+        try:
+            if isinstance(self.model, CachedEmbeddings):
+                vectors = await self._embed_through_cache(texts, call_stats)
+            else:
+                vectors = await self._embed_batches(self.model, texts, call_stats)
+        finally:
+            call_stats.elapsed_seconds = time.perf_counter() - started
+            self.stats.merge(call_stats)
+
+        logger.info(
+            f"[{self.name}] Embedded {len(vectors)} texts in {call_stats.batches} "
+            f"batches ({call_stats.cache_hits} cached, "
+            f"{call_stats.embeddings_per_second:.1f}/s, "
+            f"{call_stats.retries} retries)"
+        )
+        return vectors
+
+    async def _embed_through_cache(
+        self, texts: List[str], stats: EmbeddingStats
+    ) -> List[List[float]]:
+        """Serve cached vectors and send each distinct missing text once."""
+        cached = await self.model.alookup(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        stats.cache_hits = len(texts) - sum(1 for v in cached if v is None)
+        if not missing:
+            return cached
+
+        computed = await self._embed_batches(self.model.underlying, missing, stats)
+        await self.model.astore(missing, computed)
+        by_text = dict(zip(missing, computed))
+        return [v if v is not None else by_text[t] for t, v in zip(texts, cached)]
+
+    async def _embed_batches(
+        self, model, texts: List[str], stats: EmbeddingStats
+    ) -> List[List[float]]:
+        size = max(1, self.config.batch_size)
+        batches = [texts[i : i + size] for i in range(0, len(texts), size)]
+        semaphore = asyncio.Semaphore(max(1, self.config.max_concurrency))
+
+        async def run(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_batch(model, batch, stats)
+
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed one query through the cache and the same rate limit."""
+        model = self.model
+        if isinstance(model, CachedEmbeddings):
+            [cached] = await model.alookup([text], query=True)
+            if cached is not None:
+                return cached
+            model = model.underlying
+        await self.limiter.acquire(estimate_tokens(text))
+        vector = await asyncio.to_thread(model.embed_query, text)
+        if model is not self.model:
+            await self.model.astore([text], [vector], query=True)
+        return vector
+
+    async def _embed_batch(
+        self, model, batch: List[str], stats: EmbeddingStats
+    ) -> List[List[float]]:
+        tokens = sum(estimate_tokens(text) for text in batch)
+        attempt = 0
+        while True:
+            stats.rate_limited_seconds += await self.limiter.acquire(tokens)
+            try:
+                vectors = await asyncio.to_thread(model.embed_documents, batch)
+                if len(vectors) != len(batch):
+                    raise ValueError(
+                        f"Embedding provider returned {len(vectors)} vectors "
+                        f"for {len(batch)} texts"
+                    )
+                stats.batches += 1
+                return vectors
+            except Exception as e:
+                if attempt >= self.config.max_retries:
+                    stats.failed_batches += 1
+                    logger.error(
+                        f"[{self.name}] Embedding batch of {len(batch)} failed "
+                        f"after {attempt + 1} attempts: {e}"
+                    )
+                    raise
+                attempt += 1
+                stats.retries += 1
+                delay = min(
+                    self.config.retry_backoff_seconds * 2 ** (attempt - 1),
+                    self.config.max_retry_backoff_seconds,
+                )
+                logger.warning(
+                    f"[{self.name}] Embedding batch failed ({e}), "
+                    f"retry {attempt}/{self.config.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
@@ -8,6 +8,7 @@ from langchain_community.embeddings import (
 from langchain_openai import OpenAIEmbeddings
 
 from app.core.constants import EmbeddingType
+from app.db.vector.embeddings.fake_embedding import HashingEmbeddings
 from app.db.vector.providers.embedding_provider import EmbeddingFactory
 
 
@@ -68,3 +69,19 @@ def _create_cohere_embedding(config: Dict[str, Any]):
         Expected keys: api_key
     """
     return CohereEmbeddings(cohere_api_key=config.get("api_key"))
+
+
+@EmbeddingFactory.register(EmbeddingType.FAKE)
+def _create_fake_embedding(config: Dict[str, Any]):
+    """
+    Create the deterministic feature-hashing model (no API or weights).
+
+    Args:
+        config: Configuration dict from settings.embeddings.fake
+        Expected keys: dimensions, latency_ms
+    """
+    return HashingEmbeddings(
+        dimensions=config.get("dimensions", 384),
+        latency_ms=config.get("latency_ms", 0),
+        model=config.get("model", "feature-hashing"),
+    )
@@ -0,0 +1,492 @@
+"""
+Content-addressed cache for embedding vectors.
+
+Unchanged pages, repeated queries and re-embeds all send the same text to the
+embedding provider again. ``CachedEmbeddings`` wraps the models created by
+``EmbeddingFactory`` and looks every text up by
+``sha256(embedding type, model name, text)`` first:
+
+- a local SQLite tier stores vectors as packed float32 or float16 bytes and
+  evicts least-recently-used entries beyond ``max_entries`` / ``max_size_mb``
+- an optional Redis tier (through the shared cache infrastructure) lets
+  several workers reuse each other's vectors; it is consulted on the async
+  paths only, since the Redis client is async
+
+Configuration lives under ``cache`` in application-embeddings.yaml.
+"""
+
+import asyncio
+import base64
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_PATH = "./volumes/embeddings/cache.db"
+SUPPORTED_DTYPES = ("float32", "float16")
+# Fraction of the bound kept after an eviction pass, so eviction runs rarely
+EVICTION_HEADROOM = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key       TEXT PRIMARY KEY,
+    dtype     TEXT NOT NULL,
+    dim       INTEGER NOT NULL,
+    vector    BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+@dataclass
+class EmbeddingCacheConfig:
+    """Storage, bounds and tiers of the embedding cache."""
+
+    enabled: bool = True
+    path: str = DEFAULT_CACHE_PATH
+    dtype: str = "float32"
+    max_entries: int = 500_000
+    max_size_mb: float = 2048
+    redis_enabled: bool = False
+    redis_ttl_seconds: int = 7 * 24 * 3600
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "EmbeddingCacheConfig":
+        config = dict(config or {})
+        redis = config.pop("redis", None) or {}
+        defaults = cls()
+        dtype = str(config.get("dtype", defaults.dtype))
+        if dtype not in SUPPORTED_DTYPES:
+            logger.warning(
+                f"Unsupported embedding cache dtype '{dtype}', using float32"
+            )
+            dtype = "float32"
+        return cls(
+            enabled=_as_bool(config.get("enabled", defaults.enabled)),
+            path=str(config.get("path") or defaults.path),
+            dtype=dtype,
+            max_entries=int(config.get("max_entries", defaults.max_entries)),
+            max_size_mb=float(config.get("max_size_mb", defaults.max_size_mb)),
+            redis_enabled=_as_bool(redis.get("enabled", defaults.redis_enabled)),
+            redis_ttl_seconds=int(redis.get("ttl_seconds", defaults.redis_ttl_seconds)),
+        )
+
+    @classmethod
+    def from_settings(cls) -> "EmbeddingCacheConfig":
+        try:
+            from app.core.config.framework.settings import settings
+
+            return cls.from_config(settings.get_section("embeddings.cache", {}))
+        except Exception as e:
+            logger.warning(
+                f"Failed to load embedding cache config, using defaults: {e}"
+            )
+            return cls()
+
+
+def cache_key(namespace: str, text: str) -> str:
+    """Content address of ``text`` embedded by the model in ``namespace``."""
+    return hashlib.sha256(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: Sequence[float], dtype: str) -> bytes:
+    return np.asarray(vector, dtype=dtype).tobytes()
+
+
+def decode_vector(blob: bytes, dtype: str) -> List[float]:
+    return np.frombuffer(blob, dtype=dtype).astype(np.float32).tolist()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.redis_hits + self.misses
+        return (self.hits + self.redis_hits) / lookups if lookups else 0.0
+
+
+class EmbeddingCache:
+    """Two-tier vector cache: local SQLite, optionally backed by Redis.
+
+    All methods are thread-safe; the sync methods only touch the local tier.
+    """
+
+    def __init__(self, config: Optional[EmbeddingCacheConfig] = None, redis=None):
+        self.config = config or EmbeddingCacheConfig()
+        self.stats = EmbeddingCacheStats()
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries = 0
+        self._bytes = 0
+        self._redis = redis
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Lazily open the database and create the schema."""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    path = self.config.path
+                    if path != ":memory:":
+                        Path(path).parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._conn = conn
+                    self._refresh_size()
+                    logger.info(
+                        f"Opened embedding cache at {path} ({self._entries} entries)"
+                    )
+        return self._conn
+
+    @property
+    def redis(self):
+        """Redis tier, created on first use when enabled."""
+        if self._redis is None and self.config.redis_enabled:
+            from app.core.enums import CacheType
+            from app.infrastructure.cache import CacheFactory
+
+            self._redis = CacheFactory.create_cache(
+                cache_type=CacheType.REDIS,
+                namespace="embeddings",
+                default_ttl=self.config.redis_ttl_seconds,
+            )
+        return self._redis
+
+    # Local tier
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Look keys up locally, refreshing their LRU position."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            conn = self.connection
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings "
+                    f"WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = decode_vector(blob, dtype)
+            if found:
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found],
+                    )
+            self.stats.hits += len(found)
+        return found
+
+    def put_many(
+        self, items: Dict[str, Sequence[float]], backfill: bool = False
+    ) -> None:
+        """Store vectors locally, evicting old entries past the bounds.
+
+        ``backfill`` marks copies from the Redis tier, which are not counted
+        as new writes.
+        """
+        if not items:
+            return
+        dtype = self.config.dtype
+        now = time.time()
+        rows = [
+            (key, dtype, len(vector), encode_vector(vector, dtype), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            conn = self.connection
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dtype, dim, vector, "
+                    "last_used) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            if not backfill:
+                self.stats.writes += len(rows)
+            # Approximate until the next refresh; replaced keys are counted twice
+            self._entries += len(rows)
+            self._bytes += sum(len(row[3]) for row in rows)
+            if self._over_bounds():
+                self._refresh_size()
+                if self._over_bounds():
+                    self._evict()
+
+    def _over_bounds(self) -> bool:
+        return (
+            self._entries > self.config.max_entries
+            or self._bytes > self.config.max_size_mb * 1024 * 1024
+        )
+
+    def _refresh_size(self) -> None:
+        entries, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        self._entries, self._bytes = entries, size
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries down to the headroom target."""
+        target_entries = int(self.config.max_entries * EVICTION_HEADROOM)
+        excess = self._entries - target_entries
+        if self._bytes > self.config.max_size_mb * 1024 * 1024 and self._entries:
+            average = self._bytes / self._entries
+            target_bytes = self.config.max_size_mb * 1024 * 1024 * EVICTION_HEADROOM
+            excess = max(excess, int((self._bytes - target_bytes) / average) + 1)
+        if excess <= 0:
+            return
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        self.stats.evictions += excess
+        self._refresh_size()
+        logger.info(f"Evicted {excess} embeddings from cache")
+
+    # Both tiers
+
+    async def aget_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Look keys up locally, then in Redis; Redis hits are copied locally."""
+        found = await asyncio.to_thread(self.get_many, keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        redis = self.redis
+        if missing and redis is not None:
+            values = await asyncio.gather(
+                *(redis.get(key, deserialize=False) for key in missing)
+            )
+            remote = {}
+            for key, value in zip(missing, values):
+                vector = self._decode_remote(value)
+                if vector is not None:
+                    remote[key] = vector
+            if remote:
+                self.stats.redis_hits += len(remote)
+                await asyncio.to_thread(self.put_many, remote, True)
+                found.update(remote)
+            missing = [key for key in missing if key not in remote]
+        self.record_misses(len(missing))
+        return found
+
+    async def aput_many(self, items: Dict[str, Sequence[float]]) -> None:
+        """Store vectors locally and, when enabled, in Redis."""
+        await asyncio.to_thread(self.put_many, items)
+        redis = self.redis
+        if items and redis is not None:
+            await asyncio.gather(
+                *(
+                    redis.set(key, self._encode_remote(vector))
+                    for key, vector in items.items()
+                )
+            )
+
+    def _encode_remote(self, vector: Sequence[float]) -> str:
+        dtype = self.config.dtype
+        payload = base64.b64encode(encode_vector(vector, dtype)).decode("ascii")
+        return f"{dtype}:{payload}"
+
+    @staticmethod
+    def _decode_remote(value: Optional[str]) -> Optional[List[float]]:
+        if not value or not isinstance(value, str) or ":" not in value:
+            return None
+        dtype, payload = value.split(":", 1)
+        if dtype not in SUPPORTED_DTYPES:
+            return None
+        try:
+            return decode_vector(base64.b64decode(payload), dtype)
+        except (ValueError, TypeError):
+            return None
+
+    # Maintenance
+
+    def record_misses(self, count: int) -> None:
+        with self._lock:
+            self.stats.misses += count
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._conn is not None:
+                self._refresh_size()
+            return {
+                "hits": self.stats.hits,
+                "redis_hits": self.stats.redis_hits,
+                "misses": self.stats.misses,
+                "hit_rate": round(self.stats.hit_rate, 4),
+                "writes": self.stats.writes,
+                "evictions": self.stats.evictions,
+                "entries": self._entries,
+                "size_bytes": self._bytes,
+                "size_mb": round(self._bytes / (1024 * 1024), 2),
+                "dtype": self.config.dtype,
+            }
+
+    def clear(self) -> None:
+        """Remove every locally cached vector."""
+        with self._lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM embeddings")
+            self._entries = self._bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain ``Embeddings`` that consults an ``EmbeddingCache`` first.
+
+    Args:
+        underlying: The provider model that computes missing vectors.
+        cache: Shared vector cache.
+        namespace: Separates models, e.g. ``openai:text-embedding-3-small``.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, namespace: str):
+        self.underlying = underlying
+        self.cache = cache
+        self.namespace = namespace
+
+    def __getattr__(self, name: str):
+        # Expose provider attributes such as ``model`` or ``client``
+        if name == "underlying":
+            raise AttributeError(name)
+        return getattr(self.underlying, name)
+
+    def keys(self, texts: Sequence[str], query: bool = False) -> List[str]:
+        # Some providers embed queries differently from documents
+        namespace = f"{self.namespace}:query" if query else self.namespace
+        return [cache_key(namespace, text) for text in texts]
+
+    def lookup(
+        self, texts: Sequence[str], query: bool = False
+    ) -> List[Optional[List[float]]]:
+        keys = self.keys(texts, query)
+        found = self.cache.get_many(keys)
+        self.cache.record_misses(len({key for key in keys if key not in found}))
+        return [found.get(key) for key in keys]
+
+    async def alookup(
+        self, texts: Sequence[str], query: bool = False
+    ) -> List[Optional[List[float]]]:
+        keys = self.keys(texts, query)
+        found = await self.cache.aget_many(keys)
+        return [found.get(key) for key in keys]
+
+    def store(
+        self,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        query: bool = False,
+    ) -> None:
+        self.cache.put_many(dict(zip(self.keys(texts, query), vectors)))
+
+    async def astore(
+        self,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        query: bool = False,
+    ) -> None:
+        await self.cache.aput_many(dict(zip(self.keys(texts, query), vectors)))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.lookup(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            computed = self.underlying.embed_documents(missing)
+            self.store(missing, computed)
+            by_text = dict(zip(missing, computed))
+            vectors = [
+                v if v is not None else list(by_text[t]) for t, v in zip(texts, vectors)
+            ]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        [vector] = self.lookup([text], query=True)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self.store([text], [vector], query=True)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = await self.alookup(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            computed = await asyncio.to_thread(self.underlying.embed_documents, missing)
+            await self.astore(missing, computed)
+            by_text = dict(zip(missing, computed))
+            vectors = [
+                v if v is not None else list(by_text[t]) for t, v in zip(texts, vectors)
+            ]
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        [vector] = await self.alookup([text], query=True)
+        if vector is None:
+            vector = await asyncio.to_thread(self.underlying.embed_query, text)
+            await self.astore([text], [vector], query=True)
+        return vector
+
+
+_shared_cache: Optional[EmbeddingCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache built from settings, or None when disabled."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                config = EmbeddingCacheConfig.from_settings()
+                if not config.enabled:
+                    return None
+                _shared_cache = EmbeddingCache(config)
+    return _shared_cache
+
+
+def wrap_with_cache(model: Embeddings, embedding_type, config: Dict[str, Any]):
+    """Wrap a freshly created model with the shared cache when it is enabled."""
+    if isinstance(model, CachedEmbeddings):
+        return model
+    cache = get_embedding_cache()
+    if cache is None:
+        return model
+    model_name = (
+        config.get("model")
+        or getattr(model, "model", None)
+        or getattr(model, "model_name", None)
+        or model.__class__.__name__
+    )
+    namespace = f"{getattr(embedding_type, 'value', embedding_type)}:{model_name}"
+    return CachedEmbeddings(model, cache, namespace)
@@ -0,0 +1,65 @@
+"""
+Deterministic embeddings without a model.
+
+``HashingEmbeddings`` maps every word of a text to a signed bucket of a fixed
+size vector (feature hashing) and L2-normalizes the result. The same text
+always gets the same vector on every machine, texts sharing words are close,
+and embedding costs microseconds, so ingestion and retrieval can be exercised
+and benchmarked without API keys, downloads or rate limits. An optional
+per-call delay stands in for a provider's round trip.
+"""
+
+import hashlib
+import re
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashing embedding model.
+
+    Args:
+        dimensions: Vector size
+        latency_ms: Sleep per embed call, simulating a remote provider
+        model: Name reported to the embedding cache
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 384,
+        latency_ms: float = 0.0,
+        model: str = "feature-hashing",
+    ):
+        self.dimensions = int(dimensions)
+        self.latency_ms = float(latency_ms)
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._wait()
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._wait()
+        return self._embed(text)
+
+    def _wait(self) -> None:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        # Texts without words still get a stable, non-zero vector
+        for word in _WORD.findall(text.lower()) or [text]:
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
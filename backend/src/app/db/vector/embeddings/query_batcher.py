@@ -0,0 +1,316 @@
+"""
+Async micro-batching of query embeddings.
+
+Under load many coroutines each embed a single search query. The
+``QueryEmbeddingBatcher`` collects concurrent ``embed_query`` calls for up to
+``max_latency_ms`` or ``max_batch_size`` queries, embeds them in one model call
+on a worker thread (keeping CPU inference off the event loop) and resolves
+every waiting coroutine with its own vector.
+
+Batches are embedded with query semantics: models whose query and document
+embeddings differ (Instructor, Cohere) use their query-side batch API, and
+unknown models fall back to ``embed_query`` per text on the same thread hop.
+
+Batch sizes and queue waits are recorded as histograms, both in-process
+(``get_stats``) and as Prometheus metrics.
+
+Configuration lives under ``query_batching`` in application-embeddings.yaml.
+"""
+
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from prometheus_client import Histogram
+
+from app.core.constants import EmbeddingType
+from app.core.utils.logger import get_logger
+from app.db.vector.embeddings.embedding_cache import CachedEmbeddings
+
+logger = get_logger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250)
+
+QUERY_BATCH_SIZE = Histogram(
+    "embedding_query_batch_size",
+    "Queries embedded per model call by the query micro-batcher",
+    ["embedding_type"],
+    buckets=BATCH_SIZE_BUCKETS,
+)
+QUERY_WAIT_SECONDS = Histogram(
+    "embedding_query_wait_seconds",
+    "Time a query waited for its batch to be dispatched",
+    ["embedding_type"],
+    buckets=tuple(ms / 1000 for ms in WAIT_BUCKETS_MS),
+)
+
+
+@dataclass
+class QueryBatchingConfig:
+    """Latency and size bounds of the query micro-batcher."""
+
+    enabled: bool = True
+    max_batch_size: int = 32
+    max_latency_ms: float = 5.0
+    max_inflight_batches: int = 2
+
+    @classmethod
+    def from_settings(cls) -> "QueryBatchingConfig":
+        try:
+            from app.core.config.framework.settings import settings
+
+            config = settings.get_section("embeddings.query_batching", {}) or {}
+        except Exception as e:
+            logger.warning(f"Failed to load query batching config, using defaults: {e}")
+            return cls()
+        defaults = cls()
+        enabled = config.get("enabled", defaults.enabled)
+        if isinstance(enabled, str):
+            enabled = enabled.strip().lower() in ("1", "true", "yes", "on")
+        return cls(
+            enabled=bool(enabled),
+            max_batch_size=int(config.get("max_batch_size", defaults.max_batch_size)),
+            max_latency_ms=float(config.get("max_latency_ms", defaults.max_latency_ms)),
+            max_inflight_batches=int(
+                config.get("max_inflight_batches", defaults.max_inflight_batches)
+            ),
+        )
+
+
+class _Histogram:
+    """Cumulative counts over fixed upper bounds, plus an overflow bucket."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.samples += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.samples,
+            "mean": round(self.total / self.samples, 3) if self.samples else 0.0,
+        }
+
+
+@dataclass
+class _Pending:
+    text: str
+    future: asyncio.Future
+    enqueued_at: float
+
+
+@dataclass
+class _LoopState:
+    queue: asyncio.Queue
+    collector: asyncio.Task
+    inflight: asyncio.Semaphore
+    tasks: set = field(default_factory=set)
+
+
+def batch_query_function(model) -> Callable[[List[str]], List[List[float]]]:
+    """Embed several queries in one call, with the model's query semantics."""
+    class_name = model.__class__.__name__
+    if class_name == "HuggingFaceInstructEmbeddings":
+
+        def embed_instruct(texts: List[str]) -> List[List[float]]:
+            pairs = [[model.query_instruction, text] for text in texts]
+            return model.client.encode(pairs, **model.encode_kwargs).tolist()
+
+        return embed_instruct
+    if class_name == "CohereEmbeddings":
+        return lambda texts: model.embed(texts, input_type="search_query")
+    if class_name in ("OpenAIEmbeddings", "AzureOpenAIEmbeddings"):
+        # embed_query is embed_documents([text])[0] for these models
+        return model.embed_documents
+    if class_name in ("HuggingFaceEmbeddings", "SentenceTransformerEmbeddings"):
+        return model.embed_documents
+    return lambda texts: [model.embed_query(text) for text in texts]
+
+
+class QueryEmbeddingBatcher:
+    """Coalesce concurrent ``embed_query`` calls into batched model calls.
+
+    Args:
+        model: LangChain ``Embeddings`` instance, optionally ``CachedEmbeddings``.
+        config: Latency and batch-size bounds.
+        name: Label for metrics and logs.
+    """
+
+    _batchers: Dict[EmbeddingType, "QueryEmbeddingBatcher"] = {}
+
+    def __init__(
+        self,
+        model,
+        config: Optional[QueryBatchingConfig] = None,
+        name: str = "embeddings",
+    ):
+        self.model = model
+        self.config = config or QueryBatchingConfig()
+        self.name = name
+        underlying = model.underlying if isinstance(model, CachedEmbeddings) else model
+        self._embed_batch_fn = batch_query_function(underlying)
+        self._loops: Dict[int, _LoopState] = {}
+        self.batch_sizes = _Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = _Histogram(WAIT_BUCKETS_MS)
+        self.queries = 0
+        self.cache_hits = 0
+        self.model_calls = 0
+
+    @classmethod
+    def for_embedding_type(
+        cls, embedding_type: EmbeddingType
+    ) -> "QueryEmbeddingBatcher":
+        """Shared batcher for a provider, built on its registered model."""
+        from app.db.vector.embeddings.embedding import EmbeddingFactory
+
+        model = EmbeddingFactory.get_embedding_model(embedding_type)
+        batcher = cls._batchers.get(embedding_type)
+        # The registry returns a new model after a reload
+        if batcher is None or batcher.model is not model:
+            batcher = cls(
+                model, QueryBatchingConfig.from_settings(), str(embedding_type.value)
+            )
+            cls._batchers[embedding_type] = batcher
+        return batcher
+
+    @classmethod
+    def get_all_stats(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            str(embedding_type.value): batcher.get_stats()
+            for embedding_type, batcher in cls._batchers.items()
+        }
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget shared batchers (used by tests)."""
+        cls._batchers.clear()
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed one query, batched with any concurrent callers."""
+        self.queries += 1
+        if not self.config.enabled:
+            return (await self._embed_texts([text]))[0]
+
+        state = self._loop_state()
+        future = asyncio.get_running_loop().create_future()
+        await state.queue.put(_Pending(text, future, time.perf_counter()))
+        return await future
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "model_calls": self.model_calls,
+            "cache_hits": self.cache_hits,
+            "batch_size": self.batch_sizes.to_dict(),
+            "wait_ms": self.wait_ms.to_dict(),
+            "max_batch_size": self.config.max_batch_size,
+            "max_latency_ms": self.config.max_latency_ms,
+        }
+
+    async def close(self) -> None:
+        """Stop the collector for the running event loop."""
+        state = self._loops.pop(id(asyncio.get_running_loop()), None)
+        if state is not None:
+            state.collector.cancel()
+            await asyncio.gather(state.collector, return_exceptions=True)
+            await asyncio.gather(*state.tasks, return_exceptions=True)
+
+    # Collection and dispatch
+
+    def _loop_state(self) -> _LoopState:
+        # Queues and tasks belong to one event loop; the batcher may be shared
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(id(loop))
+        if state is None or state.collector.done():
+            queue: asyncio.Queue = asyncio.Queue()
+            state = _LoopState(
+                queue=queue,
+                collector=loop.create_task(self._collect(queue)),
+                inflight=asyncio.Semaphore(max(1, self.config.max_inflight_batches)),
+            )
+            self._loops[id(loop)] = state
+        return state
+
+    async def _collect(self, queue: asyncio.Queue) -> None:
+        max_wait = self.config.max_latency_ms / 1000
+        max_size = max(1, self.config.max_batch_size)
+        while True:
+            batch = [await queue.get()]
+            deadline = time.perf_counter() + max_wait
+            while len(batch) < max_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Drain anything already queued without waiting further
+            while len(batch) < max_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            state = self._loops[id(asyncio.get_running_loop())]
+            await state.inflight.acquire()
+            task = asyncio.create_task(self._dispatch(batch, state.inflight))
+            state.tasks.add(task)
+            task.add_done_callback(state.tasks.discard)
+
+    async def _dispatch(
+        self, batch: List[_Pending], inflight: asyncio.Semaphore
+    ) -> None:
+        try:
+            now = time.perf_counter()
+            for pending in batch:
+                waited = now - pending.enqueued_at
+                self.wait_ms.observe(waited * 1000)
+                QUERY_WAIT_SECONDS.labels(self.name).observe(waited)
+            try:
+                vectors = await self._embed_texts([p.text for p in batch])
+            except Exception as e:
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                return
+            for pending, vector in zip(batch, vectors):
+                if not pending.future.done():
+                    pending.future.set_result(vector)
+        finally:
+            inflight.release()
+
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed distinct texts once, consulting the embedding cache first."""
+        cached: List[Optional[List[float]]] = [None] * len(texts)
+        if isinstance(self.model, CachedEmbeddings):
+            cached = await self.model.alookup(texts, query=True)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        self.cache_hits += sum(1 for v in cached if v is not None)
+        if not missing:
+            return cached
+
+        vectors = await asyncio.to_thread(self._embed_batch_fn, missing)
+        self.model_calls += 1
+        self.batch_sizes.observe(len(missing))
+        QUERY_BATCH_SIZE.labels(self.name).observe(len(missing))
+        if isinstance(self.model, CachedEmbeddings):
+            await self.model.astore(missing, vectors, query=True)
+
+        by_text: Dict[str, List[float]] = dict(zip(missing, vectors))
+        return [v if v is not None else list(by_text[t]) for t, v in zip(texts, cached)]
+
+
+async def embed_query(embedding_type: EmbeddingType, text: str) -> List[float]:
+    """Embed a search query through the provider's shared micro-batcher."""
+    return await QueryEmbeddingBatcher.for_embedding_type(embedding_type).embed_query(
+        text
+    )
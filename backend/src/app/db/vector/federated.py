@@ -0,0 +1,348 @@
+"""
+Federated retrieval across several vector stores and collections.
+
+Confluence pages, uploaded files and other corpora can live in different
+collections or different providers. A FederatedSearch embeds the query once
+per embedding model, queries every configured source concurrently with that
+vector, and merges the rankings with reciprocal-rank fusion (RRF): each
+result scores ``weight / (rrf_k + rank)`` per source it appears in, so
+results ranked well by several sources rise without comparing raw scores
+across stores. Results are deduplicated by ``document_id``.
+
+Each source has its own timeout; sources that fail or answer late are dropped
+from the fusion, so latency is that of the slowest healthy source rather than
+the sum. Configuration lives under ``federated`` in application-vector.yaml.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.schema import Document
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.retrievers import BaseRetriever
+
+from app.core.config.framework.settings import settings
+from app.core.utils.background_loop import shared_loop
+
+from ...core.constants import EmbeddingType, VectorDBType
+from ...core.utils.logger import get_logger
+from .base import VectorDB
+from .embeddings.query_batcher import QueryEmbeddingBatcher
+from .providers.db_provider import VectorStoreFactory
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class FederatedSource:
+    """One store/collection taking part in federated retrieval."""
+
+    name: str
+    provider: VectorDBType
+    collection_name: Optional[str] = None
+    weight: float = 1.0
+    timeout_seconds: Optional[float] = None
+    k: Optional[int] = None
+    embedding: EmbeddingType = EmbeddingType.DEFAULT
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FederatedSource":
+        provider = VectorDBType(str(config["provider"]).lower())
+        timeout = config.get("timeout_seconds")
+        k = config.get("k")
+        return cls(
+            name=str(config.get("name") or config.get("collection_name") or provider),
+            provider=provider,
+            collection_name=config.get("collection_name"),
+            weight=float(config.get("weight", 1.0)),
+            timeout_seconds=float(timeout) if timeout is not None else None,
+            k=int(k) if k is not None else None,
+            embedding=EmbeddingType(str(config.get("embedding", "openai")).lower()),
+        )
+
+
+@dataclass
+class FederatedConfig:
+    """Fan-out, fusion and timeout settings."""
+
+    sources: List[FederatedSource] = field(default_factory=list)
+    k: int = 8
+    per_source_k: int = 10
+    rrf_k: int = 60
+    timeout_seconds: float = 2.0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "FederatedConfig":
+        config = config or {}
+        defaults = cls()
+        return cls(
+            sources=[
+                FederatedSource.from_config(source)
+                for source in config.get("sources") or []
+            ],
+            k=int(config.get("k", defaults.k)),
+            per_source_k=int(config.get("per_source_k", defaults.per_source_k)),
+            rrf_k=int(config.get("rrf_k", defaults.rrf_k)),
+            timeout_seconds=float(
+                config.get("timeout_seconds", defaults.timeout_seconds)
+            ),
+        )
+
+    @classmethod
+    def from_settings(cls) -> "FederatedConfig":
+        return cls.from_config(settings.get_section("vector.federated", {}))
+
+
+def result_key(doc: Document) -> str:
+    """Deduplication key: document_id, else store ID, else content hash."""
+    metadata = doc.metadata
+    for key in ("document_id", "_id"):
+        if metadata.get(key):
+            return str(metadata[key])
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(
+    rankings: Dict[str, List[Document]],
+    weights: Optional[Dict[str, float]] = None,
+    rrf_k: int = 60,
+    k: Optional[int] = None,
+    identity: Optional[Callable[[Document], str]] = None,
+) -> List[Document]:
+    """
+    Merge ranked result lists with weighted reciprocal-rank fusion.
+
+    A document found by several sources (same identity) is kept once, with
+    the content of its best-ranked hit and the summed fusion score.
+
+    Args:
+        rankings: Ranked results per source name
+        weights: Optional weight per source name (default 1.0)
+        rrf_k: Fusion constant; larger values flatten the rank curve
+        k: Number of fused results to return
+        identity: Key identifying a result (default: result_key)
+
+    Returns:
+        Documents ordered by fused score, with ``rrf_score`` and
+        ``federated_sources`` in their metadata
+    """
+    weights = weights or {}
+    identity = identity or result_key
+    scores: Dict[str, float] = {}
+    best: Dict[str, tuple] = {}
+    sources: Dict[str, List[str]] = {}
+    for name, docs in rankings.items():
+        weight = weights.get(name, 1.0)
+        seen = set()
+        for rank, doc in enumerate(docs, start=1):
+            key = identity(doc)
+            if key in seen:
+                # Several chunks of one document: only the best one counts
+                continue
+            seen.add(key)
+            contribution = weight / (rrf_k + rank)
+            scores[key] = scores.get(key, 0.0) + contribution
+            sources.setdefault(key, []).append(name)
+            if key not in best or contribution > best[key][0]:
+                best[key] = (contribution, name, doc)
+
+    fused = []
+    for key in sorted(scores, key=scores.get, reverse=True)[:k]:
+        _, name, doc = best[key]
+        fused.append(
+            Document(
+                page_content=doc.page_content,
+                metadata={
+                    **doc.metadata,
+                    "rrf_score": scores[key],
+                    "federated_source": name,
+                    "federated_sources": sources[key],
+                },
+            )
+        )
+    return fused
+
+
+class FederatedSearch:
+    """
+    Concurrent search over the configured sources with rank fusion.
+
+    Stores are created on first use and kept. All searches run on the shared
+    store loop, so the stores' async clients stay bound to it whether the
+    caller is synchronous or on another loop.
+
+    Args:
+        config: Sources and fusion settings (default: application config)
+        stores: Optional prebuilt stores by source name
+    """
+
+    def __init__(
+        self,
+        config: Optional[FederatedConfig] = None,
+        stores: Optional[Dict[str, VectorDB]] = None,
+    ):
+        self.config = config or FederatedConfig.from_settings()
+        self._stores: Dict[str, VectorDB] = dict(stores or {})
+        self.last_report: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.sources)
+
+    def store(self, source: FederatedSource) -> VectorDB:
+        """The source's store, pointed at its collection."""
+        if source.name not in self._stores:
+            store = VectorStoreFactory.get_vector_store(source.provider)
+            if source.collection_name:
+                store.config = {
+                    **store.config,
+                    "collection_name": source.collection_name,
+                }
+            self._stores[source.name] = store
+        return self._stores[source.name]
+
+    async def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+    ) -> List[Document]:
+        """Search every source and return fused results."""
+        return await shared_loop.run_async(self._search(query, k, filter_criteria))
+
+    def search_sync(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+    ) -> List[Document]:
+        """Blocking variant of search for synchronous callers."""
+        return shared_loop.run(self._search(query, k, filter_criteria))
+
+    async def _search(
+        self,
+        query: str,
+        k: Optional[int],
+        filter_criteria: Optional[Dict[str, Any]],
+    ) -> List[Document]:
+        started = time.perf_counter()
+        sources = self.config.sources
+        embeddings = await self._embed_query(query, sources)
+        results = await asyncio.gather(
+            *(
+                self._search_source(source, query, embeddings, filter_criteria)
+                for source in sources
+            )
+        )
+        rankings = {
+            source.name: docs
+            for source, docs in zip(sources, results)
+            if docs is not None
+        }
+        fused = reciprocal_rank_fusion(
+            rankings,
+            weights={source.name: source.weight for source in sources},
+            rrf_k=self.config.rrf_k,
+            k=k or self.config.k,
+        )
+        logger.info(
+            f"Federated search over {len(rankings)}/{len(sources)} sources "
+            f"returned {len(fused)} results in "
+            f"{time.perf_counter() - started:.3f}s"
+        )
+        return fused
+
+    async def _embed_query(
+        self, query: str, sources: List[FederatedSource]
+    ) -> Dict[EmbeddingType, List[float]]:
+        """One query vector per embedding model used by vector-capable sources."""
+        embedding_types = list(
+            dict.fromkeys(
+                source.embedding
+                for source in sources
+                if self.store(source).supports_vector_search()
+            )
+        )
+        vectors = await asyncio.gather(
+            *(
+                QueryEmbeddingBatcher.for_embedding_type(embedding).embed_query(query)
+                for embedding in embedding_types
+            )
+        )
+        return dict(zip(embedding_types, vectors))
+
+    async def _search_source(
+        self,
+        source: FederatedSource,
+        query: str,
+        embeddings: Dict[EmbeddingType, List[float]],
+        filter_criteria: Optional[Dict[str, Any]],
+    ) -> Optional[List[Document]]:
+        """Ranked results of one source, or None if it failed or timed out."""
+        started = time.perf_counter()
+        timeout = source.timeout_seconds or self.config.timeout_seconds
+        k = source.k or self.config.per_source_k
+        try:
+            docs = await asyncio.wait_for(
+                self._query_store(source, query, embeddings, k, filter_criteria),
+                timeout,
+            )
+            status = "ok"
+        except asyncio.TimeoutError:
+            docs, status = None, "timeout"
+            logger.warning(f"Federated source {source.name} timed out after {timeout}s")
+        except Exception as e:
+            docs, status = None, "error"
+            logger.warning(f"Federated source {source.name} failed: {e}")
+        self.last_report[source.name] = {
+            "status": status,
+            "results": len(docs or []),
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+        return docs
+
+    async def _query_store(
+        self,
+        source: FederatedSource,
+        query: str,
+        embeddings: Dict[EmbeddingType, List[float]],
+        k: int,
+        filter_criteria: Optional[Dict[str, Any]],
+    ) -> List[Document]:
+        store = self.store(source)
+        await store.get_connection()
+        if source.embedding in embeddings and store.supports_vector_search():
+            result = store.search_by_vector(
+                embeddings[source.embedding], k=k, filter_criteria=filter_criteria
+            )
+        else:
+            result = store.search_similar(query, k=k, filter_criteria=filter_criteria)
+        # Some stores search synchronously
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+class FederatedRetriever(BaseRetriever):
+    """LangChain retriever over a FederatedSearch."""
+
+    search: Any
+    k: Optional[int] = None
+    filter: Optional[Dict[str, Any]] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.search.search_sync(query, self.k, self.filter)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await self.search.search(query, self.k, self.filter)
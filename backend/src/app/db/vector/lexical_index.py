@@ -0,0 +1,663 @@
+"""
+BM25 keyword index kept next to the vector store.
+
+Exact identifiers (ticket keys, error codes, config names) embed poorly, and a
+vector search always costs a query embedding plus an ANN lookup. This index
+holds the same chunks the ingestion pipeline writes to the vector store in a
+local inverted index, so keyword-heavy queries are answered without an
+embedding call and mixed queries can fuse both rankings (see hybrid_rank).
+
+Chunks live in a SQLite file like the NumPy store's sidecar. Postings are
+stored per term in append-only blocks, one per write batch: row numbers are
+delta-encoded and, with the term frequencies, packed at the narrowest integer
+width the block needs. Upserts append blocks, deletes set tombstones, a
+term's blocks are merged once it has ``merge_blocks`` of them, and compact()
+drops dead postings once enough chunks are deleted. Chunk lengths stay in
+memory for scoring. Configuration lives under ``lexical`` in
+application-vector.yaml.
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from app.core.config.framework.settings import settings
+from app.core.utils.logger import get_logger
+
+from .chunk_diff import CHUNK_HASH_KEY, chunk_hash
+from .mmap_index import filter_rows, top_k
+
+logger = get_logger(__name__)
+
+# Words, numbers and compounds such as PROJ-123, max_connections or app.db.pool
+_TOKEN = re.compile(r"[^\W_]+(?:[-_.:/#][^\W_]+)*")
+_SEPARATORS = re.compile(r"[-_.:/#]")
+# Integer widths for packed postings, narrowest first
+_WIDTHS = (np.uint8, np.uint16, np.uint32, np.uint64)
+# Stay below SQLite's bound-parameter limit
+_SQL_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row         INTEGER PRIMARY KEY,
+    id          TEXT NOT NULL UNIQUE,
+    document_id TEXT,
+    source_path TEXT,
+    content     TEXT NOT NULL,
+    metadata    TEXT NOT NULL,
+    length      INTEGER NOT NULL,
+    deleted     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS chunks_document_id ON chunks (document_id);
+CREATE INDEX IF NOT EXISTS chunks_source_path ON chunks (source_path);
+CREATE TABLE IF NOT EXISTS postings (
+    term  TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    data  BLOB NOT NULL,
+    PRIMARY KEY (term, block)
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased terms of ``text``.
+
+    Compound identifiers are kept whole and also split into their parts, so
+    ``max_connections`` matches both the exact name and "max connections".
+    """
+    terms = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        if _SEPARATORS.search(token):
+            terms.extend(part for part in _SEPARATORS.split(token) if part)
+    return terms
+
+
+def looks_like_identifier(token: str) -> bool:
+    """Ticket keys, error codes, dotted or snake_case names, CamelCase."""
+    if not _TOKEN.fullmatch(token):
+        return False
+    has_digit = any(c.isdigit() for c in token)
+    has_alpha = any(c.isalpha() for c in token)
+    camel = any(c.isupper() for c in token[1:]) and any(c.islower() for c in token)
+    return bool(_SEPARATORS.search(token)) or (has_digit and has_alpha) or camel
+
+
+def is_keyword_query(query: str) -> bool:
+    """Whether a query is mostly exact identifiers (best served by BM25)."""
+    tokens = [t.strip("\"'`()[],;?!") for t in query.split()]
+    tokens = [t for t in tokens if t]
+    identifiers = sum(looks_like_identifier(t) for t in tokens)
+    return bool(identifiers) and (identifiers == len(tokens) or len(tokens) <= 3)
+
+
+def encode_postings(rows: np.ndarray, tfs: np.ndarray) -> bytes:
+    """Pack ascending rows (delta-encoded) and their term frequencies."""
+    deltas = np.diff(np.asarray(rows, dtype=np.int64), prepend=0)
+    row_code = _width_code(int(deltas.max()) if len(deltas) else 0)
+    tf_code = _width_code(int(np.max(tfs)) if len(tfs) else 0)
+    return (
+        bytes([row_code << 4 | tf_code])
+        + deltas.astype(_WIDTHS[row_code]).tobytes()
+        + np.asarray(tfs).astype(_WIDTHS[tf_code]).tobytes()
+    )
+
+
+def decode_postings(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows and term frequencies of one packed block."""
+    row_dtype = np.dtype(_WIDTHS[data[0] >> 4])
+    tf_dtype = np.dtype(_WIDTHS[data[0] & 0x0F])
+    count = (len(data) - 1) // (row_dtype.itemsize + tf_dtype.itemsize)
+    split = 1 + count * row_dtype.itemsize
+    rows = np.cumsum(np.frombuffer(data, row_dtype, count, 1), dtype=np.int64)
+    tfs = np.frombuffer(data, tf_dtype, count, split).astype(np.float32)
+    return rows, tfs
+
+
+def _width_code(value: int) -> int:
+    for code, width in enumerate(_WIDTHS):
+        if value <= np.iinfo(width).max:
+            return code
+    raise ValueError(f"Posting value {value} does not fit in 64 bits")
+
+
+def chunk_key(doc: Document) -> str:
+    """
+    Stable identity of a chunk: its document and content hash.
+
+    Re-ingesting unchanged text yields the same key, so the index can tell
+    which chunks of a document are new and which disappeared. Repeated text
+    within one document is indexed once.
+    """
+    content_hash = doc.metadata.get(CHUNK_HASH_KEY) or chunk_hash(doc.page_content)
+    return f"{doc.metadata.get('document_id') or ''}:{content_hash}"
+
+
+@dataclass
+class LexicalIndexConfig:
+    """Location, BM25 parameters and maintenance thresholds."""
+
+    enabled: bool = False
+    path: str = "./volumes/lexical/documents"
+    k1: float = 1.2
+    b: float = 0.75
+    # Merge a term's posting blocks once it has this many
+    merge_blocks: int = 16
+    # Compact once this fraction of the chunks are tombstones
+    compact_threshold: float = 0.2
+
+    @classmethod
+    def from_config(
+        cls, config: Optional[Dict[str, Any]], collection_name: Optional[str] = None
+    ) -> "LexicalIndexConfig":
+        config = config or {}
+        defaults = cls()
+        enabled = config.get("enabled", defaults.enabled)
+        if isinstance(enabled, str):
+            enabled = enabled.strip().lower() in ("1", "true", "yes", "on")
+        root = Path(config.get("path") or Path(defaults.path).parent)
+        return cls(
+            enabled=bool(enabled),
+            path=str(root / str(collection_name or "documents")),
+            k1=float(config.get("k1", defaults.k1)),
+            b=float(config.get("b", defaults.b)),
+            merge_blocks=int(config.get("merge_blocks", defaults.merge_blocks)),
+            compact_threshold=float(
+                config.get("compact_threshold", defaults.compact_threshold)
+            ),
+        )
+
+
+@dataclass
+class LexicalHit:
+    id: str
+    content: str
+    metadata: Dict[str, Any]
+    score: float
+
+    def to_document(self) -> Document:
+        return Document(
+            page_content=self.content,
+            metadata={**self.metadata, "bm25_score": self.score},
+        )
+
+
+class LexicalIndex:
+    """
+    Persistent inverted index with BM25 scoring.
+
+    All methods are thread-safe and blocking; async callers run them in
+    worker threads. Searches read postings under the lock and score outside
+    it.
+    """
+
+    def __init__(self, config: LexicalIndexConfig):
+        self.config = config
+        self.path = Path(config.path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._next_row = 0
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._live_count = 0
+        self._total_length = 0.0
+        self._latencies: deque = deque(maxlen=1024)
+        self._searches = 0
+
+    @property
+    def size(self) -> int:
+        """Live (not deleted) chunks."""
+        return self._live_count
+
+    @property
+    def tombstone_ratio(self) -> float:
+        stored = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return 1 - self._live_count / stored if stored else 0.0
+
+    # Lifecycle
+
+    def open(self) -> None:
+        """Open (or create) the index file and load the chunk lengths."""
+        with self._lock:
+            if self._conn is not None:
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path / "lexical.db"), check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._next_row = conn.execute(
+                "SELECT COALESCE(MAX(row) + 1, 0) FROM chunks"
+            ).fetchone()[0]
+            self._lengths = np.zeros(self._next_row, dtype=np.float32)
+            self._live = np.zeros(self._next_row, dtype=bool)
+            for row, length in conn.execute(
+                "SELECT row, length FROM chunks WHERE deleted = 0"
+            ):
+                self._lengths[row] = length
+                self._live[row] = True
+            self._live_count = int(self._live.sum())
+            self._total_length = float(self._lengths[self._live].sum())
+            logger.info(f"Opened lexical index {self.path}: {self.size} chunks")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+
+    # Writes
+
+    def add(self, docs: Sequence[Document]) -> int:
+        """
+        Index chunks not indexed yet; chunks already present are skipped.
+
+        Returns:
+            Number of chunks added
+        """
+        unique = {chunk_key(doc): doc for doc in docs}
+        with self._lock:
+            existing = self._existing(list(unique))
+            new = [(key, doc) for key, doc in unique.items() if key not in existing]
+            if not new:
+                return 0
+            start = self._next_row
+            records, postings, lengths = [], defaultdict(lambda: ([], [])), []
+            for offset, (key, doc) in enumerate(new):
+                terms = Counter(tokenize(doc.page_content))
+                length = sum(terms.values())
+                metadata = doc.metadata
+                records.append(
+                    (
+                        start + offset,
+                        key,
+                        metadata.get("document_id"),
+                        metadata.get("source_path"),
+                        doc.page_content,
+                        json.dumps(metadata, default=str),
+                        length,
+                    )
+                )
+                lengths.append(length)
+                for term, tf in terms.items():
+                    postings[term][0].append(start + offset)
+                    postings[term][1].append(tf)
+
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO chunks (row, id, document_id, source_path, "
+                    "content, metadata, length) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    records,
+                )
+                self._conn.executemany(
+                    "INSERT INTO postings (term, block, data) VALUES (?, ?, ?)",
+                    (
+                        (term, start, encode_postings(np.array(rows), np.array(tfs)))
+                        for term, (rows, tfs) in postings.items()
+                    ),
+                )
+
+            self._next_row = start + len(new)
+            self._lengths = np.concatenate(
+                [self._lengths, np.asarray(lengths, dtype=np.float32)]
+            )
+            self._live = np.concatenate([self._live, np.ones(len(new), dtype=bool)])
+            self._live_count += len(new)
+            self._total_length += float(sum(lengths))
+            with self._conn:
+                self._merge_terms(list(postings))
+        return len(new)
+
+    def retain(self, docs: Sequence[Document]) -> int:
+        """
+        Delete indexed chunks of the documents in ``docs`` that ``docs`` no
+        longer contains.
+
+        Args:
+            docs: The complete new chunks of one or more documents
+
+        Returns:
+            Number of chunks deleted
+        """
+        keep: Dict[str, set] = defaultdict(set)
+        for doc in docs:
+            if doc.metadata.get("document_id"):
+                keep[doc.metadata["document_id"]].add(chunk_key(doc))
+        stale = []
+        with self._lock:
+            for document_id, kept in keep.items():
+                stale.extend(
+                    row
+                    for row, key in self._conn.execute(
+                        "SELECT row, id FROM chunks WHERE deleted = 0 "
+                        "AND document_id = ?",
+                        (document_id,),
+                    )
+                    if key not in kept
+                )
+            return self._delete_rows(stale)
+
+    def delete_documents(self, document_ids: Iterable[str]) -> int:
+        """Tombstone every chunk of the given documents."""
+        return self._delete_where("document_id", list(document_ids))
+
+    def delete_source(self, source_path: str) -> int:
+        """Tombstone every chunk ingested from ``source_path``."""
+        return self._delete_where("source_path", [source_path])
+
+    def _delete_where(self, column: str, values: List[str]) -> int:
+        with self._lock:
+            rows = []
+            for batch in _chunks(values, _SQL_CHUNK):
+                rows.extend(
+                    row
+                    for (row,) in self._conn.execute(
+                        f"SELECT row FROM chunks WHERE deleted = 0 AND {column} "
+                        f"IN ({', '.join('?' for _ in batch)})",
+                        batch,
+                    )
+                )
+            return self._delete_rows(rows)
+
+    def _delete_rows(self, rows: List[int]) -> int:
+        if not rows:
+            return 0
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET deleted = 1 WHERE row = ?", ((r,) for r in rows)
+            )
+        self._live[rows] = False
+        self._live_count -= len(rows)
+        self._total_length -= float(self._lengths[rows].sum())
+        if self.tombstone_ratio > self.config.compact_threshold:
+            self.compact()
+        return len(rows)
+
+    def _existing(self, keys: List[str]) -> set:
+        existing = set()
+        for batch in _chunks(keys, _SQL_CHUNK):
+            existing.update(
+                key
+                for (key,) in self._conn.execute(
+                    "SELECT id FROM chunks WHERE deleted = 0 "
+                    f"AND id IN ({', '.join('?' for _ in batch)})",
+                    batch,
+                )
+            )
+        return existing
+
+    def _merge_terms(self, terms: List[str]) -> None:
+        """Merge the blocks of terms that reached ``merge_blocks`` blocks."""
+        crowded = []
+        for batch in _chunks(terms, _SQL_CHUNK):
+            crowded.extend(
+                term
+                for (term,) in self._conn.execute(
+                    "SELECT term FROM postings WHERE term IN "
+                    f"({', '.join('?' for _ in batch)}) GROUP BY term "
+                    "HAVING COUNT(*) >= ?",
+                    [*batch, max(2, self.config.merge_blocks)],
+                )
+            )
+        for term in crowded:
+            self._rewrite_term(term)
+
+    def _rewrite_term(self, term: str) -> None:
+        """Replace a term's blocks with one block of its live postings."""
+        blocks = self._conn.execute(
+            "SELECT block, data FROM postings WHERE term = ? ORDER BY block",
+            (term,),
+        ).fetchall()
+        rows, tfs = self._live_postings([data for _, data in blocks])
+        self._conn.execute("DELETE FROM postings WHERE term = ?", (term,))
+        if len(rows):
+            self._conn.execute(
+                "INSERT INTO postings (term, block, data) VALUES (?, ?, ?)",
+                (term, blocks[0][0], encode_postings(rows, tfs)),
+            )
+
+    def _live_postings(self, blocks: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        decoded = [decode_postings(data) for data in blocks]
+        rows = np.concatenate([r for r, _ in decoded])
+        tfs = np.concatenate([t for _, t in decoded])
+        live = self._live[rows]
+        return rows[live], tfs[live]
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Drop deleted chunks and their postings, merging each term's blocks.
+
+        Returns:
+            Chunks removed and chunks kept
+        """
+        with self._lock:
+            removed = self._conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE deleted = 1"
+            ).fetchone()[0]
+            if not removed:
+                return {"removed": 0, "chunks": self.size}
+            terms = [
+                term
+                for (term,) in self._conn.execute("SELECT DISTINCT term FROM postings")
+            ]
+            with self._conn:
+                for term in terms:
+                    self._rewrite_term(term)
+                self._conn.execute("DELETE FROM chunks WHERE deleted = 1")
+            self._conn.execute("VACUUM")
+        logger.info(
+            f"Compacted lexical index {self.path}: removed {removed} chunks, "
+            f"{self.size} remain"
+        )
+        return {"removed": int(removed), "chunks": self.size}
+
+    # Reads
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+    ) -> List[LexicalHit]:
+        """
+        Top ``k`` live chunks by BM25.
+
+        Args:
+            query: Keyword query, tokenized like the indexed text
+            k: Number of results
+            filter_criteria: Metadata equality filters; list values match any
+
+        Returns:
+            Hits, best first
+        """
+        started = time.perf_counter()
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            live, lengths = self._live, self._lengths
+            count, total = self._live_count, self._total_length
+            blocks: Dict[str, List[bytes]] = defaultdict(list)
+            for batch in _chunks(terms, _SQL_CHUNK):
+                for term, data in self._conn.execute(
+                    "SELECT term, data FROM postings WHERE term IN "
+                    f"({', '.join('?' for _ in batch)}) ORDER BY term, block",
+                    batch,
+                ):
+                    blocks[term].append(data)
+            allowed = (
+                filter_rows(self._conn, filter_criteria) if filter_criteria else None
+            )
+
+        hits: List[LexicalHit] = []
+        if count and k > 0 and blocks:
+            rows, scores = self._score(blocks, live, lengths, count, total, allowed, k)
+            with self._lock:
+                hits = self._hits(rows, scores)
+        self._searches += 1
+        self._latencies.append(time.perf_counter() - started)
+        return hits
+
+    def _score(self, blocks, live, lengths, count, total, allowed, k):
+        k1, b = self.config.k1, self.config.b
+        average = total / count
+        all_rows, all_scores = [], []
+        for term_blocks in blocks.values():
+            decoded = [decode_postings(data) for data in term_blocks]
+            rows = np.concatenate([r for r, _ in decoded])
+            tfs = np.concatenate([t for _, t in decoded])
+            keep = rows < len(live)
+            rows, tfs = rows[keep], tfs[keep]
+            keep = live[rows]
+            rows, tfs = rows[keep], tfs[keep]
+            if not len(rows):
+                continue
+            df = len(rows)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * lengths[rows] / average)
+            all_rows.append(rows)
+            all_scores.append(idf * tfs * (k1 + 1) / (tfs + norm))
+        if not all_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows, inverse = np.unique(np.concatenate(all_rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+        if allowed is not None:
+            keep = np.isin(rows, allowed, assume_unique=True)
+            rows, scores = rows[keep], scores[keep]
+        top = top_k(scores, k)
+        return rows[top], scores[top]
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[LexicalHit]:
+        found = {
+            row: (chunk_id, content, metadata)
+            for chunk in _chunks([int(r) for r in rows], _SQL_CHUNK)
+            for row, chunk_id, content, metadata in self._conn.execute(
+                "SELECT row, id, content, metadata FROM chunks WHERE deleted = 0 "
+                f"AND row IN ({', '.join('?' for _ in chunk)})",
+                chunk,
+            )
+        }
+        hits = []
+        for row, score in zip(rows, scores):
+            if int(row) in found:
+                chunk_id, content, metadata = found[int(row)]
+                hits.append(
+                    LexicalHit(chunk_id, content, json.loads(metadata), float(score))
+                )
+        return hits
+
+    def search_documents(
+        self,
+        query: str,
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+    ) -> List[Document]:
+        """search() as LangChain documents with ``bm25_score`` metadata."""
+        return [hit.to_document() for hit in self.search(query, k, filter_criteria)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size on disk and in memory, and search latency."""
+        with self._lock:
+            terms, blocks, postings_bytes = self._conn.execute(
+                "SELECT COUNT(DISTINCT term), COUNT(*), COALESCE(SUM(LENGTH(data)), 0) "
+                "FROM postings"
+            ).fetchone()
+            stored = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            latencies = np.asarray(self._latencies, dtype=np.float64) * 1000
+            return {
+                "path": str(self.path),
+                "chunks": self.size,
+                "deleted_chunks": stored - self.size,
+                "terms": terms,
+                "posting_blocks": blocks,
+                "postings_bytes": postings_bytes,
+                "disk_bytes": sum(
+                    f.stat().st_size for f in self.path.glob("lexical.db*")
+                ),
+                "memory_bytes": self._lengths.nbytes + self._live.nbytes,
+                "avg_chunk_terms": (
+                    round(self._total_length / self.size, 2) if self.size else 0.0
+                ),
+                "searches": self._searches,
+                "latency_ms": {
+                    "avg": round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+                    "p50": (
+                        round(float(np.percentile(latencies, 50)), 3)
+                        if len(latencies)
+                        else 0.0
+                    ),
+                    "p95": (
+                        round(float(np.percentile(latencies, 95)), 3)
+                        if len(latencies)
+                        else 0.0
+                    ),
+                    "max": round(float(latencies.max()), 3) if len(latencies) else 0.0,
+                },
+            }
+
+
+def hybrid_rank(
+    vector_docs: List[Document],
+    keyword_docs: List[Document],
+    k: int,
+    rrf_k: int = 60,
+) -> List[Document]:
+    """
+    Fuse vector and BM25 rankings of the same chunks with reciprocal-rank
+    fusion. Chunks are matched by content, so a chunk found by both searches
+    appears once and ranks above chunks found by only one.
+    """
+    from .federated import reciprocal_rank_fusion
+
+    return reciprocal_rank_fusion(
+        {"vector": vector_docs, "keyword": keyword_docs},
+        rrf_k=rrf_k,
+        k=k,
+        identity=lambda doc: chunk_hash(doc.page_content),
+    )
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(collection_name: Optional[str] = None) -> Optional[LexicalIndex]:
+    """
+    The open lexical index of a collection, or None when disabled.
+
+    Indexes are opened once per process and shared.
+    """
+    config = LexicalIndexConfig.from_config(
+        settings.get_section("vector.lexical", {}), collection_name
+    )
+    if not config.enabled:
+        return None
+    with _indexes_lock:
+        if config.path not in _indexes:
+            index = LexicalIndex(config)
+            index.open()
+            _indexes[config.path] = index
+        return _indexes[config.path]
+
+
+def lexical_index_for(vector_store) -> Optional[LexicalIndex]:
+    """The lexical index kept next to ``vector_store``'s collection, if enabled."""
+    config = getattr(vector_store, "config", None) or {}
+    return get_lexical_index(config.get("collection_name"))
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
@@ -0,0 +1,777 @@
+"""
+Memory-mapped vector index behind the in-process NumPy store.
+
+Vectors live in one append-only matrix file (float32 or float16) mapped with
+``np.memmap``, so the OS page cache rather than the Python heap holds them.
+Chunk text and metadata live in a SQLite sidecar keyed by row number.
+
+Deletes only set a tombstone; compact() rewrites the live rows into a new
+matrix file once enough of the current one is dead. Search is an exact dot
+product over the matrix in blocks, optionally narrowed by an IVF coarse
+quantizer (k-means lists, scanning only the ``nprobe`` nearest) or by
+quantized codes kept in RAM whose candidates are re-ranked from the mapped
+full-precision rows.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.utils.logger import get_logger
+from app.db.vector.quantization import QuantizationConfig, VectorQuantizer, normalize
+
+logger = get_logger(__name__)
+
+VECTOR_DTYPES = {"float32": np.float32, "float16": np.float16}
+METRICS = ("cosine", "dot")
+
+# Metadata keys promoted to indexed columns
+_COLUMN_FILTERS = ("document_id", "source_path")
+_FILTER_KEY = re.compile(r"^[A-Za-z0-9_-]+$")
+# Stay below SQLite's bound-parameter limit
+_SQL_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row         INTEGER PRIMARY KEY,
+    id          TEXT NOT NULL UNIQUE,
+    document_id TEXT,
+    source_path TEXT,
+    content     TEXT NOT NULL,
+    metadata    TEXT NOT NULL,
+    deleted     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS chunks_document_id ON chunks (document_id);
+CREATE INDEX IF NOT EXISTS chunks_source_path ON chunks (source_path);
+CREATE TABLE IF NOT EXISTS index_info (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+@dataclass
+class IVFConfig:
+    """Coarse quantizer settings; off by default, exact search is used."""
+
+    enabled: bool = False
+    # Below this many live rows a full scan is fast enough
+    min_rows: int = 100_000
+    # 0 derives the list count from the row count (sqrt(rows))
+    nlist: int = 0
+    nprobe: int = 8
+    train_sample: int = 65_536
+    iterations: int = 10
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "IVFConfig":
+        config = config or {}
+        defaults = cls()
+        return cls(
+            enabled=_as_bool(config.get("enabled", defaults.enabled)),
+            min_rows=int(config.get("min_rows", defaults.min_rows)),
+            nlist=int(config.get("nlist", defaults.nlist)),
+            nprobe=int(config.get("nprobe", defaults.nprobe)),
+            train_sample=int(config.get("train_sample", defaults.train_sample)),
+            iterations=int(config.get("iterations", defaults.iterations)),
+        )
+
+
+@dataclass
+class MmapIndexConfig:
+    """Where and how one collection's vectors are stored and searched."""
+
+    path: str = "./volumes/numpy_vectors/documents"
+    dimension: int = 1536
+    dtype: str = "float32"
+    metric: str = "cosine"
+    block_size: int = 16_384
+    # Compact once this fraction of the rows are tombstones
+    compact_threshold: float = 0.2
+    ivf: IVFConfig = field(default_factory=IVFConfig)
+    quantization: QuantizationConfig = field(default_factory=QuantizationConfig)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "MmapIndexConfig":
+        config = config or {}
+        defaults = cls()
+        dtype = str(config.get("dtype") or defaults.dtype).lower()
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(
+                f"Unsupported vector dtype '{dtype}': use float32 or float16"
+            )
+        metric = str(config.get("distance") or defaults.metric).lower()
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported distance '{metric}': use cosine or dot")
+        root = Path(config.get("path") or Path(defaults.path).parent)
+        return cls(
+            path=str(root / str(config.get("collection_name") or "documents")),
+            dimension=int(config.get("embedding_dimension", defaults.dimension)),
+            dtype=dtype,
+            metric=metric,
+            block_size=int(config.get("block_size", defaults.block_size)),
+            compact_threshold=float(
+                config.get("compact_threshold", defaults.compact_threshold)
+            ),
+            ivf=IVFConfig.from_config(config.get("ivf")),
+            quantization=QuantizationConfig.from_config(config.get("quantization")),
+        )
+
+
+@dataclass
+class SearchHit:
+    id: str
+    content: str
+    metadata: Dict[str, Any]
+    score: float
+
+
+class IVFCoarseQuantizer:
+    """K-means lists over the rows; a search only scans the nearest lists."""
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self._half_norms = 0.5 * (self.centroids**2).sum(axis=1)
+        self._labels = np.empty(0, dtype=np.int32)
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    @classmethod
+    def train(
+        cls, sample: np.ndarray, nlist: int, iterations: int, seed: int = 0
+    ) -> "IVFCoarseQuantizer":
+        sample = np.asarray(sample, dtype=np.float32)
+        nlist = max(1, min(nlist, len(sample)))
+        rng = np.random.default_rng(seed)
+        quantizer = cls(sample[rng.choice(len(sample), nlist, replace=False)])
+        for _ in range(iterations):
+            labels = quantizer.assign(sample)
+            counts = np.bincount(labels, minlength=nlist)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            sums = np.add.reduceat(sample[np.argsort(labels, kind="stable")], starts)
+            centroids = quantizer.centroids.copy()
+            centroids[filled] = sums / counts[filled, None]
+            quantizer = cls(centroids)
+        return quantizer
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def assign(self, vectors: np.ndarray, block_size: int = 65_536) -> np.ndarray:
+        """Nearest centroid (L2) per row, in blocks to bound memory."""
+        labels = [
+            (vectors[i : i + block_size] @ self.centroids.T - self._half_norms).argmax(
+                axis=1
+            )
+            for i in range(0, len(vectors), block_size)
+        ]
+        return np.concatenate(labels).astype(np.int32) if labels else self._labels[:0]
+
+    def add(self, vectors: np.ndarray) -> None:
+        self._labels = np.concatenate([self._labels, self.assign(vectors)])
+        self._order = None
+
+    def reorder(self, rows: np.ndarray) -> None:
+        """Follow a compaction that kept ``rows`` in this order."""
+        self._labels = self._labels[rows]
+        self._order = None
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Sorted rows of the ``nprobe`` lists nearest to ``query``."""
+        if self._order is None:
+            counts = np.bincount(self._labels, minlength=self.nlist)
+            self._order = np.argsort(self._labels, kind="stable")
+            self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        scores = self.centroids @ query - self._half_norms
+        nearest = np.argsort(-scores)[: max(1, nprobe)]
+        rows = [self._order[self._offsets[c] : self._offsets[c + 1]] for c in nearest]
+        return np.sort(np.concatenate(rows))
+
+
+class MmapVectorIndex:
+    """
+    Append-only, memory-mapped vector matrix with a SQLite metadata sidecar.
+
+    All methods are thread-safe and blocking; the async store runs them in
+    worker threads. Searches score a snapshot of the matrix outside the lock,
+    so they proceed while rows are appended or a compaction is copying.
+    """
+
+    def __init__(self, config: MmapIndexConfig):
+        self.config = config
+        self.path = Path(config.path)
+        self._dtype = np.dtype(VECTOR_DTYPES[config.dtype])
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._vectors: Optional[np.memmap] = None
+        self._vectors_file = "vectors.0.bin"
+        self._count = 0
+        self._deleted = np.zeros(0, dtype=bool)
+        # Bumped by every compaction, which renumbers rows
+        self._generation = 0
+        self._ivf: Optional[IVFCoarseQuantizer] = None
+        self._quantizer: Optional[VectorQuantizer] = None
+        self._compacting = False
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.config.dimension * self._dtype.itemsize
+
+    @property
+    def size(self) -> int:
+        """Live (not deleted) rows."""
+        return self._count - int(self._deleted.sum())
+
+    @property
+    def tombstone_ratio(self) -> float:
+        return float(self._deleted.mean()) if self._count else 0.0
+
+    # Lifecycle
+
+    def open(self) -> None:
+        """Open the sidecar and map the matrix, repairing an interrupted append."""
+        with self._lock:
+            if self._conn is not None:
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path / "metadata.db"), check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._check_layout()
+
+            self._generation = int(self._info("generation") or 0)
+            self._vectors_file = self._info("vectors_file") or self._vectors_file
+            vectors_path = self.path / self._vectors_file
+            vectors_path.touch(exist_ok=True)
+            self._remove_stale_files()
+
+            rows = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks")
+            self._count = rows.fetchone()[0]
+            file_rows = vectors_path.stat().st_size // self._row_bytes
+            if file_rows < self._count:
+                raise RuntimeError(
+                    f"Vector file {vectors_path} has {file_rows} rows, "
+                    f"metadata expects {self._count}"
+                )
+            if file_rows > self._count:
+                # Vectors appended without their metadata commit
+                with open(vectors_path, "r+b") as f:
+                    f.truncate(self._count * self._row_bytes)
+                logger.warning(
+                    f"Dropped {file_rows - self._count} uncommitted rows from "
+                    f"{vectors_path}"
+                )
+
+            self._deleted = np.zeros(self._count, dtype=bool)
+            deleted = conn.execute("SELECT row FROM chunks WHERE deleted = 1")
+            self._deleted[[row for (row,) in deleted]] = True
+            self._remap()
+            self._build_search_structures()
+            logger.info(
+                f"Opened vector index {self.path}: {self.size} live rows, "
+                f"{self.config.dtype}, {self.config.metric}"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+            self._vectors = None
+            self._ivf = None
+            self._quantizer = None
+
+    def _check_layout(self) -> None:
+        """Refuse to reopen files written with another dimension, dtype or metric."""
+        layout = {
+            "dimension": str(self.config.dimension),
+            "dtype": self.config.dtype,
+            "metric": self.config.metric,
+        }
+        for key, value in layout.items():
+            stored = self._info(key)
+            if stored is None:
+                self._set_info(key, value)
+            elif stored != value:
+                raise ValueError(
+                    f"Vector index {self.path} was created with {key}={stored}, "
+                    f"configured {key}={value}"
+                )
+        self._conn.commit()
+
+    def _info(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value FROM index_info WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_info(self, key: str, value: Any) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO index_info (key, value) VALUES (?, ?)",
+            (key, str(value)),
+        )
+
+    def _remove_stale_files(self) -> None:
+        # Old matrices still mapped by a reader (Windows) survive a compaction
+        for stale in self.path.glob("vectors.*.bin"):
+            if stale.name != self._vectors_file:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+
+    def _remap(self) -> None:
+        self._vectors = (
+            np.memmap(
+                self.path / self._vectors_file,
+                dtype=self._dtype,
+                mode="r",
+                shape=(self._count, self.config.dimension),
+            )
+            if self._count
+            else None
+        )
+
+    def _blocks(self, rows: Optional[np.ndarray] = None) -> Iterator[np.ndarray]:
+        """Row ranges (or chunks of ``rows``) of at most block_size rows."""
+        if rows is None:
+            yield from self._full_blocks(self._count)
+            return
+        size = self.config.block_size
+        for start in range(0, len(rows), size):
+            yield rows[start : start + size]
+
+    def _full_blocks(self, count: int) -> Iterator[np.ndarray]:
+        size = self.config.block_size
+        for start in range(0, count, size):
+            yield np.arange(start, min(start + size, count))
+
+    def _read(self, vectors: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            # Contiguous rows: a slice reads sequentially from the mapping
+            return np.asarray(vectors[rows[0] : rows[-1] + 1], dtype=np.float32)
+        return np.asarray(vectors[rows], dtype=np.float32)
+
+    # Search structures
+
+    def _build_search_structures(self) -> None:
+        """(Re)build the IVF lists and quantized codes over the current rows."""
+        self._ivf = None
+        self._quantizer = None
+        if self._vectors is None:
+            return
+        ivf = self.config.ivf
+        if ivf.enabled and self.size >= ivf.min_rows:
+            nlist = ivf.nlist or int(np.sqrt(self.size))
+            sample = self._read(self._vectors, self._sample_rows(ivf.train_sample))
+            coarse = IVFCoarseQuantizer.train(sample, nlist, ivf.iterations)
+            for rows in self._blocks():
+                coarse.add(self._read(self._vectors, rows))
+            self._ivf = coarse
+            logger.info(f"Trained IVF coarse quantizer with {coarse.nlist} lists")
+        if self.config.quantization.enabled:
+            quantizer = VectorQuantizer(self.config.quantization)
+            quantizer.fit_transform(self._read(self._vectors, self._sample_rows()))
+            quantizer.codes = None
+            for rows in self._blocks():
+                quantizer.add(self._read(self._vectors, rows))
+            self._quantizer = quantizer
+
+    def _sample_rows(self, limit: int = 65_536) -> np.ndarray:
+        live = np.flatnonzero(~self._deleted)
+        if len(live) <= limit:
+            return live
+        rng = np.random.default_rng(0)
+        return np.sort(rng.choice(live, limit, replace=False))
+
+    # Writes
+
+    def add(
+        self,
+        contents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """Append rows and return their IDs."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if len(contents) != len(metadatas) or len(contents) != len(matrix):
+            raise ValueError("contents, metadatas and vectors must have equal length")
+        if not len(matrix):
+            return []
+        if matrix.ndim != 2 or matrix.shape[1] != self.config.dimension:
+            raise ValueError(
+                f"Expected vectors of dimension {self.config.dimension}, "
+                f"got shape {matrix.shape}"
+            )
+        if self.config.metric == "cosine":
+            matrix = normalize(matrix)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in contents]
+
+        with self._lock:
+            start = self._count
+            records = [
+                (
+                    start + i,
+                    ids[i],
+                    metadata.get("document_id"),
+                    metadata.get("source_path"),
+                    content,
+                    json.dumps(metadata, default=str),
+                )
+                for i, (content, metadata) in enumerate(zip(contents, metadatas))
+            ]
+            vectors_path = self.path / self._vectors_file
+            with open(vectors_path, "ab") as f:
+                f.write(matrix.astype(self._dtype).tobytes())
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT INTO chunks (row, id, document_id, source_path, "
+                        "content, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                        records,
+                    )
+            except Exception:
+                with open(vectors_path, "r+b") as f:
+                    f.truncate(start * self._row_bytes)
+                raise
+
+            self._count += len(matrix)
+            self._deleted = np.concatenate(
+                [self._deleted, np.zeros(len(matrix), dtype=bool)]
+            )
+            self._remap()
+            self._extend_search_structures(matrix)
+        return ids
+
+    def _extend_search_structures(self, matrix: np.ndarray) -> None:
+        ivf = self.config.ivf
+        crosses_ivf = ivf.enabled and self._ivf is None and self.size >= ivf.min_rows
+        missing_codes = self.config.quantization.enabled and self._quantizer is None
+        if crosses_ivf or missing_codes:
+            self._build_search_structures()
+            return
+        if self._ivf is not None:
+            self._ivf.add(matrix)
+        if self._quantizer is not None:
+            self._quantizer.add(matrix)
+
+    def delete_document(self, document_id: str) -> int:
+        """Tombstone the rows of a chunk ID or of every chunk of a document."""
+        return self._delete("id = ? OR document_id = ?", (document_id, document_id))
+
+    def delete_source(self, source_path: str) -> int:
+        """Tombstone every chunk ingested from ``source_path``."""
+        return self._delete("source_path = ?", (source_path,))
+
+    def delete_ids(self, chunk_ids: Sequence[str]) -> int:
+        """Tombstone individual chunks by ID."""
+        deleted = 0
+        for batch in _chunks(list(chunk_ids), 500):
+            placeholders = ", ".join("?" * len(batch))
+            deleted += self._delete(f"id IN ({placeholders})", tuple(batch))
+        return deleted
+
+    def _delete(self, where: str, params: tuple) -> int:
+        with self._lock:
+            rows = [
+                row
+                for (row,) in self._conn.execute(
+                    f"SELECT row FROM chunks WHERE deleted = 0 AND ({where})", params
+                )
+            ]
+            if rows:
+                with self._conn:
+                    self._conn.execute(
+                        f"UPDATE chunks SET deleted = 1 WHERE deleted = 0 AND ({where})",
+                        params,
+                    )
+                self._deleted[rows] = True
+        return len(rows)
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite the live rows into a new matrix file and renumber them.
+
+        The copy runs outside the lock against a snapshot; rows appended or
+        deleted meanwhile are reconciled when the new file is swapped in.
+
+        Returns:
+            Rows removed and rows kept
+        """
+        with self._lock:
+            if self._compacting or not self._deleted.any():
+                return {"removed": 0, "rows": self._count}
+            self._compacting = True
+            snapshot_count = self._count
+            keep = np.flatnonzero(~self._deleted)
+            vectors = self._vectors
+            generation = self._generation + 1
+
+        target = self.path / f"vectors.{generation}.bin"
+        try:
+            with open(target, "wb") as f:
+                for rows in self._blocks(keep):
+                    f.write(np.asarray(vectors[rows]).tobytes())
+
+            with self._lock:
+                appended = snapshot_count + np.flatnonzero(
+                    ~self._deleted[snapshot_count:]
+                )
+                if len(appended):
+                    with open(target, "ab") as f:
+                        f.write(np.asarray(self._vectors[appended]).tobytes())
+                order = np.concatenate([keep, appended])
+                removed = np.setdiff1d(np.arange(self._count), order)
+                with self._conn:
+                    self._conn.executemany(
+                        "DELETE FROM chunks WHERE row = ?",
+                        ((int(row),) for row in removed),
+                    )
+                    # Ascending order never collides: new <= old for every row
+                    self._conn.executemany(
+                        "UPDATE chunks SET row = ? WHERE row = ?",
+                        (
+                            (new, int(old))
+                            for new, old in enumerate(order)
+                            if new != old
+                        ),
+                    )
+                    self._set_info("vectors_file", target.name)
+                    self._set_info("generation", generation)
+
+                previous = self.path / self._vectors_file
+                self._vectors_file = target.name
+                self._generation = generation
+                self._count = len(order)
+                self._deleted = self._deleted[order]
+                self._remap()
+                if self._ivf is not None:
+                    self._ivf.reorder(order)
+                if self._quantizer is not None:
+                    self._quantizer.codes = self._quantizer.codes[order]
+        except Exception:
+            target.unlink(missing_ok=True)
+            raise
+        finally:
+            self._compacting = False
+
+        try:
+            previous.unlink()
+        except OSError:
+            # Still mapped by a reader on Windows; removed on the next open
+            pass
+        logger.info(
+            f"Compacted vector index {self.path}: removed {len(removed)} rows, "
+            f"{len(order)} remain"
+        )
+        return {"removed": int(len(removed)), "rows": int(len(order))}
+
+    # Reads
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[SearchHit]:
+        """
+        Top ``k`` live rows by dot product (cosine for normalised vectors).
+
+        Args:
+            query: Query vector
+            k: Number of results
+            filter_criteria: Metadata equality filters; list values match any
+            nprobe: IVF lists to scan, defaults to the configured nprobe
+
+        Returns:
+            Hits, best first
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if self.config.metric == "cosine":
+            query = normalize(query[None, :])[0]
+        # A compaction renumbers rows between scoring and the metadata fetch
+        for _ in range(3):
+            with self._lock:
+                generation = self._generation
+                vectors, deleted = self._vectors, self._deleted[: self._count]
+                ivf, quantizer = self._ivf, self._quantizer
+                allowed = (
+                    self._filter_rows(filter_criteria) if filter_criteria else None
+                )
+            if vectors is None or k <= 0:
+                return []
+
+            rows, scores = self._score(
+                vectors, deleted, query, k, allowed, ivf, quantizer, nprobe
+            )
+            with self._lock:
+                if generation == self._generation:
+                    return self._hits(rows, scores)
+        raise RuntimeError(f"Vector index {self.path} kept changing during search")
+
+    def _score(self, vectors, deleted, query, k, allowed, ivf, quantizer, nprobe):
+        rows = allowed
+        if ivf is not None:
+            probed = ivf.probe(query, nprobe or self.config.ivf.nprobe)
+            probed = probed[probed < len(deleted)]
+            rows = (
+                probed
+                if rows is None
+                else np.intersect1d(rows, probed, assume_unique=True)
+            )
+        if rows is not None and not len(rows):
+            return rows, np.empty(0, dtype=np.float32)
+
+        if quantizer is not None and quantizer.codes is not None:
+            if rows is None:
+                # Codes appended after the snapshot are ignored
+                candidates = np.arange(len(deleted))
+                approximate = quantizer.approximate_scores(query)[: len(deleted)]
+            else:
+                candidates = rows
+                approximate = quantizer.approximate_scores(query, rows)
+            approximate[deleted[candidates]] = -np.inf
+            config = self.config.quantization
+            top = top_k(approximate, config.candidates(k) if config.rescore else k)
+            if not config.rescore:
+                return candidates[top], approximate[top]
+            rows = np.sort(candidates[top])
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        blocks = (
+            self._blocks(rows) if rows is not None else self._full_blocks(len(deleted))
+        )
+        for block in blocks:
+            scores = self._read(vectors, block) @ query
+            scores[deleted[block]] = -np.inf
+            best_rows = np.concatenate([best_rows, block])
+            best_scores = np.concatenate([best_scores, scores])
+            top = top_k(best_scores, k)
+            best_rows, best_scores = best_rows[top], best_scores[top]
+        return best_rows, best_scores
+
+    def _filter_rows(self, filter_criteria: Dict[str, Any]) -> np.ndarray:
+        """Rows whose metadata matches every filter, via the sidecar."""
+        return filter_rows(self._conn, filter_criteria)
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[SearchHit]:
+        found = {
+            row: (chunk_id, content, metadata)
+            for chunk in _chunks([int(r) for r in rows], _SQL_CHUNK)
+            for row, chunk_id, content, metadata in self._conn.execute(
+                "SELECT row, id, content, metadata FROM chunks WHERE deleted = 0 "
+                f"AND row IN ({', '.join('?' for _ in chunk)})",
+                chunk,
+            )
+        }
+        hits = []
+        for row, score in zip(rows, scores):
+            if int(row) in found and np.isfinite(score):
+                chunk_id, content, metadata = found[int(row)]
+                hits.append(
+                    SearchHit(chunk_id, content, json.loads(metadata), float(score))
+                )
+        return hits
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a chunk ID, or of the first chunk of a document."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT metadata FROM chunks WHERE deleted = 0 "
+                "AND (id = ? OR document_id = ?) ORDER BY row LIMIT 1",
+                (document_id, document_id),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def chunk_hashes(self, document_id: str) -> List[Tuple[str, Optional[str]]]:
+        """``(id, chunk_hash)`` of every live chunk of a document."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, json_extract(metadata, '$.chunk_hash') FROM chunks "
+                "WHERE deleted = 0 AND document_id = ?",
+                (document_id,),
+            ).fetchall()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "rows": self._count,
+                "live_rows": self.size,
+                "tombstone_ratio": round(self.tombstone_ratio, 4),
+                "dimension": self.config.dimension,
+                "dtype": self.config.dtype,
+                "metric": self.config.metric,
+                "matrix_bytes": self._count * self._row_bytes,
+                "ivf_lists": self._ivf.nlist if self._ivf is not None else 0,
+                "quantization": self.config.quantization.mode,
+                "quantized_bytes": (
+                    self._quantizer.memory_bytes() if self._quantizer else 0
+                ),
+            }
+
+
+def filter_rows(
+    conn: sqlite3.Connection, filter_criteria: Dict[str, Any]
+) -> np.ndarray:
+    """
+    Sorted live rows of a ``chunks`` sidecar table matching every filter.
+
+    ``document_id`` and ``source_path`` use their indexed columns; other keys
+    are read from the JSON metadata. List values match any of their items.
+    """
+    clauses, params = ["deleted = 0"], []
+    for key, value in filter_criteria.items():
+        if not _FILTER_KEY.match(str(key)):
+            raise ValueError(f"Unsupported metadata filter key: {key!r}")
+        column = (
+            key if key in _COLUMN_FILTERS else f"json_extract(metadata, '$.\"{key}\"')"
+        )
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        values = [int(v) if isinstance(v, bool) else v for v in values]
+        if value is None:
+            clauses.append(f"{column} IS NULL")
+            continue
+        clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    rows = conn.execute(
+        f"SELECT row FROM chunks WHERE {' AND '.join(clauses)} ORDER BY row",
+        params,
+    )
+    return np.fromiter((row for (row,) in rows), dtype=np.int64)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` best finite scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top[np.isfinite(scores[top])]
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
@@ -0,0 +1,260 @@
+"""
+In-process vector store on a memory-mapped NumPy matrix.
+
+Serves retrieval for development, the desktop build and small tenants
+without running Qdrant, Postgres or Chroma: vectors and metadata live in
+local files (see mmap_index) and searches are vectorized dot products in
+this process, with no network hop. Configuration lives under ``numpy`` in
+application-vector.yaml.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from langchain.schema import Document
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.retrievers import BaseRetriever
+
+from app.core.config.framework.settings import settings
+from app.db.vector.embeddings.embedding import EmbeddingFactory
+
+from ...core.constants import EmbeddingType, VectorDBType
+from ...core.utils.logger import get_logger
+from .base import DocumentMetadata, VectorDB
+from .chunk_diff import StoredChunks, group_stored_chunks
+from .mmap_index import MmapIndexConfig, MmapVectorIndex
+from .providers.db_provider import VectorDBRegistry
+
+logger = get_logger(__name__)
+
+
+@VectorDBRegistry.register(VectorDBType.NUMPY)
+class NumpyVectorDB(VectorDB):
+    """Memory-mapped NumPy vector store running in the application process."""
+
+    def __init__(self):
+        super().__init__()
+        self._compaction: Optional[asyncio.Task] = None
+
+    def get_vector_db_config(self) -> Dict[str, Any]:
+        """No connection manager: the store reads its yaml block directly."""
+        return settings.get_section("vector.numpy", {}) or {}
+
+    async def _create_connection(self) -> MmapVectorIndex:
+        """Open (or create) the collection's index files."""
+        index = MmapVectorIndex(MmapIndexConfig.from_config(self.config))
+        # Opening may train the IVF lists and quantized codes
+        await asyncio.to_thread(index.open)
+        return index
+
+    async def _close_connection(self):
+        if self._compaction is not None and not self._compaction.done():
+            await asyncio.wait([self._compaction])
+        self._connection.close()
+        logger.info("Closed NumPy vector store.")
+
+    async def save_and_embed(
+        self, embedding_type: EmbeddingType, docs: List[Document]
+    ) -> List[str]:
+        """Save documents and generate embeddings."""
+        try:
+            embeddings = await self._embed_documents(embedding_type, docs)
+            return await self.add_embedded_documents(docs, embeddings)
+
+        except Exception as e:
+            logger.error(f"Failed to save documents to NumPy store: {str(e)}")
+            raise
+
+    async def add_embedded_documents(
+        self, docs: List[Document], embeddings: List[List[float]]
+    ) -> List[str]:
+        """Append documents with precomputed vectors."""
+        index = await self.get_connection()
+        embedded_at = datetime.now().isoformat()
+        return await asyncio.to_thread(
+            index.add,
+            [doc.page_content for doc in docs],
+            [{**doc.metadata, "embedded_at": embedded_at} for doc in docs],
+            embeddings,
+        )
+
+    async def search_similar(
+        self,
+        query: str,
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Document]:
+        """
+        Search for similar documents.
+
+        Args:
+            query: Search query text
+            k: Number of results to return
+            filter_criteria: Metadata equality filters; list values match any
+            nprobe: IVF lists to scan, when the coarse quantizer is enabled
+
+        Returns:
+            List of similar documents, with their similarity in metadata
+        """
+        query_embedding = await self._embed_query(EmbeddingType.DEFAULT, query)
+        return await self.search_by_vector(query_embedding, k, filter_criteria, nprobe)
+
+    async def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Document]:
+        """Search with a precomputed query vector."""
+        index = await self.get_connection()
+        hits = await asyncio.to_thread(
+            index.search, embedding, k, filter_criteria, nprobe
+        )
+        return [self._to_document(hit) for hit in hits]
+
+    def _to_document(self, hit) -> Document:
+        return Document(
+            page_content=hit.content,
+            metadata={
+                **hit.metadata,
+                "_id": hit.id,
+                "_collection_name": self.config.get("collection_name"),
+                "similarity": hit.score,
+            },
+        )
+
+    def as_retriever(self, **kwargs) -> BaseRetriever:
+        """Return the store as a LangChain retriever."""
+        return NumpyStoreRetriever(
+            store=self, search_kwargs=kwargs.get("search_kwargs") or {}
+        )
+
+    async def delete_by_document_id(self, document_id: str) -> bool:
+        """Tombstone all chunks of a document, compacting in the background."""
+        try:
+            index = await self.get_connection()
+            deleted = await asyncio.to_thread(index.delete_document, document_id)
+            logger.info(f"Deleted {deleted} chunks of document {document_id}")
+            self._schedule_compaction(index)
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to delete document {document_id}: {str(e)}")
+            return False
+
+    async def delete_document_by_file_path(self, source_path: str) -> int:
+        """Tombstone every chunk ingested from a source path."""
+        index = await self.get_connection()
+        deleted = await asyncio.to_thread(index.delete_source, source_path)
+        self._schedule_compaction(index)
+        return deleted
+
+    async def get_chunk_hashes(self, document_id: str) -> StoredChunks:
+        index = await self.get_connection()
+        return group_stored_chunks(
+            await asyncio.to_thread(index.chunk_hashes, document_id)
+        )
+
+    async def delete_chunks(self, chunk_ids: List[str]) -> int:
+        index = await self.get_connection()
+        deleted = await asyncio.to_thread(index.delete_ids, chunk_ids)
+        self._schedule_compaction(index)
+        return deleted
+
+    def _schedule_compaction(self, index: MmapVectorIndex) -> None:
+        if index.tombstone_ratio < index.config.compact_threshold:
+            return
+        if self._compaction is not None and not self._compaction.done():
+            return
+        self._compaction = asyncio.create_task(asyncio.to_thread(index.compact))
+        self._compaction.add_done_callback(_log_compaction_failure)
+
+    async def compact(self) -> Dict[str, int]:
+        """Compact now, regardless of the tombstone ratio."""
+        index = await self.get_connection()
+        return await asyncio.to_thread(index.compact)
+
+    async def get_index_stats(self) -> Dict[str, Any]:
+        index = await self.get_connection()
+        return await asyncio.to_thread(index.stats)
+
+    async def get_document_metadata(
+        self, document_id: str
+    ) -> Optional[DocumentMetadata]:
+        """Get metadata for a document."""
+        try:
+            index = await self.get_connection()
+            metadata = await asyncio.to_thread(index.get, document_id)
+            if metadata is None:
+                return None
+
+            return DocumentMetadata(
+                document_id=document_id,
+                source_path=metadata.get("source_path", ""),
+                file_type=metadata.get("file_type", ""),
+                embedded_at=datetime.fromisoformat(
+                    metadata.get("embedded_at", datetime.now().isoformat())
+                ),
+                custom_metadata=metadata.get("custom_metadata", {}),
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to get metadata for document {document_id}: {str(e)}")
+            return None
+
+    async def update_document(
+        self, document_id: str, updated_doc: Document, embedding_type: EmbeddingType
+    ) -> bool:
+        """Update an existing document, re-embedding only if its content changed."""
+        try:
+            diff = await self.sync_document_chunks(
+                document_id, [updated_doc], embedding_type
+            )
+            return bool(diff.added or diff.unchanged)
+
+        except Exception as e:
+            logger.error(f"Failed to update document {document_id}: {str(e)}")
+            return False
+
+
+def _log_compaction_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background vector compaction failed: {task.exception()}")
+
+
+class NumpyStoreRetriever(BaseRetriever):
+    """LangChain retriever over a NumpyVectorDB."""
+
+    store: Any
+    search_kwargs: Dict[str, Any] = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # Synchronous chains: embed and search in the calling thread
+        if self.store._connection is None:
+            index = MmapVectorIndex(MmapIndexConfig.from_config(self.store.config))
+            index.open()
+            self.store._connection = index
+        model = EmbeddingFactory.get_embedding_model(EmbeddingType.DEFAULT)
+        hits = self.store._connection.search(
+            model.embed_query(query),
+            self.search_kwargs.get("k", 4),
+            self.search_kwargs.get("filter"),
+        )
+        return [self.store._to_document(hit) for hit in hits]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await self.store.search_similar(
+            query,
+            k=self.search_kwargs.get("k", 4),
+            filter_criteria=self.search_kwargs.get("filter"),
+        )
@@ -14,9 +14,12 @@ from app.db.vector.embeddings.embedding import EmbeddingFactory
 from app.infrastructure.connections.factory.connection_factory import ConnectionFactory
 
 from ...core.constants import ConnectionType, EmbeddingType, VectorDBType
+from ..repositories.pgvector_index import PgVectorIndexConfig
 from ..repositories.pgvector_repo import PgVectorRepository
 from .base import VectorDB
+from .chunk_diff import StoredChunks, group_stored_chunks
 from .providers.db_provider import VectorDBRegistry
+from .quantization import QuantizationConfig
 
 
 @VectorDBRegistry.register(VectorDBType.PGVECTOR)
@@ -24,9 +27,10 @@ class PgVectorDB(VectorDB):
     """PostgreSQL with pgvector implementation."""
 
     def __init__(self):
+        # get_vector_db_config() runs in super().__init__ and sets the manager
+        self._connection_manager = None
         super().__init__()
         self._repo: Optional[PgVectorRepository] = None
-        self._connection_manager = None
 
     def get_vector_db_config(self) -> Dict[str, Any]:
         """Get vector database configuration via connection manager."""
@@ -47,13 +51,27 @@ class PgVectorDB(VectorDB):
         # Use the connection manager to get the PostgreSQL connection
         self._connection = await self._connection_manager.connect()
 
-        # Initialize the repository with the connection
-        self._repo = PgVectorRepository(self._connection)
+        # The repository runs on the manager's pooled, codec-enabled connections
+        self._repo = PgVectorRepository(
+            await self._connection_manager.get_pool(),
+            distance_strategy=self.config.get("distance_strategy", "cosine"),
+            insert_method=self.config.get("insert_method", "copy"),
+            insert_batch_size=int(self.config.get("insert_batch_size", 1000)),
+            index_config=PgVectorIndexConfig.from_config(self.config.get("index")),
+            quantization=QuantizationConfig.from_config(
+                self.config.get("quantization")
+            ),
+            embedding_dimension=self.config.get("embedding_dimension", 1536),
+        )
         await self._repo.create_collection(
             self.config["collection_name"], self.config.get("embedding_dimension", 1536)
         )
         return self._connection
 
+    def _connection_is_open(self) -> bool:
+        # Disconnecting the manager closes this loop's connection and pool
+        return self._repo is not None and not self._connection.is_closed()
+
     async def _close_connection(self):
         """Close connection through the connection manager."""
         if self._connection_manager:
@@ -82,44 +100,69 @@ class PgVectorDB(VectorDB):
     async def save_and_embed(
         self, embedding_type: EmbeddingType, docs: List[Document]
     ) -> List[str]:
-        embedding_model = EmbeddingFactory.get_embedding_model(embedding_type)
-        ids, embeddings, enhanced_docs = [], [], []
+        ids, enhanced_docs = [], []
 
         for doc in docs:
             doc_id = str(uuid.uuid4())
             metadata = {
+                "document_id": doc_id,
                 **doc.metadata,
                 "embedded_at": datetime.now().isoformat(),
-                "document_id": doc_id,
             }
             enhanced_docs.append(
                 Document(page_content=doc.page_content, metadata=metadata)
             )
-            embeddings.append(embedding_model.embed_query(doc.page_content))
             ids.append(doc_id)
 
+        embeddings = await self._embed_documents(embedding_type, docs)
         await self._repo.add_documents(
             self.config["collection_name"], enhanced_docs, embeddings, ids
         )
         return ids
 
+    async def add_embedded_documents(
+        self, docs: List[Document], embeddings: List[List[float]]
+    ) -> List[str]:
+        ids, enhanced_docs = [], []
+        for doc in docs:
+            doc_id = str(uuid.uuid4())
+            enhanced_docs.append(
+                Document(
+                    page_content=doc.page_content,
+                    metadata={
+                        "document_id": doc_id,
+                        **doc.metadata,
+                        "embedded_at": datetime.now().isoformat(),
+                    },
+                )
+            )
+            ids.append(doc_id)
+
+        await self._repo.add_documents(
+            self.config["collection_name"], enhanced_docs, list(embeddings), ids
+        )
+        return ids
+
     async def update_document(
         self, document_id: str, updated_doc: Document, embedding_type: EmbeddingType
     ) -> bool:
-        embedding_model = EmbeddingFactory.get_embedding_model(embedding_type)
-        new_embedding = embedding_model.embed_query(updated_doc.page_content)
-        enhanced_doc = Document(
-            page_content=updated_doc.page_content,
-            metadata={
-                **updated_doc.metadata,
-                "document_id": document_id,
-                "updated_at": datetime.now().isoformat(),
-            },
+        """Update a document, re-embedding only if its content changed."""
+        updated_doc.metadata["updated_at"] = datetime.now().isoformat()
+        diff = await self.sync_document_chunks(
+            document_id, [updated_doc], embedding_type
         )
-        return await self._repo.update_document(
-            self.config["collection_name"], document_id, enhanced_doc, new_embedding
+        return bool(diff.added or diff.unchanged)
+
+    async def get_chunk_hashes(self, document_id: str) -> StoredChunks:
+        return group_stored_chunks(
+            await self._repo.get_chunk_hashes(
+                self.config["collection_name"], document_id
+            )
         )
 
+    async def delete_chunks(self, chunk_ids: List[str]) -> int:
+        return await self._repo.delete_chunks(self.config["collection_name"], chunk_ids)
+
     async def delete_by_document_id(self, document_id: str) -> bool:
         return await self._repo.delete_document(
             self.config["collection_name"], document_id
@@ -131,15 +174,43 @@ class PgVectorDB(VectorDB):
         )
 
     async def search_similar(
-        self, query: str, k: int = 5, filter_criteria: Optional[Dict[str, Any]] = None
+        self,
+        query: str,
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> List[Document]:
+        query_embedding = await self._embed_query(EmbeddingType.OPENAI, query)
+        return await self.search_by_vector(
+            query_embedding, k, filter_criteria, ef_search=ef_search, probes=probes
+        )
+
+    async def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
     ) -> List[Document]:
-        embedding_model = EmbeddingFactory.get_embedding_model(EmbeddingType.OPENAI)
-        query_embedding = embedding_model.embed_query(query)
         return await self._repo.search_similar(
             self.config["collection_name"],
-            query_embedding,
+            embedding,
             k=k,
             filter_criteria=filter_criteria,
+            ef_search=ef_search,
+            probes=probes,
+        )
+
+    async def get_index_stats(self) -> Dict[str, Any]:
+        """Row count plus definition and size of each index on the collection."""
+        return await self._repo.get_index_stats(self.config["collection_name"])
+
+    async def reindex(self, concurrently: bool = True) -> Dict[str, Any]:
+        """Build, rebuild or REINDEX the vector index to match the configuration."""
+        return await self._repo.reindex(
+            self.config["collection_name"], concurrently=concurrently
         )
 
     def as_retriever(self, embedding_type: EmbeddingType, **kwargs):
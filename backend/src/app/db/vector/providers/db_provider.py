@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Optional
 
+from app.core.config.framework.settings import settings
 from app.core.constants import VectorDBType
 from app.core.utils.logger import get_logger
 from app.db.vector.base import VectorDB
@@ -59,5 +60,19 @@ class VectorStoreFactory:
 
     @classmethod
     def get_default_vector_store(cls) -> VectorDB:
-        """Get the default vector store."""
-        return cls.get_vector_store(VectorDBType.QDRANT)
+        """Get the vector store configured under ``vector.default.provider``."""
+        return cls.get_vector_store(cls.default_vector_db_type())
+
+    @staticmethod
+    def default_vector_db_type() -> VectorDBType:
+        """The configured default provider, falling back to Qdrant."""
+        provider = settings.get_section("vector.default.provider")
+        try:
+            return (
+                VectorDBType(str(provider).lower()) if provider else VectorDBType.QDRANT
+            )
+        except ValueError:
+            logger.warning(
+                f"Unknown default vector provider '{provider}', using qdrant"
+            )
+            return VectorDBType.QDRANT
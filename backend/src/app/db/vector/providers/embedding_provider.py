@@ -1,10 +1,16 @@
+import hashlib
+import json
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from app.core.config.framework.settings import settings
 from app.core.config.utils.config_converter import dynamic_config_to_dict
 from app.core.constants import EmbeddingType
 from app.core.utils.logger import get_logger
+from app.db.vector.embeddings.embedding_cache import wrap_with_cache
 
 logger = get_logger(__name__)
 
@@ -120,6 +126,56 @@ class DictConfigProvider(EmbeddingConfigProvider):
         return self._configs[embedding_type]
 
 
+@dataclass
+class _ModelEntry:
+    """A constructed embedding model and what it cost to build."""
+
+    model: Any
+    embedding_type: EmbeddingType
+    load_seconds: float
+    rss_delta_bytes: Optional[int]
+    created_at: float
+    uses: int = 0
+
+    def describe(self) -> Dict[str, Any]:
+        underlying = getattr(self.model, "underlying", self.model)
+        return {
+            "embedding_type": self.embedding_type.value,
+            "model_class": underlying.__class__.__name__,
+            "load_seconds": round(self.load_seconds, 3),
+            "parameter_bytes": _parameter_bytes(underlying),
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "uses": self.uses,
+            "age_seconds": round(time.time() - self.created_at, 1),
+        }
+
+
+def _current_rss() -> Optional[int]:
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    """Size of the weights of local (torch) models; None for API clients."""
+    client = getattr(model, "client", None)
+    parameters = getattr(client, "parameters", None)
+    if not callable(parameters):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return None
+
+
+def _config_fingerprint(config: Dict[str, Any]) -> str:
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
 class EmbeddingFactory:
     """
     Factory for creating embedding models with pluggable configuration strategy.
@@ -134,6 +190,12 @@ class EmbeddingFactory:
         SettingsConfigProvider()
     )  # Default provider
 
+    # Constructed models keyed by (type, config fingerprint). Local models load
+    # their weights once per process instead of once per call.
+    _instances: Dict[Tuple[EmbeddingType, str], _ModelEntry] = {}
+    _instances_lock = threading.RLock()
+    _creation_locks: Dict[Tuple[EmbeddingType, str], threading.Lock] = {}
+
     @classmethod
     def register(cls, name: EmbeddingType):
         """
@@ -148,6 +210,7 @@ class EmbeddingFactory:
 
         def decorator(func: Callable[[Dict[str, Any]], Any]):
             cls._registry[name] = func
+            cls.clear_models(name)
             logger.info(f"Registered embedding creator for type: {name}")
             return func
 
@@ -165,6 +228,8 @@ class EmbeddingFactory:
             provider: The config provider to use
         """
         cls._config_provider = provider
+        # Instances were built from the previous provider's configuration
+        cls.clear_models()
         logger.info(f"Set embedding config provider to: {provider.__class__.__name__}")
 
     @classmethod
@@ -173,7 +238,13 @@ class EmbeddingFactory:
         Get or create an embedding model by type.
 
         The factory retrieves configuration from the configured provider
-        and passes it to the appropriate creator function.
+        and passes it to the appropriate creator function. Unless disabled
+        under embeddings.cache, the model is wrapped in CachedEmbeddings so
+        texts embedded before are served from the embedding cache.
+
+        Constructed models are kept in a thread-safe registry keyed by type and
+        configuration, so repeated calls return the same instance and model
+        weights are loaded once. Use reload() after changing configuration.
 
         Args:
             embedding_type: Type of embedding to create
@@ -191,17 +262,170 @@ class EmbeddingFactory:
                 f"Available types: {available_types}"
             )
 
+        # Delegate configuration retrieval to the config provider
+        config = cls._config_provider.get_config(embedding_type)
+        key = (embedding_type, _config_fingerprint(config))
+
+        entry = cls._instances.get(key)
+        if entry is None:
+            with cls._instances_lock:
+                creation_lock = cls._creation_locks.setdefault(key, threading.Lock())
+            # One thread builds a given model; others wait for it instead of
+            # loading the same weights in parallel
+            with creation_lock:
+                entry = cls._instances.get(key)
+                if entry is None:
+                    entry = cls._create_entry(embedding_type, config)
+                    with cls._instances_lock:
+                        cls._instances[key] = entry
+        entry.uses += 1
+        return entry.model
+
+    @classmethod
+    def _create_entry(
+        cls, embedding_type: EmbeddingType, config: Dict[str, Any]
+    ) -> _ModelEntry:
         logger.info(f"Creating embedding model for type: {embedding_type}")
+        rss_before = _current_rss()
+        started = time.perf_counter()
         try:
-            # Delegate configuration retrieval to the config provider
-            config = cls._config_provider.get_config(embedding_type)
-
             # Call the registered creator with the configuration
             embedding_model = cls._registry[embedding_type](config)
-
-            logger.info(f"Successfully created {embedding_type} embedding model")
-            return embedding_model
-
+            embedding_model = wrap_with_cache(embedding_model, embedding_type, config)
         except Exception as e:
             logger.error(f"Failed to initialize {embedding_type} embedding: {e}")
             raise
+
+        load_seconds = time.perf_counter() - started
+        rss_after = _current_rss()
+        entry = _ModelEntry(
+            model=embedding_model,
+            embedding_type=embedding_type,
+            load_seconds=load_seconds,
+            rss_delta_bytes=(
+                rss_after - rss_before
+                if rss_before is not None and rss_after is not None
+                else None
+            ),
+            created_at=time.time(),
+        )
+        logger.info(
+            f"Successfully created {embedding_type} embedding model "
+            f"in {load_seconds:.2f}s"
+        )
+        return entry
+
+    @classmethod
+    def warmup(
+        cls,
+        embedding_types: Optional[Iterable[EmbeddingType]] = None,
+        probe_text: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Construct models ahead of the first request.
+
+        Args:
+            embedding_types: Types to load; defaults to embeddings.registry.warmup
+                or the default embedding provider
+            probe_text: Optional text embedded once per model so lazy
+                initialisation (tokenizers, kernels) also happens up front
+
+        Returns:
+            Per-type status: load time and memory, or the error
+        """
+        if embedding_types is None:
+            embedding_types = cls._warmup_types_from_settings()
+
+        results: Dict[str, Any] = {}
+        for embedding_type in embedding_types:
+            try:
+                model = cls.get_embedding_model(embedding_type)
+                if probe_text:
+                    getattr(model, "underlying", model).embed_query(probe_text)
+                results[embedding_type.value] = cls._describe(embedding_type)
+            except Exception as e:
+                logger.warning(f"Embedding warmup failed for {embedding_type}: {e}")
+                results[embedding_type.value] = {"error": str(e)}
+        return results
+
+    @staticmethod
+    def _warmup_types_from_settings() -> List[EmbeddingType]:
+        try:
+            configured = settings.get_section("embeddings.registry.warmup", None)
+            if not configured:
+                configured = [settings.get_section("embeddings.default.provider")]
+            if isinstance(configured, str):
+                configured = [configured]
+            return [EmbeddingType(str(name).lower()) for name in configured if name]
+        except Exception as e:
+            logger.warning(f"Could not read embedding warmup list: {e}")
+            return []
+
+    @classmethod
+    def reload(cls, embedding_type: Optional[EmbeddingType] = None) -> int:
+        """
+        Drop constructed models so the next call rebuilds them with fresh
+        configuration.
+
+        Args:
+            embedding_type: Only reload this type; all types when None
+
+        Returns:
+            Number of models rebuilt
+        """
+        with cls._instances_lock:
+            types = {
+                key[0]
+                for key in cls._instances
+                if embedding_type is None or key[0] == embedding_type
+            }
+        cls.clear_models(embedding_type)
+        for reloaded_type in types:
+            cls.get_embedding_model(reloaded_type)
+        logger.info(f"Reloaded {len(types)} embedding model(s)")
+        return len(types)
+
+    @classmethod
+    def clear_models(cls, embedding_type: Optional[EmbeddingType] = None) -> int:
+        """Forget constructed models without rebuilding them."""
+        with cls._instances_lock:
+            keys = [
+                key
+                for key in cls._instances
+                if embedding_type is None or key[0] == embedding_type
+            ]
+            for key in keys:
+                del cls._instances[key]
+                cls._creation_locks.pop(key, None)
+        return len(keys)
+
+    @classmethod
+    def _describe(cls, embedding_type: EmbeddingType) -> Dict[str, Any]:
+        with cls._instances_lock:
+            entries = [e for k, e in cls._instances.items() if k[0] == embedding_type]
+        return entries[-1].describe() if entries else {}
+
+    @classmethod
+    def get_model_stats(cls) -> Dict[str, Any]:
+        """
+        Memory and usage accounting for every constructed model.
+
+        parameter_bytes is the size of local model weights; rss_delta_bytes is
+        the process memory growth observed while the model was created.
+        """
+        with cls._instances_lock:
+            entries = list(cls._instances.items())
+        models = {
+            f"{embedding_type.value}:{fingerprint}": entry.describe()
+            for (embedding_type, fingerprint), entry in entries
+        }
+        return {
+            "models": models,
+            "count": len(models),
+            "total_parameter_bytes": sum(
+                m["parameter_bytes"] or 0 for m in models.values()
+            ),
+            "total_rss_delta_bytes": sum(
+                m["rss_delta_bytes"] or 0 for m in models.values()
+            ),
+        }
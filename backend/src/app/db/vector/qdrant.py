@@ -1,14 +1,30 @@
 """
 Qdrant vector database implementation.
+
+Store operations run on the connection manager's AsyncQdrantClient (HTTP or
+gRPC), so they never block the event loop. Precomputed vectors are upserted
+in parallel batches, and keyword payload indexes on ``document_id`` and
+``source_path`` keep filtered deletes and metadata lookups from scanning the
+collection. The synchronous client is only used for LangChain retrievers.
 """
 
+import asyncio
+import time
+import uuid
 from abc import ABC
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from langchain.schema import Document
 from langchain_qdrant import Qdrant as LangchainQdrant
-from qdrant_client.http.models import FieldCondition, Filter, MatchValue
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+)
 
 from app.db.vector.embeddings.embedding import EmbeddingFactory
 from app.infrastructure.connections.factory.connection_factory import ConnectionFactory
@@ -16,10 +32,20 @@ from app.infrastructure.connections.factory.connection_factory import Connection
 from ...core.constants import ConnectionType, EmbeddingType, VectorDBType
 from ...core.utils.logger import get_logger
 from .base import DocumentMetadata, VectorDB
+from .chunk_diff import CHUNK_HASH_KEY, StoredChunks, group_stored_chunks
 from .providers.db_provider import VectorDBRegistry
+from .quantization import (
+    QuantizationConfig,
+    qdrant_quantization_config,
+    qdrant_search_params,
+)
 
 logger = get_logger(__name__)
 
+# LangChain's payload layout keeps document metadata under this key
+METADATA_KEY = "metadata"
+DEFAULT_PAYLOAD_INDEXES = ("document_id", "source_path")
+
 
 @VectorDBRegistry.register(VectorDBType.QDRANT)
 class QdrantDB(VectorDB, ABC):
@@ -31,21 +57,42 @@ class QdrantDB(VectorDB, ABC):
             ConnectionType.QDRANT
         )
         self._vectorstore = None
+        self._indexed = False
+        self._quantization_checked = False
+        self.ingestion_stats = {"points": 0, "batches": 0, "seconds": 0.0}
 
         # Now call super() which will call get_vector_db_config()
         super().__init__()
+        self.quantization = QuantizationConfig.from_config(
+            self.config.get("quantization")
+        )
 
     def get_vector_db_config(self) -> Dict[str, Any]:
         """Get vector database configuration via connection manager."""
         return self._connection_manager._get_config_dict()
 
+    @property
+    def upsert_batch_size(self) -> int:
+        return max(1, int(self.config.get("upsert_batch_size", 256)))
+
+    @property
+    def upsert_parallelism(self) -> int:
+        return max(1, int(self.config.get("upsert_parallelism", 4)))
+
     async def _create_connection(self):
-        """Create connection to Qdrant using the connection manager factory."""
+        """Create the async client, making sure the collection and indexes exist."""
         try:
             logger.info("Obtaining Qdrant connection...")
+            if self._connection_manager is None:
+                self._connection_manager = ConnectionFactory.get_connection_manager(
+                    ConnectionType.QDRANT
+                )
 
-            # Use the connection manager to establish connection (sync operation in async context)
-            self._connection = self._connection_manager.connect()
+            # connect() creates the collection if needed; keep it off the loop
+            await asyncio.to_thread(self._connection_manager.connect)
+            self._connection = self._connection_manager.get_async_client()
+            await self._ensure_payload_indexes()
+            await self._ensure_quantization()
 
             logger.info(
                 f"Successfully obtained Qdrant connection to {self.config['url']}"
@@ -56,19 +103,60 @@ class QdrantDB(VectorDB, ABC):
             logger.error(f"Failed to connect to Qdrant: {str(e)}")
             raise
 
+    def _connection_is_open(self) -> bool:
+        return self._connection_manager is not None and (
+            self._connection_manager.has_async_client(self._connection)
+        )
+
     async def _close_connection(self):
         """Close connection to Qdrant."""
         if self._connection_manager:
+            await self._connection_manager.close_async_client()
             self._connection_manager.disconnect()
             self._connection = None
             self._connection_manager = None  # Reset manager for clean state
             logger.info("Successfully closed Qdrant connection.")
 
+    async def _ensure_payload_indexes(self) -> None:
+        """Create keyword indexes for the payload fields used in filters."""
+        if self._indexed:
+            return
+        fields = self.config.get("payload_indexes") or DEFAULT_PAYLOAD_INDEXES
+        for field in fields:
+            # Qdrant treats re-creating an existing index as a no-op
+            await self._connection.create_payload_index(
+                collection_name=self.config["collection_name"],
+                field_name=f"{METADATA_KEY}.{field}",
+                field_schema=PayloadSchemaType.KEYWORD,
+            )
+        self._indexed = True
+        logger.info(f"Qdrant payload indexes ready: {', '.join(fields)}")
+
+    async def _ensure_quantization(self) -> None:
+        """Quantize an existing full-precision collection when configured to."""
+        if self._quantization_checked:
+            return
+        self._quantization_checked = True
+        quantization_config = qdrant_quantization_config(self.quantization)
+        if quantization_config is None:
+            return
+        collection_name = self.config["collection_name"]
+        info = await self._connection.get_collection(collection_name)
+        if info.config.quantization_config is None:
+            # Qdrant builds the quantized vectors in the background
+            await self._connection.update_collection(
+                collection_name=collection_name,
+                quantization_config=quantization_config,
+            )
+            logger.info(
+                f"Enabled {self.quantization.mode} quantization on {collection_name}"
+            )
+
     def _get_vectorstore(self, embedding_function):
         """Get or create Langchain Qdrant vectorstore instance."""
         if not self._vectorstore:
             self._vectorstore = LangchainQdrant(
-                client=self._connection,
+                client=self._connection_manager.connect(),
                 collection_name=self.config["collection_name"],
                 embeddings=embedding_function,
             )
@@ -80,42 +168,127 @@ class QdrantDB(VectorDB, ABC):
     ) -> List[str]:
         """Save documents and generate embeddings."""
         try:
-            # Get embedding model
             logger.info(f"Saving {len(docs)} documents...")
-            embedding_model = EmbeddingFactory.get_embedding_model(embedding_type)
-            logger.info(f"Using embedding model: {embedding_model.__class__.__name__}")
+            embeddings = await self._embed_documents(embedding_type, docs)
+            return await self.add_embedded_documents(docs, embeddings)
 
-            # Get vectorstore with embedding model
-            vectorstore = self._get_vectorstore(embedding_model)
-
-            # Add documents (sync operation wrapped for async context)
-            logger.info("Adding documents to Qdrant...")
-            ids = vectorstore.add_documents(docs)
-            logger.info(
-                f"Successfully added {len(docs)} documents to Qdrant collection {self.config['collection_name']}"
-            )
+        except Exception as e:
+            logger.error(f"Failed to save documents to Qdrant: {str(e)}")
+            raise
 
+    async def add_embedded_documents(
+        self, docs: List[Document], embeddings: List[List[float]]
+    ) -> List[str]:
+        """Upsert documents with precomputed vectors in the LangChain payload layout."""
+        try:
+            ids = [str(uuid.uuid4()) for _ in docs]
+            points = [
+                PointStruct(
+                    id=point_id,
+                    vector=list(vector),
+                    payload={
+                        "page_content": doc.page_content,
+                        METADATA_KEY: doc.metadata,
+                    },
+                )
+                for point_id, doc, vector in zip(ids, docs, embeddings)
+            ]
+            await self._upsert_points(points)
             return ids
 
         except Exception as e:
-            logger.error(f"Failed to save documents to Qdrant: {str(e)}")
+            logger.error(f"Failed to upsert embedded documents to Qdrant: {str(e)}")
             raise
 
+    async def _upsert_points(self, points: List[PointStruct]) -> None:
+        """Upsert in batches, with up to ``upsert_parallelism`` in flight."""
+        client = await self.get_connection()
+        collection_name = self.config["collection_name"]
+        size = self.upsert_batch_size
+        batches = [points[i : i + size] for i in range(0, len(points), size)]
+        semaphore = asyncio.Semaphore(self.upsert_parallelism)
+
+        async def upsert(batch: List[PointStruct]) -> None:
+            async with semaphore:
+                await client.upsert(
+                    collection_name=collection_name, points=batch, wait=True
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(upsert(batch) for batch in batches))
+        elapsed = time.perf_counter() - started
+
+        self.ingestion_stats["points"] += len(points)
+        self.ingestion_stats["batches"] += len(batches)
+        self.ingestion_stats["seconds"] += elapsed
+        logger.info(
+            f"Upserted {len(points)} points to Qdrant collection {collection_name} "
+            f"in {len(batches)} batches, {elapsed:.2f}s "
+            f"({len(points) / elapsed if elapsed else 0:.0f} points/s)"
+        )
+
+    def get_ingestion_stats(self) -> Dict[str, Any]:
+        """Cumulative upsert throughput of this store instance."""
+        seconds = self.ingestion_stats["seconds"]
+        return {
+            **self.ingestion_stats,
+            "seconds": round(seconds, 3),
+            "points_per_second": (
+                round(self.ingestion_stats["points"] / seconds, 1) if seconds else 0.0
+            ),
+        }
+
+    @staticmethod
+    def _metadata_filter(filter_criteria: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """Equality filter on metadata fields, as LangChain builds it."""
+        if not filter_criteria:
+            return None
+        return Filter(
+            must=[
+                FieldCondition(
+                    key=f"{METADATA_KEY}.{key}", match=MatchValue(value=value)
+                )
+                for key, value in filter_criteria.items()
+            ]
+        )
+
     async def search_similar(
         self, query: str, k: int = 5, filter_criteria: Optional[Dict[str, Any]] = None
     ) -> List[Document]:
         """Search for similar documents."""
+        query_embedding = await self._embed_query(EmbeddingType.DEFAULT, query)
+        return await self.search_by_vector(query_embedding, k, filter_criteria)
+
+    async def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+    ) -> List[Document]:
+        """Search with a precomputed query vector."""
         try:
-            # Get embedding model (using default for now)
-            embedding_model = EmbeddingFactory.get_embedding_model(
-                EmbeddingType.DEFAULT
-            )
+            client = await self.get_connection()
 
-            # Get vectorstore with embedding model
-            vectorstore = self._get_vectorstore(embedding_model)
-
-            # Perform search (sync operation)
-            docs = vectorstore.similarity_search(query, k=k, filter=filter_criteria)
+            response = await client.query_points(
+                collection_name=self.config["collection_name"],
+                query=embedding,
+                query_filter=self._metadata_filter(filter_criteria),
+                limit=k,
+                search_params=qdrant_search_params(self.quantization),
+                with_payload=True,
+            )
+            docs = [
+                Document(
+                    page_content=(point.payload or {}).get("page_content", ""),
+                    metadata={
+                        **((point.payload or {}).get(METADATA_KEY) or {}),
+                        "_id": point.id,
+                        "_collection_name": self.config["collection_name"],
+                        "similarity": point.score,
+                    },
+                )
+                for point in response.points
+            ]
             logger.debug(f"Found {len(docs)} similar documents")
 
             return docs
@@ -126,38 +299,30 @@ class QdrantDB(VectorDB, ABC):
 
     def as_retriever(self, **kwargs):
         """Return vectorstore as retriever."""
-        # Ensure connection is established (sync version)
-        self._ensure_connection_sync()
-
         # Use default embedding type if not specified
         embedding_model = EmbeddingFactory.get_embedding_model(EmbeddingType.DEFAULT)
         vector_store = self._get_vectorstore(embedding_model)
         return vector_store.as_retriever(**kwargs)
 
-    def _ensure_connection_sync(self):
-        """Ensure connection is established (synchronous version)."""
-        if self._connection is None:
-            # Simply call the sync method directly
-            self._create_connection()
+    @staticmethod
+    def _document_filter(document_id: str) -> Filter:
+        """Match points by document_id at the payload root or in LangChain metadata."""
+        return Filter(
+            should=[
+                FieldCondition(key=key, match=MatchValue(value=document_id))
+                for key in ("document_id", f"{METADATA_KEY}.document_id")
+            ]
+        )
 
-    def delete_by_document_id(self, document_id: str) -> bool:
+    async def delete_by_document_id(self, document_id: str) -> bool:
         """Delete all chunks of a document by its ID."""
         try:
             logger.info(f"Deleting document with ID: {document_id}")
+            client = await self.get_connection()
 
-            # Use the Qdrant client to delete by filter
-            # We'll filter by document_id in metadata
-            delete_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="document_id", match=MatchValue(value=document_id)
-                    )
-                ]
-            )
-
-            self._connection.delete(
+            await client.delete(
                 collection_name=self.config["collection_name"],
-                points_selector=delete_filter,
+                points_selector=self._document_filter(document_id),
             )
 
             logger.info(f"Successfully deleted document {document_id}")
@@ -167,36 +332,31 @@ class QdrantDB(VectorDB, ABC):
             logger.error(f"Failed to delete document {document_id}: {str(e)}")
             return False
 
-    def get_document_metadata(self, document_id: str) -> Optional[DocumentMetadata]:
+    async def get_document_metadata(
+        self, document_id: str
+    ) -> Optional[DocumentMetadata]:
         """Get metadata for a document."""
         try:
-            # Search for the document by ID
-            search_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="document_id", match=MatchValue(value=document_id)
-                    )
-                ]
-            )
-
-            result = self._connection.scroll(
+            client = await self.get_connection()
+            points, _ = await client.scroll(
                 collection_name=self.config["collection_name"],
-                scroll_filter=search_filter,
+                scroll_filter=self._document_filter(document_id),
                 limit=1,
+                with_vectors=False,
             )
 
-            if result[0]:  # result is a tuple (points, next_page_offset)
-                point = result[0][0]  # First point
-                payload = point.payload
+            if points:
+                payload = points[0].payload or {}
+                metadata = payload.get(METADATA_KEY) or payload
 
                 return DocumentMetadata(
                     document_id=document_id,
-                    source_path=payload.get("source_path", ""),
-                    file_type=payload.get("file_type", ""),
+                    source_path=metadata.get("source_path", ""),
+                    file_type=metadata.get("file_type", ""),
                     embedded_at=datetime.fromisoformat(
-                        payload.get("embedded_at", datetime.now().isoformat())
+                        metadata.get("embedded_at", datetime.now().isoformat())
                     ),
-                    custom_metadata=payload.get("custom_metadata", {}),
+                    custom_metadata=metadata.get("custom_metadata", {}),
                 )
 
             return None
@@ -205,31 +365,48 @@ class QdrantDB(VectorDB, ABC):
             logger.error(f"Failed to get metadata for document {document_id}: {str(e)}")
             return None
 
-    def update_document(
+    async def get_chunk_hashes(self, document_id: str) -> StoredChunks:
+        """Point IDs of a document's chunks, grouped by content hash."""
+        client = await self.get_connection()
+        rows = []
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=self.config["collection_name"],
+                scroll_filter=self._document_filter(document_id),
+                limit=256,
+                offset=offset,
+                with_payload=[f"{METADATA_KEY}.{CHUNK_HASH_KEY}"],
+                with_vectors=False,
+            )
+            for point in points:
+                metadata = (point.payload or {}).get(METADATA_KEY) or {}
+                rows.append((point.id, metadata.get(CHUNK_HASH_KEY)))
+            if offset is None:
+                return group_stored_chunks(rows)
+
+    async def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete individual points by ID."""
+        if not chunk_ids:
+            return 0
+        client = await self.get_connection()
+        await client.delete(
+            collection_name=self.config["collection_name"],
+            points_selector=PointIdsList(points=list(chunk_ids)),
+        )
+        return len(chunk_ids)
+
+    async def update_document(
         self, document_id: str, updated_doc: Document, embedding_type: EmbeddingType
     ) -> bool:
-        """Update an existing document."""
+        """Update an existing document, re-embedding only if its content changed."""
         try:
             logger.info(f"Updating document with ID: {document_id}")
-
-            # First delete the old document (sync operation)
-            delete_success = self.delete_by_document_id(document_id)
-            if not delete_success:
-                logger.error(f"Failed to delete old document {document_id}")
-                return False
-
-            # Then add the updated document (sync operation)
-            # Make sure the document has the same ID in metadata
-            updated_doc.metadata["document_id"] = document_id
-            ids = self.save_and_embed(embedding_type, [updated_doc])
-
-            success = len(ids) > 0
-            if success:
-                logger.info(f"Successfully updated document {document_id}")
-            else:
-                logger.error(f"Failed to save updated document {document_id}")
-
-            return success
+            diff = await self.sync_document_chunks(
+                document_id, [updated_doc], embedding_type
+            )
+            logger.info(f"Successfully updated document {document_id}")
+            return bool(diff.added or diff.unchanged)
 
         except Exception as e:
             logger.error(f"Failed to update document {document_id}: {str(e)}")
@@ -0,0 +1,236 @@
+"""
+Vector quantization and compact storage modes.
+
+One ``quantization`` block per provider in application-vector.yaml selects how
+vectors are held for search:
+
+- ``none``: full float32 (the default)
+- ``half``: float16, half the memory with negligible recall loss
+- ``scalar``: int8 codes, a quarter of the memory
+- ``binary``: one bit per dimension, 1/32 of the memory, for high-dimensional
+  embeddings (OpenAI, Cohere) where sign bits preserve neighbourhoods well
+
+Compact modes search the compact representation for ``k * oversampling``
+candidates and, when ``rescore`` is on, re-rank those against the full
+precision vectors. Providers map the modes onto their own features: Qdrant
+scalar/binary quantization, pgvector ``halfvec``/``bit`` expression indexes,
+and the NumPy quantizers below for in-process indexes.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUANTIZATION_MODES = ("none", "half", "scalar", "binary")
+
+# Set bits per byte value, for Hamming distances over packed codes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+@dataclass
+class QuantizationConfig:
+    """Compact storage mode and how its candidates are re-ranked."""
+
+    mode: str = "none"
+    oversampling: float = 2.0
+    rescore: bool = True
+    # Qdrant: keep quantized vectors in RAM, originals may live on disk
+    always_ram: bool = True
+    on_disk_vectors: bool = False
+    # Scalar quantization bounds exclude this tail of outlier values
+    quantile: float = 0.99
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "none"
+
+    def candidates(self, k: int) -> int:
+        """Candidates fetched from the compact index before re-ranking."""
+        if not self.enabled:
+            return k
+        return max(k, int(np.ceil(k * max(1.0, self.oversampling))))
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "QuantizationConfig":
+        config = config or {}
+        defaults = cls()
+        mode = str(config.get("mode") or defaults.mode).lower()
+        if mode not in QUANTIZATION_MODES:
+            logger.warning(f"Unknown quantization mode '{mode}', storing full vectors")
+            mode = "none"
+        return cls(
+            mode=mode,
+            oversampling=float(config.get("oversampling", defaults.oversampling)),
+            rescore=_as_bool(config.get("rescore", defaults.rescore)),
+            always_ram=_as_bool(config.get("always_ram", defaults.always_ram)),
+            on_disk_vectors=_as_bool(
+                config.get("on_disk_vectors", defaults.on_disk_vectors)
+            ),
+            quantile=float(config.get("quantile", defaults.quantile)),
+        )
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+# Qdrant
+
+
+def qdrant_quantization_config(config: QuantizationConfig):
+    """Collection-level quantization for Qdrant, or None for full vectors."""
+    from qdrant_client.http import models
+
+    if config.mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=config.quantile,
+                always_ram=config.always_ram,
+            )
+        )
+    if config.mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=config.always_ram)
+        )
+    return None
+
+
+def qdrant_vector_datatype(config: QuantizationConfig):
+    """Stored vector datatype; ``half`` keeps float16 vectors without codes."""
+    from qdrant_client.http import models
+
+    return models.Datatype.FLOAT16 if config.mode == "half" else None
+
+
+def qdrant_search_params(config: QuantizationConfig):
+    """Per-search oversampling and rescoring for quantized collections."""
+    from qdrant_client.http import models
+
+    if config.mode not in ("scalar", "binary"):
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            ignore=False,
+            rescore=config.rescore,
+            oversampling=config.oversampling,
+        )
+    )
+
+
+# In-process
+
+
+class VectorQuantizer:
+    """
+    Encode float32 vectors into a compact mode and search over the codes.
+
+    Vectors are L2-normalised first, so scores are cosine similarities. The
+    full-precision matrix passed to search() (e.g. memory-mapped from disk)
+    is only read for the re-ranked candidates.
+    """
+
+    def __init__(self, config: Optional[QuantizationConfig] = None):
+        self.config = config or QuantizationConfig()
+        self.codes: Optional[np.ndarray] = None
+        self._offset = 0.0
+        self._scale = 1.0
+
+    def fit_transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Compute quantization bounds from ``vectors`` and encode them."""
+        vectors = normalize(vectors)
+        if self.config.mode == "scalar" and len(vectors):
+            tail = (1 - self.config.quantile) / 2
+            low, high = np.quantile(vectors, [tail, 1 - tail])
+            self._offset = float(low)
+            self._scale = float(high - low) / 255 or 1.0
+        self.codes = self.encode(vectors)
+        return self.codes
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        mode = self.config.mode
+        if mode == "half":
+            return vectors.astype(np.float16)
+        if mode == "scalar":
+            scaled = np.rint((vectors - self._offset) / self._scale)
+            return np.clip(scaled, 0, 255).astype(np.uint8)
+        if mode == "binary":
+            return np.packbits(vectors > 0, axis=-1)
+        return vectors
+
+    def add(self, vectors: np.ndarray) -> None:
+        """Append vectors using the existing bounds."""
+        encoded = self.encode(normalize(vectors))
+        self.codes = (
+            encoded if self.codes is None else np.concatenate([self.codes, encoded])
+        )
+
+    def approximate_scores(
+        self, query: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Higher-is-better scores of ``query`` against every code, or ``rows``."""
+        query = normalize(query[None, :])[0]
+        codes = self.codes if rows is None else self.codes[rows]
+        mode = self.config.mode
+        if mode == "binary":
+            query_bits = np.packbits(query > 0)
+            distances = _POPCOUNT[np.bitwise_xor(codes, query_bits)].sum(axis=1)
+            return -distances.astype(np.float32)
+        if mode == "scalar":
+            # codes * scale + offset, dotted with the query, without decoding
+            dots = codes.astype(np.float32) @ query
+            return dots * self._scale + self._offset * float(query.sum())
+        return codes.astype(np.float32, copy=False) @ query
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        full_vectors: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top ``k`` rows for ``query``.
+
+        Args:
+            query: Query vector
+            k: Number of results
+            full_vectors: Normalised float32 rows for re-ranking, if rescoring
+
+        Returns:
+            (row indices, cosine scores), best first
+        """
+        if self.codes is None or not len(self.codes):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.approximate_scores(np.asarray(query, dtype=np.float32))
+        candidates = _top_k(scores, self.config.candidates(k))
+
+        if self.config.enabled and self.config.rescore and full_vectors is not None:
+            query = normalize(np.asarray(query, dtype=np.float32)[None, :])[0]
+            exact = np.asarray(full_vectors[candidates], dtype=np.float32) @ query
+            order = np.argsort(-exact)[:k]
+            return candidates[order], exact[order]
+        candidates = candidates[:k]
+        return candidates, scores[candidates]
+
+    def memory_bytes(self) -> int:
+        return int(self.codes.nbytes) if self.codes is not None else 0
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
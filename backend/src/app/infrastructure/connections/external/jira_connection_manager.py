@@ -200,7 +200,11 @@ class JiraConnectionManager(BaseConnectionManager):
     @retry(JIRA_RETRY_CONFIG)
     @circuit_breaker(JIRA_CIRCUIT_CONFIG)
     def search_issues(
-        self, jql: str, limit: int = 50, fields: Optional[List[str]] = None
+        self,
+        jql: str,
+        limit: int = 50,
+        fields: Optional[List[str]] = None,
+        next_page_token: Optional[str] = None,
     ) -> Dict:
         """
         Search for issues using JQL.
@@ -209,6 +213,7 @@ class JiraConnectionManager(BaseConnectionManager):
             jql: JQL (Jira Query Language) string
             limit: Maximum number of results
             fields: List of fields to return
+            next_page_token: ``nextPageToken`` of the previous page, if any
 
         Returns:
             Search results
@@ -229,6 +234,8 @@ class JiraConnectionManager(BaseConnectionManager):
 
             # Prepare the payload according to the new API spec
             payload = {"jql": jql, "maxResults": limit}
+            if next_page_token:
+                payload["nextPageToken"] = next_page_token
 
             # Add fields if specified
             if fields:
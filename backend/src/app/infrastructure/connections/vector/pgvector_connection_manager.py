@@ -4,10 +4,18 @@ PostgreSQL with PgVector extension connection manager implementation.
 Provides connection management for PgVector (PostgreSQL with pgvector extension)
 with proper configuration validation and health checking.
 
+asyncpg connections and pools only work on the event loop that created them,
+so the manager keeps one connection and one pool per running loop. Stores and
+ingestion normally share a single loop (app.core.utils.background_loop), but a
+caller on another loop gets its own pool instead of hanging on a foreign one,
+and disconnect() only closes the calling loop's connection and pool.
+
 Requirements:
     - asyncpg: pip install asyncpg
+    - pgvector: pip install pgvector (binary vector codec for the pool)
 """
 
+import asyncio
 from typing import Any, Dict, List, Optional
 
 import asyncpg
@@ -22,13 +30,52 @@ from app.infrastructure.connections.base import (
 logger = get_logger(__name__)
 
 
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+async def register_vector_codec(connection: asyncpg.Connection) -> None:
+    """Exchange ``vector`` values in pgvector's binary format on this connection."""
+    from pgvector.asyncpg import register_vector
+
+    await register_vector(connection)
+
+
 @ConnectionRegistry.register(ConnectionType.PGVECTOR)
 class PgVectorConnectionManager(AsyncBaseConnectionManager):
     """PostgreSQL with PgVector extension connection manager implementation."""
 
     def __init__(self):
         super().__init__()
-        self._pg_connection: Optional[asyncpg.Connection] = None
+        # Connections, pools and pool locks of each event loop
+        self._pg_connections: Dict[asyncio.AbstractEventLoop, asyncpg.Connection] = {}
+        self._pools: Dict[asyncio.AbstractEventLoop, asyncpg.Pool] = {}
+        self._pool_locks: Dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+
+    @property
+    def _pg_connection(self) -> Optional[asyncpg.Connection]:
+        """The running loop's connection (any connection outside a loop)."""
+        loop = _running_loop()
+        if loop is None:
+            return next(iter(self._pg_connections.values()), None)
+        return self._pg_connections.get(loop)
+
+    @_pg_connection.setter
+    def _pg_connection(self, connection: Optional[asyncpg.Connection]) -> None:
+        loop = _running_loop()
+        if connection is None:
+            self._pg_connections.pop(loop, None)
+        else:
+            self._pg_connections[loop] = connection
+
+    def _forget_closed_loops(self) -> None:
+        """Drop connections and pools whose event loop has been closed."""
+        for cache in (self._pg_connections, self._pools, self._pool_locks):
+            for loop in [loop for loop in cache if loop.is_closed()]:
+                del cache[loop]
 
     def get_connection_name(self) -> str:
         """Return the configuration name for PgVector."""
@@ -74,7 +121,8 @@ class PgVectorConnectionManager(AsyncBaseConnectionManager):
         logger.info("PgVector connection configuration validated successfully")
 
     async def connect(self) -> asyncpg.Connection:
-        """Establish PgVector connection."""
+        """Establish the running loop's PgVector connection."""
+        self._forget_closed_loops()
         if self._pg_connection:
             # Test existing connection
             if await self._test_connection():
@@ -128,8 +176,48 @@ class PgVectorConnectionManager(AsyncBaseConnectionManager):
             logger.error(f"Failed to connect to PgVector: {e}")
             raise ConnectionError(f"PgVector connection failed: {e}")
 
+    async def get_pool(self) -> asyncpg.Pool:
+        """
+        The running loop's asyncpg pool for repository operations.
+
+        Every pooled connection has the binary pgvector codec registered, so
+        embeddings are sent and received as packed floats.
+
+        Returns:
+            The connection pool, created on first use on this loop
+        """
+        loop = asyncio.get_running_loop()
+        self._forget_closed_loops()
+        async with self._pool_locks.setdefault(loop, asyncio.Lock()):
+            pool = self._pools.get(loop)
+            if pool is None:
+                config_dict = self._get_config_dict()
+                pool = await asyncpg.create_pool(
+                    config_dict["connection_string"],
+                    min_size=int(config_dict.get("pool_min_size", 1)),
+                    max_size=int(config_dict.get("pool_max_size", 10)),
+                    init=register_vector_codec,
+                )
+                self._pools[loop] = pool
+                logger.info("PgVector connection pool created")
+        return pool
+
     async def disconnect(self) -> None:
-        """Close PgVector connection."""
+        """Close the running loop's PgVector connection and pool.
+
+        Connections and pools of other loops (e.g. retrieval while an
+        ingestion job shuts down) stay open.
+        """
+        loop = asyncio.get_running_loop()
+        self._forget_closed_loops()
+        self._pool_locks.pop(loop, None)
+        pool = self._pools.pop(loop, None)
+        if pool:
+            try:
+                await pool.close()
+                logger.info("PgVector connection pool closed")
+            except Exception as e:
+                logger.warning(f"Error closing PgVector connection pool: {e}")
         if self._pg_connection:
             try:
                 await self._pg_connection.close()
@@ -138,8 +226,8 @@ class PgVectorConnectionManager(AsyncBaseConnectionManager):
                 logger.warning(f"Error closing PgVector connection: {e}")
             finally:
                 self._pg_connection = None
-                self._connection = None
-                self._is_connected = False
+        self._connection = next(iter(self._pg_connections.values()), None)
+        self._is_connected = self._connection is not None
 
     def is_healthy(self) -> bool:
         """Check if PgVector connection is healthy."""
@@ -182,13 +270,8 @@ class PgVectorConnectionManager(AsyncBaseConnectionManager):
             """
             await self._pg_connection.execute(create_table_query)
 
-            # Create index on embedding column for efficient similarity search
-            index_query = f"""
-            CREATE INDEX IF NOT EXISTS {collection_name}_embedding_idx
-            ON {collection_name} USING ivfflat (embedding vector_cosine_ops)
-            WITH (lists = 100)
-            """
-            await self._pg_connection.execute(index_query)
+            # Vector and metadata indexes are built by PgVectorRepository once
+            # the table holds data (an IVFFlat index on an empty table is useless)
 
             logger.info(f"PgVector collection table '{collection_name}' ready")
 
@@ -5,9 +5,10 @@ Provides connection management for Qdrant vector database with proper
 configuration validation and health checking.
 """
 
+import asyncio
 from typing import Any, Dict, List, Optional
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import exceptions as qdrant_exceptions
 from qdrant_client.http.models import Distance, VectorParams
 
@@ -21,6 +22,13 @@ from app.infrastructure.connections.base import (
 logger = get_logger(__name__)
 
 
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
 @ConnectionRegistry.register(ConnectionType.QDRANT)
 class QdrantConnectionManager(BaseConnectionManager):
     """Qdrant vector database connection manager implementation."""
@@ -28,6 +36,11 @@ class QdrantConnectionManager(BaseConnectionManager):
     def __init__(self):
         super().__init__()
         self._qdrant_client: Optional[QdrantClient] = None
+        # AsyncQdrantClient's HTTP and gRPC channels are bound to the event
+        # loop they were first used on, so each running loop gets its own
+        self._async_clients: Dict[
+            Optional[asyncio.AbstractEventLoop], AsyncQdrantClient
+        ] = {}
 
     def get_connection_name(self) -> str:
         """Return the configuration name for Qdrant."""
@@ -109,6 +122,15 @@ class QdrantConnectionManager(BaseConnectionManager):
                     "Dot": Distance.DOT,
                 }
 
+                from app.db.vector.quantization import (
+                    QuantizationConfig,
+                    qdrant_quantization_config,
+                    qdrant_vector_datatype,
+                )
+
+                quantization = QuantizationConfig.from_config(
+                    config_dict.get("quantization")
+                )
                 self._qdrant_client.create_collection(
                     collection_name=collection_name,
                     vectors_config=VectorParams(
@@ -116,7 +138,10 @@ class QdrantConnectionManager(BaseConnectionManager):
                         distance=distance_mapping.get(
                             config_dict.get("distance", "Cosine"), Distance.COSINE
                         ),
+                        on_disk=quantization.on_disk_vectors or None,
+                        datatype=qdrant_vector_datatype(quantization),
                     ),
+                    quantization_config=qdrant_quantization_config(quantization),
                 )
                 logger.info(f"Created Qdrant collection: {collection_name}")
             else:
@@ -134,6 +159,53 @@ class QdrantConnectionManager(BaseConnectionManager):
             logger.error(f"Failed to connect to Qdrant: {e}")
             raise ConnectionError(f"Qdrant connection failed: {e}")
 
+    def get_async_client(self) -> AsyncQdrantClient:
+        """
+        The running loop's AsyncQdrantClient for non-blocking operations.
+
+        Uses gRPC when ``prefer_grpc`` is set, which is considerably faster for
+        bulk upserts. The collection itself is created by connect().
+
+        Returns:
+            The async client, created on first use on this loop
+        """
+        loop = _running_loop()
+        for closed in [key for key in self._async_clients if key and key.is_closed()]:
+            del self._async_clients[closed]
+        if loop not in self._async_clients:
+            config_dict = self._get_config_dict()
+            prefer_grpc = config_dict.get("prefer_grpc", False)
+            if isinstance(prefer_grpc, str):
+                prefer_grpc = prefer_grpc.strip().lower() in ("1", "true", "yes", "on")
+            self._async_clients[loop] = AsyncQdrantClient(
+                url=config_dict["url"],
+                api_key=config_dict.get("api_key"),
+                timeout=config_dict.get("timeout", 60),
+                prefer_grpc=bool(prefer_grpc),
+                grpc_port=int(config_dict.get("grpc_port", 6334)),
+            )
+            logger.info(
+                f"Qdrant async client created ({'gRPC' if prefer_grpc else 'HTTP'})"
+            )
+        return self._async_clients[loop]
+
+    def has_async_client(self, client: AsyncQdrantClient) -> bool:
+        """Whether ``client`` is still open, i.e. not closed or left on a closed loop."""
+        return any(
+            cached is client
+            for loop, cached in self._async_clients.items()
+            if loop is None or not loop.is_closed()
+        )
+
+    async def close_async_client(self) -> None:
+        """Close the running loop's async client; other loops keep theirs."""
+        client = self._async_clients.pop(_running_loop(), None)
+        if client is not None:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing Qdrant async client: {e}")
+
     def disconnect(self) -> None:
         """Close Qdrant connection."""
         if self._qdrant_client:
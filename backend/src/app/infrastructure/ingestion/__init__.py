@@ -5,8 +5,19 @@ Data ingestion service package.
 from .base import BaseIngestionService
 from .confluence_injection_service import ConfluenceIngestionService
 from .file_ingestion_service import FileIngestionService
+from .jira_ingestion_service import JiraIngestionService
+from .jobs import IngestionJobManager, JobStatus, get_job_manager
+from .pipeline import IngestionPipeline, PipelineConfig
+from .upload_ingestion_service import UploadIngestionService
 
 __all__ = [
     "BaseIngestionService",
     "FileIngestionService",
+    "IngestionJobManager",
+    "IngestionPipeline",
+    "JiraIngestionService",
+    "JobStatus",
+    "PipelineConfig",
+    "UploadIngestionService",
+    "get_job_manager",
 ]
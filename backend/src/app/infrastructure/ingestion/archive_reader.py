@@ -0,0 +1,352 @@
+"""
+Streaming archive reader for file ingestion.
+
+Archive members are read one at a time straight out of ``zipfile`` /
+``tarfile`` / ``gzip`` instead of extracting the whole archive first:
+
+- text members are decoded in memory and never touch the disk
+- members that need a loader with a file path are copied into a spooled
+  temporary file (in memory up to ``spool_memory_mb``) and only written to a
+  short-lived named temp file while their loader runs
+- nested archives are opened from the spooled buffer and read recursively up
+  to ``max_depth``
+- member loading runs in a small thread pool with a bounded number of members
+  in flight, so disk usage stays constant regardless of archive size
+
+Per-member, per-archive and member-count limits guard against zip bombs.
+"""
+
+import gzip
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import magic
+from langchain.schema import Document
+from langchain_community.document_loaders import TextLoader
+
+from app.core.utils.logger import get_logger
+
+from .file_data_source_util import FileType
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+COPY_BLOCK_SIZE = 1024 * 1024
+SNIFF_BYTES = 64 * 1024
+# Decoded text with more replacement characters than this is binary data
+MAX_REPLACEMENT_RATIO = 0.05
+
+ARCHIVE_TYPES = frozenset({FileType.ZIP, FileType.RAR, FileType.TAR, FileType.GZIP})
+
+# libmagic can report OOXML documents as plain zip from a partial buffer
+_EXTENSION_OVERRIDES = {
+    ".docx": FileType.DOCX,
+    ".xlsx": FileType.XLSX,
+    ".pptx": FileType.PPTX,
+}
+
+
+class ArchiveLimitError(ValueError):
+    """Raised when an archive exceeds the configured size or member limits."""
+
+
+@dataclass
+class ArchiveLimits:
+    """Size, depth and concurrency limits for reading archives."""
+
+    max_member_mb: float = 256
+    max_total_mb: float = 4096
+    max_members: int = 10000
+    max_depth: int = 2
+    spool_memory_mb: float = 8
+    member_workers: int = 4
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ArchiveLimits":
+        known = set(cls.__dataclass_fields__)
+        return cls(**{k: v for k, v in (config or {}).items() if k in known})
+
+
+class _Budget:
+    """Tracks uncompressed bytes and members across one top-level archive."""
+
+    def __init__(self, limits: ArchiveLimits):
+        self.limits = limits
+        self.bytes = 0
+        self.members = 0
+
+    def add_member(self, name: str) -> None:
+        self.members += 1
+        if self.members > self.limits.max_members:
+            raise ArchiveLimitError(
+                f"Archive has more than {self.limits.max_members} members (at {name})"
+            )
+
+    def add_bytes(self, count: int) -> None:
+        self.bytes += count
+        if self.bytes > self.limits.max_total_mb * MB:
+            raise ArchiveLimitError(
+                f"Archive expands beyond {self.limits.max_total_mb} MB"
+            )
+
+
+class ArchiveReader:
+    """Load documents from zip, tar and gzip archives without full extraction.
+
+    Args:
+        loader_mapping: ``FileType -> (loader_class, loader_config)`` mapping
+            used for members, as built by ``_construct_mapping``.
+        limits: Size, depth and concurrency limits.
+    """
+
+    def __init__(self, loader_mapping: Dict, limits: Optional[ArchiveLimits] = None):
+        self._loader_mapping = loader_mapping
+        self.limits = limits or ArchiveLimits()
+
+    def load(self, file_path: str, file_type: FileType) -> List[Document]:
+        """Load every supported member of an archive on disk."""
+        budget = _Budget(self.limits)
+        with open(file_path, "rb") as f:
+            return self._load_archive(f, file_type, file_path, "", 0, budget)
+
+    # Archive traversal
+
+    def _load_archive(
+        self,
+        fileobj: IO[bytes],
+        file_type: FileType,
+        archive_source: str,
+        prefix: str,
+        depth: int,
+        budget: _Budget,
+    ) -> List[Document]:
+        documents: List[Document] = []
+        in_flight: Set[Future] = set()
+        max_in_flight = max(1, self.limits.member_workers) * 2
+
+        def collect(done: Set[Future]) -> None:
+            for future in done:
+                try:
+                    documents.extend(future.result())
+                except Exception as e:
+                    logger.warning(f"Error processing archive member: {e}")
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, self.limits.member_workers),
+            thread_name_prefix="archive-member",
+        ) as pool:
+            try:
+                for name, size, stream in self._iter_members(fileobj, file_type):
+                    member_path = f"{prefix}{name}"
+                    budget.add_member(member_path)
+                    if size is not None and size > self.limits.max_member_mb * MB:
+                        logger.warning(
+                            f"Skipping {member_path} in {archive_source}: "
+                            f"{size} bytes exceeds {self.limits.max_member_mb} MB"
+                        )
+                        continue
+
+                    spooled = self._spool(stream, member_path, budget)
+                    if spooled is None:
+                        continue
+
+                    member_type = self._sniff(spooled, name)
+                    if member_type in ARCHIVE_TYPES:
+                        # Nested archives are read inline to keep ordering simple.
+                        # A gzip wraps a single stream (e.g. .tar.gz), so its
+                        # content is not another level of nesting.
+                        unwrapped = file_type == FileType.GZIP
+                        documents.extend(
+                            self._load_nested(
+                                spooled,
+                                member_type,
+                                archive_source,
+                                prefix if unwrapped else f"{member_path}/",
+                                depth if unwrapped else depth + 1,
+                                budget,
+                            )
+                        )
+                        continue
+
+                    in_flight.add(
+                        pool.submit(
+                            self._load_member,
+                            spooled,
+                            member_type,
+                            name,
+                            archive_source,
+                            member_path,
+                        )
+                    )
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+            finally:
+                done, _ = wait(in_flight)
+                collect(done)
+        return documents
+
+    def _load_nested(
+        self,
+        spooled: IO[bytes],
+        file_type: FileType,
+        archive_source: str,
+        prefix: str,
+        depth: int,
+        budget: _Budget,
+    ) -> List[Document]:
+        with spooled:
+            if depth > self.limits.max_depth:
+                logger.warning(
+                    f"Skipping nested archive {prefix or archive_source} in "
+                    f"{archive_source}: depth limit {self.limits.max_depth} reached"
+                )
+                return []
+            if file_type == FileType.RAR:
+                logger.warning(f"Skipping nested RAR archive {prefix}")
+                return []
+            return self._load_archive(
+                spooled, file_type, archive_source, prefix, depth, budget
+            )
+
+    def _iter_members(
+        self, fileobj: IO[bytes], file_type: FileType
+    ) -> Iterator[Tuple[str, Optional[int], IO[bytes]]]:
+        """Yield ``(name, declared_size, stream)`` for each regular member."""
+        if file_type == FileType.ZIP:
+            with zipfile.ZipFile(fileobj) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    with zf.open(info) as stream:
+                        yield info.filename, info.file_size, stream
+        elif file_type == FileType.TAR:
+            # Streaming mode reads members strictly in order, never seeking back
+            with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+                for member in tf:
+                    if not member.isfile():
+                        continue
+                    stream = tf.extractfile(member)
+                    if stream is not None:
+                        yield member.name, member.size, stream
+        elif file_type == FileType.GZIP:
+            name = getattr(fileobj, "name", "") or ""
+            base = os.path.basename(str(name))
+            member_name = base[:-3] if base.endswith(".gz") else "extracted_file"
+            with gzip.GzipFile(fileobj=fileobj) as stream:
+                yield member_name, None, stream
+        elif file_type == FileType.RAR:
+            raise NotImplementedError(
+                "RAR support requires the 'rarfile' package and external RAR binary"
+            )
+        else:
+            raise ValueError(f"Unsupported archive type: {file_type}")
+
+    # Member handling
+
+    def _spool(
+        self, stream: IO[bytes], member_path: str, budget: _Budget
+    ) -> Optional[IO[bytes]]:
+        """Copy a member into a spooled buffer, enforcing size limits as it reads."""
+        limit = self.limits.max_member_mb * MB
+        spooled = tempfile.SpooledTemporaryFile(
+            max_size=int(self.limits.spool_memory_mb * MB)
+        )
+        copied = 0
+        while True:
+            block = stream.read(COPY_BLOCK_SIZE)
+            if not block:
+                break
+            copied += len(block)
+            budget.add_bytes(len(block))
+            if copied > limit:
+                # Declared sizes can lie; stop reading as soon as the limit is hit
+                spooled.close()
+                logger.warning(
+                    f"Skipping {member_path}: expands beyond "
+                    f"{self.limits.max_member_mb} MB"
+                )
+                return None
+            spooled.write(block)
+        spooled.seek(0)
+        return spooled
+
+    def _sniff(self, spooled: IO[bytes], name: str) -> Optional[FileType]:
+        """Detect a member's type from its first bytes, falling back to its name."""
+        head = spooled.read(SNIFF_BYTES)
+        spooled.seek(0)
+        suffix = PurePosixPath(name).suffix.lower()
+        try:
+            mime_type = magic.from_buffer(head, mime=True)
+        except Exception:
+            mime_type = None
+        if suffix in _EXTENSION_OVERRIDES and mime_type in (FileType.ZIP.value, None):
+            return _EXTENSION_OVERRIDES[suffix]
+        if mime_type == "application/x-gzip":
+            return FileType.GZIP
+        try:
+            return FileType(mime_type)
+        except ValueError:
+            return None
+
+    def _load_member(
+        self,
+        spooled: IO[bytes],
+        file_type: Optional[FileType],
+        name: str,
+        archive_source: str,
+        member_path: str,
+    ) -> List[Document]:
+        """Load one member; text is decoded in memory, others via a temp file.
+
+        Members of a type without a loader are skipped. Members of unknown
+        type are read as text, unless decoding shows they are binary.
+        """
+        with spooled:
+            if file_type is None:
+                loader_class, loader_config = TextLoader, {}
+            elif file_type in self._loader_mapping:
+                loader_class, loader_config = self._loader_mapping[file_type]
+            else:
+                logger.info(f"Skipping {member_path}: no loader for {file_type.value}")
+                return []
+            if loader_class is TextLoader:
+                text = spooled.read().decode("utf-8", errors="replace")
+                if text and text.count("\ufffd") / len(text) > MAX_REPLACEMENT_RATIO:
+                    logger.info(f"Skipping {member_path}: binary content")
+                    return []
+                docs = [Document(page_content=text, metadata={})]
+            else:
+                docs = self._load_via_temp_file(
+                    spooled, loader_class, loader_config, name
+                )
+
+        for doc in docs:
+            doc.metadata.update(
+                {
+                    "source": f"{archive_source}/{member_path}",
+                    "archive_source": archive_source,
+                    "archive_path": member_path,
+                }
+            )
+        return docs
+
+    @staticmethod
+    def _load_via_temp_file(
+        spooled: IO[bytes], loader_class, loader_config: Dict, name: str
+    ) -> List[Document]:
+        suffix = PurePosixPath(name).suffix
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, prefix="archive-member-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(spooled, out, COPY_BLOCK_SIZE)
+            return loader_class(temp_path, **loader_config).load()
+        finally:
+            os.unlink(temp_path)
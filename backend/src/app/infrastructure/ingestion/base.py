@@ -2,12 +2,19 @@
 Base class for data ingestion services.
 """
 
+import asyncio
+import inspect
 from abc import ABC, abstractmethod
+from typing import Any, Dict
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_text_splitters import TextSplitter
 
 from ...core.constants import DataSourceType
 from ...core.schemas.ingestion_config import DataSourceConfig
+from ...core.utils.logger import get_logger
+from ...db.vector.lexical_index import lexical_index_for
+
+logger = get_logger(__name__)
 
 
 class BaseIngestionService(ABC):
@@ -75,12 +82,49 @@ class BaseIngestionService(ABC):
 
         self.settings = settings
         self.validate_config()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-            is_separator_regex=False,
-        )
+        self.text_splitter = self._create_text_splitter()
+
+    @staticmethod
+    def _create_text_splitter() -> TextSplitter:
+        """Splitter configured under ``ingestion.splitter``."""
+        from .token_splitter import create_text_splitter
+
+        return create_text_splitter()
+
+    @staticmethod
+    def _load_section(section: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+        """Settings under ``section`` layered over ``defaults``."""
+        try:
+            from ...core.config.framework.settings import settings
+
+            return {**defaults, **(settings.get_section(section, {}) or {})}
+        except Exception as e:
+            logger.warning(f"{section} config unavailable, using defaults: {e}")
+            return dict(defaults)
+
+    async def _delete_document(self, document_id: str) -> bool:
+        """Delete a document's chunks from ``_vector_store`` and the lexical index.
+
+        Vector stores differ on whether ``delete_by_document_id`` is a coroutine.
+        """
+        try:
+            result = self._vector_store.delete_by_document_id(document_id)
+            if inspect.isawaitable(result):
+                result = await result
+            lexical_index = lexical_index_for(self._vector_store)
+            if lexical_index is not None:
+                await asyncio.to_thread(lexical_index.delete_documents, [document_id])
+            return bool(result)
+        except Exception as e:
+            logger.error(
+                f"Failed to delete {self.SOURCE_TYPE.value} document {document_id}: {e}"
+            )
+            return False
+
+    async def close(self):
+        """Close vector store connections."""
+        if getattr(self, "_vector_store", None):
+            await self._vector_store.close_connection()
 
     @abstractmethod
     def validate_config(self) -> None:
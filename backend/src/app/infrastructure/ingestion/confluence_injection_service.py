@@ -1,17 +1,30 @@
-from typing import Dict, List
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
 
 from langchain.schema import Document
 
 from app.core.constants import DataSourceType, EmbeddingType
 from app.core.utils.exception.http_exception_handler import handle_atlassian_errors
 from app.core.utils.logger import get_logger
+from app.db.vector.base import DocumentMetadata
 from app.db.vector.providers.db_provider import VectorStoreFactory
 from app.infrastructure.ingestion.base import BaseIngestionService
+from app.infrastructure.ingestion.dedup import forget_deleted_documents
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
 from app.infrastructure.ingestion.rag_data_provider import RagDataProvider
+from app.infrastructure.ingestion.sync_state import SyncRecord, SyncStateStore
 from app.services.external.confluence_service import ConfluenceService
 
 logger = get_logger(__name__)
 
+SYNC_DEFAULTS = {
+    "incremental": True,
+    # CQL compares lastmodified at minute precision in the account timezone,
+    # so re-read a window behind the watermark; unchanged versions are skipped.
+    "watermark_overlap_minutes": 1440,
+}
+
 
 @RagDataProvider.register(DataSourceType.CONFLUENCE)
 class ConfluenceIngestionService(BaseIngestionService):
@@ -20,7 +33,7 @@ class ConfluenceIngestionService(BaseIngestionService):
     # Define the source type this service handles
     SOURCE_TYPE = DataSourceType.CONFLUENCE
 
-    def __init__(self):
+    def __init__(self, sync_state: Optional[SyncStateStore] = None):
         # Call parent to auto-locate config by SOURCE_TYPE from settings singleton
         super().__init__()
 
@@ -28,6 +41,14 @@ class ConfluenceIngestionService(BaseIngestionService):
         self._atlassian_service = ConfluenceService()
         self._processed_pages: Dict[str, bool] = {}
 
+        # Per-page versions from previous runs drive incremental sync
+        self._sync_state = sync_state or SyncStateStore()
+        self._sync_config = self._load_section(
+            "ingestion.sync_state.confluence", SYNC_DEFAULTS
+        )
+        self._sync_stats: Dict[str, Dict[str, int]] = {}
+        self._pipeline_config = PipelineConfig.from_settings()
+
         # Initialize vector store
         self._vector_store = VectorStoreFactory.get_default_vector_store()
         self._embedding_type = EmbeddingType.DEFAULT
@@ -37,25 +58,102 @@ class ConfluenceIngestionService(BaseIngestionService):
             raise ValueError("No sources(spaces) provided in configuration")
 
     async def ingest(self) -> bool:
-        """Ingest all configured Confluence spaces and pages."""
+        """Sync all configured Confluence spaces into the vector store."""
         success = True
         await self._vector_store.get_connection()
 
         if self.config.sources:
-            spaces_to_embed = self._atlassian_service.list_confluence_spaces(
-                self.config.sources
+            spaces_to_embed = await asyncio.to_thread(
+                self._atlassian_service.list_confluence_spaces, self.config.sources
             )
             logger.info(f"Space Retrieved {spaces_to_embed}")
             for space_key in spaces_to_embed:
-                pages = self._atlassian_service.list_confluence_pages_in_space(
-                    space_key
-                )
-                for page in pages:
-                    page_success = await self.ingest_single(page)
-                    success = success and page_success
+                space_success = await self.sync_space(space_key)
+                success = success and space_success
 
         return success
 
+    async def sync_space(self, space_key: str, full: bool = False) -> bool:
+        """Bring one space in sync, re-embedding only pages whose version changed.
+
+        The first run (or ``full=True``) lists every page. Later runs ask CQL
+        for pages modified since the stored watermark, then compare the page
+        id/version listing against the sync state to drop pages deleted
+        upstream. The watermark only advances when every page succeeded, so
+        failed pages are retried on the next run.
+
+        Changed pages run through the staged ingestion pipeline, so fetching,
+        chunking, embedding and upserting overlap across pages.
+        """
+        namespace = self._namespace(space_key)
+        started_at = datetime.now(timezone.utc)
+        known = self._sync_state.get_all(namespace)
+        watermark = self._sync_state.get_watermark(namespace)
+        incremental = (
+            not full and self._sync_config.get("incremental", True) and watermark
+        )
+        stats = {"fetched": 0, "embedded": 0, "unchanged": 0, "deleted": 0}
+        failed = 0
+
+        if incremental:
+            since = watermark - timedelta(
+                minutes=int(self._sync_config.get("watermark_overlap_minutes", 0))
+            )
+            pages = await asyncio.to_thread(
+                self._atlassian_service.list_confluence_pages_modified_since,
+                space_key,
+                since,
+            )
+            live_ids = set(
+                await asyncio.to_thread(
+                    self._atlassian_service.list_confluence_page_versions, space_key
+                )
+            )
+        else:
+            pages = await asyncio.to_thread(
+                self._atlassian_service.list_confluence_pages_in_space, space_key
+            )
+            live_ids = {str(page["id"]) for page in pages}
+        stats["fetched"] = len(pages)
+
+        changed = []
+        for page in pages:
+            version = str(page.get("version", {}).get("number", ""))
+            record = known.get(str(page["id"]))
+            if record and record.version == version:
+                stats["unchanged"] += 1
+            else:
+                changed.append(page)
+
+        if changed:
+            result = await self._build_pipeline(space_key, known).run(
+                (str(page["id"]), page) for page in changed
+            )
+            stats["embedded"] = len(result.succeeded) + len(result.empty)
+            failed += len(result.failed)
+
+        removed = [page_id for page_id in known if page_id not in live_ids]
+        for page_id in removed:
+            document_id = known[page_id].document_id
+            if document_id and not await self._delete_document(document_id):
+                failed += 1
+                continue
+            self._sync_state.delete(namespace, [page_id])
+            if document_id:
+                await forget_deleted_documents(
+                    self._vector_store, self._embedding_type, [document_id]
+                )
+            stats["deleted"] += 1
+
+        if not failed:
+            self._sync_state.set_watermark(namespace, started_at)
+        self._sync_stats[space_key] = {**stats, "failed": failed}
+        logger.info(
+            f"Confluence space {space_key} synced "
+            f"({'incremental' if incremental else 'full'}): {self._sync_stats[space_key]}"
+        )
+        return failed == 0
+
     @handle_atlassian_errors(default_return=False)
     async def ingest_single(self, page) -> bool:
         """Ingest a single Confluence  page."""
@@ -93,31 +191,105 @@ class ConfluenceIngestionService(BaseIngestionService):
 
     async def _process_page_by_id(self, page_id: str) -> List[Document]:
         """Process a single page by ID."""
-        content, metadata = self._atlassian_service.retrieve_confluence_page(page_id)
+        content, metadata = await asyncio.to_thread(
+            self._atlassian_service.retrieve_confluence_page, page_id
+        )
         return self.__chunk_doc(content, metadata)
 
     @handle_atlassian_errors(default_return=[])
     async def _process_page(self, page: dict) -> List[Document]:
         """Process a single Confluence page into documents."""
 
-        content, metadata = self._atlassian_service.extract_content_from_a_page(page)
+        content, metadata = await asyncio.to_thread(
+            self._atlassian_service.extract_content_from_a_page, page
+        )
 
         return self.__chunk_doc(content, metadata)
 
     def __chunk_doc(self, content, metadata) -> List[Document]:
         """Chunk a single document using the text splitter."""
+        if metadata.get("page_id"):
+            metadata = {
+                **metadata,
+                "document_id": self.page_document_id(metadata["page_id"]),
+            }
         document = Document(page_content=content, metadata=metadata)
         return self.text_splitter.split_documents([document])
 
-    async def close(self):
-        """Close vector store connections."""
-        if self._vector_store:
-            await self._vector_store.close_connection()
+    def _build_pipeline(
+        self, space_key: str, known: Dict[str, SyncRecord]
+    ) -> IngestionPipeline:
+        """Pipeline that replaces changed pages and records their new versions."""
+        namespace = self._namespace(space_key)
+
+        async def fetch(page: dict):
+            record = known.get(str(page["id"]))
+            payload = await asyncio.to_thread(
+                self._atlassian_service.extract_content_from_a_page, page
+            )
+            # Stores with chunk-level diffs replace only the changed chunks.
+            # Others drop the old chunks once the page is extracted; the new
+            # chunks share the document id, so this cannot wait for upsert.
+            if (
+                record
+                and record.document_id
+                and not self._vector_store.supports_chunk_diff()
+            ):
+                await self._delete_document(record.document_id)
+            return payload
+
+        def chunk(payload) -> List[Document]:
+            content, metadata = payload
+            return self.__chunk_doc(content, metadata)
+
+        def on_complete(item):
+            self._processed_pages[item.key] = True
+            self._sync_state.upsert(
+                namespace, [self._sync_record(item.source, space_key)]
+            )
+
+        def on_failed(item):
+            self._processed_pages[item.key] = False
+
+        return IngestionPipeline.for_vector_store(
+            self._vector_store,
+            self._embedding_type,
+            fetch=fetch,
+            chunk=chunk,
+            document_id=lambda payload: self.page_document_id(payload[1]["page_id"]),
+            config=self._pipeline_config,
+            on_item_complete=on_complete,
+            on_item_failed=on_failed,
+            name=f"confluence:{space_key}",
+        )
+
+    @staticmethod
+    def page_document_id(page_id: str) -> str:
+        """Stable vector-store document id shared by all chunks of a page."""
+        return DocumentMetadata.create_hash(f"confluence:{page_id}")[:32]
+
+    @staticmethod
+    def _namespace(space_key: str) -> str:
+        return f"confluence:{space_key}"
+
+    def _sync_record(self, page: dict, space_key: str) -> SyncRecord:
+        version = page.get("version", {})
+        return SyncRecord(
+            item_id=str(page["id"]),
+            version=str(version.get("number", "")),
+            last_modified=version.get("when"),
+            document_id=self.page_document_id(str(page["id"])),
+            extra={"space": space_key, "title": page.get("title", "")},
+        )
 
     def get_processed_pages_status(self) -> Dict[str, bool]:
         """Get the status of processed pages."""
         return self._processed_pages.copy()
 
+    def get_sync_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get per-space counts from the last sync."""
+        return {space: dict(stats) for space, stats in self._sync_stats.items()}
+
     def set_embedding_type(self, embedding_type: EmbeddingType):
         """Set the embedding type to use."""
         self._embedding_type = embedding_type
@@ -0,0 +1,519 @@
+"""
+Near-duplicate chunk detection before embedding.
+
+Confluence templates, footers and copy-pasted runbooks produce the same chunk
+many times over. The ingestion pipeline passes every document's chunks
+through a DedupIndex before they are embedded:
+
+* exact duplicates (same text after whitespace and case folding) and
+* near duplicates (estimated Jaccard similarity of word shingles at or above
+  ``threshold``, found with MinHash signatures and an LSH band index)
+
+of a chunk that another document already stored are skipped and recorded as
+links to that canonical chunk. Repeats within one document are dropped.
+
+The index lives in the sync-state database, so it follows the same lifecycle
+as the per-item sync records. When a canonical chunk goes away (its document
+changed or was deleted), its first duplicate is promoted to canonical and
+returned so the caller stores it: content is never lost from the vector
+store because its first copy disappeared.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from app.core.utils.logger import get_logger
+
+from .sync_state import DEFAULT_STATE_PATH
+
+logger = get_logger(__name__)
+
+_WORD = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_chunks (
+    key         TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    hash        TEXT NOT NULL,
+    signature   BLOB,
+    canonical   TEXT,
+    content     TEXT,
+    metadata    TEXT
+);
+CREATE INDEX IF NOT EXISTS dedup_chunks_hash ON dedup_chunks (hash);
+CREATE INDEX IF NOT EXISTS dedup_chunks_document ON dedup_chunks (document_id);
+CREATE INDEX IF NOT EXISTS dedup_chunks_canonical ON dedup_chunks (canonical);
+CREATE TABLE IF NOT EXISTS dedup_bands (
+    band   INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    key    TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dedup_stats (
+    namespace TEXT PRIMARY KEY,
+    chunks    INTEGER NOT NULL DEFAULT 0,
+    exact     INTEGER NOT NULL DEFAULT 0,
+    near      INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass
+class DedupConfig:
+    """Thresholds and MinHash/LSH shape of the dedup index."""
+
+    enabled: bool = False
+    # Defaults to the sync-state database
+    path: Optional[str] = None
+    near_duplicates: bool = True
+    # Estimated Jaccard similarity of shingles at which chunks are duplicates
+    threshold: float = 0.85
+    num_perm: int = 64
+    # num_perm / bands rows per band; more bands find less similar candidates
+    bands: int = 16
+    shingle_size: int = 3
+    # Shorter chunks are only matched exactly
+    min_words: int = 8
+    seed: int = 1
+
+    @classmethod
+    def from_config(
+        cls, config: Optional[Dict[str, Any]], sync_state_path: Optional[str] = None
+    ) -> "DedupConfig":
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in dict(config or {}).items() if k in known}
+        result = cls(**values)
+        for name in ("enabled", "near_duplicates"):
+            value = getattr(result, name)
+            if isinstance(value, str):
+                setattr(result, name, value.lower() == "true")
+        result.path = str(result.path or sync_state_path or DEFAULT_STATE_PATH)
+        result.threshold = float(result.threshold)
+        result.num_perm = int(result.num_perm)
+        result.bands = max(1, min(int(result.bands), result.num_perm))
+        if result.num_perm % result.bands:
+            raise ValueError("dedup num_perm must be a multiple of bands")
+        return result
+
+    @classmethod
+    def from_settings(cls) -> "DedupConfig":
+        """Build from ``ingestion.dedup`` in application-ingestion.yaml."""
+        try:
+            from app.core.config.framework.settings import settings
+
+            return cls.from_config(
+                settings.get_section("ingestion.dedup", {}),
+                settings.get_section("ingestion.sync_state.path", DEFAULT_STATE_PATH),
+            )
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.warning(f"Dedup config unavailable, dedup disabled: {e}")
+            return cls.from_config({})
+
+
+def normalized_words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def exact_hash(text: str) -> str:
+    """SHA-256 of a chunk's words, ignoring whitespace and case."""
+    return hashlib.sha256(" ".join(normalized_words(text)).encode()).hexdigest()
+
+
+class MinHasher:
+    """MinHash signatures of word shingles with universal hashing."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a * x stays below 2**63 for 32-bit shingle hashes
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.shingle_size = shingle_size
+
+    def signature(self, words: Sequence[str]) -> np.ndarray:
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {
+            " ".join(words[i : i + size]) for i in range(len(words) - size + 1)
+        } or {""}
+        hashes = np.fromiter(
+            (
+                int.from_bytes(
+                    hashlib.blake2b(s.encode(), digest_size=4).digest(), "little"
+                )
+                for s in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return (permuted.min(axis=0) & 0xFFFFFFFF).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(a == b))
+
+
+@dataclass
+class DedupResult:
+    """Outcome of deduplicating a batch of chunks."""
+
+    kept: List[Document] = field(default_factory=list)
+    exact: int = 0
+    near: int = 0
+    # Former duplicates that became canonical and must be stored now
+    promoted: List[Document] = field(default_factory=list)
+
+    @property
+    def skipped(self) -> int:
+        return self.exact + self.near
+
+
+class DedupIndex:
+    """Persistent exact-hash and MinHash/LSH index of canonical chunks.
+
+    Chunks are keyed by ``document_id`` and exact hash; chunks without a
+    document_id are passed through untouched. All methods are thread-safe.
+    """
+
+    def __init__(self, config: Optional[DedupConfig] = None):
+        self.config = config or DedupConfig.from_settings()
+        self._hasher = MinHasher(
+            self.config.num_perm, self.config.shingle_size, self.config.seed
+        )
+        self._rows = self.config.num_perm // self.config.bands
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Lazily open the database and create the schema."""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.config.path != ":memory:":
+                        Path(self.config.path).parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.config.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._conn = conn
+        return self._conn
+
+    def filter(self, docs: List[Document], namespace: str = "default") -> DedupResult:
+        """
+        Drop chunks that duplicate a stored canonical chunk.
+
+        Every document in ``docs`` is treated as complete: its chunks from an
+        earlier ingest that are missing now stop being canonical.
+
+        Args:
+            docs: Chunks of one or more documents, in document order
+            namespace: Source the chunks came from, for per-source stats
+
+        Returns:
+            Kept chunks in their original order, duplicate counts and the
+            promoted chunks the caller must store
+        """
+        result = DedupResult()
+        groups: Dict[str, List[int]] = {}
+        for position, doc in enumerate(docs):
+            document_id = doc.metadata.get("document_id")
+            if document_id:
+                groups.setdefault(str(document_id), []).append(position)
+        keep = [not doc.metadata.get("document_id") for doc in docs]
+        with self._lock, self.connection:
+            for document_id, positions in groups.items():
+                for position in self._filter_document(
+                    document_id, [docs[p] for p in positions], positions, result
+                ):
+                    keep[position] = True
+            self.connection.execute(
+                "INSERT INTO dedup_stats (namespace, chunks, exact, near) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(namespace) DO UPDATE SET "
+                "chunks = chunks + excluded.chunks, exact = exact + excluded.exact, "
+                "near = near + excluded.near",
+                (namespace, len(docs), result.exact, result.near),
+            )
+        result.kept = [doc for doc, kept in zip(docs, keep) if kept]
+        if result.skipped:
+            logger.debug(
+                f"Dedup {namespace}: skipped {result.exact} exact and "
+                f"{result.near} near duplicates of {len(docs)} chunks"
+            )
+        return result
+
+    def forget_documents(self, document_ids: Sequence[str]) -> List[Document]:
+        """
+        Drop deleted documents from the index.
+
+        Returns:
+            Duplicates promoted to canonical that the caller must store
+        """
+        promoted: List[Document] = []
+        with self._lock, self.connection:
+            for document_id in document_ids:
+                canonical = self.connection.execute(
+                    "SELECT key FROM dedup_chunks WHERE document_id = ? "
+                    "AND canonical IS NULL",
+                    (document_id,),
+                ).fetchall()
+                for (key,) in canonical:
+                    promoted.extend(self._remove_canonical(key))
+                self.connection.execute(
+                    "DELETE FROM dedup_chunks WHERE document_id = ?", (document_id,)
+                )
+        return promoted
+
+    def stats(self) -> Dict[str, Any]:
+        """Canonical and duplicate chunk counts and dedup ratios per source."""
+        with self._lock:
+            canonical, duplicates = self.connection.execute(
+                "SELECT COUNT(*) FILTER (WHERE canonical IS NULL), "
+                "COUNT(*) FILTER (WHERE canonical IS NOT NULL) FROM dedup_chunks"
+            ).fetchone()
+            rows = self.connection.execute(
+                "SELECT namespace, chunks, exact, near FROM dedup_stats"
+            ).fetchall()
+        return {
+            "canonical_chunks": canonical,
+            "duplicate_chunks": duplicates,
+            "sources": {
+                namespace: {
+                    "chunks": chunks,
+                    "exact_duplicates": exact,
+                    "near_duplicates": near,
+                    "dedup_ratio": round((exact + near) / chunks, 4) if chunks else 0.0,
+                }
+                for namespace, chunks, exact, near in rows
+            },
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # Internals (called with the lock held, inside a transaction)
+
+    def _filter_document(
+        self,
+        document_id: str,
+        docs: List[Document],
+        positions: List[int],
+        result: DedupResult,
+    ) -> List[int]:
+        conn = self.connection
+        previous = {
+            row[0]
+            for row in conn.execute(
+                "SELECT key FROM dedup_chunks WHERE document_id = ? "
+                "AND canonical IS NULL",
+                (document_id,),
+            )
+        }
+        # Links of this document are recomputed below
+        conn.execute(
+            "DELETE FROM dedup_chunks WHERE document_id = ? AND canonical IS NOT NULL",
+            (document_id,),
+        )
+        kept_keys, kept_positions = set(), []
+        for doc, position in zip(docs, positions):
+            words = normalized_words(doc.page_content)
+            digest = exact_hash(doc.page_content)
+            key = f"{document_id}:{digest}"
+            if key in kept_keys:
+                # Repeated within the document
+                result.exact += 1
+                continue
+            if key in previous:
+                kept_keys.add(key)
+                kept_positions.append(position)
+                continue
+
+            signature = None
+            canonical = conn.execute(
+                "SELECT key FROM dedup_chunks WHERE hash = ? AND canonical IS NULL "
+                "AND document_id != ? LIMIT 1",
+                (digest, document_id),
+            ).fetchone()
+            if canonical is not None:
+                result.exact += 1
+            elif self.config.near_duplicates and len(words) >= self.config.min_words:
+                signature = self._hasher.signature(words)
+                canonical = self._near_duplicate(signature, document_id)
+                if canonical is not None:
+                    result.near += 1
+
+            if canonical is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO dedup_chunks (key, document_id, hash, "
+                    "signature, canonical, content, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        document_id,
+                        digest,
+                        None if signature is None else signature.tobytes(),
+                        canonical[0],
+                        doc.page_content,
+                        json.dumps(doc.metadata, default=str),
+                    ),
+                )
+                continue
+
+            self._add_canonical(key, document_id, digest, words, signature)
+            kept_keys.add(key)
+            kept_positions.append(position)
+
+        for key in previous - kept_keys:
+            result.promoted.extend(self._remove_canonical(key))
+        return kept_positions
+
+    def _near_duplicate(
+        self, signature: np.ndarray, document_id: str
+    ) -> Optional[Tuple[str]]:
+        conn = self.connection
+        candidates = set()
+        for band, bucket in self._buckets(signature):
+            candidates.update(
+                row[0]
+                for row in conn.execute(
+                    "SELECT key FROM dedup_bands WHERE band = ? AND bucket = ?",
+                    (band, bucket),
+                )
+            )
+        best, best_score = None, self.config.threshold
+        for key in sorted(candidates):
+            row = conn.execute(
+                "SELECT signature FROM dedup_chunks WHERE key = ? AND document_id != ?",
+                (key, document_id),
+            ).fetchone()
+            if row is None or row[0] is None:
+                continue
+            score = similarity(signature, np.frombuffer(row[0], dtype=np.uint32))
+            if score >= best_score:
+                best, best_score = key, score
+        return (best,) if best is not None else None
+
+    def _buckets(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        rows = self._rows
+        return [
+            (
+                band,
+                int.from_bytes(
+                    hashlib.blake2b(
+                        signature[band * rows : (band + 1) * rows].tobytes(),
+                        digest_size=8,
+                    ).digest(),
+                    "little",
+                    signed=True,
+                ),
+            )
+            for band in range(self.config.bands)
+        ]
+
+    def _add_canonical(
+        self,
+        key: str,
+        document_id: str,
+        digest: str,
+        words: List[str],
+        signature: Optional[np.ndarray],
+    ) -> None:
+        if signature is None and len(words) >= self.config.min_words:
+            signature = self._hasher.signature(words)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO dedup_chunks (key, document_id, hash, signature, "
+            "canonical, content, metadata) VALUES (?, ?, ?, ?, NULL, NULL, NULL)",
+            (
+                key,
+                document_id,
+                digest,
+                None if signature is None else signature.tobytes(),
+            ),
+        )
+        if signature is not None:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO dedup_bands (band, bucket, key) VALUES (?, ?, ?)",
+                [(band, bucket, key) for band, bucket in self._buckets(signature)],
+            )
+
+    def _remove_canonical(self, key: str) -> List[Document]:
+        """Drop a canonical chunk, promoting its first duplicate in its place."""
+        conn = self.connection
+        conn.execute("DELETE FROM dedup_bands WHERE key = ?", (key,))
+        conn.execute("DELETE FROM dedup_chunks WHERE key = ?", (key,))
+        dependents = conn.execute(
+            "SELECT key, document_id, hash, content, metadata FROM dedup_chunks "
+            "WHERE canonical = ? ORDER BY key",
+            (key,),
+        ).fetchall()
+        if not dependents:
+            return []
+        heir, document_id, digest, content, metadata = dependents[0]
+        self._add_canonical(
+            heir, document_id, digest, normalized_words(content or ""), None
+        )
+        conn.execute(
+            "UPDATE dedup_chunks SET canonical = ? WHERE canonical = ?", (heir, key)
+        )
+        return [Document(page_content=content or "", metadata=json.loads(metadata))]
+
+
+async def store_promoted(
+    vector_store, embedding_type, docs: List[Document], lexical_index=None
+) -> None:
+    """Embed and store duplicates that replaced a removed canonical chunk."""
+    if not docs:
+        return
+    result = vector_store.save_and_embed(embedding_type, docs)
+    if inspect.isawaitable(result):
+        await result
+    if lexical_index is not None:
+        await asyncio.to_thread(lexical_index.add, docs)
+    logger.info(f"Stored {len(docs)} promoted duplicate chunks")
+
+
+async def forget_deleted_documents(
+    vector_store, embedding_type, document_ids: Sequence[str]
+) -> None:
+    """Drop deleted documents from the dedup index and store promoted copies."""
+    index = get_dedup_index()
+    if index is None or not document_ids:
+        return
+    from app.db.vector.lexical_index import lexical_index_for
+
+    promoted = await asyncio.to_thread(index.forget_documents, list(document_ids))
+    await store_promoted(
+        vector_store, embedding_type, promoted, lexical_index_for(vector_store)
+    )
+
+
+_index: Optional[DedupIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_dedup_index() -> Optional[DedupIndex]:
+    """The process-wide dedup index, or None when dedup is disabled."""
+    global _index
+    config = DedupConfig.from_settings()
+    if not config.enabled:
+        return None
+    with _index_lock:
+        if _index is None or _index.config.path != config.path:
+            _index = DedupIndex(config)
+        return _index
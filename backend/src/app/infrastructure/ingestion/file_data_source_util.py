@@ -1,5 +1,8 @@
 from enum import Enum
+from functools import lru_cache
+from typing import List
 
+from langchain.schema import Document
 from langchain_community.document_loaders import (
     Docx2txtLoader,
     JSONLoader,
@@ -17,6 +20,10 @@ from langchain_community.document_loaders import (
 )
 
 
+class UnsupportedFileTypeError(ValueError):
+    """Raised when a file's MIME type has no loader."""
+
+
 class FileType(str, Enum):
     """Supported file types and their MIME types."""
 
@@ -209,3 +216,33 @@ def _construct_mapping():
         FileType.TAR: (TextLoader, {}),
         FileType.GZIP: (TextLoader, {}),
     }
+
+
+# CPU-heavy formats that file ingestion parses in a process pool
+PROCESS_POOL_FILE_TYPES = frozenset(
+    {
+        FileType.PDF,
+        FileType.DOC,
+        FileType.DOCX,
+        FileType.XLS,
+        FileType.XLSX,
+        FileType.PPT,
+        FileType.PPTX,
+        FileType.HTML,
+        FileType.RTF,
+    }
+)
+
+
+@lru_cache(maxsize=1)
+def _cached_mapping():
+    return _construct_mapping()
+
+
+def load_file(file_path: str, mime_type: str) -> List[Document]:
+    """Load a file with the loader mapped to its MIME type.
+
+    Defined at module level so it can be submitted to a process pool.
+    """
+    loader_class, _ = _cached_mapping()[FileType(mime_type)]
+    return loader_class(file_path).load()
@@ -1,26 +1,43 @@
-import gzip
+import asyncio
+import multiprocessing
 import os
-import shutil
-import tarfile
-import tempfile
-import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import magic
 from langchain.schema import Document
-from langchain_community.document_loaders import TextLoader
 
 from app.core.constants import DataSourceType, EmbeddingType
 from app.core.utils.logger import get_logger
 from app.db.vector.providers.db_provider import VectorStoreFactory
 from app.infrastructure.ingestion.base import BaseIngestionService
-
-from .file_data_source_util import FileType, _construct_mapping
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
+
+from .archive_reader import ArchiveLimits, ArchiveReader
+from .dedup import forget_deleted_documents
+from .file_data_source_util import (
+    PROCESS_POOL_FILE_TYPES,
+    FileType,
+    UnsupportedFileTypeError,
+    _construct_mapping,
+    load_file,
+)
+from .file_manifest import FileFingerprint, FileManifest, file_document_id
 from .rag_data_provider import RagDataProvider
+from .sync_state import SyncRecord
 
 logger = get_logger(__name__)
 
+FILE_DEFAULTS = {
+    "recursive": True,
+    "include_hidden": False,
+    "skip_unchanged": True,
+    # 0 = one worker per CPU, negative disables the process pool
+    "parse_workers": 0,
+    "start_method": "spawn",
+}
+
 
 @RagDataProvider.register(DataSourceType.FILE)
 class FileIngestionService(BaseIngestionService):
@@ -30,7 +47,10 @@ class FileIngestionService(BaseIngestionService):
     def __init__(self):
         # Call parent to auto-locate config by SOURCE_TYPE from settings singleton
         super().__init__()
+        self._init_file_ingestion(FileManifest())
 
+    def _init_file_ingestion(self, manifest: Optional[FileManifest]) -> None:
+        """Loaders, vector store and parsing; without a manifest every file is ingested."""
         self._processed_files: Dict[str, bool] = {}
 
         # Initialize loader mapping
@@ -39,6 +59,16 @@ class FileIngestionService(BaseIngestionService):
         # Initialize vector store
         self._vector_store = VectorStoreFactory.get_default_vector_store()
         self._embedding_type = EmbeddingType.DEFAULT  # Default embedding type
+        self._pipeline_config = PipelineConfig.from_settings()
+
+        # Skip-unchanged manifest and process pool for CPU-heavy parsers
+        self._file_config = self._load_section("ingestion.file", FILE_DEFAULTS)
+        self._manifest = manifest
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._archive_reader = ArchiveReader(
+            self._loader_mapping,
+            ArchiveLimits.from_config(self._file_config.get("archive")),
+        )
 
     def validate_config(self) -> None:
         """Validate the file ingestion configuration."""
@@ -54,7 +84,8 @@ class FileIngestionService(BaseIngestionService):
 
         for source_path in self.config.sources:
             try:
-                await self._process_files_in_folder(source_path)
+                folder_success = await self._process_files_in_folder(source_path)
+                success = success and folder_success
             except Exception as e:
                 self._processed_files[source_path] = False
                 success = False
@@ -63,14 +94,182 @@ class FileIngestionService(BaseIngestionService):
         return success
 
     async def _process_files_in_folder(self, folder_path: str) -> bool:
+        """Ingest new and changed files under a folder through the pipeline.
+
+        Files whose size/mtime or content hash match the manifest are skipped
+        without being parsed; files that disappeared since the last run have
+        their chunks removed.
+        """
+        files = await asyncio.to_thread(self._discover_files, folder_path)
+        if self._manifest is not None and self._file_config.get("skip_unchanged", True):
+            changed, unchanged = await asyncio.to_thread(self._manifest.diff, files)
+        else:
+            changed = [(FileFingerprint.from_path(path), None) for path in files]
+            unchanged = 0
+        logger.info(
+            f"Discovered {len(files)} files in {folder_path}: "
+            f"{len(changed)} new or changed, {unchanged} unchanged"
+        )
+        for path in files:
+            self._processed_files.setdefault(path, True)
+
+        await self._vector_store.get_connection()
+        success = await self._remove_deleted_files(folder_path, files)
+        if changed:
+            result = await self._build_pipeline().run(
+                (fingerprint.path, (fingerprint, record))
+                for fingerprint, record in changed
+            )
+            success = success and result.success
+        return success
+
+    def _discover_files(self, folder_path: str) -> List[str]:
+        """List files under a folder, recursing into subfolders if configured."""
+        root = Path(folder_path)
+        if root.is_file():
+            return [str(root.resolve())]
+        include_hidden = self._file_config.get("include_hidden", False)
+        pattern = "**/*" if self._file_config.get("recursive", True) else "*"
+        files = []
+        for file_path in root.glob(pattern):
+            relative = file_path.relative_to(root)
+            if not include_hidden and any(
+                part.startswith(".") for part in relative.parts
+            ):
+                continue
+            if file_path.is_file():
+                files.append(str(file_path.resolve()))
+        return sorted(files)
+
+    async def _remove_deleted_files(self, folder_path: str, files: List[str]) -> bool:
+        """Delete chunks of files that were ingested before but no longer exist."""
+        if self._manifest is None:
+            return True
+        removed = self._manifest.removed(folder_path, files)
+        success = True
+        forgotten = []
+        for path, record in removed.items():
+            if record.document_id and not await self._delete_document(
+                record.document_id
+            ):
+                success = False
+                continue
+            forgotten.append(path)
+        await forget_deleted_documents(
+            self._vector_store,
+            self._embedding_type,
+            [
+                removed[path].document_id
+                for path in forgotten
+                if removed[path].document_id
+            ],
+        )
+        if forgotten:
+            self._manifest.forget(forgotten)
+            logger.info(f"Removed {len(forgotten)} deleted files from {folder_path}")
+        return success
 
-        for file_path in Path(folder_path).iterdir():
-            if file_path.is_file() and os.path.exists(file_path):
-                file_abs_path = str(file_path)
-                process_status = await self.ingest_single(file_abs_path)
-                self._processed_files[file_abs_path] = True
-                logger.info(f"Processed {file_abs_path} Status: {process_status}")
-        return True
+    def _build_pipeline(self) -> IngestionPipeline:
+        """Pipeline that parses, splits, embeds and stores files concurrently."""
+        unsupported: Dict[str, str] = {}
+
+        async def fetch(source) -> tuple:
+            try:
+                return await self._fetch_file(source)
+            except UnsupportedFileTypeError as e:
+                fingerprint, record = source
+                logger.info(f"Skipping {fingerprint.path}: {e}")
+                unsupported[fingerprint.path] = str(e)
+                # A file that changed into an unsupported type drops its chunks
+                replaced = self._replaced_document_id(fingerprint, record)
+                if replaced and not self._vector_store.supports_chunk_diff():
+                    await self._delete_document(replaced)
+                return fingerprint.path, []
+
+        def on_complete(item):
+            fingerprint, _ = item.source
+            self._processed_files[item.key] = item.chunks > 0
+            if self._manifest is not None and item.key in unsupported:
+                # Kept in the manifest so the file is not detected again
+                # until it changes
+                self._manifest.mark_skipped(fingerprint, unsupported[item.key])
+            elif self._manifest is not None:
+                self._manifest.mark_ingested(fingerprint)
+            logger.info(f"Processed {item.key}: {item.chunks} chunks saved")
+
+        def on_failed(item):
+            self._processed_files[item.key] = False
+
+        return IngestionPipeline.for_vector_store(
+            self._vector_store,
+            self._embedding_type,
+            fetch=fetch,
+            chunk=self._chunk_file,
+            document_id=lambda payload: self._document_id(payload[0]),
+            config=self._pipeline_config,
+            on_item_complete=on_complete,
+            on_item_failed=on_failed,
+            name="file",
+        )
+
+    async def _fetch_file(self, source) -> tuple:
+        """Parse a changed file, then replace its old chunks.
+
+        CPU-heavy formats are parsed in the process pool; everything else
+        (text, archives) is loaded in a worker thread. Old chunks are only
+        deleted once parsing succeeded, so a file that fails to parse keeps
+        its previous chunks. Stores with chunk-level diffs keep the old
+        chunks; the pipeline replaces only changed ones.
+        """
+        fingerprint, record = source
+        path = fingerprint.path
+        file_type = await asyncio.to_thread(self._detect_file_type, path)
+        pool = self._get_process_pool()
+        if pool is not None and file_type in PROCESS_POOL_FILE_TYPES:
+            loop = asyncio.get_running_loop()
+            documents = await loop.run_in_executor(
+                pool, load_file, path, file_type.value
+            )
+        else:
+            documents = await asyncio.to_thread(self._load_document, path, file_type)
+
+        replaced = self._replaced_document_id(fingerprint, record)
+        if replaced and not self._vector_store.supports_chunk_diff():
+            await self._delete_document(replaced)
+        return path, documents
+
+    def _replaced_document_id(
+        self, fingerprint: FileFingerprint, record: Optional[SyncRecord]
+    ) -> Optional[str]:
+        """Document whose chunks a changed file replaces, if it was ingested."""
+        return record.document_id if record else None
+
+    def _document_id(self, path: str) -> str:
+        """Vector-store document id shared by all chunks of a file."""
+        return file_document_id(path)
+
+    def _chunk_file(self, payload) -> List[Document]:
+        """Split parsed documents and tag chunks with the file's document id."""
+        path, documents = payload
+        document_id = self._document_id(path)
+        chunks = self.text_splitter.split_documents(documents)
+        for chunk in chunks:
+            chunk.metadata["document_id"] = document_id
+        return chunks
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Lazily start the parsing process pool (disabled with parse_workers < 0)."""
+        workers = int(self._file_config.get("parse_workers", 0))
+        if workers < 0:
+            return None
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context(
+                    self._file_config.get("start_method", "spawn")
+                ),
+            )
+        return self._process_pool
 
     async def ingest_single(self, source: str) -> bool:
         """
@@ -129,14 +328,17 @@ class FileIngestionService(BaseIngestionService):
         try:
             return FileType(mime_type)
         except ValueError:
-            raise ValueError(f"Unsupported MIME type: {mime_type}")
+            raise UnsupportedFileTypeError(f"Unsupported MIME type: {mime_type}")
 
-    def _load_document(self, file_path: str) -> List[Document]:
+    def _load_document(
+        self, file_path: str, file_type: Optional[FileType] = None
+    ) -> List[Document]:
         """
         Load a document using the appropriate loader based on file type.
 
         Args:
             file_path: Path to the file to load
+            file_type: Type already detected by the caller (detected if omitted)
 
         Returns:
             List[Document]: Loaded documents
@@ -144,8 +346,9 @@ class FileIngestionService(BaseIngestionService):
         Raises:
             ValueError: If file type is not supported
         """
-        file_type = self._detect_file_type(file_path)
-        logger.info(f"Detected file type {file_type} for {file_path}")
+        if file_type is None:
+            file_type = self._detect_file_type(file_path)
+            logger.info(f"Detected file type {file_type} for {file_path}")
 
         if file_type not in self._loader_mapping:
             raise ValueError(f"Unsupported file type: {file_type}")
@@ -163,78 +366,17 @@ class FileIngestionService(BaseIngestionService):
 
     def _handle_archive(self, file_path: str, file_type: FileType) -> List[Document]:
         """
-        Handle archive files by extracting and processing their contents.
-        Directly loads extracted files without recursive archive handling.
+        Handle archive files by streaming their members into the loaders.
+        Nested archives are read recursively up to the configured depth.
         """
-        documents = []
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Extract archive based on type
-            if file_type == FileType.ZIP:
-                with zipfile.ZipFile(file_path, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-            elif file_type == FileType.RAR:
-                # Note: RAR support requires additional setup
-                raise NotImplementedError(
-                    "RAR support requires the 'rarfile' package and external RAR binary"
-                )
-            elif file_type == FileType.TAR:
-                with tarfile.open(file_path, "r") as tar_ref:
-                    tar_ref.extractall(temp_dir)
-            elif file_type == FileType.GZIP:
-                output_path = os.path.join(temp_dir, "extracted_file")
-                with gzip.open(file_path, "rb") as f_in:
-                    with open(output_path, "wb") as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-
-            # Process each extracted file
-            for root, _, files in os.walk(temp_dir):
-                for file in files:
-                    extracted_path = os.path.join(root, file)
-                    try:
-                        # Detect the file type
-                        mime_type = magic.from_file(extracted_path, mime=True)
-                        relative_path = os.path.relpath(extracted_path, temp_dir)
-
-                        # Use TextLoader as fallback if mime type isn't recognized
-                        loader_info = None
-                        try:
-                            file_type = FileType(mime_type)
-                            if file_type in self._loader_mapping:
-                                loader_info = self._loader_mapping[file_type]
-                        except ValueError:
-                            loader_info = (TextLoader, {})
-
-                        if loader_info:
-                            loader_class, loader_config = loader_info
-                            # Skip nested archives to prevent recursion
-                            if loader_class not in [
-                                FileType.ZIP,
-                                FileType.RAR,
-                                FileType.TAR,
-                                FileType.GZIP,
-                            ]:
-                                loader = loader_class(extracted_path, **loader_config)
-                                docs = loader.load()
-                                # Add archive context to metadata
-                                for doc in docs:
-                                    doc.metadata.update(
-                                        {
-                                            "archive_source": file_path,
-                                            "archive_path": relative_path,
-                                        }
-                                    )
-                                documents.extend(docs)
-                    except Exception as e:
-                        # Log error and continue with next file
-                        print(f"Error processing {extracted_path}: {str(e)}")
-                        continue
-
-        return documents
+        return self._archive_reader.load(file_path, file_type)
 
     async def close(self):
-        """Close vector store connections."""
-        if self._vector_store:
-            await self._vector_store.close_connection()
+        """Close vector store connections and stop the parsing process pool."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        await super().close()
 
     def get_processed_files_status(self) -> Dict[str, bool]:
         """Get the status of processed files."""
@@ -0,0 +1,146 @@
+"""
+Manifest of ingested files for skip-unchanged file ingestion.
+
+Each ingested file is recorded in the sync-state store with its size, mtime
+and SHA-256 content hash. On the next run:
+
+- size and mtime unchanged -> skipped without reading the file
+- size or mtime changed but hash unchanged (touched, copied) -> skipped, the
+  record is refreshed so the next run takes the fast path again
+- otherwise the file is re-ingested and its old chunks replaced
+
+Files that disappeared from a source folder are reported so their chunks can
+be removed from the vector store.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.utils.logger import get_logger
+from app.db.vector.base import DocumentMetadata
+from app.infrastructure.ingestion.sync_state import SyncRecord, SyncStateStore
+
+logger = get_logger(__name__)
+
+MANIFEST_NAMESPACE = "file"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """Identity of a file's content at a point in time."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: Optional[str] = None
+
+    @property
+    def version(self) -> str:
+        return f"{self.size}:{self.mtime_ns}"
+
+    @classmethod
+    def from_path(cls, path: str, with_hash: bool = False) -> "FileFingerprint":
+        stat = os.stat(path)
+        return cls(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=hash_file(path) if with_hash else None,
+        )
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_document_id(path: str) -> str:
+    """Stable vector-store document id shared by all chunks of a file."""
+    return DocumentMetadata.create_hash(f"file:{os.path.abspath(path)}")[:32]
+
+
+class FileManifest:
+    """Tracks which files were ingested and whether they changed since."""
+
+    def __init__(self, store: Optional[SyncStateStore] = None):
+        self._store = store or SyncStateStore()
+
+    def diff(
+        self, paths: Iterable[str]
+    ) -> Tuple[List[Tuple[FileFingerprint, Optional[SyncRecord]]], int]:
+        """Split paths into changed files and a count of unchanged ones.
+
+        Returns:
+            ``([(fingerprint, previous_record_or_None), ...], unchanged_count)``
+        """
+        records = self._store.get_all(MANIFEST_NAMESPACE)
+        changed = []
+        touched: List[SyncRecord] = []
+        unchanged = 0
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                fingerprint = FileFingerprint.from_path(path)
+            except OSError as e:
+                logger.warning(f"Cannot stat {path}, skipping: {e}")
+                continue
+
+            record = records.get(path)
+            if record and record.version == fingerprint.version:
+                unchanged += 1
+                continue
+
+            fingerprint = FileFingerprint.from_path(path, with_hash=True)
+            if record and record.content_hash == fingerprint.content_hash:
+                touched.append(self._record(fingerprint, record.document_id))
+                unchanged += 1
+                continue
+            changed.append((fingerprint, record))
+
+        if touched:
+            self._store.upsert(MANIFEST_NAMESPACE, touched)
+        return changed, unchanged
+
+    def removed(self, root: str, present: Iterable[str]) -> Dict[str, SyncRecord]:
+        """Records under ``root`` whose files are no longer present."""
+        root = os.path.join(os.path.realpath(root), "")
+        present = {os.path.abspath(p) for p in present}
+        return {
+            path: record
+            for path, record in self._store.get_all(MANIFEST_NAMESPACE).items()
+            if path.startswith(root) and path not in present
+        }
+
+    def mark_ingested(self, fingerprint: FileFingerprint) -> None:
+        """Record a successfully ingested file."""
+        self._store.upsert(
+            MANIFEST_NAMESPACE,
+            [self._record(fingerprint, file_document_id(fingerprint.path))],
+        )
+
+    def mark_skipped(self, fingerprint: FileFingerprint, reason: str) -> None:
+        """Record a file that has nothing to ingest, so it is not re-read."""
+        record = self._record(fingerprint, None)
+        record.extra["skipped"] = reason
+        self._store.upsert(MANIFEST_NAMESPACE, [record])
+
+    def forget(self, paths: Iterable[str]) -> int:
+        """Drop files from the manifest."""
+        return self._store.delete(MANIFEST_NAMESPACE, list(paths))
+
+    @staticmethod
+    def _record(fingerprint: FileFingerprint, document_id: Optional[str]) -> SyncRecord:
+        return SyncRecord(
+            item_id=fingerprint.path,
+            version=fingerprint.version,
+            content_hash=fingerprint.content_hash,
+            document_id=document_id,
+            extra={"size": fingerprint.size, "mtime_ns": fingerprint.mtime_ns},
+        )
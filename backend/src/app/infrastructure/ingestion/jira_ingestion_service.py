@@ -0,0 +1,295 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from langchain.schema import Document
+
+from app.core.constants import DataSourceType, EmbeddingType
+from app.core.utils.exception.http_exception_handler import handle_atlassian_errors
+from app.core.utils.logger import get_logger
+from app.db.vector.base import DocumentMetadata
+from app.db.vector.providers.db_provider import VectorStoreFactory
+from app.infrastructure.ingestion.base import BaseIngestionService
+from app.infrastructure.ingestion.dedup import forget_deleted_documents
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
+from app.infrastructure.ingestion.rag_data_provider import RagDataProvider
+from app.infrastructure.ingestion.sync_state import SyncRecord, SyncStateStore
+from app.services.external.jira_service import JiraClient
+
+logger = get_logger(__name__)
+
+# Status category Jira assigns to resolved/closed workflow states
+DONE_CATEGORY = "done"
+
+SYNC_DEFAULTS = {
+    "incremental": True,
+    # JQL compares updated at minute precision in the account timezone,
+    # so re-read a window behind the watermark; unchanged issues are skipped.
+    "watermark_overlap_minutes": 1440,
+    # Closed issues stay searchable (re-embedded with their final status)
+    # unless they should be removed from the index.
+    "delete_closed": False,
+    "page_size": 100,
+}
+
+
+@RagDataProvider.register(DataSourceType.JIRA)
+class JiraIngestionService(BaseIngestionService):
+    """Service for ingesting Jira issues of the configured projects"""
+
+    SOURCE_TYPE = DataSourceType.JIRA
+
+    def __init__(self, sync_state: Optional[SyncStateStore] = None):
+        super().__init__()
+
+        self._jira = JiraClient()
+        self._processed_issues: Dict[str, bool] = {}
+
+        # Per-issue updated times from previous runs drive incremental sync
+        self._sync_state = sync_state or SyncStateStore()
+        self._sync_config = self._load_section(
+            "ingestion.sync_state.jira", SYNC_DEFAULTS
+        )
+        self._sync_stats: Dict[str, Dict[str, int]] = {}
+        self._pipeline_config = PipelineConfig.from_settings()
+
+        self._vector_store = VectorStoreFactory.get_default_vector_store()
+        self._embedding_type = EmbeddingType.DEFAULT
+
+    def validate_config(self) -> None:
+        if not self.config.sources:
+            raise ValueError("No sources(projects) provided in configuration")
+
+    async def ingest(self) -> bool:
+        """Sync all configured Jira projects into the vector store."""
+        success = True
+        await self._vector_store.get_connection()
+
+        for project_key in self.config.sources:
+            project_success = await self.sync_project(str(project_key))
+            success = success and project_success
+
+        return success
+
+    async def sync_project(self, project_key: str, full: bool = False) -> bool:
+        """Bring one project in sync, re-embedding only issues that were updated.
+
+        The first run (or ``full=True``) lists every issue. Later runs ask JQL
+        for issues updated since the stored watermark, then compare the
+        project's issue ids against the sync state to drop issues deleted
+        upstream or moved to another project. With ``delete_closed`` set,
+        issues in a done status are removed instead of re-embedded. The
+        watermark only advances when every issue succeeded, so failed issues
+        are retried on the next run.
+
+        Updated issues run through the staged ingestion pipeline, so fetching
+        comments, chunking, embedding and upserting overlap across issues.
+        """
+        namespace = self._namespace(project_key)
+        started_at = datetime.now(timezone.utc)
+        known = self._sync_state.get_all(namespace)
+        watermark = self._sync_state.get_watermark(namespace)
+        incremental = (
+            not full and self._sync_config.get("incremental", True) and watermark
+        )
+        page_size = int(self._sync_config.get("page_size", 100))
+        stats = {"fetched": 0, "embedded": 0, "unchanged": 0, "deleted": 0}
+        failed = 0
+
+        if incremental:
+            since = watermark - timedelta(
+                minutes=int(self._sync_config.get("watermark_overlap_minutes", 0))
+            )
+            issues = await asyncio.to_thread(
+                self._jira.list_issues_updated_since, project_key, since, page_size
+            )
+            live_ids = set(
+                await asyncio.to_thread(self._jira.list_issue_versions, project_key)
+            )
+        else:
+            issues = await asyncio.to_thread(
+                self._jira.list_issues_updated_since, project_key, None, page_size
+            )
+            live_ids = {str(issue["id"]) for issue in issues}
+        stats["fetched"] = len(issues)
+
+        changed = []
+        for issue in issues:
+            issue_id = str(issue["id"])
+            record = known.get(issue_id)
+            if self._sync_config.get("delete_closed") and self._is_closed(issue):
+                live_ids.discard(issue_id)
+            elif record and record.version == self._version(issue):
+                stats["unchanged"] += 1
+            else:
+                changed.append(issue)
+
+        if changed:
+            result = await self._build_pipeline(project_key, known).run(
+                (str(issue["id"]), issue) for issue in changed
+            )
+            stats["embedded"] = len(result.succeeded) + len(result.empty)
+            failed += len(result.failed)
+
+        removed = [issue_id for issue_id in known if issue_id not in live_ids]
+        for issue_id in removed:
+            document_id = known[issue_id].document_id
+            if document_id and not await self._delete_document(document_id):
+                failed += 1
+                continue
+            self._sync_state.delete(namespace, [issue_id])
+            if document_id:
+                await forget_deleted_documents(
+                    self._vector_store, self._embedding_type, [document_id]
+                )
+            stats["deleted"] += 1
+
+        if not failed:
+            self._sync_state.set_watermark(namespace, started_at)
+        self._sync_stats[project_key] = {**stats, "failed": failed}
+        logger.info(
+            f"Jira project {project_key} synced "
+            f"({'incremental' if incremental else 'full'}): {self._sync_stats[project_key]}"
+        )
+        return failed == 0
+
+    @handle_atlassian_errors(default_return=False)
+    async def ingest_single(self, issue_key: str) -> bool:
+        """Ingest (or refresh) a single Jira issue by key."""
+        try:
+            await self._vector_store.get_connection()
+
+            issue = await asyncio.to_thread(self._jira.get_issue, issue_key)
+            content, metadata = await asyncio.to_thread(
+                self._jira.extract_issue_content, issue
+            )
+            documents = self.__chunk_issue(content, metadata)
+            if not documents:
+                logger.info(f"No documents extracted from {issue_key}")
+                self._processed_issues[issue_key] = False
+                return False
+
+            await self._delete_document(documents[0].metadata["document_id"])
+            document_ids = await self._vector_store.save_and_embed(
+                self._embedding_type, documents
+            )
+            logger.info(
+                f"Successfully processed issue {issue_key}: "
+                f"{len(document_ids)} chunks saved"
+            )
+            self._processed_issues[issue_key] = True
+            return True
+        except Exception as e:
+            logger.error(f"Error ingesting Jira issue {issue_key}: {e}")
+            self._processed_issues[issue_key] = False
+            return False
+
+    def __chunk_issue(self, content: str, metadata: dict) -> List[Document]:
+        """Chunk an issue's text under its stable document id."""
+        if not content.strip():
+            return []
+        metadata = {
+            **metadata,
+            "document_id": self.issue_document_id(
+                metadata["project"], metadata["issue_id"]
+            ),
+        }
+        document = Document(page_content=content, metadata=metadata)
+        return self.text_splitter.split_documents([document])
+
+    def _build_pipeline(
+        self, project_key: str, known: Dict[str, SyncRecord]
+    ) -> IngestionPipeline:
+        """Pipeline that replaces updated issues and records their updated times."""
+        namespace = self._namespace(project_key)
+
+        async def fetch(issue: dict):
+            record = known.get(str(issue["id"]))
+            # Fetches the remaining comments when the search truncated them
+            payload = await asyncio.to_thread(self._jira.extract_issue_content, issue)
+            # Stores with chunk-level diffs replace only the changed chunks.
+            # Others drop the old chunks once the issue is extracted; the new
+            # chunks share the document id, so this cannot wait for upsert.
+            if (
+                record
+                and record.document_id
+                and not self._vector_store.supports_chunk_diff()
+            ):
+                await self._delete_document(record.document_id)
+            return payload
+
+        def chunk(payload) -> List[Document]:
+            content, metadata = payload
+            return self.__chunk_issue(content, metadata)
+
+        def on_complete(item):
+            self._processed_issues[item.key] = True
+            self._sync_state.upsert(
+                namespace, [self._sync_record(item.source, project_key)]
+            )
+
+        def on_failed(item):
+            self._processed_issues[item.key] = False
+
+        return IngestionPipeline.for_vector_store(
+            self._vector_store,
+            self._embedding_type,
+            fetch=fetch,
+            chunk=chunk,
+            document_id=lambda payload: self.issue_document_id(
+                payload[1]["project"], payload[1]["issue_id"]
+            ),
+            config=self._pipeline_config,
+            on_item_complete=on_complete,
+            on_item_failed=on_failed,
+            name=f"jira:{project_key}",
+        )
+
+    @staticmethod
+    def issue_document_id(project_key: str, issue_id: str) -> str:
+        """Stable vector-store document id shared by all chunks of an issue.
+
+        Keyed by project as well as issue id, so an issue moved between two
+        synced projects is removed from one and embedded in the other without
+        either sync deleting the other's chunks.
+        """
+        return DocumentMetadata.create_hash(f"jira:{project_key}:{issue_id}")[:32]
+
+    @staticmethod
+    def _namespace(project_key: str) -> str:
+        return f"jira:{project_key}"
+
+    @staticmethod
+    def _version(issue: dict) -> str:
+        return str((issue.get("fields") or {}).get("updated") or "")
+
+    @staticmethod
+    def _is_closed(issue: dict) -> bool:
+        status = (issue.get("fields") or {}).get("status") or {}
+        return (status.get("statusCategory") or {}).get("key") == DONE_CATEGORY
+
+    def _sync_record(self, issue: dict, project_key: str) -> SyncRecord:
+        fields = issue.get("fields") or {}
+        return SyncRecord(
+            item_id=str(issue["id"]),
+            version=self._version(issue),
+            last_modified=fields.get("updated"),
+            document_id=self.issue_document_id(project_key, str(issue["id"])),
+            extra={
+                "project": project_key,
+                "key": issue.get("key", ""),
+                "status": (fields.get("status") or {}).get("name", ""),
+            },
+        )
+
+    def get_processed_issues_status(self) -> Dict[str, bool]:
+        """Get the status of processed issues."""
+        return self._processed_issues.copy()
+
+    def get_sync_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get per-project counts from the last sync."""
+        return {project: dict(stats) for project, stats in self._sync_stats.items()}
+
+    def set_embedding_type(self, embedding_type: EmbeddingType):
+        """Set the embedding type to use."""
+        self._embedding_type = embedding_type
@@ -0,0 +1,576 @@
+"""
+Asynchronous ingestion jobs.
+
+``POST /data/load/{data_source}`` submits a job and returns its id at once;
+the data source's ``ingest()`` then runs on an event loop thread of its own, so
+long ingests never hold a request worker, block the API's event loop or
+compete with retrieval on the shared store loop. The job builds its own stores;
+the connection managers keep a pool and client per loop, which the job closes
+when it ends without touching the ones retrieval uses. At
+most ``max_concurrent_jobs`` run at a time, later ones wait in the queue, and
+one data source has at most one active job per set of parameters.
+
+The ingestion pipeline reports to the job it runs under (see
+current_job_progress): every source item that completes or fails is
+checkpointed, together with the job's counters, in a SQLite database. When
+the process restarts, jobs that were queued or running are resumed and skip
+the items an earlier attempt already finished. Running jobs can be cancelled;
+items finished before the cancellation stay ingested.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.utils.background_loop import BackgroundLoop
+from app.core.utils.logger import get_logger
+
+from .rag_data_provider import RagDataProvider
+
+logger = get_logger(__name__)
+
+DEFAULT_JOBS_PATH = "./volumes/ingestion/jobs.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id          TEXT PRIMARY KEY,
+    data_source TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    state       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ingestion_jobs_status ON ingestion_jobs (status);
+CREATE TABLE IF NOT EXISTS ingestion_job_items (
+    job_id     TEXT NOT NULL,
+    item_key   TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    chunks     INTEGER NOT NULL DEFAULT 0,
+    error      TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, item_key)
+);
+"""
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def active(self) -> bool:
+        return self in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+@dataclass
+class JobConfig:
+    """Where jobs are recorded and how many run at once."""
+
+    path: str = DEFAULT_JOBS_PATH
+    max_concurrent_jobs: int = 1
+    # Most recent item errors kept on the job itself
+    max_errors: int = 50
+    resume_on_startup: bool = True
+
+    @classmethod
+    def from_settings(cls) -> "JobConfig":
+        """Build from ``ingestion.jobs`` in application-ingestion.yaml."""
+        values: Dict[str, Any] = {}
+        try:
+            from app.core.config.framework.settings import settings
+
+            values = settings.get_section("ingestion.jobs", {}) or {}
+        except Exception as e:
+            logger.warning(f"Ingestion job config unavailable, using defaults: {e}")
+        known = {f.name for f in fields(cls)}
+        config = cls(**{k: v for k, v in dict(values).items() if k in known})
+        config.max_concurrent_jobs = max(1, int(config.max_concurrent_jobs))
+        config.max_errors = int(config.max_errors)
+        if isinstance(config.resume_on_startup, str):
+            config.resume_on_startup = config.resume_on_startup.lower() == "true"
+        return config
+
+
+@dataclass
+class IngestionJob:
+    """One ingestion run of a data source and its progress."""
+
+    id: str
+    data_source: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: str = field(default_factory=_utcnow)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    attempts: int = 0
+    items_total: int = 0
+    items_done: int = 0
+    items_failed: int = 0
+    items_skipped: int = 0
+    chunks_embedded: int = 0
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    message: Optional[str] = None
+    cancel_requested: bool = False
+    # Keyword arguments the data source's ingestion service is built with
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The job with throughput and ETA of the current attempt."""
+        elapsed = 0.0
+        if self.started_at:
+            end = (
+                datetime.fromisoformat(self.finished_at)
+                if self.finished_at
+                else datetime.now(timezone.utc)
+            )
+            elapsed = max(
+                0.0, (end - datetime.fromisoformat(self.started_at)).total_seconds()
+            )
+        processed = self.items_done + self.items_failed
+        remaining = max(0, self.items_total - processed - self.items_skipped)
+        items_rate = processed / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.status == JobStatus.RUNNING and items_rate > 0:
+            eta = round(remaining / items_rate, 1)
+        return {
+            "id": self.id,
+            "data_source": self.data_source,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "attempts": self.attempts,
+            "items": {
+                "total": self.items_total,
+                "done": self.items_done,
+                "failed": self.items_failed,
+                "skipped": self.items_skipped,
+                "remaining": remaining,
+            },
+            "chunks_embedded": self.chunks_embedded,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput": {
+                "items_per_second": round(items_rate, 3),
+                "chunks_per_second": (
+                    round(self.chunks_embedded / elapsed, 3) if elapsed > 0 else 0.0
+                ),
+            },
+            "eta_seconds": eta,
+            "errors": list(self.errors),
+            "message": self.message,
+            "cancel_requested": self.cancel_requested,
+            "params": dict(self.params),
+        }
+
+    def _state(self) -> str:
+        return json.dumps(
+            {
+                key: value
+                for key, value in self.__dict__.items()
+                if key not in ("id", "data_source", "status", "created_at")
+            }
+        )
+
+    @classmethod
+    def _from_row(cls, row) -> "IngestionJob":
+        job_id, data_source, status, created_at, state = row
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in json.loads(state).items() if k in known}
+        return cls(
+            id=job_id,
+            data_source=data_source,
+            status=JobStatus(status),
+            created_at=created_at,
+            **values,
+        )
+
+
+class JobStore:
+    """SQLite-backed jobs and per-item checkpoints. All methods are thread-safe."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or JobConfig.from_settings().path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Lazily open the database and create the schema."""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.path != ":memory:":
+                        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._conn = conn
+        return self._conn
+
+    def save(self, job: IngestionJob) -> None:
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO ingestion_jobs (id, data_source, status, "
+                    "created_at, state) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        job.id,
+                        job.data_source,
+                        job.status.value,
+                        job.created_at,
+                        job._state(),
+                    ),
+                )
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT id, data_source, status, created_at, state "
+                "FROM ingestion_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return IngestionJob._from_row(row) if row else None
+
+    def list(
+        self, limit: int = 20, status: Optional[JobStatus] = None
+    ) -> List[IngestionJob]:
+        """Most recent jobs first."""
+        query = "SELECT id, data_source, status, created_at, state FROM ingestion_jobs"
+        params: List[Any] = []
+        if status is not None:
+            query += " WHERE status = ?"
+            params.append(status.value)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.connection.execute(query, params).fetchall()
+        return [IngestionJob._from_row(row) for row in rows]
+
+    def active(self) -> List[IngestionJob]:
+        """Queued and running jobs, oldest first."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT id, data_source, status, created_at, state FROM ingestion_jobs "
+                "WHERE status IN (?, ?) ORDER BY created_at",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            ).fetchall()
+        return [IngestionJob._from_row(row) for row in rows]
+
+    def checkpoint(
+        self,
+        job: IngestionJob,
+        item_key: str,
+        status: str,
+        chunks: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        """Record one item's outcome and the job's counters atomically."""
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO ingestion_job_items (job_id, item_key, "
+                    "status, chunks, error, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job.id, item_key, status, chunks, error, _utcnow()),
+                )
+                self.connection.execute(
+                    "UPDATE ingestion_jobs SET state = ? WHERE id = ?",
+                    (job._state(), job.id),
+                )
+
+    def done_items(self, job_id: str) -> Set[str]:
+        """Items an earlier attempt of the job completed."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT item_key FROM ingestion_job_items "
+                "WHERE job_id = ? AND status = 'done'",
+                (job_id,),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class JobProgress:
+    """
+    What the ingestion pipeline reports to the job it runs under.
+
+    Called on the job loop only. Item outcomes are checkpointed immediately;
+    chunk counts are saved with them and at most once per second otherwise.
+    """
+
+    def __init__(self, job: IngestionJob, store: JobStore, max_errors: int = 50):
+        self.job = job
+        self.store = store
+        self.max_errors = max_errors
+        self._done = store.done_items(job.id)
+        self._saved_at = 0.0
+
+    def is_done(self, item_key: str) -> bool:
+        """Whether an earlier attempt already finished this item."""
+        return item_key in self._done
+
+    def item_queued(self, item_key: str) -> None:
+        self.job.items_total += 1
+
+    def item_skipped(self, item_key: str) -> None:
+        self.job.items_total += 1
+        self.job.items_skipped += 1
+
+    def chunks_upserted(self, count: int) -> None:
+        self.job.chunks_embedded += count
+        if time.monotonic() - self._saved_at >= 1.0:
+            self._save()
+
+    def item_done(self, item_key: str, chunks: int) -> None:
+        self.job.items_done += 1
+        self._done.add(item_key)
+        self.store.checkpoint(self.job, item_key, "done", chunks)
+
+    def item_failed(self, item_key: str, error: str) -> None:
+        self.job.items_failed += 1
+        self.job.errors.append({"item": item_key, "error": error})
+        if self.max_errors >= 0:
+            del self.job.errors[: -self.max_errors or None]
+        self.store.checkpoint(self.job, item_key, "failed", error=error)
+
+    def _save(self) -> None:
+        self._saved_at = time.monotonic()
+        self.store.save(self.job)
+
+
+_current_progress: ContextVar[Optional[JobProgress]] = ContextVar(
+    "ingestion_job_progress", default=None
+)
+
+
+def current_job_progress() -> Optional[JobProgress]:
+    """Progress of the ingestion job the caller runs under, if any."""
+    return _current_progress.get()
+
+
+class IngestionJobManager:
+    """
+    Queue, run, cancel and resume ingestion jobs.
+
+    Args:
+        store: Job records and checkpoints (default: configured database)
+        config: Concurrency and retention settings
+    """
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        config: Optional[JobConfig] = None,
+    ):
+        self.config = config or JobConfig.from_settings()
+        self.store = store or JobStore(self.config.path)
+        self._loop = BackgroundLoop("ingestion-jobs")
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(
+        self, data_source: Any, params: Optional[Dict[str, Any]] = None
+    ) -> IngestionJob:
+        """
+        Queue an ingestion of ``data_source`` and return at once.
+
+        A data source with a queued or running job for the same ``params``
+        gets that job back instead of a second one.
+
+        Args:
+            data_source: Registered data source type
+            params: JSON-serializable keyword arguments for the ingestion service
+
+        Raises:
+            ValueError: If no ingestion service is registered for the source
+        """
+        RagDataProvider.get_class(data_source)
+        name = getattr(data_source, "value", data_source)
+        params = dict(params or {})
+        with self._lock:
+            for job in self.store.active():
+                if job.data_source == name and job.params == params:
+                    return job
+            job = IngestionJob(id=uuid.uuid4().hex, data_source=name, params=params)
+            self.store.save(job)
+        self._schedule(job.id, data_source)
+        logger.info(f"Queued ingestion job {job.id} for {name}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self.store.get(job_id)
+
+    def list_jobs(self, limit: int = 20) -> List[IngestionJob]:
+        return self.store.list(limit)
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            The job, or None if it does not exist
+        """
+        with self._lock:
+            job = self.store.get(job_id)
+            if job is None or not job.status.active:
+                return job
+            job.cancel_requested = True
+            task = self._tasks.get(job_id)
+            if task is None:
+                # Not running in this process (e.g. resume disabled)
+                job.status = JobStatus.CANCELLED
+                job.finished_at = _utcnow()
+                self.store.save(job)
+        if task is not None:
+            self._loop.submit(self._cancel_task(task))
+        logger.info(f"Cancellation requested for ingestion job {job_id}")
+        return job
+
+    def resume(self) -> List[str]:
+        """Requeue jobs a previous process left queued or running."""
+        resumed = []
+        with self._lock:
+            for job in self.store.active():
+                if job.id in self._tasks:
+                    continue
+                job.status = JobStatus.QUEUED
+                self.store.save(job)
+                resumed.append(job.id)
+        for job_id in resumed:
+            self._schedule(job_id, self.store.get(job_id).data_source)
+        if resumed:
+            logger.info(f"Resuming {len(resumed)} ingestion jobs: {resumed}")
+        return resumed
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> IngestionJob:
+        """Block until a job finishes (used by scripts and tests)."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            self._loop.run(self._wait_task(task), timeout)
+        return self.store.get(job_id)
+
+    # Job loop
+
+    def _schedule(self, job_id: str, data_source: Any) -> None:
+        async def start() -> None:
+            task = asyncio.ensure_future(self._run(job_id, data_source))
+            self._tasks[job_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+        self._loop.run(start())
+
+    @staticmethod
+    async def _cancel_task(task: asyncio.Task) -> None:
+        task.cancel()
+
+    @staticmethod
+    async def _wait_task(task: asyncio.Task) -> None:
+        await asyncio.wait([task])
+
+    async def _run(self, job_id: str, data_source: Any) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrent_jobs)
+        job = self.store.get(job_id)
+        try:
+            async with self._semaphore:
+                job = self.store.get(job_id)
+                if job.status != JobStatus.QUEUED:
+                    return
+                await self._execute(job, data_source)
+        except asyncio.CancelledError:
+            # Cancelled while waiting for a worker slot
+            job.status = JobStatus.CANCELLED
+            job.cancel_requested = True
+            job.finished_at = _utcnow()
+            self.store.save(job)
+
+    async def _execute(self, job: IngestionJob, data_source: Any) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = _utcnow()
+        job.finished_at = None
+        job.attempts += 1
+        # Counters restart per attempt; finished items are counted as skipped
+        job.items_total = job.items_done = job.items_failed = job.items_skipped = 0
+        job.chunks_embedded = 0
+        self.store.save(job)
+        progress = JobProgress(job, self.store, self.config.max_errors)
+        token = _current_progress.set(progress)
+        job_loop = BackgroundLoop(f"ingestion-job-{job.id[:8]}")
+        try:
+            success = await job_loop.run_async(self._ingest(data_source, job.params))
+            job.status = (
+                JobStatus.SUCCEEDED
+                if success and not job.items_failed
+                else JobStatus.FAILED
+            )
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+            job.cancel_requested = True
+            job.message = "Cancelled; finished items stay ingested"
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.message = str(e) or type(e).__name__
+            logger.error(f"Ingestion job {job.id} failed: {job.message}")
+        finally:
+            _current_progress.reset(token)
+            # Lets a cancelled ingest finish closing its stores first
+            job_loop.stop()
+            job.finished_at = _utcnow()
+            self.store.save(job)
+        logger.info(f"Ingestion job {job.id} {job.status.value}: {job.to_dict()}")
+
+    @classmethod
+    async def _ingest(cls, data_source: Any, params: Dict[str, Any]) -> bool:
+        """Build the source's service, ingest and close it on the job's loop."""
+        provider = None
+        try:
+            provider = await asyncio.to_thread(
+                RagDataProvider.get_class(data_source), **params
+            )
+            return await provider.ingest()
+        finally:
+            await cls._close(provider)
+
+    @staticmethod
+    async def _close(provider) -> None:
+        close = getattr(provider, "close", None)
+        if close is None:
+            return
+        try:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Failed to close ingestion provider: {e}")
+
+
+_manager: Optional[IngestionJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> IngestionJobManager:
+    """The process-wide ingestion job manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = IngestionJobManager()
+    return _manager
@@ -0,0 +1,637 @@
+"""
+Staged, concurrent ingestion pipeline.
+
+Sources flow through four stages connected by bounded queues::
+
+    fetch -> chunk -> embed -> upsert
+
+Each stage runs its own pool of workers, so network fetches, CPU-bound
+splitting, embedding API calls and vector-store writes overlap instead of
+running one source at a time. Chunks are re-batched between stages so the
+embedding provider and the vector store see full batches regardless of how
+many chunks each source produced. Every stage call is retried with backoff;
+an embed or upsert batch that still fails is retried per source, so a bad
+chunk fails only its own source. A source is reported complete only once all
+of its chunks were upserted.
+
+Stage callables may be sync or async. Sync callables run in worker threads so
+they never block the event loop.
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field, fields
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType
+from app.core.utils.logger import get_logger
+
+from .dedup import DedupIndex, get_dedup_index, store_promoted
+from .jobs import JobProgress, current_job_progress
+
+logger = get_logger(__name__)
+
+_DONE = object()
+
+FetchFn = Callable[[Any], Any]
+ChunkFn = Callable[[Any], List[Document]]
+EmbedFn = Callable[[List[str]], List[List[float]]]
+UpsertFn = Callable[[List[Document], Optional[List[List[float]]]], Any]
+ItemCallback = Callable[["PipelineItem"], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class PipelineConfig:
+    """Concurrency, batching and retry settings for an ingestion pipeline."""
+
+    fetch_concurrency: int = 4
+    chunk_concurrency: int = 2
+    embed_concurrency: int = 2
+    upsert_concurrency: int = 2
+    queue_size: int = 64
+    embed_batch_size: int = 64
+    upsert_batch_size: int = 128
+    batch_wait_seconds: float = 0.05
+    max_retries: int = 3
+    retry_backoff_seconds: float = 0.5
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "PipelineConfig":
+        """Build from ``ingestion.pipeline`` in application-ingestion.yaml."""
+        values: Dict[str, Any] = {}
+        try:
+            from app.core.config.framework.settings import settings
+
+            values = settings.get_section("ingestion.pipeline", {}) or {}
+        except Exception as e:
+            logger.warning(f"Pipeline config unavailable, using defaults: {e}")
+        known = {f.name for f in fields(cls)}
+        config = {k: v for k, v in dict(values).items() if k in known}
+        config.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**config)
+
+
+@dataclass
+class StageMetrics:
+    """Counters for a single pipeline stage."""
+
+    name: str
+    processed: int = 0
+    failed: int = 0
+    retries: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def observe_queue(self, depth: int) -> None:
+        self.queue_depth = depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "elapsed_seconds": round(elapsed, 4),
+            "throughput_per_second": (
+                round(self.processed / elapsed, 2) if elapsed > 0 else 0.0
+            ),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+@dataclass
+class PipelineItem:
+    """A source travelling through the pipeline."""
+
+    key: str
+    source: Any
+    payload: Any = None
+    documents: List[Document] = field(default_factory=list)
+    chunks: int = 0
+    remaining: int = 0
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+
+@dataclass
+class PipelineResult:
+    """Outcome of a pipeline run."""
+
+    succeeded: List[str] = field(default_factory=list)
+    empty: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return not self.failed
+
+
+async def _call(fn: Callable, *args):
+    """Await async callables, run sync ones in a worker thread."""
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args)
+    result = await asyncio.to_thread(fn, *args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def _changed_chunks_only(
+    chunk: ChunkFn,
+    vector_store,
+    lexical_index=None,
+    document_id: Optional[Callable[[Any], Optional[str]]] = None,
+) -> ChunkFn:
+    """Wrap a chunk stage so unchanged stored chunks are not embedded again.
+
+    Unchanged chunks never reach the upsert stage, so they are indexed in the
+    lexical index here (a no-op unless it is missing them). With
+    ``document_id``, a source that now yields no chunks has its stored chunks
+    removed.
+    """
+
+    async def chunk_changed(source) -> List[Document]:
+        docs = await _call(chunk, source)
+        owner = document_id(source) if document_id is not None else None
+        changed = await vector_store.prune_unchanged_chunks(
+            docs, [owner] if owner else ()
+        )
+        if owner and not docs and lexical_index is not None:
+            await asyncio.to_thread(lexical_index.delete_documents, [owner])
+        if lexical_index is not None:
+            pending = {id(doc) for doc in changed}
+            unchanged = [doc for doc in docs if id(doc) not in pending]
+            await asyncio.to_thread(lexical_index.add, unchanged)
+        return changed
+
+    return chunk_changed
+
+
+def _deduplicated(
+    chunk: ChunkFn,
+    dedup: DedupIndex,
+    namespace: str,
+    vector_store,
+    embedding_type: EmbeddingType,
+    lexical_index=None,
+) -> ChunkFn:
+    """Wrap a chunk stage so duplicates of stored chunks are not embedded.
+
+    Duplicates promoted to canonical because this source dropped the chunk
+    they copied are stored right away.
+    """
+
+    async def chunk_unique(source) -> List[Document]:
+        docs = await _call(chunk, source)
+        result = await asyncio.to_thread(dedup.filter, docs, namespace)
+        await store_promoted(
+            vector_store, embedding_type, result.promoted, lexical_index
+        )
+        return result.kept
+
+    return chunk_unique
+
+
+def _lexically_indexed(chunk: ChunkFn, upsert: UpsertFn, lexical_index):
+    """Keep a lexical index in step with the chunks written to the store.
+
+    Chunks a re-ingested document no longer has are dropped when it is
+    chunked; new chunks are indexed once their upsert succeeded.
+    """
+
+    async def chunk_and_retain(source) -> List[Document]:
+        docs = await _call(chunk, source)
+        await asyncio.to_thread(lexical_index.retain, docs)
+        return docs
+
+    async def upsert_and_index(docs, vectors):
+        result = await _call(upsert, docs, vectors)
+        await asyncio.to_thread(lexical_index.add, docs)
+        return result
+
+    return chunk_and_retain, upsert_and_index
+
+
+class IngestionPipeline:
+    """Run sources through fetch, chunk, embed and upsert stages concurrently.
+
+    Args:
+        fetch: Turns a source into a payload (download, read, parse).
+        chunk: Splits a payload into documents.
+        upsert: Writes a batch of documents, with vectors when ``embed`` is set.
+        embed: Optional; embeds a batch of texts. When omitted, ``upsert`` is
+            expected to embed itself (e.g. ``VectorDB.save_and_embed``).
+        config: Concurrency, batching and retry settings.
+        on_item_complete: Called once every chunk of a source was upserted.
+        on_item_failed: Called once when any stage fails for a source.
+        name: Used in log lines.
+    """
+
+    def __init__(
+        self,
+        fetch: FetchFn,
+        chunk: ChunkFn,
+        upsert: UpsertFn,
+        embed: Optional[EmbedFn] = None,
+        config: Optional[PipelineConfig] = None,
+        on_item_complete: Optional[ItemCallback] = None,
+        on_item_failed: Optional[ItemCallback] = None,
+        name: str = "ingestion",
+    ):
+        self.fetch = fetch
+        self.chunk = chunk
+        self.embed = embed
+        self.upsert = upsert
+        self.config = config or PipelineConfig.from_settings()
+        self.on_item_complete = on_item_complete
+        self.on_item_failed = on_item_failed
+        self.name = name
+        self._metrics: Dict[str, StageMetrics] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._result = PipelineResult()
+        self._progress: Optional[JobProgress] = None
+
+    @classmethod
+    def for_vector_store(
+        cls,
+        vector_store,
+        embedding_type: EmbeddingType,
+        fetch: FetchFn,
+        chunk: ChunkFn,
+        **kwargs,
+    ) -> "IngestionPipeline":
+        """Build a pipeline that writes into a ``VectorDB``.
+
+        Stores that accept precomputed vectors get a separate embed stage
+        backed by the provider's rate-limited ``BatchEmbedder``; others fall
+        back to ``save_and_embed`` in the upsert stage. Stores that support
+        chunk-level diffs only receive chunks whose content changed. When a
+        lexical (BM25) index is enabled for the store's collection, or passed
+        as ``lexical_index``, it receives the same chunks. When ingestion
+        dedup is enabled, or a ``dedup`` index is passed, duplicates of stored
+        chunks are skipped before either. ``document_id`` maps a chunk-stage
+        payload to the document it replaces, so a source that now yields no
+        chunks has its stored chunks removed.
+        """
+        from app.db.vector.lexical_index import lexical_index_for
+
+        document_id = kwargs.pop("document_id", None)
+
+        lexical_index = kwargs.pop("lexical_index", None) or lexical_index_for(
+            vector_store
+        )
+        dedup = kwargs.pop("dedup", None) or get_dedup_index()
+        embed = None
+        if vector_store.supports_precomputed_embeddings():
+            from app.db.vector.embeddings.batch_embedder import BatchEmbedder
+
+            embed = BatchEmbedder.for_embedding_type(embedding_type).embed_documents
+
+            async def upsert(docs, vectors):
+                return await _call(vector_store.add_embedded_documents, docs, vectors)
+
+        else:
+
+            async def upsert(docs, _vectors):
+                return await _call(vector_store.save_and_embed, embedding_type, docs)
+
+        if dedup is not None:
+            chunk = _deduplicated(
+                chunk,
+                dedup,
+                kwargs.get("name", "ingestion"),
+                vector_store,
+                embedding_type,
+                lexical_index,
+            )
+        if lexical_index is not None:
+            chunk, upsert = _lexically_indexed(chunk, upsert, lexical_index)
+        if vector_store.supports_chunk_diff():
+            chunk = _changed_chunks_only(
+                chunk, vector_store, lexical_index, document_id
+            )
+
+        return cls(fetch=fetch, chunk=chunk, embed=embed, upsert=upsert, **kwargs)
+
+    async def run(
+        self, sources: Union[Iterable[Tuple[str, Any]], AsyncIterable[Tuple[str, Any]]]
+    ) -> PipelineResult:
+        """Ingest ``(key, source)`` pairs and wait for every stage to drain."""
+        cfg = self.config
+        started = time.perf_counter()
+        self._result = PipelineResult()
+        self._progress = current_job_progress()
+        stage_names = ["fetch", "chunk", "embed", "upsert"]
+        if self.embed is None:
+            stage_names.remove("embed")
+        self._metrics = {name: StageMetrics(name) for name in stage_names}
+        self._queues = {
+            "fetch": asyncio.Queue(cfg.queue_size),
+            "chunk": asyncio.Queue(cfg.queue_size),
+            "docs": asyncio.Queue(cfg.queue_size * max(1, cfg.embed_batch_size)),
+            "upsert": asyncio.Queue(cfg.queue_size),
+        }
+        if self.embed is not None:
+            self._queues["embed"] = asyncio.Queue(cfg.queue_size)
+            self._queues["embedded"] = asyncio.Queue(
+                cfg.queue_size * max(1, cfg.upsert_batch_size)
+            )
+
+        stages = [
+            self._feed(sources),
+            self._stage_group(
+                "fetch", cfg.fetch_concurrency, self._fetch_worker, next_queue="chunk"
+            ),
+            self._stage_group(
+                "chunk", cfg.chunk_concurrency, self._chunk_worker, next_queue="docs"
+            ),
+        ]
+        if self.embed is not None:
+            stages += [
+                self._batcher("docs", "embed", cfg.embed_batch_size),
+                self._stage_group(
+                    "embed",
+                    cfg.embed_concurrency,
+                    self._embed_worker,
+                    next_queue="embedded",
+                ),
+                self._batcher("embedded", "upsert", cfg.upsert_batch_size),
+            ]
+        else:
+            stages.append(self._batcher("docs", "upsert", cfg.upsert_batch_size))
+        stages.append(
+            self._stage_group("upsert", cfg.upsert_concurrency, self._upsert_worker)
+        )
+
+        await asyncio.gather(*stages)
+
+        self._result.elapsed_seconds = round(time.perf_counter() - started, 4)
+        self._result.stages = self.get_stats()
+        logger.info(
+            f"Pipeline {self.name} finished in {self._result.elapsed_seconds}s: "
+            f"{len(self._result.succeeded)} succeeded, {len(self._result.empty)} "
+            f"empty, {len(self._result.failed)} failed, {self._result.chunks} chunks"
+        )
+        return self._result
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage counters, throughput and queue depth (live while running)."""
+        for name, metrics in self._metrics.items():
+            queue = self._queues.get(name)
+            if queue is not None:
+                metrics.observe_queue(queue.qsize())
+        return {name: m.to_dict() for name, m in self._metrics.items()}
+
+    # Stage plumbing
+
+    async def _feed(self, sources) -> None:
+        if hasattr(sources, "__aiter__"):
+            async for key, source in sources:
+                await self._enqueue(str(key), source)
+        else:
+            for key, source in sources:
+                await self._enqueue(str(key), source)
+        for _ in range(max(1, self.config.fetch_concurrency)):
+            await self._queues["fetch"].put(_DONE)
+
+    async def _enqueue(self, key: str, source) -> None:
+        if self._progress is not None:
+            # Resumed jobs skip the items an earlier attempt finished
+            if self._progress.is_done(self._checkpoint_key(key)):
+                self._progress.item_skipped(self._checkpoint_key(key))
+                return
+            self._progress.item_queued(self._checkpoint_key(key))
+        await self._put(
+            self._queues["fetch"], "fetch", PipelineItem(key=key, source=source)
+        )
+
+    def _checkpoint_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def _put(self, queue: asyncio.Queue, stage: str, value) -> None:
+        await queue.put(value)
+        if stage in self._metrics:
+            self._metrics[stage].observe_queue(queue.qsize())
+
+    async def _stage_group(
+        self,
+        stage: str,
+        concurrency: int,
+        worker: Callable[[Any], Awaitable[None]],
+        next_queue: Optional[str] = None,
+    ) -> None:
+        """Run ``concurrency`` workers on a stage queue, then signal the next."""
+        metrics = self._metrics[stage]
+        metrics.started_at = time.perf_counter()
+        queue = self._queues[stage]
+
+        async def loop():
+            while True:
+                value = await queue.get()
+                if value is _DONE:
+                    return
+                await worker(value)
+
+        count = max(1, concurrency)
+        await asyncio.gather(*(loop() for _ in range(count)))
+        metrics.finished_at = time.perf_counter()
+        metrics.queue_depth = 0
+        if next_queue is not None:
+            downstream = self._queues[next_queue]
+            # Batchers are single consumers; stages have their own worker pools
+            batched = next_queue in ("docs", "embedded")
+            for _ in range(1 if batched else self._concurrency_of(next_queue)):
+                await downstream.put(_DONE)
+
+    def _concurrency_of(self, stage: str) -> int:
+        return max(1, getattr(self.config, f"{stage}_concurrency", 1))
+
+    async def _batcher(self, source: str, target: str, batch_size: int) -> None:
+        """Group single entries into batches, flushing on size or idle time."""
+        inbox = self._queues[source]
+        outbox = self._queues[target]
+        batch: List[Any] = []
+        done = False
+        while not done:
+            try:
+                timeout = self.config.batch_wait_seconds if batch else None
+                value = await asyncio.wait_for(inbox.get(), timeout)
+            except asyncio.TimeoutError:
+                value = None
+            if value is _DONE:
+                done = True
+            elif value is not None:
+                batch.append(value)
+                if len(batch) < max(1, batch_size):
+                    continue
+            if batch:
+                await self._put(outbox, target, batch)
+                batch = []
+        for _ in range(self._concurrency_of(target)):
+            await outbox.put(_DONE)
+
+    async def _with_retries(self, stage: str, fn: Callable, *args):
+        metrics = self._metrics[stage]
+        attempt = 0
+        while True:
+            began = time.perf_counter()
+            try:
+                return await _call(fn, *args)
+            except Exception:
+                if attempt >= self.config.max_retries:
+                    raise
+                metrics.retries += 1
+                await asyncio.sleep(self.config.retry_backoff_seconds * (2**attempt))
+                attempt += 1
+            finally:
+                metrics.busy_seconds += time.perf_counter() - began
+
+    # Workers
+
+    async def _fetch_worker(self, item: PipelineItem) -> None:
+        metrics = self._metrics["fetch"]
+        try:
+            item.payload = await self._with_retries("fetch", self.fetch, item.source)
+        except Exception as e:
+            metrics.failed += 1
+            await self._fail(item, f"fetch: {e}")
+            return
+        metrics.processed += 1
+        await self._put(self._queues["chunk"], "chunk", item)
+
+    async def _chunk_worker(self, item: PipelineItem) -> None:
+        metrics = self._metrics["chunk"]
+        try:
+            documents = await self._with_retries("chunk", self.chunk, item.payload)
+        except Exception as e:
+            metrics.failed += 1
+            await self._fail(item, f"chunk: {e}")
+            return
+        metrics.processed += 1
+        item.payload = None
+        item.documents = list(documents or [])
+        item.chunks = item.remaining = len(item.documents)
+        if not item.documents:
+            self._result.empty.append(item.key)
+            await self._complete(item)
+            return
+        self._result.chunks += item.remaining
+        for doc in item.documents:
+            await self._queues["docs"].put((item, doc))
+
+    async def _embed_worker(self, batch: List[Tuple[PipelineItem, Document]]) -> None:
+        metrics = self._metrics["embed"]
+        texts = [doc.page_content for _, doc in batch]
+        try:
+            vectors = await self._with_retries("embed", self.embed, texts)
+        except Exception as e:
+            if await self._split_failed_batch(batch, self._embed_worker):
+                return
+            metrics.failed += len(batch)
+            await self._fail_batch(batch, f"embed: {e}")
+            return
+        metrics.processed += len(batch)
+        metrics.batches += 1
+        for (item, doc), vector in zip(batch, vectors):
+            await self._queues["embedded"].put((item, doc, vector))
+
+    async def _upsert_worker(self, batch: List[tuple]) -> None:
+        metrics = self._metrics["upsert"]
+        docs = [entry[1] for entry in batch]
+        vectors = [entry[2] for entry in batch] if self.embed is not None else None
+        try:
+            await self._with_retries("upsert", self.upsert, docs, vectors)
+        except Exception as e:
+            if await self._split_failed_batch(batch, self._upsert_worker):
+                return
+            metrics.failed += len(batch)
+            await self._fail_batch(batch, f"upsert: {e}")
+            return
+        metrics.processed += len(batch)
+        metrics.batches += 1
+        if self._progress is not None:
+            self._progress.chunks_upserted(len(batch))
+        for entry in batch:
+            item = entry[0]
+            item.remaining -= 1
+            if item.remaining == 0 and not item.failed:
+                item.documents = []
+                self._result.succeeded.append(item.key)
+                await self._complete(item)
+
+    async def _split_failed_batch(
+        self, batch: List[tuple], worker: Callable[[List[tuple]], Awaitable[None]]
+    ) -> bool:
+        """Re-run a batch that exhausted its retries one item at a time.
+
+        Batches mix chunks of several items, so a single bad chunk would
+        otherwise fail every item it was batched with. Returns False when the
+        batch already holds a single item and the failure is that item's own.
+        """
+        groups: Dict[int, List[tuple]] = {}
+        for entry in batch:
+            groups.setdefault(id(entry[0]), []).append(entry)
+        if len(groups) < 2:
+            return False
+        for group in groups.values():
+            if not group[0][0].failed:
+                await worker(group)
+        return True
+
+    async def _complete(self, item: PipelineItem) -> None:
+        await self._notify(self.on_item_complete, item)
+        if self._progress is not None:
+            self._progress.item_done(self._checkpoint_key(item.key), item.chunks)
+
+    async def _fail_batch(self, batch: List[tuple], error: str) -> None:
+        for entry in batch:
+            await self._fail(entry[0], error)
+
+    async def _fail(self, item: PipelineItem, error: str) -> None:
+        if item.failed:
+            return
+        item.error = error
+        self._result.failed[item.key] = error
+        logger.error(f"Pipeline {self.name} failed for {item.key}: {error}")
+        await self._notify(self.on_item_failed, item)
+        if self._progress is not None:
+            self._progress.item_failed(self._checkpoint_key(item.key), error)
+
+    async def _notify(self, callback: Optional[ItemCallback], item: PipelineItem):
+        if callback is None:
+            return
+        try:
+            result = callback(item)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"Pipeline {self.name} callback failed for {item.key}: {e}")
@@ -0,0 +1,218 @@
+"""
+Persistent sync state for incremental ingestion.
+
+Ingestion sources record what they last embedded for every item (version,
+last-modified timestamp, content hash and the vector-store document id) plus a
+per-namespace watermark. On the next run a source only fetches and re-embeds
+items whose version moved past what is recorded here, and removes items that
+disappeared upstream.
+
+State is kept in a small SQLite database so it survives restarts and can be
+shared by every worker on the same host.
+"""
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_STATE_PATH = "./volumes/ingestion/sync_state.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_items (
+    namespace     TEXT NOT NULL,
+    item_id       TEXT NOT NULL,
+    version       TEXT,
+    last_modified TEXT,
+    content_hash  TEXT,
+    document_id   TEXT,
+    extra         TEXT,
+    synced_at     TEXT NOT NULL,
+    PRIMARY KEY (namespace, item_id)
+);
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    namespace  TEXT PRIMARY KEY,
+    watermark  TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class SyncRecord:
+    """What was last embedded for a single source item."""
+
+    item_id: str
+    version: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    document_id: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+    synced_at: Optional[str] = None
+
+
+class SyncStateStore:
+    """SQLite-backed store of per-item sync records and namespace watermarks.
+
+    Namespaces isolate sources from each other, e.g. ``confluence:ENG`` or
+    ``file:/data/docs``. All methods are thread-safe.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            from app.core.config.framework.settings import settings
+
+            path = settings.get_section("ingestion.sync_state.path", DEFAULT_STATE_PATH)
+        self.path = str(path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Lazily open the database and create the schema."""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.path != ":memory:":
+                        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._conn = conn
+                    logger.info(f"Opened ingestion sync state at {self.path}")
+        return self._conn
+
+    # Item records
+
+    def get(self, namespace: str, item_id: str) -> Optional[SyncRecord]:
+        """Return the record for one item, or None if it was never synced."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT item_id, version, last_modified, content_hash, document_id, "
+                "extra, synced_at FROM sync_items WHERE namespace = ? AND item_id = ?",
+                (namespace, item_id),
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def get_all(self, namespace: str) -> Dict[str, SyncRecord]:
+        """Return every record in a namespace keyed by item id."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT item_id, version, last_modified, content_hash, document_id, "
+                "extra, synced_at FROM sync_items WHERE namespace = ?",
+                (namespace,),
+            ).fetchall()
+        return {row[0]: self._to_record(row) for row in rows}
+
+    def upsert(self, namespace: str, records: Iterable[SyncRecord]) -> int:
+        """Insert or replace records, stamping them with the current time."""
+        synced_at = _utcnow().isoformat()
+        rows = [
+            (
+                namespace,
+                r.item_id,
+                None if r.version is None else str(r.version),
+                r.last_modified,
+                r.content_hash,
+                r.document_id,
+                json.dumps(r.extra or {}),
+                synced_at,
+            )
+            for r in records
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO sync_items (namespace, item_id, version, "
+                    "last_modified, content_hash, document_id, extra, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def delete(self, namespace: str, item_ids: Iterable[str]) -> int:
+        """Forget the given items."""
+        ids = [(namespace, item_id) for item_id in item_ids]
+        if not ids:
+            return 0
+        with self._lock:
+            with self.connection:
+                self.connection.executemany(
+                    "DELETE FROM sync_items WHERE namespace = ? AND item_id = ?", ids
+                )
+        return len(ids)
+
+    def clear(self, namespace: str) -> None:
+        """Drop all records and the watermark of a namespace."""
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    "DELETE FROM sync_items WHERE namespace = ?", (namespace,)
+                )
+                self.connection.execute(
+                    "DELETE FROM sync_watermarks WHERE namespace = ?", (namespace,)
+                )
+
+    # Watermarks
+
+    def get_watermark(self, namespace: str) -> Optional[datetime]:
+        """Return the time up to which the namespace is known to be in sync."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT watermark FROM sync_watermarks WHERE namespace = ?",
+                (namespace,),
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def set_watermark(self, namespace: str, watermark: datetime) -> None:
+        """Advance the namespace watermark."""
+        if watermark.tzinfo is None:
+            watermark = watermark.replace(tzinfo=timezone.utc)
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO sync_watermarks (namespace, watermark, "
+                    "updated_at) VALUES (?, ?, ?)",
+                    (namespace, watermark.isoformat(), _utcnow().isoformat()),
+                )
+
+    def namespaces(self) -> List[str]:
+        """List namespaces that have records."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT namespace FROM sync_items"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _to_record(row) -> SyncRecord:
+        item_id, version, last_modified, content_hash, document_id, extra, synced = row
+        return SyncRecord(
+            item_id=item_id,
+            version=version,
+            last_modified=last_modified,
+            content_hash=content_hash,
+            document_id=document_id,
+            extra=json.loads(extra) if extra else {},
+            synced_at=synced,
+        )
@@ -0,0 +1,478 @@
+"""
+Token-sized, structure-aware text splitting.
+
+``RecursiveCharacterTextSplitter`` sizes chunks in characters, so the token
+count of its chunks swings with the text (code and tables hold far more
+tokens per character than prose) and embedding context is either wasted or
+truncated. ``StructuredTokenSplitter`` sizes chunks in tokens of the
+configured tiktoken encoding and splits along the document's structure:
+
+- Markdown headings start a new chunk once the current one is reasonably full
+- Fenced code blocks and tables are kept whole; when one exceeds a chunk it
+  is split by lines, with its fence or header row repeated in every piece
+- Prose is packed sentence by sentence, so chunks fill up evenly; overlap
+  repeats whole trailing sentences of the previous chunk
+
+Every piece of text is tokenized once, in one batch per document, and chunk
+sizes are sums of piece counts. Large batches of documents are split in a
+process pool. When the encoding cannot be loaded (e.g. offline without a
+tiktoken cache) a regex approximation of one token per word or run of
+symbols is used instead.
+"""
+
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+
+from app.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_FENCE = re.compile(r"^\s*(`{3,}|~{3,})")
+_HEADING = re.compile(r"^#{1,6}\s")
+_TABLE_ROW = re.compile(r"^\s*\|")
+_TABLE_RULE = re.compile(r"^\s*\|?\s*:?-{3,}")
+# Sentence ends and line breaks inside a paragraph
+_PROSE_BREAK = re.compile(r"(?<=[.!?])[ \t]+|\n")
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]+")
+
+
+@dataclass
+class SplitterConfig:
+    """How ingestion splits documents into chunks."""
+
+    # "token" (StructuredTokenSplitter) or "character" (RecursiveCharacterTextSplitter)
+    strategy: str = "token"
+    # tiktoken encoding or model name
+    encoding: str = "cl100k_base"
+    chunk_tokens: int = 256
+    chunk_overlap_tokens: int = 32
+    # A heading starts a new chunk once the current one has this many tokens
+    min_chunk_tokens: int = 64
+    # 0 = one worker per CPU, negative splits in the calling process
+    parallel_workers: int = 0
+    # Batches with fewer characters are split in the calling process
+    parallel_min_chars: int = 200_000
+    # Legacy character splitter
+    chunk_size: int = 1000
+    chunk_overlap: int = 200
+
+    @classmethod
+    def from_settings(cls) -> "SplitterConfig":
+        """Build from ``ingestion.splitter`` in application-ingestion.yaml."""
+        values: Dict[str, Any] = {}
+        try:
+            from app.core.config.framework.settings import settings
+
+            values = settings.get_section("ingestion.splitter", {}) or {}
+        except Exception as e:
+            logger.warning(f"Splitter config unavailable, using defaults: {e}")
+        known = {f.name for f in fields(cls)}
+        config = cls(**{k: v for k, v in dict(values).items() if k in known})
+        for name in (
+            "chunk_tokens",
+            "chunk_overlap_tokens",
+            "min_chunk_tokens",
+            "parallel_workers",
+            "parallel_min_chars",
+            "chunk_size",
+            "chunk_overlap",
+        ):
+            setattr(config, name, int(getattr(config, name)))
+        config.strategy = str(config.strategy).lower()
+        return config
+
+
+class ApproximateTokenizer:
+    """One token per word or run of symbols; used when tiktoken is unavailable."""
+
+    name = "approximate"
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [len(_APPROX_TOKEN.findall(text)) for text in texts]
+
+    def windows(self, text: str, size: int) -> List[str]:
+        """Consecutive pieces of ``text`` of at most ``size`` tokens."""
+        starts = [m.start() for m in _APPROX_TOKEN.finditer(text)]
+        pieces = []
+        for i in range(0, len(starts), size):
+            end = starts[i + size] if i + size < len(starts) else len(text)
+            pieces.append(text[starts[i] : end].strip())
+        return [piece for piece in pieces if piece]
+
+
+class TiktokenTokenizer:
+    """Counts with a tiktoken encoding."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.name = encoding.name
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [len(t) for t in self.encoding.encode_ordinary_batch(texts)]
+
+    def windows(self, text: str, size: int) -> List[str]:
+        tokens = self.encoding.encode_ordinary(text)
+        pieces = (
+            self.encoding.decode(tokens[i : i + size]).strip()
+            for i in range(0, len(tokens), size)
+        )
+        return [piece for piece in pieces if piece]
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(encoding: str):
+    """Tokenizer for a tiktoken encoding or model name, cached per process."""
+    try:
+        import tiktoken
+
+        try:
+            return TiktokenTokenizer(tiktoken.get_encoding(encoding))
+        except ValueError:
+            return TiktokenTokenizer(tiktoken.encoding_for_model(encoding))
+    except Exception as e:
+        logger.warning(
+            f"Tokenizer '{encoding}' unavailable, approximating token counts: {e}"
+        )
+        return ApproximateTokenizer()
+
+
+@dataclass
+class _Piece:
+    text: str
+    # Text placed between this piece and the previous one in a chunk
+    joiner: str
+    # "heading", "text", "code" or "table"
+    kind: str
+    tokens: int = 0
+
+
+def _blocks(text: str) -> List[Tuple[str, str]]:
+    """Markdown-ish structure of a text as (kind, text) blocks."""
+    blocks: List[Tuple[str, str]] = []
+    lines = text.splitlines()
+    paragraph: List[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            blocks.append(("text", "\n".join(paragraph)))
+            paragraph.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        fence = _FENCE.match(line)
+        if fence:
+            flush()
+            marker = fence.group(1)
+            end = i + 1
+            while end < len(lines) and not lines[end].strip().startswith(marker):
+                end += 1
+            blocks.append(("code", "\n".join(lines[i : end + 1])))
+            i = end + 1
+            continue
+        if _TABLE_ROW.match(line):
+            flush()
+            end = i
+            while end < len(lines) and _TABLE_ROW.match(lines[end]):
+                end += 1
+            blocks.append(("table", "\n".join(lines[i:end])))
+            i = end
+            continue
+        if _HEADING.match(line):
+            flush()
+            blocks.append(("heading", line.strip()))
+        elif line.strip():
+            paragraph.append(line.rstrip())
+        else:
+            flush()
+        i += 1
+    flush()
+    return blocks
+
+
+def _prose_pieces(text: str) -> List[_Piece]:
+    pieces, start, joiner = [], 0, "\n\n"
+    for match in _PROSE_BREAK.finditer(text):
+        if match.start() > start:
+            pieces.append(_Piece(text[start : match.start()], joiner, "text"))
+            joiner = "\n" if "\n" in match.group() else " "
+        start = match.end()
+    if start < len(text):
+        pieces.append(_Piece(text[start:], joiner, "text"))
+    return pieces
+
+
+class StructuredTokenSplitter(TextSplitter):
+    """
+    Split text into chunks of at most ``chunk_size`` tokens along its structure.
+
+    Args:
+        chunk_size: Maximum tokens per chunk
+        chunk_overlap: Tokens of trailing prose repeated at the next chunk's start
+        encoding: tiktoken encoding or model name
+        min_chunk_tokens: Tokens a chunk needs before a heading starts a new one
+        parallel_workers: Processes for large batches (0 = CPU count, < 0 = off)
+        parallel_min_chars: Smallest batch, in characters, split in parallel
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        encoding: str = "cl100k_base",
+        min_chunk_tokens: int = 64,
+        parallel_workers: int = -1,
+        parallel_min_chars: int = 200_000,
+        **kwargs: Any,
+    ):
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        self.encoding = encoding
+        self.min_chunk_tokens = min(min_chunk_tokens, chunk_size)
+        self.parallel_workers = parallel_workers
+        self.parallel_min_chars = parallel_min_chars
+        self._tokenizer = None
+
+    @classmethod
+    def from_config(cls, config: SplitterConfig) -> "StructuredTokenSplitter":
+        return cls(
+            chunk_size=config.chunk_tokens,
+            chunk_overlap=config.chunk_overlap_tokens,
+            encoding=config.encoding,
+            min_chunk_tokens=config.min_chunk_tokens,
+            parallel_workers=config.parallel_workers,
+            parallel_min_chars=config.parallel_min_chars,
+        )
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer(self.encoding)
+        return self._tokenizer
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Workers load the tokenizer themselves
+        return {**self.__dict__, "_tokenizer": None}
+
+    def count_tokens(self, text: str) -> int:
+        return self.tokenizer.count_many([text])[0]
+
+    # Splitting
+
+    def split_text(self, text: str) -> List[str]:
+        pieces = self._pieces(text)
+        if not pieces:
+            return []
+        chunks: List[List[_Piece]] = []
+        current: List[_Piece] = []
+        size = 0
+        for piece in pieces:
+            if piece.kind == "heading" and size >= self.min_chunk_tokens:
+                chunks.append(current)
+                current = []
+            elif current and size + self._cost(piece) > self._chunk_size:
+                # A heading moves on with the content it introduces
+                headings = 0
+                while headings < len(current) and current[-1 - headings].kind == (
+                    "heading"
+                ):
+                    headings += 1
+                carried = current[len(current) - headings :]
+                if (
+                    0 < headings < len(current)
+                    and self._size(carried + [piece]) <= self._chunk_size
+                ):
+                    chunks.append(current[:-headings])
+                    current = carried
+                else:
+                    chunks.append(current)
+                    current = self._overlap(current, piece)
+                size = self._size(current)
+            size = size + self._cost(piece) if current else piece.tokens
+            current.append(piece)
+        if current:
+            chunks.append(current)
+        return [self._join(chunk) for chunk in chunks]
+
+    def _pieces(self, text: str) -> List[_Piece]:
+        """Pieces of at most ``chunk_size`` tokens, tokenized in one batch."""
+        pieces: List[_Piece] = []
+        for kind, block in _blocks(text):
+            if kind == "text":
+                pieces.extend(_prose_pieces(block))
+            else:
+                pieces.append(_Piece(block, "\n\n", kind))
+        counts = self.tokenizer.count_many([p.text for p in pieces])
+        result: List[_Piece] = []
+        for piece, tokens in zip(pieces, counts):
+            piece.tokens = tokens
+            if tokens <= self._chunk_size:
+                result.append(piece)
+            else:
+                result.extend(self._split_piece(piece))
+        return result
+
+    def _split_piece(self, piece: _Piece) -> List[_Piece]:
+        """Split an oversized code block, table or sentence."""
+        if piece.kind in ("code", "table"):
+            lines = piece.text.split("\n")
+            if piece.kind == "code":
+                closed = len(lines) > 1 and _FENCE.match(lines[-1])
+                tail = lines[-1:] if closed else []
+                head, body = lines[:1], lines[1 : len(lines) - len(tail)]
+            else:
+                rule = len(lines) > 1 and _TABLE_RULE.match(lines[1])
+                head, tail, body = (
+                    lines[: 2 if rule else 1],
+                    [],
+                    lines[2 if rule else 1 :],
+                )
+            frame = self.tokenizer.count_many(["\n".join(head + tail)])[0] + 2
+            if body and frame < self._chunk_size // 2:
+                return self._pack_lines(piece, head, body, tail, frame)
+        pieces = [
+            _Piece(text, piece.joiner if i == 0 else " ", "text")
+            for i, text in enumerate(
+                self.tokenizer.windows(piece.text, self._chunk_size)
+            )
+        ]
+        counts = self.tokenizer.count_many([p.text for p in pieces])
+        for p, tokens in zip(pieces, counts):
+            p.tokens = min(tokens, self._chunk_size)
+        return pieces
+
+    def _pack_lines(
+        self,
+        piece: _Piece,
+        head: List[str],
+        body: List[str],
+        tail: List[str],
+        frame: int,
+    ) -> List[_Piece]:
+        """Group lines under a repeated fence or table header."""
+        budget = self._chunk_size - frame
+        counts = self.tokenizer.count_many(body)
+        groups: List[List[str]] = [[]]
+        size = 0
+        for line, tokens in zip(body, counts):
+            if tokens > budget:
+                # A single huge line is cut into token windows
+                groups.extend([w] for w in self.tokenizer.windows(line, budget))
+                groups.append([])
+                size = 0
+                continue
+            if groups[-1] and size + tokens + 1 > budget:
+                groups.append([])
+                size = 0
+            groups[-1].append(line)
+            size += tokens + 1
+        texts = ["\n".join(head + group + tail) for group in groups if group]
+        counts = self.tokenizer.count_many(texts)
+        return [
+            _Piece(text, piece.joiner, piece.kind, tokens)
+            for text, tokens in zip(texts, counts)
+        ]
+
+    def _overlap(self, chunk: List[_Piece], following: _Piece) -> List[_Piece]:
+        """Trailing prose of a chunk repeated before the next piece."""
+        budget = min(self._chunk_overlap, self._chunk_size - self._cost(following))
+        overlap: List[_Piece] = []
+        for piece in reversed(chunk):
+            if piece.kind != "text" or self._size([piece] + overlap) > budget:
+                break
+            overlap.insert(0, piece)
+        return overlap
+
+    @staticmethod
+    def _cost(piece: _Piece) -> int:
+        """Tokens a piece adds after another one."""
+        # A space merges into the next word's token; line breaks do not
+        return piece.tokens + (0 if piece.joiner == " " else 1)
+
+    @classmethod
+    def _size(cls, pieces: List[_Piece]) -> int:
+        if not pieces:
+            return 0
+        return pieces[0].tokens + sum(cls._cost(p) for p in pieces[1:])
+
+    @staticmethod
+    def _join(chunk: List[_Piece]) -> str:
+        return chunk[0].text + "".join(p.joiner + p.text for p in chunk[1:])
+
+    # Parallel splitting
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """Split documents, in the process pool when the batch is large."""
+        documents = list(documents)
+        if not self._parallel(documents):
+            return super().split_documents(documents)
+        workers = self.parallel_workers or os.cpu_count() or 1
+        batches = _batches(documents, workers * 4)
+        results = _get_pool(workers).map(_split_batch, [self] * len(batches), batches)
+        return [chunk for chunks in results for chunk in chunks]
+
+    def _parallel(self, documents: List[Document]) -> bool:
+        if self.parallel_workers < 0 or len(documents) < 2:
+            return False
+        return sum(len(d.page_content) for d in documents) >= self.parallel_min_chars
+
+
+def _batches(documents: List[Document], count: int) -> List[List[Document]]:
+    """Contiguous batches, so chunk order follows document order."""
+    size = max(1, -(-len(documents) // max(1, count)))
+    return [documents[i : i + size] for i in range(0, len(documents), size)]
+
+
+def _split_batch(
+    splitter: StructuredTokenSplitter, documents: List[Document]
+) -> List[Document]:
+    return TextSplitter.split_documents(splitter, documents)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by all splitters, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(shutdown_pool)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the splitting process pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def create_text_splitter(config: Optional[SplitterConfig] = None) -> TextSplitter:
+    """The splitter ingestion is configured to use."""
+    config = config or SplitterConfig.from_settings()
+    if config.strategy == "character":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            length_function=len,
+            is_separator_regex=False,
+        )
+    if config.strategy != "token":
+        raise ValueError(f"Unknown text splitter strategy: {config.strategy}")
+    return StructuredTokenSplitter.from_config(config)
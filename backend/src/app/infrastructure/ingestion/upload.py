@@ -0,0 +1,381 @@
+"""
+Streaming multipart uploads for ingestion.
+
+``POST /data/upload`` never buffers a request: each body chunk is fed to an
+incremental multipart parser and every file part is written straight to a
+per-upload staging folder, so memory stays at one network chunk plus the
+first ``sniff_bytes`` of the current file whatever the upload size. The file
+type is detected from those first bytes, and unsupported files, files over
+``max_file_mb`` and bodies over ``max_upload_mb`` abort the upload before the
+rest is read. At most ``max_concurrent_uploads`` are received at once.
+
+The staged folder is then ingested by an UploadIngestionService job, which
+parses, chunks and embeds files through the regular pipeline (large PDFs page
+by page, archives member by member) and removes the folder when done.
+"""
+
+import asyncio
+import re
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional
+
+import magic
+from multipart.exceptions import ParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.exceptions import (
+    PayloadTooLargeError,
+    RateLimitError,
+    UnsupportedMediaTypeError,
+    ValidationError,
+)
+from app.core.utils.logger import get_logger
+
+from .file_data_source_util import FileType
+
+logger = get_logger(__name__)
+
+DEFAULT_STAGING_PATH = "./volumes/ingestion/uploads"
+_MB = 1024 * 1024
+_UNSAFE_NAME = re.compile(r"[^\w.\- ]+")
+
+
+@dataclass
+class UploadConfig:
+    """Where uploads are staged and how large and how many they may be."""
+
+    staging_path: str = DEFAULT_STAGING_PATH
+    max_file_mb: float = 512
+    max_upload_mb: float = 2048
+    max_files: int = 100
+    max_concurrent_uploads: int = 4
+    # Bytes buffered per file to detect its type
+    sniff_bytes: int = 4096
+
+    @classmethod
+    def from_settings(cls) -> "UploadConfig":
+        """Build from ``ingestion.upload`` in application-ingestion.yaml."""
+        values: Dict[str, Any] = {}
+        try:
+            from app.core.config.framework.settings import settings
+
+            values = settings.get_section("ingestion.upload", {}) or {}
+        except Exception as e:
+            logger.warning(f"Upload config unavailable, using defaults: {e}")
+        known = {f.name for f in fields(cls)}
+        config = cls(**{k: v for k, v in dict(values).items() if k in known})
+        config.max_file_mb = float(config.max_file_mb)
+        config.max_upload_mb = float(config.max_upload_mb)
+        config.max_files = int(config.max_files)
+        config.max_concurrent_uploads = max(1, int(config.max_concurrent_uploads))
+        config.sniff_bytes = max(1, int(config.sniff_bytes))
+        return config
+
+    @property
+    def max_file_bytes(self) -> int:
+        return int(self.max_file_mb * _MB)
+
+    @property
+    def max_upload_bytes(self) -> int:
+        return int(self.max_upload_mb * _MB)
+
+
+@dataclass
+class StagedFile:
+    """A received file part."""
+
+    name: str
+    path: str
+    size: int = 0
+    content_type: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "size": self.size, "content_type": self.content_type}
+
+
+@dataclass
+class StagedUpload:
+    """Files of one upload, written to its staging folder."""
+
+    upload_id: str
+    path: str
+    files: List[StagedFile] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return sum(f.size for f in self.files)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.upload_id,
+            "files": [f.to_dict() for f in self.files],
+            "bytes": self.size,
+        }
+
+
+def staging_dir(upload_id: str, config: Optional[UploadConfig] = None) -> Path:
+    """Staging folder of an upload."""
+    if not re.fullmatch(r"[0-9a-f]{32}", upload_id or ""):
+        raise ValueError(f"Invalid upload id: {upload_id!r}")
+    return Path((config or UploadConfig.from_settings()).staging_path) / upload_id
+
+
+def safe_filename(filename: str) -> str:
+    """Base name of an uploaded file, without path parts or odd characters."""
+    name = filename.replace("\\", "/").rsplit("/", 1)[-1]
+    name = _UNSAFE_NAME.sub("_", name).strip(" .")
+    return name or "upload"
+
+
+def detect_file_type(head: bytes, name: str = "file") -> FileType:
+    """
+    File type from the first bytes of a file.
+
+    Raises:
+        UnsupportedMediaTypeError: If ingestion has no loader for the type
+    """
+    mime_type = magic.from_buffer(head, mime=True)
+    try:
+        return FileType(mime_type)
+    except ValueError:
+        raise UnsupportedMediaTypeError(
+            message=f"Unsupported type of '{name}': {mime_type}", media_type=mime_type
+        )
+
+
+class _UploadWriter:
+    """Multipart parser callbacks that write file parts to a staging folder."""
+
+    def __init__(self, upload: StagedUpload, config: UploadConfig):
+        self.upload = upload
+        self.config = config
+        self.received = 0
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._file: Optional[StagedFile] = None
+        self._handle: Optional[BinaryIO] = None
+        self._head = b""
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(
+            self._headers.get(b"content-disposition", b"")
+        )
+        filename = options.get(b"filename")
+        if not filename:
+            # Plain form fields are counted against the size cap and dropped
+            return
+        if len(self.upload.files) >= self.config.max_files:
+            raise ValidationError(
+                message=f"Too many files in upload (max {self.config.max_files})",
+                field="files",
+            )
+        name = self._unique_name(safe_filename(filename.decode(errors="replace")))
+        path = Path(self.upload.path) / name
+        self._file = StagedFile(name=name, path=str(path))
+        self._handle = open(path, "wb")
+        self._head = b""
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        size = end - start
+        self.received += size
+        if self.received > self.config.max_upload_bytes:
+            raise PayloadTooLargeError(
+                message=f"Upload exceeds {self.config.max_upload_mb:g} MB",
+                limit_bytes=self.config.max_upload_bytes,
+            )
+        if self._file is None:
+            return
+        self._file.size += size
+        if self._file.size > self.config.max_file_bytes:
+            raise PayloadTooLargeError(
+                message=(
+                    f"File '{self._file.name}' exceeds "
+                    f"{self.config.max_file_mb:g} MB"
+                ),
+                limit_bytes=self.config.max_file_bytes,
+            )
+        if self._file.content_type is None:
+            self._head += data[start:end]
+            if len(self._head) >= self.config.sniff_bytes:
+                self._sniff()
+        self._handle.write(data[start:end])
+
+    def on_part_end(self) -> None:
+        if self._file is None:
+            return
+        if self._file.content_type is None:
+            if not self._head:
+                raise ValidationError(
+                    message=f"File '{self._file.name}' is empty", field="files"
+                )
+            self._sniff()
+        self._handle.close()
+        self._handle = None
+        self.upload.files.append(self._file)
+        self._file = None
+
+    @property
+    def in_file(self) -> bool:
+        """Whether the body stopped inside a file part."""
+        return self._file is not None
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _sniff(self) -> None:
+        self._file.content_type = detect_file_type(self._head, self._file.name).value
+        self._head = b""
+
+    def _unique_name(self, name: str) -> str:
+        taken = {f.name for f in self.upload.files}
+        stem, dot, suffix = name.partition(".")
+        candidate, n = name, 1
+        while candidate in taken:
+            candidate = f"{stem}-{n}{dot}{suffix}"
+            n += 1
+        return candidate
+
+
+class UploadReceiver:
+    """
+    Receive multipart uploads into staging folders.
+
+    Args:
+        config: Limits and staging location (default: application settings)
+    """
+
+    def __init__(self, config: Optional[UploadConfig] = None):
+        self.config = config or UploadConfig.from_settings()
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active_uploads(self) -> int:
+        return self._active
+
+    async def receive(
+        self,
+        content_type: Optional[str],
+        stream: AsyncIterator[bytes],
+        content_length: Optional[int] = None,
+    ) -> StagedUpload:
+        """
+        Stream a ``multipart/form-data`` body to a new staging folder.
+
+        Args:
+            content_type: The request's Content-Type header
+            stream: The request body, chunk by chunk
+            content_length: The declared body size, checked before reading
+
+        Raises:
+            RateLimitError: If ``max_concurrent_uploads`` are already in progress
+            UnsupportedMediaTypeError: For non-multipart bodies and file types
+                ingestion cannot parse
+            PayloadTooLargeError: If a file or the whole body is too large
+            ValidationError: For malformed bodies and uploads without files
+        """
+        mime_type, options = parse_options_header(content_type or "")
+        boundary = options.get(b"boundary")
+        if mime_type != b"multipart/form-data" or not boundary:
+            raise UnsupportedMediaTypeError(
+                message="Expected a multipart/form-data body with a boundary",
+                media_type=mime_type.decode(errors="replace") or None,
+            )
+        if content_length and content_length > self.config.max_upload_bytes:
+            raise PayloadTooLargeError(
+                message=f"Upload exceeds {self.config.max_upload_mb:g} MB",
+                limit_bytes=self.config.max_upload_bytes,
+            )
+        with self._lock:
+            if self._active >= self.config.max_concurrent_uploads:
+                raise RateLimitError(
+                    message="Too many uploads in progress, try again shortly",
+                    retry_after=5,
+                )
+            self._active += 1
+        try:
+            return await self._receive(boundary, stream)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    async def _receive(
+        self, boundary: bytes, stream: AsyncIterator[bytes]
+    ) -> StagedUpload:
+        upload_id = uuid.uuid4().hex
+        path = staging_dir(upload_id, self.config)
+        upload = StagedUpload(upload_id=upload_id, path=str(path))
+        writer = _UploadWriter(upload, self.config)
+        parser = MultipartParser(boundary, writer.callbacks())
+        try:
+            await asyncio.to_thread(path.mkdir, parents=True, exist_ok=True)
+            async for chunk in stream:
+                if chunk:
+                    # Parsing and file writes run off the event loop
+                    await asyncio.to_thread(parser.write, chunk)
+            await asyncio.to_thread(parser.finalize)
+            if writer.in_file:
+                raise ValidationError(message="Multipart body ended mid-file")
+            if not upload.files:
+                raise ValidationError(message="Upload contains no files", field="files")
+        except ParseError as e:
+            await self._discard(writer, path)
+            raise ValidationError(message=f"Malformed multipart body: {e}")
+        except BaseException:
+            # Limit errors, disconnects and cancellation leave nothing behind
+            await self._discard(writer, path)
+            raise
+        logger.info(
+            f"Staged upload {upload_id}: {len(upload.files)} files, "
+            f"{upload.size} bytes"
+        )
+        return upload
+
+    @staticmethod
+    async def _discard(writer: _UploadWriter, path: Path) -> None:
+        writer.close()
+        await asyncio.to_thread(shutil.rmtree, path, True)
+
+
+_receiver: Optional[UploadReceiver] = None
+_receiver_lock = threading.Lock()
+
+
+def get_upload_receiver() -> UploadReceiver:
+    """The process-wide upload receiver."""
+    global _receiver
+    with _receiver_lock:
+        if _receiver is None:
+            _receiver = UploadReceiver()
+    return _receiver
@@ -0,0 +1,78 @@
+import asyncio
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+from langchain.schema import Document
+
+from app.core.constants import DataSourceType
+from app.core.schemas.ingestion_config import DataSourceConfig
+from app.core.utils.logger import get_logger
+from app.db.vector.base import DocumentMetadata
+
+from .file_ingestion_service import FileIngestionService
+from .rag_data_provider import RagDataProvider
+from .upload import UploadConfig, staging_dir
+
+logger = get_logger(__name__)
+
+
+@RagDataProvider.register(DataSourceType.UPLOAD)
+class UploadIngestionService(FileIngestionService):
+    """
+    Ingest the files of one streamed upload (see upload.py).
+
+    Files are parsed, chunked and embedded like configured file sources, but
+    their document id is derived from the uploaded file name, so uploading a
+    file again replaces its chunks. The staging folder is removed once the
+    upload was ingested, failed or was cancelled; a job interrupted by a
+    restart resumes from it.
+
+    Args:
+        upload_id: Id returned by UploadReceiver.receive
+    """
+
+    SOURCE_TYPE = DataSourceType.UPLOAD
+
+    def __init__(self, upload_id: str):
+        # Sources come from the upload, not from application-data.yaml
+        self.upload_id = upload_id
+        self._staging = staging_dir(upload_id, UploadConfig.from_settings()).resolve()
+        self.config = DataSourceConfig(
+            type=self.SOURCE_TYPE, sources=[str(self._staging)]
+        )
+        self.validate_config()
+        self.text_splitter = self._create_text_splitter()
+        self._init_file_ingestion(manifest=None)
+
+    async def ingest(self) -> bool:
+        """Ingest the staged files, then remove them."""
+        try:
+            return await super().ingest()
+        finally:
+            await asyncio.to_thread(shutil.rmtree, self._staging, True)
+
+    def _replaced_document_id(self, fingerprint, record) -> Optional[str]:
+        """An earlier upload of the same file name, replaced once this one parsed."""
+        return self._document_id(fingerprint.path)
+
+    def _chunk_file(self, payload) -> List[Document]:
+        path, _ = payload
+        chunks = super()._chunk_file(payload)
+        name = self._uploaded_name(path)
+        for chunk in chunks:
+            # Report the uploaded name, not the staging path (archive members
+            # keep their member path)
+            for key in ("source", "archive_source"):
+                value = str(chunk.metadata.get(key, ""))
+                if value.startswith(path):
+                    chunk.metadata[key] = name + value[len(path) :]
+        return chunks
+
+    def _uploaded_name(self, path: str) -> str:
+        return Path(path).relative_to(self._staging).as_posix()
+
+    def _document_id(self, path: str) -> str:
+        """Same id for every upload of a file name."""
+        name = self._uploaded_name(path)
+        return DocumentMetadata.create_hash(f"upload:{name}")[:32]
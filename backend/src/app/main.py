@@ -114,6 +114,15 @@ async def _warmup():
         except Exception as e:
             logger.warning(f"⚠️ Agent warmup failed (will retry on first request): {e}")
 
+        # Step 4: Load embedding models (local models load weights once, not per query)
+        try:
+            from app.db.vector.embeddings import EmbeddingFactory
+
+            loaded = await asyncio.to_thread(EmbeddingFactory.warmup)
+            logger.info(f"✅ Embedding models warmed up: {list(loaded)}")
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding warmup failed (will load on first use): {e}")
+
         elapsed = asyncio.get_event_loop().time() - warmup_start
         logger.info(
             f"🚀 Warmup completed in {elapsed:.1f}s — first request will be fast!"
@@ -123,10 +132,22 @@ async def _warmup():
         logger.error(f"❌ Warmup failed: {e}", exc_info=True)
 
 
+def _resume_ingestion_jobs():
+    """Requeue ingestion jobs an earlier process left queued or running."""
+    try:
+        from app.infrastructure.ingestion.jobs import JobConfig, get_job_manager
+
+        if JobConfig.from_settings().resume_on_startup:
+            get_job_manager().resume()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not resume ingestion jobs: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan — runs warmup at startup, cleanup at shutdown."""
     await _warmup()
+    _resume_ingestion_jobs()
     yield
     logger.info("Application shutting down")
 
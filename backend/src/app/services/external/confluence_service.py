@@ -1,4 +1,5 @@
 import re
+from datetime import datetime
 from typing import Any, Tuple
 
 import requests
@@ -12,6 +13,8 @@ from app.core.utils.single_ton import SingletonMeta
 logger = get_logger(__name__)
 RESULT_KEY = "results"
 SIZE_KEY = "size"
+PAGE_LIMIT = 100
+PAGE_EXPAND = "body.storage,version,ancestors,space"
 
 
 class ConfluenceService(metaclass=SingletonMeta):
@@ -68,27 +71,74 @@ class ConfluenceService(metaclass=SingletonMeta):
         return self.extract_content_from_a_page(page)
 
     # @handle_atlassian_errors(default_return=[])
-    def list_confluence_pages_in_space(self, space_key: str) -> list[Any]:
-        page_size = 0
-        limit = 100
+    def list_confluence_pages_in_space(
+        self, space_key: str, expand: str = PAGE_EXPAND, limit: int = PAGE_LIMIT
+    ) -> list[Any]:
+        """List every page in a space, following pagination to the end."""
+        start = 0
         page_details = []
         while True:
             result = self._confluence.get_all_pages_from_space_raw(
                 space_key,
-                start=page_size,
+                start=start,
                 limit=limit,
-                expand="body.storage,version,ancestors",
+                expand=expand,
             )
-            if result:
-                pages = (
-                    result.get(RESULT_KEY, []) if isinstance(result, dict) else result
-                )
-                page_details.extend(pages)
-            page_size += limit
-            if result[SIZE_KEY] < limit:
+            if isinstance(result, dict):
+                pages = result.get(RESULT_KEY, [])
+                size = result.get(SIZE_KEY, len(pages))
+            else:
+                pages = result or []
+                size = len(pages)
+            page_details.extend(pages)
+            start += limit
+            if size < limit:
                 break
         return page_details
 
+    def list_confluence_page_versions(self, space_key: str) -> dict[str, int]:
+        """Map page id to version number for every page in a space.
+
+        Only the version is expanded, so this is cheap enough to run on every
+        sync to detect pages deleted upstream.
+        """
+        pages = self.list_confluence_pages_in_space(space_key, expand="version")
+        return {
+            str(page["id"]): page.get("version", {}).get("number", 1) for page in pages
+        }
+
+    def list_confluence_pages_modified_since(
+        self, space_key: str, since: datetime, limit: int = PAGE_LIMIT
+    ) -> list[Any]:
+        """List pages in a space modified after ``since`` using a CQL watermark.
+
+        CQL compares ``lastmodified`` at minute precision in the account's
+        timezone, so callers should pass a watermark with some overlap and
+        de-duplicate by page version.
+        """
+        cql = (
+            f'space = "{space_key}" AND type = page '
+            f'AND lastmodified > "{since.strftime("%Y-%m-%d %H:%M")}" '
+            "ORDER BY lastmodified ASC"
+        )
+        expand = ",".join(f"content.{part}" for part in PAGE_EXPAND.split(","))
+        start = 0
+        page_details = []
+        while True:
+            result = self._confluence.cql(cql, start=start, limit=limit, expand=expand)
+            result = result or {}
+            items = result.get(RESULT_KEY, [])
+            page_details.extend(
+                item["content"] if "content" in item else item for item in items
+            )
+            start += limit
+            if result.get(SIZE_KEY, len(items)) < limit:
+                break
+        logger.info(
+            f"CQL found {len(page_details)} pages in {space_key} modified since {since}"
+        )
+        return page_details
+
     def __get_page_meta(self, page: dict) -> dict:
         page_id = page["id"]
         title = page["title"]
@@ -1,10 +1,77 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
 from app.core.utils.logger import get_logger
 from app.core.utils.single_ton import SingletonMeta
 from app.infrastructure.connections.base import ConnectionType
 from app.infrastructure.connections.factory.connection_factory import ConnectionFactory
+from app.services.external.jira_user_directory import jira_user_directory
 
 logger = get_logger(__name__)
 
+# Fields needed to index an issue for retrieval
+ISSUE_FIELDS = [
+    "summary",
+    "description",
+    "comment",
+    "status",
+    "issuetype",
+    "priority",
+    "project",
+    "assignee",
+    "reporter",
+    "labels",
+    "created",
+    "updated",
+    "resolutiondate",
+]
+SEARCH_PAGE_SIZE = 100
+
+# ADF nodes that end a line of text
+_ADF_BLOCKS = {
+    "paragraph",
+    "heading",
+    "codeBlock",
+    "blockquote",
+    "listItem",
+    "tableRow",
+    "panel",
+    "rule",
+    "mediaGroup",
+}
+
+
+def adf_to_text(node: Any) -> str:
+    """Plain text of an Atlassian Document Format (ADF) value.
+
+    Jira Cloud returns descriptions and comments as ADF documents; Jira
+    Server returns plain strings, which pass through unchanged.
+    """
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, list):
+        return "".join(adf_to_text(child) for child in node)
+
+    node_type = node.get("type")
+    attrs = node.get("attrs") or {}
+    if node_type == "text":
+        return node.get("text", "")
+    if node_type == "hardBreak":
+        return "\n"
+    if node_type in ("mention", "emoji", "status", "date", "inlineCard"):
+        return str(attrs.get("text") or attrs.get("shortName") or attrs.get("url", ""))
+
+    text = adf_to_text(node.get("content", []))
+    if node_type == "listItem":
+        text = f"- {text.strip()}"
+    elif node_type in ("tableCell", "tableHeader"):
+        text = f"{text.strip()} | "
+    if node_type in _ADF_BLOCKS:
+        text = text.rstrip() + "\n"
+    return text
+
 
 class JiraClient(metaclass=SingletonMeta):
     """Jira client using the unified connection management system."""
@@ -47,6 +114,136 @@ class JiraClient(metaclass=SingletonMeta):
         self._ensure_connected()
         return self._connection_manager.get_issue(issue_key)
 
+    def search_all_issues(
+        self,
+        jql: str,
+        fields: Optional[List[str]] = None,
+        page_size: int = SEARCH_PAGE_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """Every issue matching a JQL query, following ``nextPageToken``."""
+        self._ensure_connected()
+        issues: List[Dict[str, Any]] = []
+        token = None
+        while True:
+            result = self._connection_manager.search_issues(
+                jql, limit=page_size, fields=fields, next_page_token=token
+            )
+            issues.extend(result.get("issues", []))
+            token = result.get("nextPageToken")
+            if result.get("isLast") or not token:
+                return issues
+
+    def list_issues_updated_since(
+        self,
+        project_key: str,
+        since: Optional[datetime] = None,
+        page_size: int = SEARCH_PAGE_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """Issues of a project updated at or after ``since`` (all when None).
+
+        JQL compares ``updated`` at minute precision in the account's
+        timezone, so callers should pass a watermark with some overlap and
+        de-duplicate by the issue's ``updated`` value.
+        """
+        jql = f'project = "{project_key}"'
+        if since is not None:
+            jql += f' AND updated >= "{since.strftime("%Y-%m-%d %H:%M")}"'
+        issues = self.search_all_issues(
+            f"{jql} ORDER BY updated ASC", ISSUE_FIELDS, page_size
+        )
+        logger.info(f"JQL found {len(issues)} issues in {project_key} since {since}")
+        return issues
+
+    def list_issue_versions(
+        self, project_key: str, page_size: int = 1000
+    ) -> Dict[str, Optional[str]]:
+        """Map issue id to its ``updated`` time for every issue in a project.
+
+        Only ``updated`` is requested, so this is cheap enough to run on every
+        sync to detect issues deleted upstream or moved to another project.
+        """
+        issues = self.search_all_issues(
+            f'project = "{project_key}"', ["updated"], page_size
+        )
+        return {
+            str(issue["id"]): (issue.get("fields") or {}).get("updated")
+            for issue in issues
+        }
+
+    def get_issue_comments(self, issue_key: str) -> List[Dict[str, Any]]:
+        """All comments of an issue; search results only carry the first page."""
+        self._ensure_connected()
+        issue = self._connection_manager.get_issue(issue_key, fields="comment")
+        return ((issue.get("fields") or {}).get("comment") or {}).get("comments", [])
+
+    def extract_issue_content(
+        self, issue: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Text (summary, details, description, comments) and metadata of an issue."""
+        fields = issue.get("fields") or {}
+        key = issue.get("key", "")
+        comment = fields.get("comment") or {}
+        comments = comment.get("comments", [])
+        if comment.get("total", len(comments)) > len(comments):
+            comments = self.get_issue_comments(key)
+
+        def name(field: str) -> str:
+            return (fields.get(field) or {}).get("name", "") or ""
+
+        def person(field: str) -> str:
+            return (fields.get(field) or {}).get("displayName", "") or ""
+
+        status = fields.get("status") or {}
+        details = [
+            f"{label}: {value}"
+            for label, value in (
+                ("Type", name("issuetype")),
+                ("Status", status.get("name", "")),
+                ("Priority", name("priority")),
+                ("Assignee", person("assignee")),
+                ("Reporter", person("reporter")),
+                ("Labels", ", ".join(fields.get("labels") or [])),
+                ("Created", fields.get("created") or ""),
+                ("Resolved", fields.get("resolutiondate") or ""),
+            )
+            if value
+        ]
+        sections = [f"{key}: {fields.get('summary', '')}", "\n".join(details)]
+        description = adf_to_text(fields.get("description")).strip()
+        if description:
+            sections.append(f"Description:\n{description}")
+        for item in comments:
+            body = adf_to_text(item.get("body")).strip()
+            if body:
+                author = (item.get("author") or {}).get("displayName", "Unknown")
+                sections.append(
+                    f"Comment by {author} ({item.get('created', '')}):\n{body}"
+                )
+
+        project = fields.get("project") or {}
+        metadata = {
+            "source": "jira",
+            "issue_id": str(issue.get("id", "")),
+            "issue_key": key,
+            "project": project.get("key", ""),
+            "title": fields.get("summary", ""),
+            "status": status.get("name", ""),
+            "status_category": (status.get("statusCategory") or {}).get("key", ""),
+            "issue_type": name("issuetype"),
+            "priority": name("priority"),
+            "created": fields.get("created"),
+            "updated": fields.get("updated"),
+            "resolved": fields.get("resolutiondate"),
+            "url": self._browse_url(key),
+        }
+        return "\n\n".join(section for section in sections if section), metadata
+
+    def _browse_url(self, issue_key: str) -> str:
+        base_url = ""
+        if self._connection_manager:
+            base_url = self._connection_manager.config.get("jira_base_url") or ""
+        return f"{str(base_url).rstrip('/')}/browse/{issue_key}" if base_url else ""
+
     def get_projects(self):
         """Get all accessible projects."""
         self._ensure_connected()
@@ -62,29 +259,62 @@ class JiraClient(metaclass=SingletonMeta):
         self._ensure_connected()
         return self._connection_manager.add_comment(issue_key, comment_body)
 
-    def search_users(self, query: str, max_results: int = 50):
-        """Search for users in Jira."""
+    def _user_directory(self):
+        """Return the local user directory if it can serve lookups."""
         self._ensure_connected()
-        return self._connection_manager.search_users(query, max_results)
+        try:
+            if jira_user_directory.ensure_fresh(self._connection_manager):
+                return jira_user_directory
+        except Exception as e:
+            logger.warning(f"Jira user directory unavailable, using Jira API: {e}")
+        return None
+
+    def search_users(self, query: str, max_results: int = 50):
+        """Search for users, served from the local user directory when possible."""
+        directory = self._user_directory()
+        if directory:
+            users = directory.search(query, max_results)
+            if users:
+                return [user.to_jira_dict() for user in users]
+
+        users = self._connection_manager.search_users(query, max_results)
+        if directory:
+            directory.upsert(users)
+        return users
 
     def get_user_by_account_id(self, account_id: str):
         """Get user details by account ID."""
-        self._ensure_connected()
+        directory = self._user_directory()
+        if directory:
+            user = directory.get(account_id)
+            if user:
+                return user.to_jira_dict()
         return self._connection_manager.get_user_by_account_id(account_id)
 
     def get_all_users(self, start_at: int = 0, max_results: int = 50):
         """Get all users with pagination."""
-        self._ensure_connected()
+        directory = self._user_directory()
+        if directory:
+            users = directory.list_users(start_at, max_results)
+            return [user.to_jira_dict() for user in users]
         return self._connection_manager.get_all_users(start_at, max_results)
 
     def get_project_users(
         self, project_key: str, start_at: int = 0, max_results: int = 50
     ):
         """Get users who have access to a specific project."""
-        self._ensure_connected()
-        return self._connection_manager.get_project_users(
+        directory = self._user_directory()
+        if directory:
+            users = directory.list_users(start_at, max_results, project_key)
+            if users is not None:
+                return [user.to_jira_dict() for user in users]
+
+        users = self._connection_manager.get_project_users(
             project_key, start_at, max_results
         )
+        if directory:
+            directory.upsert(users, project_key=project_key)
+        return users
 
     def disconnect(self):
         """Close the Jira connection."""
@@ -0,0 +1,643 @@
+"""
+Local Jira user directory for mention and assignee lookups.
+
+Jira's user endpoints (`/user/search`, `/users/search`, `/user/assignable/search`)
+are slow and rate limited, yet the agent hits them several times per
+conversation just to turn a name or an email into an account ID. This module
+keeps an in-process directory of Jira users built from paginated bulk fetches
+and answers those lookups locally:
+
+- Exact lookups by account ID or email are dictionary hits.
+- Prefix lookups (display name tokens, email local part) use a sorted token
+  index searched with ``bisect``.
+- Fuzzy lookups use RapidFuzz over display names.
+
+The directory is built and refreshed in the background; until the first build
+finishes, lookups go to Jira as before. Incremental refreshes re-list
+users and apply only the records whose fingerprint changed; full refreshes also
+rebuild project membership. Snapshots are persisted through the cache layer so
+every worker shares one copy and only the first one to go stale calls Jira.
+"""
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from rapidfuzz import fuzz, process
+
+from app.core.utils.background_loop import shared_loop
+from app.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_KEY = "directory"
+CACHE_NAMESPACE = "jira_users"
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "enabled": True,
+    "refresh_interval": 900,  # Incremental refresh (seconds)
+    "full_refresh_interval": 86400,  # Full rebuild incl. project membership
+    "page_size": 100,
+    "projects": [],  # Project keys to index membership for; empty = all
+    "fuzzy_score_cutoff": 80,
+    "retry_backoff": 60,  # First retry after an empty or failed refresh (seconds)
+}
+
+
+def _run_async(coro):
+    """Run a cache coroutine from the synchronous Jira client code path.
+
+    The cache's async Redis client is bound to the loop it first ran on, so
+    every call goes through the one shared background loop.
+    """
+    return shared_loop.run(coro, timeout=30)
+
+
+def _normalize(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+@dataclass
+class JiraUserRecord:
+    """A single Jira user as held by the directory."""
+
+    account_id: str
+    display_name: str = ""
+    email: str = ""
+    active: bool = True
+    account_type: str = "atlassian"
+    projects: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_jira(cls, user: Dict[str, Any]) -> "JiraUserRecord":
+        """Build a record from a Jira REST user object."""
+        return cls(
+            account_id=user.get("accountId", ""),
+            display_name=user.get("displayName", "") or "",
+            email=user.get("emailAddress", "") or "",
+            active=user.get("active", True),
+            account_type=user.get("accountType", "atlassian") or "atlassian",
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JiraUserRecord":
+        """Build a record from a persisted snapshot entry."""
+        return cls(
+            account_id=data["account_id"],
+            display_name=data.get("display_name", ""),
+            email=data.get("email", ""),
+            active=data.get("active", True),
+            account_type=data.get("account_type", "atlassian"),
+            projects=set(data.get("projects", [])),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for the cache snapshot."""
+        return {
+            "account_id": self.account_id,
+            "display_name": self.display_name,
+            "email": self.email,
+            "active": self.active,
+            "account_type": self.account_type,
+            "projects": sorted(self.projects),
+        }
+
+    def to_jira_dict(self) -> Dict[str, Any]:
+        """Render in the same shape Jira's user endpoints return."""
+        user = {
+            "accountId": self.account_id,
+            "displayName": self.display_name,
+            "active": self.active,
+            "accountType": self.account_type,
+        }
+        if self.email:
+            user["emailAddress"] = self.email
+        return user
+
+    def fingerprint(self) -> Tuple:
+        """Identity of the fields that affect lookups."""
+        return (
+            self.display_name,
+            self.email,
+            self.active,
+            self.account_type,
+            frozenset(self.projects),
+        )
+
+
+class JiraUserDirectory:
+    """
+    In-process, periodically refreshed index of Jira users.
+
+    Lookups are synchronous and never touch the network. Refreshes pull data
+    from a *source* object exposing the Jira connection manager's user API
+    (``get_all_users``, ``get_project_users`` and ``get_projects``).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, cache: Any = None):
+        """
+        Initialize the directory.
+
+        Args:
+            config: Directory settings; defaults to
+                ``external.atlassian.user_directory`` from settings
+            cache: Optional cache provider used to share snapshots between
+                workers; defaults to a ``CacheService`` in the ``jira_users``
+                namespace
+        """
+        self.config = {**DEFAULT_CONFIG, **(config or self._load_config())}
+        self._cache = cache
+
+        self._records: Dict[str, JiraUserRecord] = {}
+        self._email_index: Dict[str, str] = {}
+        self._prefix_index: List[Tuple[str, str]] = []
+        self._name_choices: Dict[str, str] = {}
+        self._indexed_projects: Set[str] = set()
+
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._version = 0
+        self._last_refresh = 0.0
+        self._last_full_refresh = 0.0
+        self._last_refresh_duration = 0.0
+        self._refresh_thread: Optional[threading.Thread] = None
+        # Back-off after refreshes that failed or returned no users
+        self._failed_refreshes = 0
+        self._retry_after = 0.0
+
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+
+    @staticmethod
+    def _load_config() -> Dict[str, Any]:
+        try:
+            from app.core.config.framework.settings import settings
+
+            return settings.get_section("external.atlassian.user_directory", {}) or {}
+        except Exception as e:
+            logger.warning(
+                f"Jira user directory config unavailable, using defaults: {e}"
+            )
+            return {}
+
+    @property
+    def cache(self):
+        """Lazily create the shared snapshot cache."""
+        if self._cache is None:
+            from app.infrastructure.cache import CacheService
+
+            self._cache = CacheService(
+                namespace=CACHE_NAMESPACE,
+                default_ttl=int(self.config["full_refresh_interval"]) * 2,
+            )
+        return self._cache
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.get("enabled", True))
+
+    @property
+    def is_ready(self) -> bool:
+        """True once the directory holds at least one user."""
+        return bool(self._records)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, account_id: str) -> Optional[JiraUserRecord]:
+        """Get a user by account ID."""
+        return self._count(self._records.get(account_id))
+
+    def find_by_email(self, email: str) -> Optional[JiraUserRecord]:
+        """Get a user by exact (case-insensitive) email address."""
+        account_id = self._email_index.get(_normalize(email))
+        return self._count(self._records.get(account_id) if account_id else None)
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> List[JiraUserRecord]:
+        """Find users whose display name, name token or email starts with ``prefix``."""
+        needle = _normalize(prefix)
+        if not needle:
+            return []
+
+        results: List[JiraUserRecord] = []
+        seen: Set[str] = set()
+        with self._lock:
+            index = self._prefix_index
+            pos = bisect.bisect_left(index, (needle, ""))
+            while pos < len(index) and len(results) < limit:
+                token, account_id = index[pos]
+                if not token.startswith(needle):
+                    break
+                if account_id not in seen:
+                    seen.add(account_id)
+                    results.append(self._records[account_id])
+                pos += 1
+        return self._count_many(results)
+
+    def search_fuzzy(
+        self, query: str, limit: int = 10, score_cutoff: Optional[float] = None
+    ) -> List[JiraUserRecord]:
+        """Find users whose display name approximately matches ``query``."""
+        needle = _normalize(query)
+        if not needle:
+            return []
+        cutoff = (
+            score_cutoff
+            if score_cutoff is not None
+            else self.config["fuzzy_score_cutoff"]
+        )
+        with self._lock:
+            matches = process.extract(
+                needle,
+                self._name_choices,
+                scorer=fuzz.WRatio,
+                limit=limit,
+                score_cutoff=cutoff,
+            )
+            results = [self._records[account_id] for _, _, account_id in matches]
+        return self._count_many(results)
+
+    def search(self, query: str, limit: int = 10) -> List[JiraUserRecord]:
+        """
+        Resolve a free-form user query the way Jira's user search does.
+
+        Tries, in order: exact account ID, exact email, prefix match, and only
+        if nothing matched, a fuzzy match on display names.
+        """
+        query = (query or "").strip()
+        if not query:
+            return []
+
+        record = self._records.get(query)
+        if record:
+            return self._count_many([record])
+        if "@" in query:
+            record = self.find_by_email(query)
+            if record:
+                return [record]
+
+        results = self.search_prefix(query, limit)
+        if results:
+            return results
+        return self.search_fuzzy(query, limit)
+
+    def list_users(
+        self,
+        start_at: int = 0,
+        max_results: int = 50,
+        project_key: Optional[str] = None,
+    ) -> Optional[List[JiraUserRecord]]:
+        """
+        Page through the directory, optionally restricted to a project.
+
+        Returns:
+            The requested page, or None if ``project_key`` membership has not
+            been indexed (the caller should fall back to Jira).
+        """
+        with self._lock:
+            if project_key is None:
+                users = list(self._records.values())
+            elif project_key.upper() in self._indexed_projects:
+                key = project_key.upper()
+                users = [r for r in self._records.values() if key in r.projects]
+            else:
+                self._misses += 1
+                return None
+        return self._count_many(users[start_at : start_at + max_results])
+
+    def _count(self, record: Optional[JiraUserRecord]) -> Optional[JiraUserRecord]:
+        if record is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return record
+
+    def _count_many(self, records: List[JiraUserRecord]) -> List[JiraUserRecord]:
+        if records:
+            self._hits += 1
+        else:
+            self._misses += 1
+        return records
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def upsert(
+        self, users: Iterable[Dict[str, Any]], project_key: Optional[str] = None
+    ) -> int:
+        """
+        Merge Jira user objects into the directory.
+
+        Used both by refreshes and by callers that had to fall back to Jira,
+        so a miss is only paid once.
+
+        Returns:
+            Number of records that were added or changed
+        """
+        changed = 0
+        with self._lock:
+            for user in users or []:
+                if not user.get("accountId"):
+                    continue
+                incoming = JiraUserRecord.from_jira(user)
+                existing = self._records.get(incoming.account_id)
+                if existing:
+                    incoming.projects = set(existing.projects)
+                if project_key:
+                    incoming.projects.add(project_key.upper())
+                if existing and existing.fingerprint() == incoming.fingerprint():
+                    continue
+                self._records[incoming.account_id] = incoming
+                changed += 1
+            if changed:
+                self._rebuild_indexes()
+        return changed
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the email, prefix and fuzzy indexes. Caller holds the lock."""
+        email_index: Dict[str, str] = {}
+        prefix_index: List[Tuple[str, str]] = []
+        name_choices: Dict[str, str] = {}
+
+        for account_id, record in self._records.items():
+            name = _normalize(record.display_name)
+            email = _normalize(record.email)
+            tokens = set(name.split())
+            if name:
+                tokens.add(name)
+                name_choices[account_id] = name
+            if email:
+                email_index[email] = account_id
+                tokens.add(email)
+                tokens.add(email.split("@", 1)[0])
+            prefix_index.extend((token, account_id) for token in tokens)
+
+        prefix_index.sort()
+        self._email_index = email_index
+        self._prefix_index = prefix_index
+        self._name_choices = name_choices
+        self._version += 1
+
+    # ------------------------------------------------------------------
+    # Refresh and persistence
+    # ------------------------------------------------------------------
+
+    def ensure_fresh(self, source: Any) -> bool:
+        """
+        Make sure the directory is populated and not stale.
+
+        An empty directory loads the shared snapshot from the cache, or builds
+        itself from Jira, in the background; callers use the Jira API until it
+        is ready. Later calls only schedule the same background work when the
+        refresh interval has elapsed, and keep serving the in-memory copy
+        meanwhile, so lookups never wait on the cache or Jira. After a refresh
+        fails or returns no users, nothing is scheduled until its back-off has
+        passed.
+
+        Args:
+            source: Jira connection manager (or anything with the same user API)
+
+        Returns:
+            True if the directory can serve lookups
+        """
+        if not self.enabled:
+            return False
+
+        now = time.time()
+        if self._refresh_lock.locked() or now < self._retry_after:
+            return self.is_ready
+
+        if not self._records:
+            self._schedule_refresh(source, full=True)
+        elif now - self._last_refresh >= float(self.config["refresh_interval"]):
+            full = now - self._last_full_refresh >= float(
+                self.config["full_refresh_interval"]
+            )
+            self._schedule_refresh(source, full=full)
+        return self.is_ready
+
+    def _schedule_refresh(self, source: Any, full: bool) -> None:
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._load_or_refresh,
+                args=(source,),
+                kwargs={"full": full},
+                name="jira-user-directory-refresh",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _load_or_refresh(self, source: Any, full: bool) -> None:
+        """Use a newer shared snapshot if another worker made one, else refresh."""
+        if not self.load_snapshot():
+            self.refresh(source, full=full)
+
+    def _back_off(self) -> None:
+        """Delay the next refresh, doubling the delay up to the refresh interval."""
+        self._failed_refreshes += 1
+        delay = min(
+            float(self.config["retry_backoff"]) * 2 ** (self._failed_refreshes - 1),
+            float(self.config["refresh_interval"]),
+        )
+        self._retry_after = time.time() + delay
+        logger.info(f"Next Jira user directory refresh in {delay:.0f}s")
+
+    def refresh(self, source: Any, full: bool = False) -> int:
+        """
+        Refresh the directory from Jira.
+
+        Incremental refreshes page through ``get_all_users`` and apply only
+        changed records. Full refreshes additionally rebuild project membership
+        from ``get_project_users`` for the configured (or all) projects.
+
+        Returns:
+            Number of records added, changed or removed (-1 if a refresh was
+            already running)
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return -1
+        started = time.time()
+        try:
+            page_size = int(self.config["page_size"])
+            fetched: Dict[str, Dict[str, Any]] = {}
+            for user in self._paginate(
+                lambda start: source.get_all_users(start, page_size), page_size
+            ):
+                # Apps and customers stay: they are valid assignees and
+                # get_all_users lists them as Jira does
+                if user.get("accountId"):
+                    fetched[user["accountId"]] = user
+
+            memberships: Optional[Dict[str, Set[str]]] = None
+            if full:
+                memberships = {}
+                for project_key in self._projects_to_index(source):
+                    for user in self._paginate(
+                        lambda start, key=project_key: source.get_project_users(
+                            key, start, page_size
+                        ),
+                        page_size,
+                    ):
+                        memberships.setdefault(user.get("accountId"), set()).add(
+                            project_key.upper()
+                        )
+                        fetched.setdefault(user.get("accountId"), user)
+
+            if not fetched:
+                logger.warning("Jira returned no users; keeping the existing directory")
+                self._back_off()
+                return 0
+
+            changed = self._apply_refresh(fetched, memberships)
+            now = time.time()
+            self._last_refresh = now
+            if full:
+                self._last_full_refresh = now
+            self._refreshes += 1
+            self._last_refresh_duration = now - started
+            self._failed_refreshes = 0
+            self._retry_after = 0.0
+
+            if changed or full:
+                self.save_snapshot()
+            logger.info(
+                f"Jira user directory {'full' if full else 'incremental'} refresh: "
+                f"{len(self._records)} users, {changed} changed "
+                f"in {self._last_refresh_duration:.2f}s"
+            )
+            return changed
+        except Exception as e:
+            logger.error(f"Jira user directory refresh failed: {e}")
+            self._back_off()
+            return 0
+        finally:
+            self._refresh_lock.release()
+
+    def _apply_refresh(
+        self,
+        fetched: Dict[str, Dict[str, Any]],
+        memberships: Optional[Dict[str, Set[str]]],
+    ) -> int:
+        changed = 0
+        with self._lock:
+            records: Dict[str, JiraUserRecord] = {}
+            for account_id, user in fetched.items():
+                record = JiraUserRecord.from_jira(user)
+                existing = self._records.get(account_id)
+                if memberships is not None:
+                    record.projects = memberships.get(account_id, set())
+                elif existing:
+                    record.projects = set(existing.projects)
+                if not existing or existing.fingerprint() != record.fingerprint():
+                    changed += 1
+                records[account_id] = record
+            changed += len(self._records.keys() - records.keys())
+
+            if memberships is not None:
+                self._indexed_projects = {
+                    key for keys in memberships.values() for key in keys
+                } | set(self._configured_projects())
+            if changed:
+                self._records = records
+                self._rebuild_indexes()
+        return changed
+
+    @staticmethod
+    def _paginate(fetch_page, page_size: int) -> Iterable[Dict[str, Any]]:
+        start = 0
+        while True:
+            page = fetch_page(start) or []
+            yield from page
+            if len(page) < page_size:
+                break
+            start += page_size
+
+    def _configured_projects(self) -> List[str]:
+        return [key.upper() for key in (self.config.get("projects") or [])]
+
+    def _projects_to_index(self, source: Any) -> List[str]:
+        configured = self._configured_projects()
+        if configured:
+            return configured
+        return [p.get("key") for p in (source.get_projects() or []) if p.get("key")]
+
+    def save_snapshot(self) -> bool:
+        """Persist the directory through the cache layer."""
+        with self._lock:
+            snapshot = {
+                "version": self._version,
+                "refreshed_at": self._last_refresh,
+                "full_refreshed_at": self._last_full_refresh,
+                "indexed_projects": sorted(self._indexed_projects),
+                "users": [r.to_dict() for r in self._records.values()],
+            }
+        try:
+            return bool(_run_async(self.cache.set(SNAPSHOT_KEY, snapshot)))
+        except Exception as e:
+            logger.warning(f"Failed to persist Jira user directory snapshot: {e}")
+            return False
+
+    def load_snapshot(self) -> bool:
+        """
+        Load the shared snapshot if it is newer than the local copy.
+
+        Returns:
+            True if a newer snapshot was loaded
+        """
+        try:
+            snapshot = _run_async(self.cache.get(SNAPSHOT_KEY))
+        except Exception as e:
+            logger.warning(f"Failed to load Jira user directory snapshot: {e}")
+            return False
+        if not snapshot or snapshot.get("refreshed_at", 0) <= self._last_refresh:
+            return False
+
+        with self._lock:
+            self._records = {
+                data["account_id"]: JiraUserRecord.from_dict(data)
+                for data in snapshot.get("users", [])
+            }
+            self._indexed_projects = set(snapshot.get("indexed_projects", []))
+            self._last_refresh = snapshot.get("refreshed_at", 0)
+            self._last_full_refresh = snapshot.get("full_refreshed_at", 0)
+            self._rebuild_indexes()
+        logger.info(
+            f"Loaded Jira user directory snapshot with {len(self._records)} users"
+        )
+        return True
+
+    def clear(self) -> None:
+        """Drop all local state (the shared snapshot is left untouched)."""
+        with self._lock:
+            self._records = {}
+            self._indexed_projects = set()
+            self._last_refresh = 0.0
+            self._last_full_refresh = 0.0
+            self._rebuild_indexes()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Directory size, freshness and hit/miss telemetry."""
+        total = self._hits + self._misses
+        return {
+            "users": len(self._records),
+            "indexed_projects": sorted(self._indexed_projects),
+            "version": self._version,
+            "last_refresh": self._last_refresh,
+            "last_full_refresh": self._last_full_refresh,
+            "last_refresh_duration": round(self._last_refresh_duration, 3),
+            "refreshes": self._refreshes,
+            "failed_refreshes": self._failed_refreshes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total, 3) if total else 0.0,
+        }
+
+
+jira_user_directory = JiraUserDirectory()
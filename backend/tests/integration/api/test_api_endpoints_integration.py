@@ -213,13 +213,14 @@ class TestAPIIntegration(MongoDBTestMixin):
                 # Should accept valid source types (may fail due to configuration)
                 assert response.status_code in [
                     200,
+                    202,
                     404,
                     422,
                     500,
                     503,
                 ]  # Various service states
 
-                if response.status_code == 200:
+                if response.status_code in (200, 202):
                     data = response.json()
                     assert "message" in data
 
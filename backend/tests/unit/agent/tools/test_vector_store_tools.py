@@ -0,0 +1,250 @@
+"""
+Unit tests for the retrieve_information vector store tool.
+
+Covers:
+- One cached default store reused by sync and async calls
+- k, score threshold and metadata filter arguments
+- Compact, budget-capped rendering and error reporting
+- Keyword, hybrid and automatic search modes over the lexical index
+- The federated_retrieve tool when federated sources are configured
+"""
+
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from langchain.schema import Document
+
+from app.agent.tools.database import vector_store as vector_tools
+from app.agent.tools.database.vector_store import RetrievalConfig, VectorStoreTools
+from app.core.constants import VectorDBType
+from app.core.utils.background_loop import shared_loop
+from app.db.vector.federated import FederatedConfig, FederatedSearch, FederatedSource
+from app.db.vector.lexical_index import LexicalIndex, LexicalIndexConfig
+
+
+class FakeStore:
+    """Async store recording searches and the loop they ran on."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.searches = []
+        self.connections = 0
+        self.loops = set()
+
+    async def get_connection(self):
+        self.connections += 1
+
+    async def search_similar(self, query, k=5, filter_criteria=None):
+        self.loops.add(id(asyncio.get_running_loop()))
+        self.searches.append((query, k, filter_criteria))
+        return self.docs[:k]
+
+
+def _doc(text, score, **metadata):
+    return Document(page_content=text, metadata={"similarity": score, **metadata})
+
+
+@pytest.fixture
+def store():
+    fake = FakeStore(
+        [
+            _doc("Reset tokens expire after 15 minutes.", 0.91, title="Auth"),
+            _doc("Payments retry three times.", 0.42, source_path="/pay.md"),
+        ]
+    )
+    with (
+        patch.object(vector_tools, "_vector_store", None),
+        patch(
+            "app.db.vector.VectorStoreFactory.get_default_vector_store",
+            return_value=fake,
+        ) as factory,
+    ):
+        fake.factory = factory
+        yield fake
+
+
+def _tools(**retrieval):
+    return VectorStoreTools({"retrieval": {"k": 4, **retrieval}})
+
+
+class TestRetrieveInformation:
+    """Test the retrieval path."""
+
+    def test_tool_exposes_sync_and_async_entry_points(self):
+        [tool] = _tools().get_tools()
+
+        assert tool.name == "retrieve_information"
+        assert tool.coroutine is not None
+        assert set(tool.args) == {"query", "k", "score_threshold", "filters", "mode"}
+
+    @pytest.mark.asyncio
+    async def test_store_is_created_once_and_reused(self, store):
+        tools = _tools()
+
+        tools._retrieve_information("tokens")
+        await tools._aretrieve_information("tokens")
+        await asyncio.to_thread(tools._retrieve_information, "tokens")
+
+        store.factory.assert_called_once()
+        assert len(store.searches) == 3
+        # Every call runs on the same background loop
+        assert len(store.loops) == 1
+
+    def test_arguments_reach_the_store(self, store):
+        _tools(max_k=5)._retrieve_information(
+            "tokens", k=50, filters={"space_key": "ENG"}
+        )
+
+        assert store.searches == [("tokens", 5, {"space_key": "ENG"})]
+
+    def test_score_threshold_drops_weak_results(self, store):
+        output = _tools()._retrieve_information("tokens", score_threshold=0.5)
+
+        assert "Reset tokens" in output
+        assert "Payments" not in output
+        assert "title: Auth | score: 0.910" in output
+
+    def test_output_is_capped_by_the_budget(self, store):
+        output = _tools(max_chars=60, max_chunk_chars=20)._retrieve_information(
+            "tokens"
+        )
+
+        assert "Reset tokens expire …" in output
+        assert "[1 more results omitted]" in output
+
+    def test_sync_stores_are_supported(self, store):
+        store.search_similar = lambda query, k, filter_criteria: [_doc("sync", None)]
+
+        assert _tools()._retrieve_information("q") == "[1] result\nsync"
+
+    def test_failures_are_reported_as_errors(self, store):
+        async def fail(*args, **kwargs):
+            raise RuntimeError("store down")
+
+        store.search_similar = fail
+
+        result = json.loads(_tools()._retrieve_information("q"))
+        assert result["status"] == "error"
+        assert "store down" in result["message"]
+
+    def test_retrieval_runs_on_the_shared_loop(self, store):
+        _tools()._retrieve_information("q")
+
+        threads = [t for t in threading.enumerate() if t.name == shared_loop.name]
+        assert threads and all(t.daemon for t in threads)
+        assert store.loops == {id(shared_loop._loop)}
+
+    @pytest.mark.asyncio
+    async def test_search_while_an_ingest_is_running(self, store):
+        # A loop-bound lock like the asyncpg pool lock, held by an ingest
+        # running on the shared loop while searches come in
+        lock_holder = {}
+
+        async def ingest(batches):
+            lock = lock_holder.setdefault("lock", asyncio.Lock())
+            for _ in range(batches):
+                async with lock:
+                    await asyncio.sleep(0.02)
+            return batches
+
+        async def search_similar(query, k=5, filter_criteria=None):
+            async with lock_holder["lock"]:
+                return await FakeStore.search_similar(store, query, k, filter_criteria)
+
+        store.search_similar = search_similar
+        tools = _tools(timeout_seconds=5)
+        running = shared_loop.submit(ingest(10))
+        while "lock" not in lock_holder:
+            await asyncio.sleep(0.001)
+
+        sync_result = await asyncio.to_thread(tools._retrieve_information, "tokens")
+        async_result = await tools._aretrieve_information("tokens")
+
+        assert not running.done()
+        assert "Reset tokens" in sync_result and "Reset tokens" in async_result
+        assert store.loops == {id(shared_loop._loop)}
+        assert await asyncio.wrap_future(running) == 10
+
+
+@pytest.fixture
+def lexical(tmp_path, store):
+    index = LexicalIndex(LexicalIndexConfig(enabled=True, path=str(tmp_path)))
+    index.open()
+    index.add(
+        [
+            Document(page_content="PROJ-7 tracks the token expiry bug."),
+            Document(page_content="Reset tokens expire after 15 minutes."),
+        ]
+    )
+    with patch.object(vector_tools, "lexical_index_for", return_value=index):
+        yield index
+    index.close()
+
+
+class TestSearchModes:
+    """Test keyword, hybrid and automatic modes."""
+
+    def test_identifier_queries_skip_the_vector_store(self, store, lexical):
+        output = _tools()._retrieve_information("PROJ-7")
+
+        assert store.searches == []
+        assert output.startswith("[1] bm25: ")
+        assert "PROJ-7 tracks" in output
+
+    def test_other_queries_fuse_both_rankings(self, store, lexical):
+        output = _tools()._retrieve_information("when do reset tokens expire")
+
+        assert store.searches == [("when do reset tokens expire", 8, None)]
+        assert output.startswith("[1] from: vector, keyword | title: Auth")
+
+    def test_automatic_keyword_search_without_hits_falls_back(self, store, lexical):
+        output = _tools()._retrieve_information("ERR_UNKNOWN")
+
+        assert len(store.searches) == 1
+        assert "Reset tokens" in output
+
+    def test_explicit_modes(self, store, lexical):
+        tools = _tools()
+
+        assert tools._retrieve_information("ERR_UNKNOWN", mode="keyword") == (
+            "No relevant information found."
+        )
+        tools._retrieve_information("PROJ-7", mode="vector")
+
+        assert [query for query, _, _ in store.searches] == ["PROJ-7"]
+        assert "Unknown search mode" in tools._retrieve_information("q", mode="fuzzy")
+
+
+class TestFederatedRetrieve:
+    """Test the federated_retrieve tool."""
+
+    def test_tool_is_offered_when_sources_are_configured(self):
+        search = FederatedSearch(
+            FederatedConfig(
+                sources=[FederatedSource(name="files", provider=VectorDBType.QDRANT)]
+            ),
+            stores={"files": FakeStore([_doc("Uploaded runbook.", None)])},
+        )
+        search.store(search.config.sources[0]).supports_vector_search = lambda: False
+
+        with patch.object(vector_tools, "_federated_search", search):
+            tools = {tool.name: tool for tool in _tools().get_tools()}
+            output = tools["federated_retrieve"].invoke({"query": "runbook"})
+
+        assert output == "[1] from: files\nUploaded runbook."
+
+
+class TestRetrievalConfig:
+    """Test configuration parsing."""
+
+    def test_defaults_and_overrides(self):
+        config = RetrievalConfig.from_config(
+            {"k": "6", "score_threshold": None, "metadata_fields": ["title"]}
+        )
+
+        assert config.k == 6
+        assert config.score_threshold == 0.0
+        assert config.metadata_fields == ("title",)
@@ -0,0 +1,66 @@
+"""
+Unit tests for the ingestion API endpoints.
+
+Covers:
+- Endpoints that write to or rebuild the index require authentication
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.api.v1 import ingest_data
+from app.core.exceptions import BaseAppException
+from app.core.handlers import base_app_exception_handler
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(ingest_data.router, prefix="/api/v1/data")
+    app.add_exception_handler(BaseAppException, base_app_exception_handler)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+class TestIngestEndpointsAuthentication:
+    """Test that protected ingestion endpoints reject anonymous requests."""
+
+    def test_upload_requires_authentication(self, client):
+        with patch.object(ingest_data, "get_upload_receiver") as receiver:
+            response = client.post(
+                "/api/v1/data/upload",
+                files={"file": ("notes.txt", b"alpha", "text/plain")},
+            )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        receiver.assert_not_called()
+
+    def test_embedding_model_reload_requires_authentication(self, client):
+        with patch.object(ingest_data.EmbeddingFactory, "reload") as reload:
+            response = client.post("/api/v1/data/embeddings/models/reload")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        reload.assert_not_called()
+
+    def test_pgvector_reindex_requires_authentication(self, client):
+        with patch.object(ingest_data, "_on_pgvector_store") as on_store:
+            response = client.post("/api/v1/data/vector/pgvector/indexes/reindex")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        on_store.assert_not_called()
+
+    def test_load_requires_authentication(self, client):
+        with patch.object(ingest_data, "get_job_manager") as manager:
+            response = client.post("/api/v1/data/load/confluence")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        manager.assert_not_called()
+
+    def test_job_cancel_requires_authentication(self, client):
+        with patch.object(ingest_data, "get_job_manager") as manager:
+            response = client.post("/api/v1/data/jobs/j1/cancel")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        manager.assert_not_called()
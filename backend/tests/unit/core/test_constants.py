@@ -44,6 +44,7 @@ class TestVectorDBType:
             "pgvector",
             "chroma",
             "qdrant",
+            "numpy",
             "milvus",
             "redis",
             "opensearch",
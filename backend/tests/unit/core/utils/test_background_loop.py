@@ -0,0 +1,72 @@
+"""
+Unit tests for the background event loop.
+
+Covers:
+- Sync and async callers run coroutines on the loop thread
+- Nested run_async calls from the loop itself do not deadlock
+- Blocking run() from the loop thread is rejected
+- Stopping waits for pending tasks, then closes the loop
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.utils.background_loop import BackgroundLoop, shared_loop
+
+
+async def _thread_name():
+    return threading.current_thread().name
+
+
+class TestBackgroundLoop:
+    """Test running coroutines on a BackgroundLoop."""
+
+    def test_sync_and_async_callers_share_the_loop_thread(self):
+        loop = BackgroundLoop("test-loop")
+
+        assert loop.run(_thread_name()) == "test-loop"
+        assert asyncio.run(loop.run_async(_thread_name())) == "test-loop"
+
+    def test_nested_run_async_runs_inline(self):
+        loop = BackgroundLoop("test-loop")
+
+        async def outer():
+            return await loop.run_async(_thread_name(), timeout=1)
+
+        assert loop.run(outer(), timeout=1) == "test-loop"
+
+    def test_blocking_run_from_the_loop_is_rejected(self):
+        loop = BackgroundLoop("test-loop")
+
+        async def outer():
+            loop.run(_thread_name())
+
+        with pytest.raises(RuntimeError, match="run_async"):
+            loop.run(outer(), timeout=1)
+
+    def test_shared_loop_is_one_daemon_thread(self):
+        shared_loop.run(_thread_name())
+
+        threads = [t for t in threading.enumerate() if t.name == shared_loop.name]
+        assert len(threads) == 1 and threads[0].daemon
+
+    def test_stop_lets_pending_tasks_finish(self):
+        loop = BackgroundLoop("test-loop")
+        finished = threading.Event()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            finished.set()
+
+        loop.submit(slow())
+        event_loop = loop._loop
+        loop.stop()
+
+        assert finished.wait(2)
+        for _ in range(100):
+            if event_loop.is_closed():
+                break
+            threading.Event().wait(0.01)
+        assert event_loop.is_closed()
@@ -47,6 +47,22 @@ class TestWebContentChunkerInitialization:
         assert chunker.text_splitter._chunk_size == 500
         assert chunker.text_splitter._chunk_overlap == 50
 
+    def test_token_sized_chunks(self):
+        """Test that chunks can be sized in tokens."""
+        chunker = WebContentChunker(
+            chunk_size=20, chunk_overlap=0, unit="tokens", encoding="approximate"
+        )
+
+        chunks = chunker.text_splitter.split_text("Check the status page. " * 30)
+
+        assert len(chunks) > 1
+        assert all(chunker.text_splitter.count_tokens(c) <= 20 for c in chunks)
+
+    def test_unknown_unit_rejected(self):
+        """Test that an unknown chunk size unit is rejected."""
+        with pytest.raises(ValueError):
+            WebContentChunker(unit="words")
+
 
 class TestWebContentChunkerFetching:
     """Test web content fetching functionality."""
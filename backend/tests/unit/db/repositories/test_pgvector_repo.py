@@ -0,0 +1,493 @@
+"""
+Unit tests for PgVectorRepository on an asyncpg pool.
+
+Covers:
+- Bulk inserts via binary COPY or batched executemany, in one transaction
+- Parameterized similarity search with JSONB containment filters
+- Metadata round trips and collection name validation
+- Chunk hash listings and per-chunk deletes
+- Vector/metadata index builds, per-query tuning and maintenance
+- Compact halfvec/bit indexes with full-precision re-ranking
+- One connection manager pool per event loop
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain.schema import Document
+
+from app.core.utils.background_loop import BackgroundLoop
+from app.db.repositories.pgvector_index import (
+    PgVectorIndexConfig,
+    ivfflat_lists,
+    vector_index_sql,
+)
+from app.db.repositories.pgvector_repo import PgVectorRepository
+from app.db.vector.quantization import QuantizationConfig
+from app.infrastructure.connections.vector.pgvector_connection_manager import (
+    PgVectorConnectionManager,
+)
+
+
+class FakePool:
+    """asyncpg-like pool handing out one recording connection."""
+
+    def __init__(self):
+        self.conn = MagicMock()
+        self.conn.copy_records_to_table = AsyncMock()
+        self.conn.executemany = AsyncMock()
+        self.conn.execute = AsyncMock(return_value="UPDATE 1")
+        self.conn.fetch = AsyncMock(return_value=[])
+        self.conn.fetchval = AsyncMock(return_value=None)
+        self.transactions = 0
+
+        @asynccontextmanager
+        async def transaction():
+            self.transactions += 1
+            yield
+
+        self.conn.transaction = transaction
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.acquired += 1
+        yield self.conn
+
+
+@pytest.fixture
+def pool():
+    return FakePool()
+
+
+def _docs(count):
+    return [
+        Document(page_content=f"doc {i}", metadata={"source": f"s{i}"})
+        for i in range(count)
+    ]
+
+
+class TestPgVectorRepositoryWrites:
+    """Test bulk inserts and updates."""
+
+    @pytest.mark.asyncio
+    async def test_add_documents_copies_in_batches(self, pool):
+        repo = PgVectorRepository(
+            pool,
+            insert_batch_size=2,
+            index_config=PgVectorIndexConfig(build_after_load=False),
+        )
+        docs = _docs(5)
+
+        await repo.add_documents(
+            "documents",
+            docs,
+            [[float(i)] for i in range(5)],
+            [f"id{i}" for i in range(5)],
+        )
+
+        copies = pool.conn.copy_records_to_table.await_args_list
+        assert [len(call.kwargs["records"]) for call in copies] == [2, 2, 1]
+        assert copies[0].args == ("documents",)
+        assert copies[0].kwargs["columns"] == ["id", "content", "metadata", "embedding"]
+        first = copies[0].kwargs["records"][0]
+        assert first == ("id0", "doc 0", json.dumps({"source": "s0"}), [0.0])
+        assert pool.transactions == 1
+        assert pool.acquired == 1
+
+    @pytest.mark.asyncio
+    async def test_executemany_upserts(self, pool):
+        repo = PgVectorRepository(pool, insert_method="executemany")
+
+        await repo.add_documents("documents", _docs(3), [[1.0]] * 3)
+
+        query, records = pool.conn.executemany.await_args.args
+        assert "ON CONFLICT (id) DO UPDATE" in query
+        assert len(records) == 3
+        pool.conn.copy_records_to_table.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_mismatched_embeddings_are_rejected(self, pool):
+        repo = PgVectorRepository(pool)
+        with pytest.raises(ValueError):
+            await repo.add_documents("documents", _docs(2), [[1.0]])
+
+    @pytest.mark.asyncio
+    async def test_update_writes_content_and_metadata(self, pool):
+        repo = PgVectorRepository(pool)
+        doc = Document(page_content="new", metadata={"v": 2})
+
+        assert await repo.update_document("documents", "id1", doc, [0.5])
+
+        args = pool.conn.execute.await_args.args
+        assert args[1:] == ([0.5], '{"v": 2}', "new", "id1")
+
+    @pytest.mark.asyncio
+    async def test_delete_reports_missing_rows(self, pool):
+        pool.conn.execute.return_value = "DELETE 0"
+        assert not await PgVectorRepository(pool).delete_document("documents", "x")
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_found_by_row_id_or_document_metadata(self, pool):
+        row_id = "0b6f3c1e-8a84-4c2f-9a77-5d1d7d1e2b10"
+        pool.conn.fetch.return_value = [{"id": row_id, "chunk_hash": "h1"}]
+        repo = PgVectorRepository(pool)
+
+        assert await repo.get_chunk_hashes("documents", row_id) == [(row_id, "h1")]
+        query, *args = pool.conn.fetch.await_args.args
+        assert "metadata->>'chunk_hash'" in query
+        assert args == [row_id, json.dumps({"document_id": row_id})]
+
+        # Non-UUID document IDs only match the metadata tag
+        await repo.delete_document("documents", "file-doc")
+        query, *args = pool.conn.execute.await_args.args
+        assert query.endswith("WHERE metadata @> $1::jsonb")
+        assert args == [json.dumps({"document_id": "file-doc"})]
+
+    @pytest.mark.asyncio
+    async def test_delete_chunks_by_id(self, pool):
+        pool.conn.execute.return_value = "DELETE 2"
+
+        assert (
+            await PgVectorRepository(pool).delete_chunks("documents", ["a", "b"]) == 2
+        )
+        query, ids = pool.conn.execute.await_args.args
+        assert "id = ANY($1::uuid[])" in query and ids == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_unsafe_collection_names_are_rejected(self, pool):
+        with pytest.raises(ValueError, match="Invalid pgvector collection name"):
+            await PgVectorRepository(pool).delete_document("docs; DROP TABLE x", "1")
+
+
+class TestPgVectorRepositorySearch:
+    """Test similarity search queries."""
+
+    @pytest.mark.asyncio
+    async def test_search_orders_by_cosine_distance(self, pool):
+        pool.conn.fetch.return_value = [
+            {
+                "id": "a",
+                "content": "hit",
+                "metadata": '{"source": "s"}',
+                "distance": 0.25,
+            }
+        ]
+        repo = PgVectorRepository(pool)
+
+        docs = await repo.search_similar("documents", [0.1, 0.2], k=3)
+
+        query, *params = pool.conn.fetch.await_args.args
+        assert "ORDER BY embedding <=> $1" in query
+        assert "LIMIT $2" in query
+        assert "WHERE" not in query
+        assert params == [[0.1, 0.2], 3]
+        assert docs[0].page_content == "hit"
+        assert docs[0].metadata == {
+            "source": "s",
+            "document_id": "a",
+            "similarity": 0.75,
+        }
+
+    @pytest.mark.asyncio
+    async def test_filters_use_jsonb_containment(self, pool):
+        repo = PgVectorRepository(pool)
+
+        await repo.search_similar("documents", [0.1], filter_criteria={"source": "s"})
+
+        query, *params = pool.conn.fetch.await_args.args
+        assert "WHERE metadata @> $3::jsonb" in query
+        assert params[2] == '{"source": "s"}'
+
+    @pytest.mark.asyncio
+    async def test_distance_strategy_selects_operator(self, pool):
+        repo = PgVectorRepository(pool, distance_strategy="dot_product")
+        pool.conn.fetch.return_value = [
+            {"id": "a", "content": "hit", "metadata": None, "distance": -0.9}
+        ]
+
+        docs = await repo.search_similar("documents", [0.1])
+
+        assert "embedding <#> $1" in pool.conn.fetch.await_args.args[0]
+        pool.conn.execute.assert_awaited_once_with("SET LOCAL hnsw.ef_search = 40")
+        assert docs[0].metadata["similarity"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_metadata_is_decoded(self, pool):
+        pool.conn.fetchval.return_value = '{"document_id": "a"}'
+        metadata = await PgVectorRepository(pool).get_document_metadata(
+            "documents", "a"
+        )
+        assert metadata == {"document_id": "a"}
+
+
+def _executed(pool):
+    return [call.args[0] for call in pool.conn.execute.await_args_list]
+
+
+class TestPgVectorIndexes:
+    """Test index builds, tuning and maintenance."""
+
+    def test_ivfflat_lists_scale_with_rows(self):
+        assert ivfflat_lists(0) == 1
+        assert ivfflat_lists(250_000) == 250
+        assert ivfflat_lists(4_000_000) == 2000
+
+    def test_index_sql_matches_distance_strategy(self):
+        hnsw = vector_index_sql("docs", PgVectorIndexConfig(), "euclidean", 10)
+        assert hnsw == (
+            "CREATE INDEX IF NOT EXISTS docs_embedding_idx ON docs "
+            "USING hnsw (embedding vector_l2_ops) WITH (m = 16, ef_construction = 64)"
+        )
+        ivf = vector_index_sql(
+            "docs", PgVectorIndexConfig(type="ivfflat"), "cosine", 50_000
+        )
+        assert "USING ivfflat (embedding vector_cosine_ops) WITH (lists = 50)" in ivf
+
+    def test_config_from_yaml_block(self):
+        config = PgVectorIndexConfig.from_config(
+            {
+                "type": "IVFFLAT",
+                "ivfflat": {"probes": "20"},
+                "metadata_gin": "false",
+            }
+        )
+        assert config.type == "ivfflat"
+        assert config.ivfflat_probes == 20
+        assert config.metadata_gin is False
+
+    @pytest.mark.asyncio
+    async def test_empty_collection_gets_only_the_metadata_index(self, pool):
+        pool.conn.fetchval.side_effect = [None, 0]  # no index, no rows
+        repo = PgVectorRepository(pool)
+
+        await repo.create_collection("documents", 3)
+
+        statements = _executed(pool)
+        assert any("USING gin (metadata jsonb_path_ops)" in s for s in statements)
+        assert not any("embedding_idx" in s for s in statements)
+
+    @pytest.mark.asyncio
+    async def test_vector_index_is_built_after_bulk_load(self, pool):
+        pool.conn.fetchval.side_effect = [None, 5000]
+        repo = PgVectorRepository(pool, index_config=PgVectorIndexConfig("ivfflat"))
+
+        await repo.add_documents("documents", _docs(2), [[1.0]] * 2)
+
+        assert _executed(pool)[-1].endswith("WITH (lists = 5)")
+
+    @pytest.mark.asyncio
+    async def test_ivfflat_waits_for_enough_rows(self, pool):
+        pool.conn.fetchval.side_effect = [None, 10]
+        repo = PgVectorRepository(pool, index_config=PgVectorIndexConfig("ivfflat"))
+
+        assert await repo.build_vector_index("documents") is None
+
+    @pytest.mark.asyncio
+    async def test_per_query_probes(self, pool):
+        repo = PgVectorRepository(pool, index_config=PgVectorIndexConfig("ivfflat"))
+
+        await repo.search_similar("documents", [0.1], probes=25)
+
+        assert _executed(pool) == ["SET LOCAL ivfflat.probes = 25"]
+
+    @pytest.mark.asyncio
+    async def test_stale_ivfflat_lists_are_rebuilt_concurrently(self, pool):
+        definition = (
+            "CREATE INDEX documents_embedding_idx ON public.documents "
+            "USING ivfflat (embedding vector_cosine_ops) WITH (lists='100')"
+        )
+        pool.conn.fetchval.side_effect = [definition, 1_000_000]
+        repo = PgVectorRepository(
+            pool, index_config=PgVectorIndexConfig("ivfflat", metadata_gin=False)
+        )
+
+        result = await repo.reindex("documents")
+
+        assert result["action"] == "rebuilt"
+        statements = _executed(pool)
+        assert (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS documents_embedding_idx_new"
+            in (statements[1])
+        )
+        assert "lists = 1000" in statements[1]
+        assert statements[2:] == [
+            "DROP INDEX CONCURRENTLY documents_embedding_idx",
+            "ALTER INDEX documents_embedding_idx_new RENAME TO documents_embedding_idx",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_current_index_is_reindexed_in_place(self, pool):
+        definition = (
+            "CREATE INDEX documents_embedding_idx ON public.documents "
+            "USING hnsw (embedding vector_cosine_ops) WITH (m='16')"
+        )
+        pool.conn.fetchval.side_effect = [definition, 100]
+        repo = PgVectorRepository(pool)
+
+        result = await repo.reindex("documents")
+
+        assert result["action"] == "reindexed"
+        assert _executed(pool)[-1] == (
+            "REINDEX INDEX CONCURRENTLY documents_embedding_idx"
+        )
+
+    @pytest.mark.asyncio
+    async def test_index_stats(self, pool):
+        pool.conn.fetchval.side_effect = [2000, 65536]
+        pool.conn.fetch.return_value = [
+            {
+                "indexname": "documents_embedding_idx",
+                "indexdef": "...",
+                "size_bytes": 8192,
+            }
+        ]
+        repo = PgVectorRepository(pool, index_config=PgVectorIndexConfig("ivfflat"))
+
+        stats = await repo.get_index_stats("documents")
+
+        assert stats["rows"] == 2000
+        assert stats["recommended_lists"] == 2
+        assert stats["indexes"][0]["size_bytes"] == 8192
+
+
+class TestPgVectorQuantization:
+    """Test halfvec/bit expression indexes and re-ranked searches."""
+
+    def test_halfvec_index_expression(self):
+        sql = vector_index_sql(
+            "docs",
+            PgVectorIndexConfig(),
+            "cosine",
+            10,
+            quantization=QuantizationConfig(mode="half"),
+            dimension=3,
+        )
+        assert "USING hnsw (((embedding)::halfvec(3)) halfvec_cosine_ops)" in sql
+
+    def test_binary_index_expression(self):
+        sql = vector_index_sql(
+            "docs",
+            PgVectorIndexConfig(),
+            "cosine",
+            10,
+            quantization=QuantizationConfig(mode="binary"),
+            dimension=3,
+        )
+        assert "(binary_quantize(embedding)::bit(3)) bit_hamming_ops" in sql
+
+    @pytest.mark.asyncio
+    async def test_binary_search_reranks_oversampled_candidates(self, pool):
+        repo = PgVectorRepository(
+            pool,
+            quantization=QuantizationConfig(mode="binary", oversampling=4),
+            embedding_dimension=2,
+        )
+
+        await repo.search_similar("documents", [0.1, 0.2], k=5)
+
+        query, *params = pool.conn.fetch.await_args.args
+        assert (
+            "ORDER BY binary_quantize(embedding)::bit(2) <~> "
+            "binary_quantize($1::vector)::bit(2)"
+        ) in query
+        assert "LIMIT $3" in query
+        assert "ORDER BY distance" in query
+        assert params == [[0.1, 0.2], 5, 20]
+        assert _executed(pool) == ["SET LOCAL hnsw.ef_search = 40"]
+
+    @pytest.mark.asyncio
+    async def test_candidates_raise_hnsw_ef_search(self, pool):
+        repo = PgVectorRepository(
+            pool, quantization=QuantizationConfig(mode="half", oversampling=10)
+        )
+
+        await repo.search_similar(
+            "documents", [0.1], k=10, filter_criteria={"source": "s"}
+        )
+
+        query, *params = pool.conn.fetch.await_args.args
+        assert "WHERE metadata @> $3::jsonb" in query
+        assert "LIMIT $4" in query
+        assert params[3] == 100
+        assert _executed(pool) == ["SET LOCAL hnsw.ef_search = 100"]
+
+    @pytest.mark.asyncio
+    async def test_full_precision_index_is_rebuilt_for_compact_mode(self, pool):
+        definition = (
+            "CREATE INDEX documents_embedding_idx ON public.documents "
+            "USING hnsw (embedding vector_cosine_ops) WITH (m='16')"
+        )
+        pool.conn.fetchval.side_effect = [definition, 100]
+        repo = PgVectorRepository(
+            pool,
+            index_config=PgVectorIndexConfig(metadata_gin=False),
+            quantization=QuantizationConfig(mode="half"),
+        )
+
+        result = await repo.reindex("documents")
+
+        assert result["action"] == "rebuilt"
+        assert "halfvec(1536)" in _executed(pool)[1]
+
+
+class TestPgVectorConnectionPools:
+    """Test the connection manager's per-loop pools."""
+
+    @pytest.fixture
+    def manager(self):
+        manager = PgVectorConnectionManager.__new__(PgVectorConnectionManager)
+        manager._pg_connections, manager._pools, manager._pool_locks = {}, {}, {}
+        config = {"connection_string": "postgresql://x"}
+        with (
+            patch.object(manager, "_get_config_dict", return_value=config),
+            patch(
+                "app.infrastructure.connections.vector.pgvector_connection_manager."
+                "asyncpg.create_pool",
+                AsyncMock(side_effect=lambda *args, **kwargs: FakePool()),
+            ),
+        ):
+            yield manager
+
+    def test_pool_is_reused_on_its_loop(self, manager):
+        loop = BackgroundLoop("test-pg-loop")
+
+        first = loop.run(manager.get_pool())
+
+        assert loop.run(manager.get_pool()) is first
+
+    def test_other_loops_do_not_wait_on_a_busy_pool_lock(self, manager):
+        loop = BackgroundLoop("test-pg-loop")
+        on_loop = loop.run(manager.get_pool())
+
+        async def hold_lock():
+            async with manager._pool_locks[loop._loop]:
+                await asyncio.sleep(1)
+
+        held = loop.submit(hold_lock())
+
+        async def get_pool():
+            return await asyncio.wait_for(manager.get_pool(), 0.5)
+
+        elsewhere = asyncio.run(get_pool())
+        held.result()
+
+        assert elsewhere is not on_loop
+        assert loop.run(manager.get_pool()) is on_loop
+        # The closed asyncio.run loop's pool is dropped with its loop
+        assert list(manager._pools.values()) == [on_loop]
+
+    def test_disconnect_only_closes_the_calling_loops_pool(self, manager):
+        retrieval, job = BackgroundLoop("test-pg-a"), BackgroundLoop("test-pg-b")
+        kept = retrieval.run(manager.get_pool())
+        closed = job.run(manager.get_pool())
+        kept.close, closed.close = AsyncMock(), AsyncMock()
+
+        job.run(manager.disconnect())
+
+        closed.close.assert_awaited_once()
+        kept.close.assert_not_called()
+        assert retrieval.run(manager.get_pool()) is kept
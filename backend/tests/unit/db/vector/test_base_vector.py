@@ -6,10 +6,8 @@ connection management patterns for vector database implementations.
 
 import asyncio
 import hashlib
-import tempfile
 from abc import ABC
 from datetime import datetime
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -70,52 +68,6 @@ class TestDocumentMetadata:
         different_content = "Different content"
         assert DocumentMetadata.create_hash(different_content) != hash_result
 
-    def test_get_change_detection_info_for_url(self):
-        """Test change detection for URL sources."""
-        url_source = "https://example.com/document.pdf"
-        info = DocumentMetadata.get_change_detection_info(url_source)
-
-        assert info["source_path"] == url_source
-        assert info["source_type"] == "url"
-        assert "timestamp" in info
-
-        # URL sources should not have file metadata
-        assert "file_size" not in info
-        assert "modified_time" not in info
-
-    def test_get_change_detection_info_for_local_file(self):
-        """Test change detection for local file sources."""
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as tmp:
-            tmp.write("test content")
-            tmp_path = tmp.name
-
-        try:
-            info = DocumentMetadata.get_change_detection_info(tmp_path)
-
-            assert info["source_path"] == tmp_path
-            assert info["source_type"] == "local_file"
-            assert "timestamp" in info
-            assert "file_size" in info
-            assert "modified_time" in info
-            assert "creation_time" in info
-            assert "inode" in info
-            assert info["file_size"] > 0
-        finally:
-            Path(tmp_path).unlink()
-
-    def test_get_change_detection_info_for_nonexistent_file(self):
-        """Test change detection for non-existent local file."""
-        fake_path = "/nonexistent/path/to/file.txt"
-        info = DocumentMetadata.get_change_detection_info(fake_path)
-
-        assert info["source_path"] == fake_path
-        assert info["source_type"] == "local_file"
-        assert "timestamp" in info
-
-        # Non-existent files should not have file metadata
-        assert "file_size" not in info
-        assert "modified_time" not in info
-
     def test_generate_document_id_deterministic(self):
         """Test document ID generation is deterministic."""
         source_path = "/path/to/test/document.pdf"
@@ -291,6 +243,18 @@ class TestVectorDBConnectionManagement:
         assert connection1 is connection2
         assert not db._create_connection_called  # Should not create again
 
+    @pytest.mark.asyncio
+    async def test_get_connection_reopens_a_closed_connection(self):
+        """Test that a connection closed underneath the store is replaced."""
+        db = MockVectorDB()
+        stale = await db.get_connection()
+
+        with patch.object(MockVectorDB, "_connection_is_open", return_value=False):
+            fresh = await db.get_connection()
+
+        assert fresh is not stale
+        assert db._connection is fresh
+
     @pytest.mark.asyncio
     async def test_close_connection_calls_implementation(self):
         """Test that close_connection calls implementation-specific close."""
@@ -472,5 +436,29 @@ class TestVectorDBRetrieverIntegration:
         assert all(isinstance(doc, Document) for doc in results)
 
 
+class TestProviderConstruction:
+    """Test that connection-managed providers can be instantiated."""
+
+    @pytest.mark.parametrize(
+        "module, class_name",
+        [
+            ("app.db.vector.pgvector", "PgVectorDB"),
+            ("app.db.vector.chromadb", "ChromaDB"),
+        ],
+    )
+    def test_config_comes_from_the_connection_manager(self, module, class_name):
+        import importlib
+
+        provider_cls = getattr(importlib.import_module(module), class_name)
+        with patch(f"{module}.ConnectionFactory") as factory:
+            manager = factory.get_connection_manager.return_value
+            manager._get_config_dict.return_value = {"collection_name": "docs"}
+
+            db = provider_cls()
+
+        assert db.config == {"collection_name": "docs"}
+        assert db._connection_manager is manager
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
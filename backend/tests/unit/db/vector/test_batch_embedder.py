@@ -0,0 +1,256 @@
+"""
+Unit tests for batched, rate-limited embedding.
+
+Covers:
+- Texts are embedded in embed_documents batches, preserving order
+- Concurrency, retries and failure reporting
+- Request and token rate limits
+- Vector stores embed through the batch layer instead of per-document calls
+"""
+
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType
+from app.db.vector.embeddings.batch_embedder import (
+    BatchEmbedder,
+    BatchEmbeddingConfig,
+    RateLimiter,
+)
+
+
+class FakeEmbeddings:
+    """Records embed_documents batches and tracks peak concurrency."""
+
+    def __init__(self, delay=0.0, fail_times=0):
+        self.batches = []
+        self.delay = delay
+        self.fail_times = fail_times
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise ConnectionError("rate limited")
+            self.batches.append(list(texts))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+def _config(**overrides):
+    values = dict(batch_size=10, max_concurrency=2, retry_backoff_seconds=0)
+    values.update(overrides)
+    return BatchEmbeddingConfig(**values)
+
+
+@pytest.fixture(autouse=True)
+def _reset_providers():
+    BatchEmbedder.reset_providers()
+    yield
+    BatchEmbedder.reset_providers()
+
+
+class TestBatchEmbedder:
+    """Test batching, concurrency and retries."""
+
+    @pytest.mark.asyncio
+    async def test_embeds_in_batches_preserving_order(self):
+        model = FakeEmbeddings()
+        texts = [f"text {'x' * i}" for i in range(95)]
+
+        vectors = await BatchEmbedder(model, _config()).embed_documents(texts)
+
+        assert len(model.batches) == 10
+        assert all(len(batch) <= 10 for batch in model.batches)
+        assert vectors == [[float(len(t))] for t in texts]
+
+    @pytest.mark.asyncio
+    async def test_batches_run_concurrently_up_to_limit(self):
+        model = FakeEmbeddings(delay=0.02)
+
+        await BatchEmbedder(model, _config(max_concurrency=3)).embed_documents(
+            ["t"] * 100
+        )
+
+        assert model.peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_are_retried(self):
+        model = FakeEmbeddings(fail_times=2)
+        embedder = BatchEmbedder(model, _config(max_retries=2, max_concurrency=1))
+
+        vectors = await embedder.embed_documents(["a", "b"])
+
+        assert vectors == [[1.0], [1.0]]
+        assert embedder.stats.retries == 2
+        assert embedder.stats.batches == 1
+
+    @pytest.mark.asyncio
+    async def test_exhausted_retries_raise(self):
+        model = FakeEmbeddings(fail_times=5)
+        embedder = BatchEmbedder(model, _config(max_retries=1))
+
+        with pytest.raises(ConnectionError):
+            await embedder.embed_documents(["a"])
+        assert embedder.stats.failed_batches == 1
+
+    @pytest.mark.asyncio
+    async def test_mismatched_vector_count_is_an_error(self):
+        model = Mock()
+        model.embed_documents.return_value = [[0.0]]
+        embedder = BatchEmbedder(model, _config(max_retries=0))
+
+        with pytest.raises(ValueError):
+            await embedder.embed_documents(["a", "b"])
+
+    @pytest.mark.asyncio
+    async def test_empty_input_makes_no_calls(self):
+        model = FakeEmbeddings()
+        assert await BatchEmbedder(model, _config()).embed_documents([]) == []
+        assert model.batches == []
+
+    @pytest.mark.asyncio
+    async def test_stats_report_throughput(self):
+        embedder = BatchEmbedder(FakeEmbeddings(), _config())
+        await embedder.embed_documents(["a"] * 25)
+
+        stats = embedder.stats.to_dict()
+        assert stats["texts"] == 25
+        assert stats["batches"] == 3
+        assert stats["embeddings_per_second"] > 0
+
+    @pytest.mark.asyncio
+    async def test_provider_embedders_share_limiter_and_stats(self):
+        model = FakeEmbeddings()
+        with patch(
+            "app.core.config.framework.settings.settings.get_section",
+            return_value={"batch_size": 5},
+        ):
+            first = BatchEmbedder.for_embedding_type(EmbeddingType.OPENAI, model)
+            second = BatchEmbedder.for_embedding_type(EmbeddingType.OPENAI, model)
+
+        await first.embed_documents(["a"] * 5)
+        await second.embed_documents(["a"] * 10)
+
+        assert first.limiter is second.limiter
+        assert first.config.batch_size == 5
+        assert BatchEmbedder.get_provider_stats()["openai"]["batches"] == 3
+
+
+class TestRateLimiter:
+    """Test request and token budgets."""
+
+    @pytest.mark.asyncio
+    async def test_disabled_limiter_never_waits(self):
+        limiter = RateLimiter()
+        for _ in range(100):
+            assert await limiter.acquire(1000) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_requests_per_minute(self):
+        clock = Mock(side_effect=[0.0, 1.0, 2.0, 60.5])
+        limiter = RateLimiter(requests_per_minute=2, clock=clock)
+        with patch(
+            "app.db.vector.embeddings.batch_embedder.asyncio.sleep",
+            new=AsyncMock(),
+        ) as mock_sleep:
+            await limiter.acquire()
+            await limiter.acquire()
+            waited = await limiter.acquire()
+
+        assert waited == pytest.approx(58.0)
+        mock_sleep.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_tokens_per_minute(self):
+        clock = Mock(side_effect=[0.0, 10.0, 20.0, 60.0])
+        limiter = RateLimiter(tokens_per_minute=100, clock=clock)
+        with patch(
+            "app.db.vector.embeddings.batch_embedder.asyncio.sleep",
+            new=AsyncMock(),
+        ):
+            await limiter.acquire(60)
+            await limiter.acquire(30)
+            # 60 + 30 + 40 > 100: wait for the first request to leave the window
+            waited = await limiter.acquire(40)
+
+        assert waited == pytest.approx(40.0)
+
+    @pytest.mark.asyncio
+    async def test_oversized_request_passes_on_empty_window(self):
+        limiter = RateLimiter(tokens_per_minute=10)
+        assert await limiter.acquire(50) == 0.0
+
+    def test_config_coerces_string_values(self):
+        config = BatchEmbeddingConfig.from_config(
+            {"batch_size": "50", "requests_per_minute": ""},
+            {"tokens_per_minute": "1000", "unknown": 1},
+        )
+        assert config.batch_size == 50
+        assert config.requests_per_minute == 0
+        assert config.tokens_per_minute == 1000
+
+
+class TestVectorStoresUseBatchEmbedding:
+    """Test that stores no longer embed one document per call."""
+
+    @pytest.mark.asyncio
+    async def test_pgvector_save_and_embed(self):
+        from app.db.vector.pgvector import PgVectorDB
+
+        model = FakeEmbeddings()
+        db = PgVectorDB.__new__(PgVectorDB)
+        db.config = {"collection_name": "docs"}
+        db._repo = Mock()
+        db._repo.add_documents = AsyncMock()
+        docs = [Document(page_content=f"doc {i}") for i in range(250)]
+
+        with patch(
+            "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model",
+            return_value=model,
+        ):
+            ids = await db.save_and_embed(EmbeddingType.OPENAI, docs)
+
+        assert len(ids) == 250
+        assert len(model.batches) == 3
+        _, saved_docs, embeddings, saved_ids = db._repo.add_documents.await_args.args
+        assert embeddings == [[float(len(d.page_content))] for d in docs]
+        assert saved_ids == ids
+
+    @pytest.mark.asyncio
+    async def test_qdrant_save_and_embed_upserts_precomputed_vectors(self):
+        from app.db.vector.qdrant import QdrantDB
+
+        model = FakeEmbeddings()
+        db = QdrantDB.__new__(QdrantDB)
+        db.config = {"collection_name": "docs", "upsert_batch_size": 1000}
+        db._connection = Mock()
+        db._connection_manager = Mock()
+        db._connection.upsert = AsyncMock()
+        db.ingestion_stats = {"points": 0, "batches": 0, "seconds": 0.0}
+        docs = [Document(page_content=f"doc {i}") for i in range(150)]
+
+        with patch(
+            "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model",
+            return_value=model,
+        ):
+            ids = await db.save_and_embed(EmbeddingType.OPENAI, docs)
+
+        assert len(ids) == 150
+        assert len(model.batches) == 2
+        points = db._connection.upsert.await_args.kwargs["points"]
+        assert points[0].payload["page_content"] == "doc 0"
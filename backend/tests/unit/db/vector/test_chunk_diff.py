@@ -0,0 +1,301 @@
+"""
+Unit tests for chunk-level diffs of re-ingested documents.
+
+Covers:
+- Content hashes, write-time positions and multiset matching of chunks
+- Syncing a document so only changed chunks are embedded
+- Qdrant, pgvector and Chroma chunk listings and deletes
+- Pruning unchanged chunks in the ingestion pipeline
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType
+from app.db.vector.chunk_diff import (
+    CHUNK_HASH_KEY,
+    CHUNK_INDEX_KEY,
+    annotate_chunks,
+    chunk_hash,
+    diff_chunks,
+    group_stored_chunks,
+)
+from app.db.vector.numpy_store import NumpyVectorDB
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
+
+
+def _chunks(document_id, *texts):
+    return [
+        Document(page_content=text, metadata={"document_id": document_id})
+        for text in texts
+    ]
+
+
+class TestChunkDiff:
+    """Test hashing and matching."""
+
+    def test_annotation_records_hash_and_position_per_document(self):
+        docs = annotate_chunks(_chunks("a", "one", "two") + _chunks("b", "three"))
+
+        assert [d.metadata[CHUNK_INDEX_KEY] for d in docs] == [0, 1, 0]
+        assert docs[0].metadata[CHUNK_HASH_KEY] == chunk_hash("one")
+
+    def test_only_new_hashes_are_added_and_vanished_ones_deleted(self):
+        stored = group_stored_chunks(
+            [("id-1", chunk_hash("one")), ("id-2", chunk_hash("two"))]
+        )
+        docs = annotate_chunks(_chunks("a", "one", "three"))
+
+        diff = diff_chunks("a", docs, stored)
+
+        assert [d.page_content for d in diff.added] == ["three"]
+        assert diff.deleted_ids == ["id-2"]
+        assert diff.summary() == {"added": 1, "deleted": 1, "unchanged": 1}
+
+    def test_duplicate_chunks_are_matched_one_to_one(self):
+        stored = group_stored_chunks(
+            [("id-1", chunk_hash("same")), ("id-2", chunk_hash("same"))]
+        )
+
+        fewer = diff_chunks("a", annotate_chunks(_chunks("a", "same")), stored)
+        more = diff_chunks(
+            "a", annotate_chunks(_chunks("a", "same", "same", "same")), stored
+        )
+
+        assert fewer.deleted_ids == ["id-2"] and not fewer.added
+        assert len(more.added) == 1 and not more.deleted_ids
+
+    def test_shifted_chunks_are_matched_regardless_of_position(self):
+        stored = group_stored_chunks(
+            [("id-1", chunk_hash("one")), ("id-2", chunk_hash("two"))]
+        )
+
+        diff = diff_chunks("a", annotate_chunks(_chunks("a", "new", "two")), stored)
+
+        assert [d.page_content for d in diff.added] == ["new"]
+        assert diff.deleted_ids == ["id-1"]
+        assert diff.unchanged == 1
+
+    def test_chunks_stored_without_hashes_are_replaced(self):
+        stored = group_stored_chunks([("legacy", None)])
+
+        diff = diff_chunks("a", annotate_chunks(_chunks("a", "one")), stored)
+
+        assert diff.deleted_ids == ["legacy"]
+        assert len(diff.added) == 1
+
+
+def _numpy_store(tmp_path):
+    store = NumpyVectorDB.__new__(NumpyVectorDB)
+    store.config = {
+        "path": str(tmp_path),
+        "collection_name": "docs",
+        "embedding_dimension": 2,
+        "compact_threshold": 1.0,
+    }
+    store._connection = None
+    store._compaction = None
+    return store
+
+
+def _embedder():
+    embedded = []
+
+    async def embed(embedding_type, docs):
+        embedded.extend(doc.page_content for doc in docs)
+        return [[1.0, float(len(doc.page_content))] for doc in docs]
+
+    return embedded, embed
+
+
+class TestDocumentSync:
+    """Test syncing a document's chunks in a store."""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_chunks_are_embedded(self, tmp_path):
+        store = _numpy_store(tmp_path)
+        embedded, embed = _embedder()
+
+        with patch.object(NumpyVectorDB, "_embed_documents", side_effect=embed):
+            await store.sync_document_chunks(
+                "doc", _chunks("doc", "intro", "body", "outro"), EmbeddingType.DEFAULT
+            )
+            embedded.clear()
+            diff = await store.sync_document_chunks(
+                "doc",
+                _chunks("doc", "intro", "body v2", "outro"),
+                EmbeddingType.DEFAULT,
+            )
+
+        assert embedded == ["body v2"]
+        assert diff.summary() == {"added": 1, "deleted": 1, "unchanged": 2}
+        stored = await store.get_chunk_hashes("doc")
+        assert sorted(stored) == sorted(
+            chunk_hash(text) for text in ("intro", "body v2", "outro")
+        )
+        await store.close_connection()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_update_embeds_nothing(self, tmp_path):
+        store = _numpy_store(tmp_path)
+        embedded, embed = _embedder()
+
+        with patch.object(NumpyVectorDB, "_embed_documents", side_effect=embed):
+            assert await store.update_document(
+                "doc", Document(page_content="v1"), EmbeddingType.DEFAULT
+            )
+            assert await store.update_document(
+                "doc", Document(page_content="v1"), EmbeddingType.DEFAULT
+            )
+
+        assert embedded == ["v1"]
+        await store.close_connection()
+
+    @pytest.mark.asyncio
+    async def test_stores_without_chunk_diffs_replace_every_chunk(self):
+        store = Mock()
+        store.supports_chunk_diff.return_value = False
+        store.delete_by_document_id = AsyncMock(return_value=True)
+        store.save_and_embed = AsyncMock(return_value=["id"])
+        docs = _chunks("other", "one")
+
+        diff = await NumpyVectorDB.sync_document_chunks(
+            store, "doc", docs, EmbeddingType.DEFAULT
+        )
+
+        store.delete_by_document_id.assert_awaited_once_with("doc")
+        assert store.save_and_embed.await_args.args == (EmbeddingType.DEFAULT, docs)
+        assert docs[0].metadata["document_id"] == "doc"
+        assert diff.added == docs
+
+
+class TestStoreChunkListings:
+    """Test the per-provider chunk listing and delete queries."""
+
+    @pytest.mark.asyncio
+    async def test_qdrant_scrolls_every_page_of_hashes(self):
+        from app.db.vector.qdrant import QdrantDB
+
+        db = QdrantDB.__new__(QdrantDB)
+        db.config = {"collection_name": "docs"}
+        db._connection = Mock()
+        db._connection_manager = Mock()
+        point = lambda pid, value: SimpleNamespace(  # noqa: E731
+            id=pid, payload={"metadata": {CHUNK_HASH_KEY: value}}
+        )
+        db._connection.scroll = AsyncMock(
+            side_effect=[([point("p1", "h1")], "next"), ([point("p2", "h1")], None)]
+        )
+        db._connection.delete = AsyncMock()
+
+        assert await db.get_chunk_hashes("doc") == {"h1": ["p1", "p2"]}
+        assert db._connection.scroll.await_args_list[1].kwargs["offset"] == "next"
+
+        assert await db.delete_chunks(["p1"]) == 1
+        selector = db._connection.delete.await_args.kwargs["points_selector"]
+        assert selector.points == ["p1"]
+
+    @pytest.mark.asyncio
+    async def test_chroma_lists_chunks_by_document_metadata(self):
+        from app.db.vector.chromadb import ChromaDB
+
+        db = ChromaDB.__new__(ChromaDB)
+        db._collection = MagicMock()
+        db._chroma_collection = MagicMock()
+        db._chroma_collection.get.return_value = {
+            "ids": ["c1", "c2"],
+            "metadatas": [{CHUNK_HASH_KEY: "h1"}, None],
+        }
+
+        assert await db.get_chunk_hashes("doc") == {"h1": ["c1"], None: ["c2"]}
+        db._chroma_collection.get.assert_called_once_with(
+            where={"document_id": "doc"}, include=["metadatas"]
+        )
+        assert await db.delete_chunks(["c1"]) == 1
+        db._chroma_collection.delete.assert_called_once_with(ids=["c1"])
+
+    @pytest.mark.asyncio
+    async def test_chroma_writes_precomputed_embeddings_to_the_collection(self):
+        from app.db.vector.chromadb import ChromaDB
+
+        db = ChromaDB.__new__(ChromaDB)
+        db._collection = MagicMock()
+        db._chroma_collection = MagicMock()
+
+        ids = await db.add_embedded_documents(_chunks("doc", "one"), [(1.0, 2.0)])
+
+        kwargs = db._chroma_collection.upsert.call_args.kwargs
+        assert kwargs["ids"] == ids
+        assert kwargs["embeddings"] == [[1.0, 2.0]]
+        assert kwargs["metadatas"][0]["document_id"] == "doc"
+
+
+class TestPipelinePruning:
+    """Test that re-ingesting a source only embeds its changed chunks."""
+
+    @pytest.mark.asyncio
+    async def test_second_run_embeds_only_changed_chunks(self, tmp_path):
+        store = _numpy_store(tmp_path)
+        model = Mock()
+        model.embed_documents.side_effect = lambda texts: [
+            [1.0, float(len(t))] for t in texts
+        ]
+
+        def chunk(payload):
+            document_id, text = payload
+            return _chunks(document_id, *text.split("|"))
+
+        async def ingest(text):
+            with patch(
+                "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model",
+                return_value=model,
+            ):
+                pipeline = IngestionPipeline.for_vector_store(
+                    store,
+                    EmbeddingType.DEFAULT,
+                    fetch=lambda source: source,
+                    chunk=chunk,
+                    config=PipelineConfig(batch_wait_seconds=0.01, max_retries=0),
+                )
+            return await pipeline.run([("doc", ("doc", text))])
+
+        await ingest("a|b|c")
+        model.embed_documents.reset_mock()
+        result = await ingest("a|b2|c")
+
+        embedded = [
+            t for call in model.embed_documents.call_args_list for t in call[0][0]
+        ]
+        assert embedded == ["b2"]
+        assert result.succeeded == ["doc"]
+        assert (await store.get_index_stats())["live_rows"] == 3
+        await store.close_connection()
+
+    @pytest.mark.asyncio
+    async def test_source_without_chunks_removes_its_stored_chunks(self, tmp_path):
+        store = _numpy_store(tmp_path)
+        _, embed = _embedder()
+        with patch.object(NumpyVectorDB, "_embed_documents", side_effect=embed):
+            await store.sync_document_chunks(
+                "doc", _chunks("doc", "a", "b"), EmbeddingType.DEFAULT
+            )
+
+        with patch(
+            "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model"
+        ):
+            pipeline = IngestionPipeline.for_vector_store(
+                store,
+                EmbeddingType.DEFAULT,
+                fetch=lambda source: source,
+                chunk=lambda payload: [],
+                document_id=lambda payload: payload,
+                config=PipelineConfig(batch_wait_seconds=0.01, max_retries=0),
+            )
+        result = await pipeline.run([("doc", "doc")])
+
+        assert result.empty == ["doc"]
+        assert await store.get_chunk_hashes("doc") == {}
+        await store.close_connection()
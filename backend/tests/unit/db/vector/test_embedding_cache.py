@@ -0,0 +1,262 @@
+"""
+Unit tests for the content-addressed embedding cache.
+
+Covers:
+- Compact float32/float16 storage and persistence across instances
+- LRU eviction by entry count and size
+- Hit-rate metrics
+- The Redis tier on async paths
+- CachedEmbeddings and its use by EmbeddingFactory and BatchEmbedder
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.core.constants import EmbeddingType
+from app.db.vector.embeddings.batch_embedder import BatchEmbedder, BatchEmbeddingConfig
+from app.db.vector.embeddings.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    EmbeddingCacheConfig,
+    cache_key,
+)
+from app.db.vector.providers.embedding_provider import (
+    DictConfigProvider,
+    EmbeddingFactory,
+    SettingsConfigProvider,
+)
+
+
+class CountingEmbeddings:
+    """Deterministic provider that counts texts it was asked to embed."""
+
+    def __init__(self):
+        self.document_calls = []
+        self.query_calls = []
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return [[float(len(t)), 0.5] for t in texts]
+
+    def embed_query(self, text):
+        self.query_calls.append(text)
+        return [float(len(text)), 1.5]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(EmbeddingCacheConfig(path=str(tmp_path / "cache.db")))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def cached_model(cache):
+    return CachedEmbeddings(CountingEmbeddings(), cache, "openai:test-model")
+
+
+class TestEmbeddingCache:
+    """Test the local tier."""
+
+    def test_vectors_round_trip_as_float32_bytes(self, cache):
+        cache.put_many({"k": [0.1, 0.2, 0.3]})
+
+        blob = cache.connection.execute(
+            "SELECT vector FROM embeddings WHERE key = 'k'"
+        ).fetchone()[0]
+
+        assert len(blob) == 12
+        assert cache.get_many(["k"])["k"] == pytest.approx([0.1, 0.2, 0.3])
+
+    def test_float16_halves_storage(self, tmp_path):
+        cache = EmbeddingCache(
+            EmbeddingCacheConfig(path=str(tmp_path / "c.db"), dtype="float16")
+        )
+        cache.put_many({"k": [0.25] * 8})
+
+        assert cache.get_stats()["size_bytes"] == 16
+        assert cache.get_many(["k"])["k"] == [0.25] * 8
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        first = EmbeddingCache(EmbeddingCacheConfig(path=path))
+        first.put_many({"k": [1.0]})
+        first.close()
+
+        second = EmbeddingCache(EmbeddingCacheConfig(path=path))
+        assert second.get_many(["k"]) == {"k": [1.0]}
+        second.close()
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        cache = EmbeddingCache(
+            EmbeddingCacheConfig(path=str(tmp_path / "c.db"), max_entries=10)
+        )
+        with patch(
+            "app.db.vector.embeddings.embedding_cache.time.time",
+            side_effect=range(100),
+        ):
+            cache.put_many({f"k{i}": [float(i)] for i in range(10)})
+            cache.get_many(["k0"])  # k0 becomes the most recently used
+            cache.put_many({"new": [1.0]})
+
+        stats = cache.get_stats()
+        assert stats["entries"] == 9
+        assert stats["evictions"] == 2
+        assert "k0" in cache.get_many(["k0"])
+        assert cache.get_many(["k1", "k2"]) == {}
+        cache.close()
+
+    def test_size_bound_evicts(self, tmp_path):
+        cache = EmbeddingCache(
+            EmbeddingCacheConfig(
+                path=str(tmp_path / "c.db"), max_size_mb=4096 / (1024 * 1024)
+            )
+        )
+        for i in range(20):
+            cache.put_many({f"k{i}": [0.0] * 64})  # 256 bytes each
+
+        assert cache.get_stats()["size_bytes"] <= 4096
+        cache.close()
+
+    def test_invalid_dtype_falls_back_to_float32(self):
+        assert EmbeddingCacheConfig.from_config({"dtype": "int8"}).dtype == "float32"
+
+
+class TestCachedEmbeddings:
+    """Test the LangChain wrapper."""
+
+    def test_repeated_documents_are_embedded_once(self, cached_model):
+        first = cached_model.embed_documents(["a", "bb", "a"])
+        second = cached_model.embed_documents(["bb", "ccc"])
+
+        assert first == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+        assert second == [[2.0, 0.5], [3.0, 0.5]]
+        assert cached_model.underlying.document_calls == [["a", "bb"], ["ccc"]]
+
+    def test_hit_rate_is_reported(self, cached_model, cache):
+        cached_model.embed_documents(["a", "b"])
+        cached_model.embed_documents(["a", "b"])
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["hit_rate"] == 0.5
+
+    def test_queries_are_cached_separately_from_documents(self, cached_model):
+        cached_model.embed_documents(["text"])
+        assert cached_model.embed_query("text") == [4.0, 1.5]
+        assert cached_model.embed_query("text") == [4.0, 1.5]
+        assert cached_model.underlying.query_calls == ["text"]
+
+    def test_models_do_not_share_entries(self, cache):
+        first = CachedEmbeddings(CountingEmbeddings(), cache, "openai:small")
+        second = CachedEmbeddings(CountingEmbeddings(), cache, "openai:large")
+
+        first.embed_documents(["a"])
+        second.embed_documents(["a"])
+
+        assert second.underlying.document_calls == [["a"]]
+        assert cache_key("openai:small", "a") != cache_key("openai:large", "a")
+
+    def test_provider_attributes_are_exposed(self, cache):
+        underlying = CountingEmbeddings()
+        underlying.model = "text-embedding-3-small"
+        assert CachedEmbeddings(underlying, cache, "ns").model == underlying.model
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_is_used_on_async_paths(self, tmp_path):
+        stored = {}
+        redis = Mock()
+        redis.get = AsyncMock(side_effect=lambda key, deserialize: stored.get(key))
+        redis.set = AsyncMock(
+            side_effect=lambda key, value: stored.update({key: value})
+        )
+
+        config = EmbeddingCacheConfig(path=str(tmp_path / "w1.db"), dtype="float16")
+        worker1 = CachedEmbeddings(
+            CountingEmbeddings(), EmbeddingCache(config, redis=redis), "ns"
+        )
+        await worker1.aembed_documents(["shared"])
+
+        config2 = EmbeddingCacheConfig(path=str(tmp_path / "w2.db"), dtype="float16")
+        cache2 = EmbeddingCache(config2, redis=redis)
+        worker2 = CachedEmbeddings(CountingEmbeddings(), cache2, "ns")
+        assert await worker2.aembed_documents(["shared"]) == [[6.0, 0.5]]
+
+        assert worker2.underlying.document_calls == []
+        assert all(value.startswith("float16:") for value in stored.values())
+        assert cache2.get_stats()["redis_hits"] == 1
+        # Redis hits are copied into the local tier
+        assert worker2.embed_documents(["shared"]) == [[6.0, 0.5]]
+
+
+class TestCacheIntegration:
+    """Test wiring into EmbeddingFactory and BatchEmbedder."""
+
+    def test_factory_wraps_models_with_cache(self, cache):
+        model = CountingEmbeddings()
+        EmbeddingFactory.set_config_provider(
+            DictConfigProvider({EmbeddingType.OPENAI: {"model": "m1"}})
+        )
+        try:
+            with (
+                patch.dict(
+                    EmbeddingFactory._registry,
+                    {EmbeddingType.OPENAI: lambda config: model},
+                ),
+                patch(
+                    "app.db.vector.embeddings.embedding_cache.get_embedding_cache",
+                    return_value=cache,
+                ),
+            ):
+                wrapped = EmbeddingFactory.get_embedding_model(EmbeddingType.OPENAI)
+        finally:
+            EmbeddingFactory.set_config_provider(SettingsConfigProvider())
+
+        assert isinstance(wrapped, CachedEmbeddings)
+        assert wrapped.underlying is model
+        assert wrapped.namespace == "openai:m1"
+
+    def test_factory_returns_raw_model_when_cache_disabled(self):
+        model = CountingEmbeddings()
+        EmbeddingFactory.set_config_provider(
+            DictConfigProvider({EmbeddingType.OPENAI: {}})
+        )
+        try:
+            with (
+                patch.dict(
+                    EmbeddingFactory._registry,
+                    {EmbeddingType.OPENAI: lambda config: model},
+                ),
+                patch(
+                    "app.db.vector.embeddings.embedding_cache.get_embedding_cache",
+                    return_value=None,
+                ),
+            ):
+                assert (
+                    EmbeddingFactory.get_embedding_model(EmbeddingType.OPENAI) is model
+                )
+        finally:
+            EmbeddingFactory.set_config_provider(SettingsConfigProvider())
+
+    @pytest.mark.asyncio
+    async def test_batch_embedder_only_sends_misses(self, cached_model):
+        embedder = BatchEmbedder(
+            cached_model, BatchEmbeddingConfig(batch_size=2, retry_backoff_seconds=0)
+        )
+        await embedder.embed_documents(["a", "b"])
+
+        vectors = await embedder.embed_documents(["a", "c", "b", "c"])
+
+        assert vectors == [[1.0, 0.5]] * 4
+        assert cached_model.underlying.document_calls == [["a", "b"], ["c"]]
+        assert embedder.stats.cache_hits == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_embedder_query_uses_cache(self, cached_model):
+        embedder = BatchEmbedder(cached_model)
+        await embedder.embed_query("q")
+        await embedder.embed_query("q")
+        assert cached_model.underlying.query_calls == ["q"]
@@ -0,0 +1,204 @@
+"""
+Unit tests for the embedding model registry in EmbeddingFactory.
+
+Covers:
+- Constructed models are reused per type and configuration
+- Concurrent first calls build a model once
+- Reload, clear and warmup
+- Memory accounting
+"""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.core.constants import EmbeddingType
+from app.db.vector.providers.embedding_provider import (
+    DictConfigProvider,
+    EmbeddingFactory,
+    SettingsConfigProvider,
+)
+
+
+class FakeParameter:
+    def __init__(self, count, size):
+        self._count = count
+        self._size = size
+
+    def numel(self):
+        return self._count
+
+    def element_size(self):
+        return self._size
+
+
+class FakeLocalModel:
+    """Looks like HuggingFaceEmbeddings: weights live on ``client``."""
+
+    def __init__(self, config):
+        self.config = config
+        self.client = Mock()
+        self.client.parameters.return_value = [
+            FakeParameter(1000, 4),
+            FakeParameter(24, 4),
+        ]
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [0.0]
+
+
+@pytest.fixture
+def configs():
+    return {
+        EmbeddingType.HUGGINGFACE: {"model": "mini"},
+        EmbeddingType.OPENAI: {"model": "small"},
+    }
+
+
+@pytest.fixture
+def creator(configs):
+    """Register counting creators against a dict config provider."""
+    created = []
+
+    def create(config):
+        model = FakeLocalModel(config)
+        created.append(model)
+        return model
+
+    EmbeddingFactory.set_config_provider(DictConfigProvider(configs))
+    with (
+        patch.dict(
+            EmbeddingFactory._registry,
+            {EmbeddingType.HUGGINGFACE: create, EmbeddingType.OPENAI: create},
+        ),
+        patch(
+            "app.db.vector.embeddings.embedding_cache.get_embedding_cache",
+            return_value=None,
+        ),
+    ):
+        yield created
+    EmbeddingFactory.set_config_provider(SettingsConfigProvider())
+
+
+class TestEmbeddingModelRegistry:
+    """Test instance reuse and lifecycle."""
+
+    def test_model_is_constructed_once(self, creator):
+        first = EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE)
+        second = EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE)
+
+        assert first is second
+        assert len(creator) == 1
+
+    def test_changed_configuration_builds_a_new_model(self, creator, configs):
+        first = EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE)
+        configs[EmbeddingType.HUGGINGFACE] = {"model": "large"}
+
+        second = EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE)
+
+        assert first is not second
+        assert second.config == {"model": "large"}
+
+    def test_concurrent_first_calls_share_one_load(self, configs):
+        created = []
+
+        def slow_create(config):
+            time.sleep(0.05)
+            created.append(config)
+            return FakeLocalModel(config)
+
+        EmbeddingFactory.set_config_provider(DictConfigProvider(configs))
+        try:
+            with (
+                patch.dict(
+                    EmbeddingFactory._registry,
+                    {EmbeddingType.HUGGINGFACE: slow_create},
+                ),
+                patch(
+                    "app.db.vector.embeddings.embedding_cache.get_embedding_cache",
+                    return_value=None,
+                ),
+            ):
+                results = []
+                threads = [
+                    threading.Thread(
+                        target=lambda: results.append(
+                            EmbeddingFactory.get_embedding_model(
+                                EmbeddingType.HUGGINGFACE
+                            )
+                        )
+                    )
+                    for _ in range(8)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            EmbeddingFactory.set_config_provider(SettingsConfigProvider())
+
+        assert len(created) == 1
+        assert len({id(model) for model in results}) == 1
+
+    def test_reload_rebuilds_only_the_requested_type(self, creator):
+        hf = EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE)
+        openai = EmbeddingFactory.get_embedding_model(EmbeddingType.OPENAI)
+
+        assert EmbeddingFactory.reload(EmbeddingType.HUGGINGFACE) == 1
+
+        assert EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE) is not hf
+        assert EmbeddingFactory.get_embedding_model(EmbeddingType.OPENAI) is openai
+        assert len(creator) == 3
+
+    def test_clear_models_defers_rebuild(self, creator):
+        EmbeddingFactory.get_embedding_model(EmbeddingType.OPENAI)
+        assert EmbeddingFactory.clear_models() == 1
+        assert EmbeddingFactory.get_model_stats()["count"] == 0
+
+    def test_unregistered_type_is_rejected(self, creator):
+        with pytest.raises(ValueError, match="Unsupported embedding type"):
+            EmbeddingFactory.get_embedding_model(EmbeddingType.VERTEX)
+
+
+class TestEmbeddingModelWarmupAndStats:
+    """Test startup warmup and memory accounting."""
+
+    def test_warmup_loads_and_probes_models(self, creator):
+        results = EmbeddingFactory.warmup(
+            [EmbeddingType.HUGGINGFACE], probe_text="warm"
+        )
+
+        assert results["huggingface"]["model_class"] == "FakeLocalModel"
+        assert creator[0].queries == ["warm"]
+        assert EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE) is (
+            creator[0]
+        )
+
+    def test_warmup_reports_failures_without_raising(self, creator):
+        results = EmbeddingFactory.warmup([EmbeddingType.VERTEX])
+        assert "error" in results["vertex"]
+
+    def test_warmup_defaults_to_settings(self, creator):
+        with patch.object(
+            EmbeddingFactory,
+            "_warmup_types_from_settings",
+            return_value=[EmbeddingType.OPENAI],
+        ):
+            assert list(EmbeddingFactory.warmup()) == ["openai"]
+
+    def test_model_stats_account_for_weights(self, creator):
+        EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE)
+        EmbeddingFactory.get_embedding_model(EmbeddingType.HUGGINGFACE)
+
+        stats = EmbeddingFactory.get_model_stats()
+
+        assert stats["count"] == 1
+        [model] = stats["models"].values()
+        assert model["parameter_bytes"] == 4096
+        assert model["uses"] == 2
+        assert model["load_seconds"] >= 0
+        assert stats["total_parameter_bytes"] == 4096
@@ -0,0 +1,57 @@
+"""
+Unit tests for the deterministic hashing embeddings.
+
+Covers:
+- Stable, normalized vectors of the configured size
+- Texts sharing words are closer than unrelated texts
+- Registration in EmbeddingFactory
+"""
+
+import numpy as np
+
+from app.core.constants import EmbeddingType
+from app.db.vector.embeddings.fake_embedding import HashingEmbeddings
+from app.db.vector.providers.embedding_provider import (
+    DictConfigProvider,
+    EmbeddingFactory,
+)
+
+
+class TestHashingEmbeddings:
+    """Test the feature-hashing model."""
+
+    def test_vectors_are_stable_and_normalized(self):
+        model = HashingEmbeddings(dimensions=64)
+
+        first, second = model.embed_documents(["Reset the token", ""])
+
+        assert len(first) == 64
+        assert first == HashingEmbeddings(dimensions=64).embed_query("Reset the token")
+        assert np.isclose(np.linalg.norm(first), 1.0)
+        assert np.isclose(np.linalg.norm(second), 1.0)
+
+    def test_shared_words_are_closer(self):
+        model = HashingEmbeddings(dimensions=256)
+        query, related, unrelated = (
+            np.array(v)
+            for v in model.embed_documents(
+                [
+                    "reset password token",
+                    "the password reset token expires",
+                    "quarterly revenue grew",
+                ]
+            )
+        )
+
+        assert query @ related > query @ unrelated
+
+    def test_factory_creates_the_model(self):
+        previous = EmbeddingFactory._config_provider
+        EmbeddingFactory.set_config_provider(
+            DictConfigProvider({EmbeddingType.FAKE: {"dimensions": 32}})
+        )
+        try:
+            model = EmbeddingFactory.get_embedding_model(EmbeddingType.FAKE)
+            assert len(model.embed_query("hello")) == 32
+        finally:
+            EmbeddingFactory.set_config_provider(previous)
@@ -0,0 +1,249 @@
+"""
+Unit tests for federated retrieval.
+
+Covers:
+- Weighted reciprocal-rank fusion and document_id deduplication
+- One shared query embedding per embedding model
+- Per-source timeouts and failure isolation
+- Collection overrides, the LangChain retriever and sync stores
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType, VectorDBType
+from app.db.vector.federated import (
+    FederatedConfig,
+    FederatedRetriever,
+    FederatedSearch,
+    FederatedSource,
+    reciprocal_rank_fusion,
+)
+
+
+def _doc(document_id, text=None):
+    return Document(
+        page_content=text or f"text of {document_id}",
+        metadata={"document_id": document_id},
+    )
+
+
+class FakeStore:
+    """Vector-capable store returning fixed results after a delay."""
+
+    def __init__(self, docs, delay=0.0, error=None):
+        self.docs = docs
+        self.delay = delay
+        self.error = error
+        self.vectors = []
+        self.config = {"collection_name": "default"}
+
+    def supports_vector_search(self):
+        return True
+
+    async def get_connection(self):
+        return self
+
+    async def search_by_vector(self, embedding, k=5, filter_criteria=None):
+        self.vectors.append(embedding)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.docs[:k]
+
+
+class SyncStore:
+    """Store that only searches by text, synchronously."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def supports_vector_search(self):
+        return False
+
+    async def get_connection(self):
+        return self
+
+    def search_similar(self, query, k=5, filter_criteria=None):
+        self.queries.append((query, filter_criteria))
+        return self.docs[:k]
+
+
+def _search(stores, timeout=1.0, **sources):
+    config = FederatedConfig(
+        sources=[
+            FederatedSource(name=name, provider=VectorDBType.QDRANT, **options)
+            for name, options in {
+                name: sources.get(name, {}) for name in stores
+            }.items()
+        ],
+        k=5,
+        timeout_seconds=timeout,
+    )
+    return FederatedSearch(config, stores=stores)
+
+
+@pytest.fixture
+def embedder():
+    batcher = Mock()
+    calls = []
+
+    async def embed_query(query):
+        calls.append(query)
+        return [0.5, 0.5]
+
+    batcher.embed_query = embed_query
+    with patch(
+        "app.db.vector.federated.QueryEmbeddingBatcher.for_embedding_type",
+        return_value=batcher,
+    ) as for_type:
+        for_type.calls = calls
+        yield for_type
+
+
+class TestReciprocalRankFusion:
+    """Test rank fusion."""
+
+    def test_results_found_by_several_sources_rank_first(self):
+        fused = reciprocal_rank_fusion(
+            {
+                "confluence": [_doc("a"), _doc("shared")],
+                "files": [_doc("b"), _doc("shared")],
+            }
+        )
+
+        assert fused[0].metadata["document_id"] == "shared"
+        assert fused[0].metadata["federated_sources"] == ["confluence", "files"]
+        assert fused[0].metadata["rrf_score"] == pytest.approx(2 / 62)
+        assert [d.metadata["document_id"] for d in fused] == ["shared", "a", "b"]
+
+    def test_chunks_of_one_document_count_once(self):
+        fused = reciprocal_rank_fusion(
+            {"files": [_doc("a", "chunk 1"), _doc("a", "chunk 2"), _doc("b")]}
+        )
+
+        assert [d.page_content for d in fused] == ["chunk 1", "text of b"]
+
+    def test_weights_and_k(self):
+        fused = reciprocal_rank_fusion(
+            {"low": [_doc("a")], "high": [_doc("b")]},
+            weights={"high": 2.0},
+            k=1,
+        )
+
+        assert [d.metadata["document_id"] for d in fused] == ["b"]
+        assert fused[0].metadata["federated_source"] == "high"
+
+
+class TestFederatedSearch:
+    """Test the concurrent fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_query_is_embedded_once_and_shared(self, embedder):
+        stores = {"a": FakeStore([_doc("1")]), "b": FakeStore([_doc("2")])}
+
+        docs = await _search(stores).search("reset password")
+
+        assert embedder.calls == ["reset password"]
+        assert stores["a"].vectors == stores["b"].vectors == [[0.5, 0.5]]
+        assert {d.metadata["document_id"] for d in docs} == {"1", "2"}
+
+    @pytest.mark.asyncio
+    async def test_slow_and_failing_sources_are_dropped(self, embedder):
+        stores = {
+            "fast": FakeStore([_doc("1")], delay=0.01),
+            "slow": FakeStore([_doc("2")], delay=2.0),
+            "broken": FakeStore([], error=RuntimeError("down")),
+        }
+        search = _search(stores, timeout=0.2)
+
+        started = time.perf_counter()
+        docs = await search.search("q")
+
+        assert time.perf_counter() - started < 1.0
+        assert [d.metadata["document_id"] for d in docs] == ["1"]
+        assert search.last_report["slow"]["status"] == "timeout"
+        assert search.last_report["broken"]["status"] == "error"
+        assert search.last_report["fast"] == {
+            "status": "ok",
+            "results": 1,
+            "seconds": search.last_report["fast"]["seconds"],
+        }
+
+    @pytest.mark.asyncio
+    async def test_sources_run_concurrently(self, embedder):
+        stores = {name: FakeStore([_doc(name)], delay=0.2) for name in ("a", "b", "c")}
+
+        started = time.perf_counter()
+        await _search(stores).search("q")
+
+        assert time.perf_counter() - started < 0.5
+
+    def test_sync_stores_search_by_text(self, embedder):
+        store = SyncStore([_doc("1")])
+
+        docs = _search({"legacy": store}).search_sync("q", filter_criteria={"x": 1})
+
+        assert store.queries == [("q", {"x": 1})]
+        assert embedder.calls == []
+        assert docs[0].metadata["federated_source"] == "legacy"
+
+    def test_sources_point_at_their_collection(self):
+        source = FederatedSource(
+            name="confluence",
+            provider=VectorDBType.QDRANT,
+            collection_name="confluence_pages",
+        )
+        store = Mock(config={"collection_name": "documents", "url": "u"})
+        with patch(
+            "app.db.vector.federated.VectorStoreFactory.get_vector_store",
+            return_value=store,
+        ) as factory:
+            search = FederatedSearch(FederatedConfig(sources=[source]))
+            assert search.store(source) is search.store(source)
+
+        factory.assert_called_once_with(VectorDBType.QDRANT)
+        assert store.config == {"collection_name": "confluence_pages", "url": "u"}
+
+
+class TestFederatedRetriever:
+    """Test the LangChain retriever."""
+
+    @pytest.mark.asyncio
+    async def test_sync_and_async_invocation(self, embedder):
+        stores = {"a": FakeStore([_doc("1"), _doc("2")])}
+        retriever = FederatedRetriever(search=_search(stores), k=1)
+
+        assert len(await retriever.ainvoke("q")) == 1
+        assert len(retriever.invoke("q")) == 1
+
+
+class TestFederatedConfig:
+    """Test configuration parsing."""
+
+    def test_sources_from_config(self):
+        config = FederatedConfig.from_config(
+            {
+                "rrf_k": 30,
+                "sources": [
+                    {
+                        "name": "files",
+                        "provider": "pgvector",
+                        "collection_name": "uploads",
+                        "timeout_seconds": 0.5,
+                        "embedding": "huggingface",
+                    }
+                ],
+            }
+        )
+
+        [source] = config.sources
+        assert config.rrf_k == 30
+        assert source.provider == VectorDBType.PGVECTOR
+        assert source.timeout_seconds == 0.5
+        assert source.embedding == EmbeddingType.HUGGINGFACE
@@ -0,0 +1,274 @@
+"""
+Unit tests for the BM25 lexical index.
+
+Covers:
+- Tokenizing identifiers and packing postings
+- BM25 ranking, filters and identifier queries
+- Incremental upserts, deletes, block merges, compaction and reopening
+- Hybrid fusion and maintenance by the ingestion pipeline
+"""
+
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType
+from app.db.vector.lexical_index import (
+    LexicalIndex,
+    LexicalIndexConfig,
+    decode_postings,
+    encode_postings,
+    hybrid_rank,
+    is_keyword_query,
+    tokenize,
+)
+from app.db.vector.numpy_store import NumpyVectorDB
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
+
+
+def _doc(text, document_id="doc", **metadata):
+    return Document(
+        page_content=text, metadata={"document_id": document_id, **metadata}
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(LexicalIndexConfig(enabled=True, path=str(tmp_path / "lex")))
+    index.open()
+    yield index
+    index.close()
+
+
+def _ids(hits):
+    return [hit.metadata["document_id"] for hit in hits]
+
+
+class TestTokensAndPostings:
+    """Test tokenization and the postings format."""
+
+    def test_identifiers_are_kept_whole_and_split(self):
+        assert tokenize("Set max_connections for PROJ-123.") == [
+            "set",
+            "max_connections",
+            "max",
+            "connections",
+            "for",
+            "proj-123",
+            "proj",
+            "123",
+        ]
+
+    def test_postings_round_trip_at_the_narrowest_width(self):
+        rows = np.array([3, 4, 300, 70_000])
+        tfs = np.array([1, 2, 1, 1])
+
+        data = encode_postings(rows, tfs)
+        decoded_rows, decoded_tfs = decode_postings(data)
+
+        assert decoded_rows.tolist() == rows.tolist()
+        assert decoded_tfs.tolist() == tfs.tolist()
+        # uint32 deltas and uint8 frequencies behind a one-byte header
+        assert len(data) == 1 + 4 * 4 + 4
+
+    @pytest.mark.parametrize(
+        "query, expected",
+        [
+            ("PROJ-123", True),
+            ("ERR_CONN_RESET", True),
+            ("db.pool.max_size timeout", True),
+            ("NullPointerException", True),
+            ("how do I reset my password", False),
+            ("why does build 42 fail on every commit", False),
+        ],
+    )
+    def test_identifier_queries(self, query, expected):
+        assert is_keyword_query(query) is expected
+
+
+class TestSearch:
+    """Test BM25 ranking."""
+
+    def test_exact_identifier_ranks_first(self, index):
+        index.add(
+            [
+                _doc("Payments fail with ERR_CONN_RESET after deploys.", "a"),
+                _doc("Connection resets are retried by the client.", "b"),
+                _doc("Unrelated onboarding notes.", "c"),
+            ]
+        )
+
+        hits = index.search("ERR_CONN_RESET", k=5)
+
+        assert _ids(hits) == ["a"]
+        assert hits[0].score > 0
+
+    def test_frequent_terms_in_short_chunks_score_higher(self, index):
+        index.add(
+            [
+                _doc("cache cache cache", "short"),
+                _doc("cache " + "filler " * 50, "long"),
+                _doc("nothing relevant", "other"),
+            ]
+        )
+
+        assert _ids(index.search("cache", k=2)) == ["short", "long"]
+
+    def test_filters_restrict_results(self, index):
+        index.add(
+            [
+                _doc("deploy runbook", "a", space_key="ENG"),
+                _doc("deploy checklist", "b", space_key="OPS"),
+            ]
+        )
+
+        hits = index.search("deploy", filter_criteria={"space_key": "OPS"})
+
+        assert _ids(hits) == ["b"]
+
+    def test_documents_carry_their_bm25_score(self, index):
+        index.add([_doc("alpha beta", "a")])
+
+        [doc] = index.search_documents("alpha")
+
+        assert doc.metadata["bm25_score"] > 0
+        assert doc.metadata["document_id"] == "a"
+
+
+class TestMaintenance:
+    """Test incremental updates and persistence."""
+
+    def test_indexed_chunks_are_skipped(self, index):
+        assert index.add([_doc("one"), _doc("two")]) == 2
+        assert index.add([_doc("one"), _doc("three")]) == 1
+        assert index.size == 3
+
+    def test_retain_drops_chunks_a_document_no_longer_has(self, index):
+        index.add([_doc("intro"), _doc("old body"), _doc("other", "b")])
+
+        removed = index.retain([_doc("intro"), _doc("new body")])
+
+        assert removed == 1
+        assert index.search("old") == []
+        assert _ids(index.search("other")) == ["b"]
+
+    def test_deleted_documents_disappear_and_are_compacted(self, index):
+        index.add([_doc("shared words", "a"), _doc("shared words too", "b")])
+
+        index.delete_documents(["a"])
+
+        assert _ids(index.search("shared")) == ["b"]
+        stats = index.stats()
+        # Half the chunks were dead, over the threshold: compacted right away
+        assert stats["deleted_chunks"] == 0
+        assert stats["chunks"] == 1
+
+    def test_blocks_of_a_term_are_merged(self, tmp_path):
+        index = LexicalIndex(
+            LexicalIndexConfig(path=str(tmp_path / "lex"), merge_blocks=3)
+        )
+        index.open()
+        for n in range(7):
+            index.add([_doc(f"common term {n}", f"d{n}")])
+
+        stats = index.stats()
+
+        assert stats["posting_blocks"] < 7 * 3
+        assert len(index.search("common", k=10)) == 7
+        index.close()
+
+    def test_index_survives_reopening(self, tmp_path):
+        config = LexicalIndexConfig(path=str(tmp_path / "lex"))
+        index = LexicalIndex(config)
+        index.open()
+        index.add([_doc("persisted chunk", "a"), _doc("another chunk", "b")])
+        index.close()
+
+        reopened = LexicalIndex(config)
+        reopened.open()
+
+        assert _ids(reopened.search("persisted")) == ["a"]
+        assert reopened.size == 2
+        reopened.close()
+
+    def test_stats_report_size_and_latency(self, index):
+        index.add([_doc("alpha")])
+        index.search("alpha")
+        index.search("beta")
+
+        stats = index.stats()
+
+        assert stats["terms"] == 1
+        assert stats["postings_bytes"] > 0
+        assert stats["disk_bytes"] > 0
+        assert stats["searches"] == 2
+        assert set(stats["latency_ms"]) == {"avg", "p50", "p95", "max"}
+
+
+class TestHybridRank:
+    """Test fusing vector and keyword rankings."""
+
+    def test_chunks_found_by_both_rank_first(self):
+        vector = [_doc("semantic match"), _doc("both")]
+        keyword = [_doc("keyword match"), _doc("both")]
+
+        fused = hybrid_rank(vector, keyword, k=3)
+
+        assert [d.page_content for d in fused][0] == "both"
+        assert fused[0].metadata["federated_sources"] == ["vector", "keyword"]
+        # Chunks of one document are not collapsed
+        assert len(fused) == 3
+
+
+def _numpy_store(tmp_path):
+    store = NumpyVectorDB.__new__(NumpyVectorDB)
+    store.config = {
+        "path": str(tmp_path / "vectors"),
+        "collection_name": "docs",
+        "embedding_dimension": 2,
+        "compact_threshold": 1.0,
+    }
+    store._connection = None
+    store._compaction = None
+    return store
+
+
+class TestPipelineMaintenance:
+    """Test that ingestion keeps the index in step with the vector store."""
+
+    @pytest.mark.asyncio
+    async def test_reingest_replaces_changed_chunks(self, tmp_path, index):
+        store = _numpy_store(tmp_path)
+        model = Mock()
+        model.embed_documents.side_effect = lambda texts: [
+            [1.0, float(len(t))] for t in texts
+        ]
+
+        def chunk(payload):
+            return [_doc(text) for text in payload.split("|")]
+
+        async def ingest(text):
+            with patch(
+                "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model",
+                return_value=model,
+            ):
+                pipeline = IngestionPipeline.for_vector_store(
+                    store,
+                    EmbeddingType.DEFAULT,
+                    fetch=lambda source: source,
+                    chunk=chunk,
+                    lexical_index=index,
+                    config=PipelineConfig(batch_wait_seconds=0.01, max_retries=0),
+                )
+            return await pipeline.run([("doc", text)])
+
+        await ingest("alpha intro|beta body")
+        result = await ingest("alpha intro|gamma body")
+
+        assert result.succeeded == ["doc"]
+        assert index.search("beta") == []
+        assert [h.content for h in index.search("gamma")] == ["gamma body"]
+        assert index.size == (await store.get_index_stats())["live_rows"] == 2
+        await store.close_connection()
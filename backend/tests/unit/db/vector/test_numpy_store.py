@@ -0,0 +1,259 @@
+"""
+Unit tests for the in-process NumPy vector store.
+
+Covers:
+- Exact blocked top-k search, float16 storage and metadata filters
+- Tombstone deletes, compaction and reopening from disk
+- The IVF coarse quantizer and quantized candidate search
+- The VectorDB provider and its retriever
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType, VectorDBType
+from app.db.vector.mmap_index import IVFConfig, MmapIndexConfig, MmapVectorIndex
+from app.db.vector.numpy_store import NumpyVectorDB
+from app.db.vector.providers.db_provider import VectorDBRegistry
+from app.db.vector.quantization import QuantizationConfig
+
+DIM = 16
+
+
+def _vectors(count, seed=0):
+    # Clustered like real embeddings, so approximate search has structure
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 50), DIM))
+    return (
+        centers[rng.integers(0, len(centers), count)]
+        + rng.normal(scale=0.2, size=(count, DIM))
+    ).astype(np.float32)
+
+
+def _index(tmp_path, **config):
+    index = MmapVectorIndex(
+        MmapIndexConfig(path=str(tmp_path / "docs"), dimension=DIM, **config)
+    )
+    index.open()
+    return index
+
+
+def _fill(index, vectors, **metadata):
+    return index.add(
+        [f"chunk {i}" for i in range(len(vectors))],
+        [
+            {"document_id": f"doc-{i // 10}", "part": i % 2, **metadata}
+            for i in range(len(vectors))
+        ],
+        vectors,
+    )
+
+
+def _exact(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normed @ (query / np.linalg.norm(query))))[:k])
+
+
+class TestMmapVectorIndexSearch:
+    """Test exact search over the mapped matrix."""
+
+    def test_blocked_search_matches_exact_top_k(self, tmp_path):
+        vectors = _vectors(1000)
+        index = _index(tmp_path, block_size=64)
+        _fill(index, vectors)
+
+        hits = index.search(vectors[7], k=5)
+
+        expected = [f"chunk {i}" for i in _exact(vectors, vectors[7], 5)]
+        assert [hit.content for hit in hits] == expected
+        assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+
+    def test_float16_storage_halves_the_matrix(self, tmp_path):
+        vectors = _vectors(200)
+        index = _index(tmp_path, dtype="float16")
+        _fill(index, vectors)
+
+        assert index.stats()["matrix_bytes"] == 200 * DIM * 2
+        assert index.search(vectors[3], k=1)[0].content == "chunk 3"
+
+    def test_metadata_filters(self, tmp_path):
+        vectors = _vectors(100)
+        index = _index(tmp_path)
+        _fill(index, vectors)
+
+        hits = index.search(vectors[0], k=50, filter_criteria={"part": 1})
+        assert hits and all(hit.metadata["part"] == 1 for hit in hits)
+
+        hits = index.search(
+            vectors[0], k=50, filter_criteria={"document_id": ["doc-1", "doc-2"]}
+        )
+        assert {hit.metadata["document_id"] for hit in hits} == {"doc-1", "doc-2"}
+
+        with pytest.raises(ValueError):
+            index.search(vectors[0], filter_criteria={"a') OR 1=1 --": 1})
+
+    def test_dimension_mismatch_is_rejected(self, tmp_path):
+        index = _index(tmp_path)
+        with pytest.raises(ValueError):
+            index.add(["x"], [{}], [[0.1, 0.2]])
+
+
+class TestMmapVectorIndexMaintenance:
+    """Test tombstones, compaction and persistence."""
+
+    def test_deleted_rows_are_never_returned(self, tmp_path):
+        vectors = _vectors(100)
+        index = _index(tmp_path)
+        _fill(index, vectors)
+
+        assert index.delete_document("doc-0") == 10
+        hits = index.search(vectors[0], k=100)
+
+        assert len(hits) == 90
+        assert all(hit.metadata["document_id"] != "doc-0" for hit in hits)
+        assert index.tombstone_ratio == pytest.approx(0.1)
+
+    def test_compaction_renumbers_rows(self, tmp_path):
+        vectors = _vectors(100)
+        index = _index(tmp_path)
+        _fill(index, vectors)
+        index.delete_document("doc-0")
+        index.delete_document("doc-5")
+
+        assert index.compact() == {"removed": 20, "rows": 80}
+        assert index.tombstone_ratio == 0
+        assert list((tmp_path / "docs").glob("vectors.*.bin")) == [
+            tmp_path / "docs" / "vectors.1.bin"
+        ]
+        hits = index.search(vectors[42], k=1)
+        assert hits[0].content == "chunk 42"
+        assert index.get("doc-9")["document_id"] == "doc-9"
+
+    def test_reopen_restores_rows_and_tombstones(self, tmp_path):
+        vectors = _vectors(50)
+        index = _index(tmp_path)
+        _fill(index, vectors)
+        index.delete_document("doc-1")
+        index.close()
+
+        reopened = _index(tmp_path)
+
+        assert reopened.stats()["live_rows"] == 40
+        assert reopened.search(vectors[30], k=1)[0].content == "chunk 30"
+
+    def test_uncommitted_append_is_truncated_on_open(self, tmp_path):
+        index = _index(tmp_path)
+        _fill(index, _vectors(10))
+        index.close()
+        with open(tmp_path / "docs" / "vectors.0.bin", "ab") as f:
+            f.write(np.zeros(DIM, dtype=np.float32).tobytes())
+
+        assert _index(tmp_path).stats()["rows"] == 10
+
+    def test_layout_change_is_rejected(self, tmp_path):
+        _index(tmp_path).close()
+        with pytest.raises(ValueError, match="dtype"):
+            _index(tmp_path, dtype="float16")
+
+
+class TestApproximateSearch:
+    """Test the IVF lists and quantized candidates."""
+
+    def test_ivf_probes_nearest_lists(self, tmp_path):
+        vectors = _vectors(2000)
+        index = _index(
+            tmp_path, ivf=IVFConfig(enabled=True, min_rows=1000, nlist=20, nprobe=4)
+        )
+        _fill(index, vectors)
+
+        assert index.stats()["ivf_lists"] == 20
+        hits = index.search(vectors[11], k=10)
+        assert hits[0].content == "chunk 11"
+        found = {int(hit.content.split()[1]) for hit in hits}
+        assert len(found & set(_exact(vectors, vectors[11], 10))) >= 8
+
+    def test_ivf_follows_compaction(self, tmp_path):
+        vectors = _vectors(1500)
+        index = _index(tmp_path, ivf=IVFConfig(enabled=True, min_rows=1000, nlist=10))
+        _fill(index, vectors)
+        index.delete_document("doc-0")
+        index.compact()
+
+        assert index.search(vectors[500], k=1)[0].content == "chunk 500"
+
+    @pytest.mark.parametrize("mode", ["scalar", "binary"])
+    def test_quantized_candidates_are_rescored(self, tmp_path, mode):
+        vectors = _vectors(1000)
+        index = _index(
+            tmp_path, quantization=QuantizationConfig(mode=mode, oversampling=10)
+        )
+        _fill(index, vectors[:600])
+        _fill(index, vectors[600:])
+        index.delete_document("doc-3")
+
+        hits = index.search(vectors[99], k=5)
+
+        assert hits[0].content == "chunk 99"
+        assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+        assert all(hit.metadata["document_id"] != "doc-3" for hit in hits)
+        assert index.stats()["quantized_bytes"] > 0
+
+
+class TestNumpyVectorDB:
+    """Test the registered provider."""
+
+    def _store(self, tmp_path):
+        store = NumpyVectorDB.__new__(NumpyVectorDB)
+        store.config = {
+            "path": str(tmp_path),
+            "collection_name": "docs",
+            "embedding_dimension": 2,
+            "compact_threshold": 0.5,
+        }
+        store._connection = None
+        store._compaction = None
+        return store
+
+    def test_provider_is_registered(self):
+        assert VectorDBRegistry.get_class(VectorDBType.NUMPY) is NumpyVectorDB
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self, tmp_path):
+        store = self._store(tmp_path)
+        docs = [
+            Document(page_content="north", metadata={"document_id": "a"}),
+            Document(page_content="east", metadata={"document_id": "b"}),
+        ]
+        await store.add_embedded_documents(docs, [[0.0, 1.0], [1.0, 0.0]])
+
+        with patch.object(NumpyVectorDB, "_embed_query", return_value=[0.1, 0.9]):
+            results = await store.search_similar("up", k=1)
+
+        assert results[0].page_content == "north"
+        assert results[0].metadata["_collection_name"] == "docs"
+        metadata = await store.get_document_metadata("b")
+        assert metadata.document_id == "b"
+
+        assert await store.delete_by_document_id("a")
+        await store._compaction
+        assert (await store.get_index_stats())["rows"] == 1
+        await store.close_connection()
+
+    def test_sync_retriever(self, tmp_path):
+        store = self._store(tmp_path)
+        index = MmapVectorIndex(MmapIndexConfig.from_config(store.config))
+        index.open()
+        index.add(["north"], [{}], [[0.0, 1.0]])
+        store._connection = index
+
+        with patch(
+            "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model"
+        ) as get_model:
+            get_model.return_value.embed_query.return_value = [0.0, 2.0]
+            docs = store.as_retriever(search_kwargs={"k": 1}).invoke("up")
+
+        assert docs[0].page_content == "north"
+        get_model.assert_called_once_with(EmbeddingType.DEFAULT)
@@ -0,0 +1,246 @@
+"""
+Unit tests for the async Qdrant provider.
+
+Covers:
+- Parallel batched upserts of precomputed vectors and throughput stats
+- Payload indexes on document_id and source_path
+- Async deletes, metadata lookups and updates
+- The async client and its optional gRPC transport
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType
+from app.db.vector.qdrant import QdrantDB
+from app.db.vector.quantization import QuantizationConfig
+
+
+class FakeAsyncClient:
+    """Records upserts and their peak concurrency."""
+
+    def __init__(self):
+        self.upserts = []
+        self.active = 0
+        self.peak = 0
+        self.create_payload_index = AsyncMock()
+        self.delete = AsyncMock()
+        self.scroll = AsyncMock(return_value=([], None))
+
+    async def upsert(self, collection_name, points, wait):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.upserts.append(len(points))
+        self.active -= 1
+
+
+def _store(client=None, **config):
+    db = QdrantDB.__new__(QdrantDB)
+    db.config = {"collection_name": "docs", "url": "http://qdrant", **config}
+    db._connection = client or FakeAsyncClient()
+    db._connection_manager = Mock()
+    db._indexed = False
+    db._quantization_checked = False
+    db.quantization = QuantizationConfig()
+    db.ingestion_stats = {"points": 0, "batches": 0, "seconds": 0.0}
+    return db
+
+
+class TestQdrantUpserts:
+    """Test batched, parallel writes."""
+
+    @pytest.mark.asyncio
+    async def test_upserts_run_in_parallel_batches(self):
+        db = _store(upsert_batch_size=100, upsert_parallelism=3)
+        docs = [Document(page_content=f"doc {i}") for i in range(1000)]
+
+        ids = await db.add_embedded_documents(docs, [[0.1, 0.2]] * 1000)
+
+        assert len(ids) == 1000
+        assert db._connection.upserts == [100] * 10
+        assert db._connection.peak == 3
+
+    @pytest.mark.asyncio
+    async def test_throughput_is_reported(self):
+        db = _store(upsert_batch_size=10)
+        await db.add_embedded_documents([Document(page_content="d")] * 25, [[0.0]] * 25)
+
+        stats = db.get_ingestion_stats()
+        assert stats["points"] == 25
+        assert stats["batches"] == 3
+        assert stats["points_per_second"] > 0
+
+
+class TestQdrantPayloadIndexes:
+    """Test index creation on connect."""
+
+    @pytest.mark.asyncio
+    async def test_connect_creates_keyword_indexes_once(self):
+        client = FakeAsyncClient()
+        db = _store(client)
+        db._connection = None
+        db._connection_manager.get_async_client.return_value = client
+
+        await db.get_connection()
+        await db._ensure_payload_indexes()
+
+        db._connection_manager.connect.assert_called_once()
+        fields = [
+            call.kwargs["field_name"]
+            for call in client.create_payload_index.await_args_list
+        ]
+        assert fields == ["metadata.document_id", "metadata.source_path"]
+
+
+class TestQdrantDocumentOperations:
+    """Test deletes, lookups and updates on the async client."""
+
+    @pytest.mark.asyncio
+    async def test_delete_filters_on_document_id(self):
+        db = _store()
+
+        assert await db.delete_by_document_id("doc-1")
+
+        selector = db._connection.delete.await_args.kwargs["points_selector"]
+        assert {c.key for c in selector.should} == {
+            "document_id",
+            "metadata.document_id",
+        }
+
+    @pytest.mark.asyncio
+    async def test_metadata_is_read_from_langchain_payload(self):
+        db = _store()
+        db._connection.scroll.return_value = (
+            [
+                SimpleNamespace(
+                    payload={
+                        "page_content": "text",
+                        "metadata": {
+                            "source_path": "/a.md",
+                            "file_type": "md",
+                            "embedded_at": "2024-01-01T00:00:00",
+                        },
+                    }
+                )
+            ],
+            None,
+        )
+
+        metadata = await db.get_document_metadata("doc-1")
+
+        assert metadata.source_path == "/a.md"
+        assert metadata.file_type == "md"
+
+    @pytest.mark.asyncio
+    async def test_update_awaits_the_new_embedding(self):
+        db = _store()
+        with patch.object(
+            QdrantDB, "save_and_embed", new=AsyncMock(return_value=["new-id"])
+        ) as save:
+            updated = await db.update_document(
+                "doc-1", Document(page_content="v2"), EmbeddingType.OPENAI
+            )
+
+        assert updated is True
+        saved_doc = save.await_args.args[1][0]
+        assert saved_doc.metadata["document_id"] == "doc-1"
+
+    def test_metadata_filter_targets_payload_metadata(self):
+        query_filter = QdrantDB._metadata_filter({"source_path": "/a.md"})
+        assert query_filter.must[0].key == "metadata.source_path"
+        assert QdrantDB._metadata_filter(None) is None
+
+
+class TestQdrantAsyncClient:
+    """Test the connection manager's async client."""
+
+    def test_grpc_is_used_when_preferred(self):
+        from app.infrastructure.connections.vector.qdrant_connection_manager import (
+            QdrantConnectionManager,
+        )
+
+        manager = QdrantConnectionManager.__new__(QdrantConnectionManager)
+        manager._async_clients = {}
+        config = {"url": "http://qdrant:6333", "prefer_grpc": "true"}
+        with (
+            patch.object(manager, "_get_config_dict", return_value=config),
+            patch(
+                "app.infrastructure.connections.vector.qdrant_connection_manager."
+                "AsyncQdrantClient"
+            ) as client_cls,
+        ):
+            first = manager.get_async_client()
+            second = manager.get_async_client()
+
+        assert first is second
+        client_cls.assert_called_once()
+        assert client_cls.call_args.kwargs["prefer_grpc"] is True
+        assert client_cls.call_args.kwargs["grpc_port"] == 6334
+
+    def test_each_event_loop_gets_its_own_client(self):
+        from app.core.utils.background_loop import BackgroundLoop
+        from app.infrastructure.connections.vector.qdrant_connection_manager import (
+            QdrantConnectionManager,
+        )
+
+        manager = QdrantConnectionManager.__new__(QdrantConnectionManager)
+        manager._async_clients = {}
+        other = BackgroundLoop("test-qdrant-loop")
+
+        async def client():
+            return manager.get_async_client()
+
+        with (
+            patch.object(manager, "_get_config_dict", return_value={"url": "x"}),
+            patch(
+                "app.infrastructure.connections.vector.qdrant_connection_manager."
+                "AsyncQdrantClient",
+                side_effect=lambda **kwargs: AsyncMock(),
+            ),
+        ):
+            on_other = other.run(client())
+            assert other.run(client()) is on_other
+            on_this = asyncio.run(client())
+            assert on_this is not on_other
+            assert other.run(client()) is on_other
+
+        # The client of the closed asyncio.run loop is dropped with its loop
+        assert list(manager._async_clients.values()) == [on_other]
+
+    def test_closing_only_closes_the_calling_loops_client(self):
+        from app.core.utils.background_loop import BackgroundLoop
+        from app.infrastructure.connections.vector.qdrant_connection_manager import (
+            QdrantConnectionManager,
+        )
+
+        manager = QdrantConnectionManager.__new__(QdrantConnectionManager)
+        manager._async_clients = {}
+        retrieval, job = BackgroundLoop("test-qdrant-a"), BackgroundLoop(
+            "test-qdrant-b"
+        )
+
+        async def client():
+            return manager.get_async_client()
+
+        with (
+            patch.object(manager, "_get_config_dict", return_value={"url": "x"}),
+            patch(
+                "app.infrastructure.connections.vector.qdrant_connection_manager."
+                "AsyncQdrantClient",
+                side_effect=lambda **kwargs: AsyncMock(),
+            ),
+        ):
+            kept = retrieval.run(client())
+            closed = job.run(client())
+            job.run(manager.close_async_client())
+
+            closed.close.assert_awaited_once()
+            kept.close.assert_not_called()
+            assert retrieval.run(client()) is kept
+            assert manager.has_async_client(kept)
+            assert not manager.has_async_client(closed)
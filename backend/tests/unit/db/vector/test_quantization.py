@@ -0,0 +1,115 @@
+"""
+Unit tests for vector quantization modes.
+
+Covers:
+- Config parsing and candidate oversampling
+- Half, scalar and binary encodings and their memory footprint
+- Re-ranking candidates on full-precision vectors
+- Qdrant quantization, datatype and search parameters
+"""
+
+import numpy as np
+import pytest
+from qdrant_client.http import models
+
+from app.db.vector.quantization import (
+    QuantizationConfig,
+    VectorQuantizer,
+    normalize,
+    qdrant_quantization_config,
+    qdrant_search_params,
+    qdrant_vector_datatype,
+)
+
+
+@pytest.fixture
+def vectors():
+    # Ten clusters, like embeddings of a few topics
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(10, 64))
+    points = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.3, size=(500, 64))
+    return points.astype(np.float32)
+
+
+def _exact_top(vectors, query, k):
+    scores = normalize(vectors) @ normalize(query[None, :])[0]
+    return set(np.argsort(-scores)[:k])
+
+
+class TestQuantizationConfig:
+    """Test config parsing."""
+
+    def test_from_yaml_block(self):
+        config = QuantizationConfig.from_config(
+            {"mode": "BINARY", "oversampling": "3", "rescore": "false"}
+        )
+        assert config.mode == "binary"
+        assert config.oversampling == 3.0
+        assert config.rescore is False
+        assert config.candidates(10) == 30
+
+    def test_unknown_mode_stores_full_vectors(self):
+        config = QuantizationConfig.from_config({"mode": "pq"})
+        assert not config.enabled
+        assert config.candidates(10) == 10
+
+
+class TestVectorQuantizer:
+    """Test encodings and search."""
+
+    @pytest.mark.parametrize(
+        "mode, dtype, bytes_per_row",
+        [("half", np.float16, 128), ("scalar", np.uint8, 64), ("binary", np.uint8, 8)],
+    )
+    def test_encodings_shrink_memory(self, vectors, mode, dtype, bytes_per_row):
+        quantizer = VectorQuantizer(QuantizationConfig(mode=mode))
+        codes = quantizer.fit_transform(vectors)
+
+        assert codes.dtype == dtype
+        assert quantizer.memory_bytes() == len(vectors) * bytes_per_row
+
+    @pytest.mark.parametrize("mode", ["half", "scalar", "binary"])
+    def test_rescored_search_finds_exact_neighbours(self, vectors, mode):
+        quantizer = VectorQuantizer(QuantizationConfig(mode=mode, oversampling=8))
+        quantizer.fit_transform(vectors)
+        full = normalize(vectors)
+        query = vectors[3] + 0.01
+
+        ids, scores = quantizer.search(query, 5, full_vectors=full)
+
+        assert ids[0] == 3
+        assert len(set(ids) & _exact_top(vectors, query, 5)) >= 4
+        assert np.all(np.diff(scores) <= 0)
+
+    def test_add_appends_with_existing_bounds(self, vectors):
+        quantizer = VectorQuantizer(QuantizationConfig(mode="scalar"))
+        quantizer.fit_transform(vectors[:400])
+        quantizer.add(vectors[400:])
+
+        assert len(quantizer.codes) == 500
+        ids, _ = quantizer.search(vectors[450], 1, full_vectors=normalize(vectors))
+        assert ids[0] == 450
+
+    def test_empty_index(self):
+        ids, scores = VectorQuantizer().search(np.ones(4), 3)
+        assert len(ids) == 0 and len(scores) == 0
+
+
+class TestQdrantQuantization:
+    """Test the Qdrant mappings."""
+
+    def test_scalar_mode(self):
+        config = QuantizationConfig(mode="scalar", quantile=0.95)
+        quantization = qdrant_quantization_config(config)
+
+        assert isinstance(quantization, models.ScalarQuantization)
+        assert quantization.scalar.quantile == 0.95
+        params = qdrant_search_params(config)
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 2.0
+
+    def test_half_mode_uses_float16_vectors(self):
+        config = QuantizationConfig(mode="half")
+        assert qdrant_quantization_config(config) is None
+        assert qdrant_vector_datatype(config) == models.Datatype.FLOAT16
+        assert qdrant_search_params(config) is None
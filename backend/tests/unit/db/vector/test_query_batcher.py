@@ -0,0 +1,266 @@
+"""
+Unit tests for micro-batched query embedding.
+
+Covers:
+- Concurrent queries are coalesced into one model call
+- Batch size and latency bounds
+- Query semantics per model family and error fan-out
+- Cache hits skip the model
+- Vector stores embed search queries through the batcher
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.core.constants import EmbeddingType
+from app.db.vector.embeddings.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    EmbeddingCacheConfig,
+)
+from app.db.vector.embeddings.query_batcher import (
+    QueryBatchingConfig,
+    QueryEmbeddingBatcher,
+    batch_query_function,
+)
+
+
+class FakeQueryEmbeddings:
+    """Records query batches and the threads they ran on."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.threads = set()
+        self.fail = fail
+
+    def embed_query(self, text):
+        self.threads.add(threading.get_ident())
+        if self.fail:
+            raise ConnectionError("provider down")
+        self.batches.append([text])
+        return [float(len(text))]
+
+
+class HuggingFaceEmbeddings:
+    """Named like the LangChain class: embed_query == embed_documents([q])[0]."""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        raise AssertionError("queries should be embedded in batches")
+
+
+def _batcher(model, **overrides):
+    values = dict(max_batch_size=32, max_latency_ms=20)
+    values.update(overrides)
+    return QueryEmbeddingBatcher(model, QueryBatchingConfig(**values), "test")
+
+
+@pytest.fixture(autouse=True)
+def _reset_batchers():
+    QueryEmbeddingBatcher.reset()
+    yield
+    QueryEmbeddingBatcher.reset()
+
+
+class TestQueryEmbeddingBatcher:
+    """Test coalescing, bounds and fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_model_call(self):
+        model = HuggingFaceEmbeddings()
+        batcher = _batcher(model)
+        queries = [f"q{'x' * i}" for i in range(10)]
+
+        vectors = await asyncio.gather(*(batcher.embed_query(q) for q in queries))
+
+        assert model.batches == [queries]
+        assert vectors == [[float(len(q))] for q in queries]
+        stats = batcher.get_stats()
+        assert stats["model_calls"] == 1
+        assert stats["batch_size"]["buckets"]["<=16"] == 1
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped_at_max_batch_size(self):
+        model = HuggingFaceEmbeddings()
+        batcher = _batcher(model, max_batch_size=4)
+
+        await asyncio.gather(*(batcher.embed_query(f"q{i}") for i in range(10)))
+
+        assert [len(batch) for batch in model.batches] == [4, 4, 2]
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_single_query_waits_at_most_max_latency(self):
+        model = HuggingFaceEmbeddings()
+        batcher = _batcher(model, max_latency_ms=5)
+
+        vector = await asyncio.wait_for(batcher.embed_query("alone"), timeout=1)
+
+        assert vector == [5.0]
+        assert batcher.get_stats()["wait_ms"]["count"] == 1
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_queries_are_embedded_once(self):
+        model = HuggingFaceEmbeddings()
+        batcher = _batcher(model)
+
+        first, second = await asyncio.gather(
+            batcher.embed_query("same"), batcher.embed_query("same")
+        )
+
+        assert model.batches == [["same"]]
+        assert first == second
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_models_embed_per_query_off_the_event_loop(self):
+        model = FakeQueryEmbeddings()
+        batcher = _batcher(model)
+
+        await asyncio.gather(batcher.embed_query("a"), batcher.embed_query("bb"))
+
+        assert model.batches == [["a"], ["bb"]]
+        assert threading.get_ident() not in model.threads
+        assert batcher.get_stats()["model_calls"] == 1
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiting_query(self):
+        batcher = _batcher(FakeQueryEmbeddings(fail=True))
+
+        results = await asyncio.gather(
+            batcher.embed_query("a"),
+            batcher.embed_query("b"),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, ConnectionError) for r in results)
+        # The collector keeps serving after a failed batch
+        batcher.model.fail = False
+        assert await batcher.embed_query("c") == [1.0]
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_disabled_batching_embeds_directly(self):
+        model = HuggingFaceEmbeddings()
+        batcher = _batcher(model, enabled=False)
+
+        await asyncio.gather(batcher.embed_query("a"), batcher.embed_query("b"))
+
+        assert model.batches == [["a"], ["b"]]
+        assert batcher._loops == {}
+
+    @pytest.mark.asyncio
+    async def test_cached_queries_skip_the_model(self, tmp_path):
+        cache = EmbeddingCache(EmbeddingCacheConfig(path=str(tmp_path / "c.db")))
+        model = HuggingFaceEmbeddings()
+        batcher = _batcher(CachedEmbeddings(model, cache, "hf:mini"))
+
+        await batcher.embed_query("q")
+        assert await batcher.embed_query("q") == [1.0]
+
+        assert model.batches == [["q"]]
+        assert batcher.get_stats()["cache_hits"] == 1
+        await batcher.close()
+        cache.close()
+
+    def test_query_semantics_per_model_family(self):
+        instruct = Mock()
+        instruct.__class__ = type("HuggingFaceInstructEmbeddings", (Mock,), {})
+        instruct.query_instruction = "Represent the question:"
+        instruct.encode_kwargs = {}
+        instruct.client.encode.return_value.tolist.return_value = [[1.0]]
+        batch_query_function(instruct)(["q"])
+        instruct.client.encode.assert_called_once_with(
+            [["Represent the question:", "q"]]
+        )
+
+        cohere = Mock()
+        cohere.__class__ = type("CohereEmbeddings", (Mock,), {})
+        batch_query_function(cohere)(["q"])
+        cohere.embed.assert_called_once_with(["q"], input_type="search_query")
+
+    def test_config_reads_settings(self):
+        with patch(
+            "app.core.config.framework.settings.settings.get_section",
+            return_value={"enabled": "false", "max_batch_size": "8"},
+        ):
+            config = QueryBatchingConfig.from_settings()
+
+        assert config.enabled is False
+        assert config.max_batch_size == 8
+        assert config.max_latency_ms == 5.0
+
+
+class TestVectorStoresUseQueryBatching:
+    """Test that searches embed queries through the shared batcher."""
+
+    @pytest.mark.asyncio
+    async def test_pgvector_search_similar(self):
+        from app.db.vector.pgvector import PgVectorDB
+
+        model = HuggingFaceEmbeddings()
+        db = PgVectorDB.__new__(PgVectorDB)
+        db.config = {"collection_name": "docs"}
+        db._repo = Mock()
+        db._repo.search_similar = AsyncMock(return_value=[])
+
+        with patch(
+            "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model",
+            return_value=model,
+        ):
+            await asyncio.gather(
+                db.search_similar("first"), db.search_similar("second")
+            )
+            await QueryEmbeddingBatcher._batchers[EmbeddingType.OPENAI].close()
+
+        assert model.batches == [["first", "second"]]
+        assert db._repo.search_similar.await_args.args[1] in ([5.0], [6.0])
+
+    @pytest.mark.asyncio
+    async def test_qdrant_searches_by_precomputed_vector(self):
+        from app.db.vector.qdrant import QdrantDB
+        from app.db.vector.quantization import QuantizationConfig
+
+        model = HuggingFaceEmbeddings()
+        db = QdrantDB.__new__(QdrantDB)
+        db.config = {"collection_name": "docs"}
+        db.quantization = QuantizationConfig()
+        db._connection = Mock()
+        db._connection_manager = Mock()
+        db._connection.query_points = AsyncMock(
+            return_value=SimpleNamespace(
+                points=[
+                    SimpleNamespace(
+                        id="p1",
+                        score=0.9,
+                        payload={"page_content": "hit", "metadata": {}},
+                    )
+                ]
+            )
+        )
+
+        with patch(
+            "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model",
+            return_value=model,
+        ):
+            docs = await db.search_similar("query", k=3)
+            await QueryEmbeddingBatcher._batchers[EmbeddingType.DEFAULT].close()
+
+        assert docs[0].page_content == "hit"
+        kwargs = db._connection.query_points.await_args.kwargs
+        assert kwargs["query"] == [5.0]
+        assert kwargs["limit"] == 3
+        assert kwargs["query_filter"] is None
@@ -0,0 +1,312 @@
+"""
+Unit tests for the local Jira user directory.
+
+Covers:
+- Exact, prefix, email and fuzzy lookups
+- Paginated bulk refresh and incremental diffing
+- Project membership indexing
+- Snapshot persistence through the cache layer
+- Background first build and back-off after empty or failed refreshes
+- JiraClient serving user lookups from the directory
+"""
+
+import asyncio
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.services.external.jira_service import JiraClient
+from app.services.external.jira_user_directory import JiraUserDirectory
+
+
+def _user(account_id, name, email=""):
+    user = {"accountId": account_id, "displayName": name, "accountType": "atlassian"}
+    if email:
+        user["emailAddress"] = email
+    return user
+
+
+USERS = [
+    _user("a1", "Jane Doe", "jane.doe@example.com"),
+    _user("a2", "John Smith", "jsmith@example.com"),
+    _user("a3", "Janet Jackson"),
+    {"accountId": "app-1", "displayName": "Automation", "accountType": "app"},
+]
+
+
+class FakeCache:
+    """Minimal async cache with the CacheService get/set signature."""
+
+    def __init__(self):
+        self.store = {}
+        self.loops = set()
+
+    async def get(self, key, deserialize=True):
+        self.loops.add(id(asyncio.get_running_loop()))
+        return self.store.get(key)
+
+    async def set(self, key, value, ttl=None, indexes=None):
+        self.loops.add(id(asyncio.get_running_loop()))
+        self.store[key] = value
+        return True
+
+
+def _source(users=USERS, project_users=None):
+    """Fake Jira connection manager that pages through ``users``."""
+    source = Mock()
+    source.get_all_users.side_effect = lambda start, limit: users[start : start + limit]
+    source.get_projects.return_value = [{"key": "PROJ"}]
+    members = project_users if project_users is not None else users[:2]
+    source.get_project_users.side_effect = lambda key, start, limit: members[
+        start : start + limit
+    ]
+    return source
+
+
+@pytest.fixture
+def directory():
+    return JiraUserDirectory(config={"page_size": 2}, cache=FakeCache())
+
+
+class TestJiraUserDirectoryLookups:
+    """Test in-memory lookups."""
+
+    @pytest.fixture(autouse=True)
+    def _populate(self, directory):
+        directory.upsert(USERS[:3])
+        self.directory = directory
+
+    def test_get_by_account_id(self):
+        assert self.directory.get("a2").display_name == "John Smith"
+        assert self.directory.get("missing") is None
+
+    def test_find_by_email_is_case_insensitive(self):
+        assert self.directory.find_by_email("JANE.DOE@example.com").account_id == "a1"
+
+    def test_prefix_matches_any_name_token(self):
+        ids = [r.account_id for r in self.directory.search_prefix("jan")]
+        assert ids == ["a1", "a3"]
+        assert [r.account_id for r in self.directory.search_prefix("smi")] == ["a2"]
+
+    def test_prefix_respects_limit(self):
+        assert len(self.directory.search_prefix("ja", limit=1)) == 1
+
+    def test_search_falls_back_to_fuzzy(self):
+        results = self.directory.search("Jon Smith")
+        assert [r.account_id for r in results] == ["a2"]
+
+    def test_search_by_email(self):
+        assert [r.account_id for r in self.directory.search("jsmith@example.com")] == [
+            "a2"
+        ]
+
+    def test_stats_track_hits_and_misses(self):
+        self.directory.get("a1")
+        self.directory.get("missing")
+        stats = self.directory.get_stats()
+        assert stats["users"] == 3
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+
+class TestJiraUserDirectoryRefresh:
+    """Test bulk refresh from Jira."""
+
+    def test_full_refresh_paginates_and_indexes_projects(self, directory):
+        source = _source()
+
+        changed = directory.refresh(source, full=True)
+
+        assert changed == 4
+        # 4 users in pages of 2 -> three calls (last page is empty)
+        assert source.get_all_users.call_count == 3
+        # App and customer accounts are kept, as Jira lists them
+        assert directory.get("app-1").account_type == "app"
+        assert len(directory.list_users()) == 4
+        assert [r.account_id for r in directory.list_users(project_key="proj")] == [
+            "a1",
+            "a2",
+        ]
+
+    def test_incremental_refresh_applies_only_changes(self, directory):
+        directory.refresh(_source(), full=True)
+        version = directory.get_stats()["version"]
+
+        assert directory.refresh(_source(), full=False) == 0
+        assert directory.get_stats()["version"] == version
+
+        renamed = [_user("a1", "Jane Roe", "jane.doe@example.com")] + USERS[1:]
+        assert directory.refresh(_source(users=renamed)) == 1
+        assert directory.search_prefix("roe")[0].account_id == "a1"
+        # Incremental refreshes keep previously indexed project membership
+        assert "PROJ" in directory.get("a1").projects
+
+    def test_refresh_removes_vanished_users(self, directory):
+        directory.refresh(_source(), full=True)
+        directory.refresh(_source(users=USERS[:1]))
+        assert directory.get("a2") is None
+
+    def test_empty_response_keeps_existing_directory(self, directory):
+        directory.refresh(_source(), full=True)
+        assert directory.refresh(_source(users=[])) == 0
+        assert directory.get_stats()["users"] == 4
+
+    def test_unindexed_project_returns_none(self, directory):
+        directory.refresh(_source(), full=False)
+        assert directory.list_users(project_key="OTHER") is None
+
+
+class TestJiraUserDirectorySnapshots:
+    """Test snapshot sharing through the cache layer."""
+
+    def test_snapshot_round_trip(self):
+        cache = FakeCache()
+        writer = JiraUserDirectory(config={"page_size": 2}, cache=cache)
+        writer.refresh(_source(), full=True)
+
+        reader = JiraUserDirectory(config={"page_size": 2}, cache=cache)
+        assert reader.load_snapshot() is True
+        assert reader.find_by_email("jane.doe@example.com").account_id == "a1"
+        assert reader.list_users(project_key="PROJ") is not None
+
+    def test_cache_calls_share_one_event_loop(self):
+        cache = FakeCache()
+        writer = JiraUserDirectory(config={"page_size": 2}, cache=cache)
+        writer.refresh(_source(), full=True)
+
+        async def load_from_a_running_loop():
+            reader = JiraUserDirectory(config={"page_size": 2}, cache=cache)
+            return reader.load_snapshot()
+
+        assert asyncio.run(load_from_a_running_loop()) is True
+        # The async Redis client behind the cache is bound to a single loop
+        assert len(cache.loops) == 1
+
+    def test_ensure_fresh_prefers_shared_snapshot(self):
+        cache = FakeCache()
+        JiraUserDirectory(config={"page_size": 2}, cache=cache).refresh(
+            _source(), full=True
+        )
+
+        source = _source()
+        reader = JiraUserDirectory(config={"page_size": 2}, cache=cache)
+        reader.ensure_fresh(source)
+        reader._refresh_thread.join(timeout=5)
+
+        assert reader.ensure_fresh(source) is True
+        source.get_all_users.assert_not_called()
+
+    def test_stale_directory_keeps_serving_while_the_snapshot_loads(self):
+        directory = JiraUserDirectory(config={"page_size": 2}, cache=FakeCache())
+        directory.refresh(_source(), full=True)
+        directory._last_refresh = 0
+        loading = threading.Event()
+        release = threading.Event()
+
+        async def slow_get(key, deserialize=True):
+            loading.set()
+            await asyncio.to_thread(release.wait, 5)
+            return None
+
+        directory.cache.get = slow_get
+        try:
+            assert directory.ensure_fresh(_source()) is True
+            assert loading.wait(timeout=5)
+            assert directory.get("a1").display_name == "Jane Doe"
+        finally:
+            release.set()
+            directory._refresh_thread.join(timeout=5)
+
+    def test_first_lookup_builds_in_the_background(self):
+        source = _source()
+        directory = JiraUserDirectory(config={"page_size": 2}, cache=FakeCache())
+
+        # Not ready yet: the caller uses the Jira API meanwhile
+        assert directory.ensure_fresh(source) is False
+        directory._refresh_thread.join(timeout=5)
+
+        assert directory.ensure_fresh(source) is True
+        assert directory.get("a1").display_name == "Jane Doe"
+
+    @pytest.mark.parametrize(
+        "failure",
+        [
+            {"return_value": []},
+            {"side_effect": RuntimeError("rate limited")},
+        ],
+        ids=["empty", "error"],
+    )
+    def test_failed_build_backs_off(self, failure):
+        source = Mock(get_all_users=Mock(**failure))
+        source.get_projects.return_value = []
+        directory = JiraUserDirectory(
+            config={"page_size": 2, "retry_backoff": 60}, cache=FakeCache()
+        )
+
+        for _ in range(3):
+            assert directory.ensure_fresh(source) is False
+            directory._refresh_thread.join(timeout=5)
+
+        source.get_all_users.assert_called_once()
+        assert directory.get_stats()["failed_refreshes"] == 1
+
+        # Once the back-off has passed the directory tries again
+        directory._retry_after = 0
+        directory.ensure_fresh(source)
+        directory._refresh_thread.join(timeout=5)
+        assert source.get_all_users.call_count == 2
+        assert directory.get_stats()["failed_refreshes"] == 2
+
+    def test_disabled_directory_is_never_ready(self):
+        directory = JiraUserDirectory(config={"enabled": False}, cache=FakeCache())
+        assert directory.ensure_fresh(_source()) is False
+
+
+class TestJiraClientUsesDirectory:
+    """Test that JiraClient answers user lookups locally."""
+
+    def setup_method(self):
+        """Use a fresh client rather than the module-level singleton."""
+        if hasattr(JiraClient, "_instances"):
+            JiraClient._instances.pop(JiraClient, None)
+
+    def teardown_method(self):
+        if hasattr(JiraClient, "_instances"):
+            JiraClient._instances.clear()
+
+    @patch("app.services.external.jira_service.ConnectionFactory")
+    def test_search_users_served_from_directory(self, mock_factory):
+        manager = _source()
+        manager.connect.return_value = Mock()
+        mock_factory.get_connection_manager.return_value = manager
+        directory = JiraUserDirectory(config={"page_size": 2}, cache=FakeCache())
+
+        with patch("app.services.external.jira_service.jira_user_directory", directory):
+            client = JiraClient()
+            client.search_users("jane doe")  # Jira API while the directory builds
+            directory._refresh_thread.join(timeout=5)
+            manager.search_users.reset_mock()
+            first = client.search_users("jane doe")
+            second = client.search_users("john")
+
+        assert [u["accountId"] for u in first] == ["a1"]
+        assert second[0]["displayName"] == "John Smith"
+        manager.search_users.assert_not_called()
+
+    @patch("app.services.external.jira_service.ConnectionFactory")
+    def test_search_miss_falls_back_and_is_remembered(self, mock_factory):
+        manager = _source()
+        manager.connect.return_value = Mock()
+        manager.search_users.return_value = [_user("a9", "Zed Newcomer")]
+        mock_factory.get_connection_manager.return_value = manager
+        directory = JiraUserDirectory(config={"page_size": 2}, cache=FakeCache())
+        directory.refresh(manager, full=True)
+
+        with patch("app.services.external.jira_service.jira_user_directory", directory):
+            client = JiraClient()
+            client.search_users("zed")
+            client.search_users("zed")
+
+        manager.search_users.assert_called_once()
+        assert directory.get("a9").display_name == "Zed Newcomer"
@@ -0,0 +1,232 @@
+"""
+Unit tests for streaming archive ingestion.
+
+Covers:
+- Zip, tar, tar.gz and gzip members loaded without extracting to disk
+- Nested archives and the depth limit
+- Per-member, total size and member-count limits
+- Members that need a file path go through a short-lived temp file
+- Binary members and members without a loader are skipped
+"""
+
+import gzip
+import io
+import tarfile
+import zipfile
+from unittest.mock import Mock, patch
+
+import pytest
+from langchain.schema import Document
+
+from app.infrastructure.ingestion.archive_reader import (
+    ArchiveLimitError,
+    ArchiveLimits,
+    ArchiveReader,
+)
+from app.infrastructure.ingestion.file_data_source_util import (
+    FileType,
+    _construct_mapping,
+)
+
+
+def _zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _tar_bytes(members, mode="w"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def _reader(**limits):
+    return ArchiveReader(_construct_mapping(), ArchiveLimits(**limits))
+
+
+def _contents(docs):
+    return {d.metadata["archive_path"]: d.page_content for d in docs}
+
+
+class TestArchiveReaderFormats:
+    """Test reading members from each archive format."""
+
+    def test_zip_members_are_read_in_memory(self, tmp_path):
+        path = tmp_path / "docs.zip"
+        path.write_bytes(
+            _zip_bytes({"a.txt": b"alpha", "dir/b.txt": b"beta", "dir/": b""})
+        )
+
+        with patch("tempfile.mkstemp") as mock_mkstemp:
+            docs = _reader().load(str(path), FileType.ZIP)
+
+        mock_mkstemp.assert_not_called()
+        assert _contents(docs) == {"a.txt": "alpha", "dir/b.txt": "beta"}
+        assert docs[0].metadata["archive_source"] == str(path)
+        assert docs[0].metadata["source"].startswith(f"{path}/")
+
+    def test_tar_members_are_streamed(self, tmp_path):
+        path = tmp_path / "docs.tar"
+        path.write_bytes(_tar_bytes({"a.txt": b"alpha", "b.txt": b"beta"}))
+
+        docs = _reader().load(str(path), FileType.TAR)
+
+        assert _contents(docs) == {"a.txt": "alpha", "b.txt": "beta"}
+
+    def test_tar_gz_is_unwrapped_without_extra_nesting(self, tmp_path):
+        path = tmp_path / "docs.tar.gz"
+        path.write_bytes(gzip.compress(_tar_bytes({"a.txt": b"alpha"})))
+
+        docs = _reader(max_depth=0).load(str(path), FileType.GZIP)
+
+        assert _contents(docs) == {"a.txt": "alpha"}
+
+    def test_plain_gzip_member(self, tmp_path):
+        path = tmp_path / "notes.txt.gz"
+        path.write_bytes(gzip.compress(b"compressed notes"))
+
+        docs = _reader().load(str(path), FileType.GZIP)
+
+        assert _contents(docs) == {"notes.txt": "compressed notes"}
+
+    def test_rar_is_not_supported(self, tmp_path):
+        path = tmp_path / "docs.rar"
+        path.write_bytes(b"Rar!")
+        with pytest.raises(NotImplementedError):
+            _reader().load(str(path), FileType.RAR)
+
+
+class TestArchiveReaderNesting:
+    """Test nested archives."""
+
+    def test_nested_archives_are_followed(self, tmp_path):
+        inner = _zip_bytes({"inner.txt": b"inside"})
+        path = tmp_path / "outer.zip"
+        path.write_bytes(_zip_bytes({"top.txt": b"top", "nested/inner.zip": inner}))
+
+        docs = _reader().load(str(path), FileType.ZIP)
+
+        assert _contents(docs) == {
+            "top.txt": "top",
+            "nested/inner.zip/inner.txt": "inside",
+        }
+
+    def test_depth_limit_skips_deeper_archives(self, tmp_path):
+        level2 = _zip_bytes({"deep.txt": b"deep"})
+        level1 = _zip_bytes({"l2.zip": level2, "l1.txt": b"one"})
+        path = tmp_path / "outer.zip"
+        path.write_bytes(_zip_bytes({"l1.zip": level1}))
+
+        docs = _reader(max_depth=1).load(str(path), FileType.ZIP)
+
+        assert _contents(docs) == {"l1.zip/l1.txt": "one"}
+
+
+class TestArchiveReaderLimits:
+    """Test zip-bomb guards."""
+
+    def test_oversized_member_is_skipped(self, tmp_path):
+        path = tmp_path / "docs.zip"
+        path.write_bytes(_zip_bytes({"big.txt": b"x" * 4096, "small.txt": b"ok"}))
+
+        docs = _reader(max_member_mb=1024 / (1024 * 1024)).load(str(path), FileType.ZIP)
+
+        assert _contents(docs) == {"small.txt": "ok"}
+
+    def test_member_size_is_enforced_while_reading(self, tmp_path):
+        # gzip has no declared size, so the limit must apply to the stream
+        path = tmp_path / "bomb.txt.gz"
+        path.write_bytes(gzip.compress(b"x" * 8192))
+
+        docs = _reader(max_member_mb=1024 / (1024 * 1024)).load(
+            str(path), FileType.GZIP
+        )
+
+        assert docs == []
+
+    def test_total_size_limit_fails_the_archive(self, tmp_path):
+        path = tmp_path / "docs.zip"
+        path.write_bytes(_zip_bytes({f"{i}.txt": b"x" * 1024 for i in range(8)}))
+
+        with pytest.raises(ArchiveLimitError):
+            _reader(max_total_mb=4096 / (1024 * 1024)).load(str(path), FileType.ZIP)
+
+    def test_member_count_limit(self, tmp_path):
+        path = tmp_path / "docs.zip"
+        path.write_bytes(_zip_bytes({f"{i}.txt": b"x" for i in range(5)}))
+
+        with pytest.raises(ArchiveLimitError):
+            _reader(max_members=3).load(str(path), FileType.ZIP)
+
+
+class TestArchiveReaderLoaders:
+    """Test members that need a loader with a file path."""
+
+    def test_path_loaders_get_a_temporary_file(self, tmp_path):
+        seen = {}
+
+        class RecordingLoader:
+            def __init__(self, file_path, **kwargs):
+                seen["path"] = file_path
+
+            def load(self):
+                with open(seen["path"], "rb") as f:
+                    seen["data"] = f.read()
+                return [Document(page_content="parsed", metadata={"source": "tmp"})]
+
+        mapping = {**_construct_mapping(), FileType.PDF: (RecordingLoader, {})}
+        path = tmp_path / "docs.zip"
+        pdf = b"%PDF-1.4\n%fake\n"
+        path.write_bytes(_zip_bytes({"report.pdf": pdf}))
+
+        docs = ArchiveReader(mapping).load(str(path), FileType.ZIP)
+
+        assert seen["data"] == pdf
+        assert seen["path"].endswith(".pdf")
+        assert not (tmp_path / seen["path"]).exists()
+        assert docs[0].metadata["archive_path"] == "report.pdf"
+        assert docs[0].metadata["source"] == f"{path}/report.pdf"
+
+    def test_failing_member_does_not_fail_archive(self, tmp_path):
+        broken = Mock(side_effect=RuntimeError("parser crashed"))
+        mapping = {**_construct_mapping(), FileType.PDF: (broken, {})}
+        path = tmp_path / "docs.zip"
+        path.write_bytes(_zip_bytes({"bad.pdf": b"%PDF-1.4\n", "good.txt": b"fine"}))
+
+        docs = ArchiveReader(mapping).load(str(path), FileType.ZIP)
+
+        assert _contents(docs) == {"good.txt": "fine"}
+
+    def test_binary_and_unsupported_members_are_skipped(self, tmp_path):
+        mapping = {
+            file_type: loader
+            for file_type, loader in _construct_mapping().items()
+            if file_type != FileType.PNG
+        }
+        png = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + bytes(range(256))
+        path = tmp_path / "docs.zip"
+        path.write_bytes(
+            _zip_bytes(
+                {
+                    "logo.png": png,
+                    "blob.bin": bytes(range(128, 256)) * 8,
+                    "notes.log": "café latency spiked".encode("utf-8"),
+                }
+            )
+        )
+
+        docs = ArchiveReader(mapping).load(str(path), FileType.ZIP)
+
+        assert _contents(docs) == {"notes.log": "café latency spiked"}
+
+    def test_limits_from_config_ignore_unknown_keys(self):
+        limits = ArchiveLimits.from_config({"max_depth": 5, "other": 1})
+        assert limits.max_depth == 5
+        assert limits.member_workers == ArchiveLimits().member_workers
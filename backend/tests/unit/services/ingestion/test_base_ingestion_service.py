@@ -10,7 +10,7 @@ Tests the foundational ingestion service architecture including:
 """
 
 from abc import ABC
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 
@@ -264,3 +264,45 @@ class TestBaseIngestionServiceDataSourceMapping:
         error_msg = str(exc_info.value)
         assert "No configuration found for data source type: file" in error_msg
         assert "Available types: ['confluence', 's3']" in error_msg
+
+
+class TestBaseIngestionServiceSharedHelpers:
+    """Test the delete, config and close helpers shared by the services."""
+
+    @pytest.fixture
+    def service(self):
+        svc = ConcreteIngestionServiceForTesting.__new__(
+            ConcreteIngestionServiceForTesting
+        )
+        svc._vector_store = Mock()
+        svc._vector_store.close_connection = AsyncMock()
+        return svc
+
+    @pytest.mark.asyncio
+    async def test_delete_document_awaits_async_stores(self, service):
+        service._vector_store.delete_by_document_id = AsyncMock(return_value=True)
+
+        assert await service._delete_document("doc") is True
+
+        service._vector_store.delete_by_document_id.assert_awaited_once_with("doc")
+
+    @pytest.mark.asyncio
+    async def test_delete_document_reports_failures(self, service):
+        service._vector_store.delete_by_document_id.side_effect = RuntimeError("down")
+
+        assert await service._delete_document("doc") is False
+
+    def test_load_section_falls_back_to_defaults(self):
+        with patch(
+            "app.core.config.framework.settings.settings.get_section",
+            side_effect=RuntimeError("not loaded"),
+        ):
+            config = BaseIngestionService._load_section("ingestion.x", {"a": 1})
+
+        assert config == {"a": 1}
+
+    @pytest.mark.asyncio
+    async def test_close_closes_vector_store(self, service):
+        await service.close()
+
+        service._vector_store.close_connection.assert_awaited_once()
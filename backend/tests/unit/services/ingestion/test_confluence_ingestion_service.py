@@ -0,0 +1,234 @@
+"""
+Unit tests for incremental Confluence ingestion.
+
+Covers:
+- First sync embeds every page and records versions
+- Incremental sync uses the CQL watermark and skips unchanged versions
+- Changed pages replace their previous chunks
+- Pages deleted upstream are removed from the vector store
+- Failed pages hold the watermark back
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.constants import EmbeddingType
+from app.infrastructure.ingestion.confluence_injection_service import (
+    SYNC_DEFAULTS,
+    ConfluenceIngestionService,
+)
+from app.infrastructure.ingestion.pipeline import PipelineConfig
+from app.infrastructure.ingestion.sync_state import SyncStateStore
+from app.services.external.confluence_service import ConfluenceService
+
+
+def _page(page_id, version, body="Body"):
+    return {
+        "id": page_id,
+        "title": f"Page {page_id}",
+        "version": {"number": version, "when": "2024-05-01T10:00:00.000Z"},
+        "body": {"storage": {"value": f"<p>{body} {page_id}</p>"}},
+    }
+
+
+def _saved_docs(service):
+    """Documents written to the vector store across all batches."""
+    return [
+        doc
+        for call in service._vector_store.save_and_embed.await_args_list
+        for doc in call.args[1]
+    ]
+
+
+def _metadata(page):
+    return {"page_id": page["id"], "title": page["title"]}
+
+
+@pytest.fixture
+def state(tmp_path):
+    store = SyncStateStore(path=str(tmp_path / "sync.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def service(state):
+    """Build the service without loading application config."""
+    svc = ConfluenceIngestionService.__new__(ConfluenceIngestionService)
+    svc.config = Mock(sources=["ENG"])
+    svc._atlassian_service = Mock()
+    svc._atlassian_service.list_confluence_spaces.return_value = ["ENG"]
+    svc._atlassian_service.extract_content_from_a_page.side_effect = lambda p: (
+        p["body"]["storage"]["value"],
+        _metadata(p),
+    )
+    svc._processed_pages = {}
+    svc._vector_store = Mock()
+    svc._vector_store.get_connection = AsyncMock()
+    svc._vector_store.save_and_embed = AsyncMock(side_effect=lambda t, d: ["id"])
+    svc._vector_store.delete_by_document_id = AsyncMock(return_value=True)
+    svc._vector_store.supports_precomputed_embeddings.return_value = False
+    svc._vector_store.supports_chunk_diff.return_value = False
+    svc._embedding_type = EmbeddingType.DEFAULT
+    svc._sync_state = state
+    svc._sync_config = dict(SYNC_DEFAULTS)
+    svc._sync_stats = {}
+    svc._pipeline_config = PipelineConfig(
+        batch_wait_seconds=0.01, max_retries=0, retry_backoff_seconds=0
+    )
+    svc.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+    return svc
+
+
+class TestConfluenceFullSync:
+    """Test the first, full sync of a space."""
+
+    @pytest.mark.asyncio
+    async def test_first_sync_embeds_all_pages(self, service, state):
+        pages = [_page("1", 1), _page("2", 4)]
+        service._atlassian_service.list_confluence_pages_in_space.return_value = pages
+
+        assert await service.ingest() is True
+
+        service._atlassian_service.list_confluence_pages_modified_since.assert_not_called()
+        assert len(_saved_docs(service)) == 2
+        records = state.get_all("confluence:ENG")
+        assert records["2"].version == "4"
+        assert records["1"].document_id == service.page_document_id("1")
+        assert state.get_watermark("confluence:ENG") is not None
+        assert service.get_sync_stats()["ENG"]["embedded"] == 2
+
+    @pytest.mark.asyncio
+    async def test_chunks_carry_page_document_id(self, service):
+        service._atlassian_service.list_confluence_pages_in_space.return_value = [
+            _page("1", 1)
+        ]
+
+        await service.sync_space("ENG")
+
+        docs = _saved_docs(service)
+        assert {d.metadata["document_id"] for d in docs} == {
+            service.page_document_id("1")
+        }
+
+
+class TestConfluenceIncrementalSync:
+    """Test watermark-driven incremental syncs."""
+
+    @pytest.fixture(autouse=True)
+    def _first_sync(self, service, state):
+        service._atlassian_service.list_confluence_pages_in_space.return_value = [
+            _page("1", 1),
+            _page("2", 1),
+            _page("3", 1),
+        ]
+        asyncio.run(service.sync_space("ENG"))
+        service._vector_store.save_and_embed.reset_mock()
+        self.watermark = state.get_watermark("confluence:ENG")
+
+    @pytest.mark.asyncio
+    async def test_only_changed_pages_are_reembedded(self, service, state):
+        api = service._atlassian_service
+        api.list_confluence_pages_modified_since.return_value = [
+            _page("1", 1),  # returned by the overlap window, same version
+            _page("2", 2, body="Edited"),
+        ]
+        api.list_confluence_page_versions.return_value = {"1": 1, "2": 2, "3": 1}
+
+        assert await service.sync_space("ENG") is True
+
+        api.list_confluence_pages_in_space.assert_called_once()
+        since = api.list_confluence_pages_modified_since.call_args.args[1]
+        assert since == self.watermark - timedelta(
+            minutes=SYNC_DEFAULTS["watermark_overlap_minutes"]
+        )
+        assert [d.metadata["page_id"] for d in _saved_docs(service)] == ["2"]
+        service._vector_store.delete_by_document_id.assert_awaited_once_with(
+            service.page_document_id("2")
+        )
+        assert state.get("confluence:ENG", "2").version == "2"
+        stats = service.get_sync_stats()["ENG"]
+        assert stats["unchanged"] == 1
+        assert stats["embedded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_pages_deleted_upstream_are_removed(self, service, state):
+        api = service._atlassian_service
+        api.list_confluence_pages_modified_since.return_value = []
+        api.list_confluence_page_versions.return_value = {"1": 1, "3": 1}
+
+        assert await service.sync_space("ENG") is True
+
+        service._vector_store.delete_by_document_id.assert_awaited_once_with(
+            service.page_document_id("2")
+        )
+        service._vector_store.save_and_embed.assert_not_called()
+        assert set(state.get_all("confluence:ENG")) == {"1", "3"}
+
+    @pytest.mark.asyncio
+    async def test_failed_page_holds_watermark(self, service, state):
+        api = service._atlassian_service
+        api.list_confluence_pages_modified_since.return_value = [_page("2", 2)]
+        api.list_confluence_page_versions.return_value = {"1": 1, "2": 2, "3": 1}
+        service._vector_store.save_and_embed.side_effect = RuntimeError("down")
+
+        assert await service.sync_space("ENG") is False
+
+        assert state.get_watermark("confluence:ENG") == self.watermark
+        assert state.get("confluence:ENG", "2").version == "1"
+
+    @pytest.mark.asyncio
+    async def test_failed_extraction_keeps_previous_chunks(self, service, state):
+        api = service._atlassian_service
+        api.list_confluence_pages_modified_since.return_value = [_page("2", 2)]
+        api.list_confluence_page_versions.return_value = {"1": 1, "2": 2, "3": 1}
+        api.extract_content_from_a_page.side_effect = RuntimeError("timeout")
+
+        assert await service.sync_space("ENG") is False
+
+        service._vector_store.delete_by_document_id.assert_not_called()
+        assert state.get("confluence:ENG", "2").version == "1"
+
+    @pytest.mark.asyncio
+    async def test_full_flag_relists_space(self, service):
+        api = service._atlassian_service
+        api.list_confluence_pages_in_space.reset_mock()
+
+        await service.sync_space("ENG", full=True)
+
+        api.list_confluence_pages_in_space.assert_called_once_with("ENG")
+        api.list_confluence_pages_modified_since.assert_not_called()
+        service._vector_store.save_and_embed.assert_not_called()
+
+    def test_sync_vector_store_delete_is_supported(self, service):
+        service._vector_store.delete_by_document_id = Mock(return_value=True)
+        assert asyncio.run(service._delete_document("doc")) is True
+
+
+class TestConfluenceServiceWatermarkQuery:
+    """Test the CQL watermark query on ConfluenceService."""
+
+    def test_modified_since_paginates_cql(self):
+        with patch(
+            "app.services.external.confluence_service.ConfluenceService._ConfluenceService__init_client"
+        ):
+            svc = ConfluenceService.__new__(ConfluenceService)
+            svc._confluence = Mock()
+            svc._confluence.cql.side_effect = [
+                {"results": [{"content": {"id": "1"}}, {"content": {"id": "2"}}]},
+                {"results": [{"content": {"id": "3"}}]},
+            ]
+
+            pages = svc.list_confluence_pages_modified_since(
+                "ENG", datetime(2024, 5, 1, 9, 5, tzinfo=timezone.utc), limit=2
+            )
+
+        assert [p["id"] for p in pages] == ["1", "2", "3"]
+        cql = svc._confluence.cql.call_args_list[0].args[0]
+        assert 'space = "ENG"' in cql
+        assert 'lastmodified > "2024-05-01 09:05"' in cql
+        assert svc._confluence.cql.call_args_list[1].kwargs["start"] == 2
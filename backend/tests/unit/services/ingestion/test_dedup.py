@@ -0,0 +1,185 @@
+"""
+Unit tests for near-duplicate chunk detection.
+
+Covers:
+- Exact, near and in-document duplicates are skipped
+- Re-ingested documents do not match their own earlier chunks
+- Duplicates are promoted when their canonical chunk goes away
+- Per-source stats, persistence and the ingestion pipeline stage
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType
+from app.infrastructure.ingestion.dedup import DedupConfig, DedupIndex
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
+
+RUNBOOK = (
+    "Restart the payment worker, drain the retry queue, then confirm the "
+    "invoice backlog is empty before reopening the checkout endpoint."
+)
+FOOTER = "Owned by the platform team. Ask in the support channel for access."
+
+
+def _doc(text, document_id):
+    return Document(page_content=text, metadata={"document_id": document_id})
+
+
+def _texts(docs):
+    return [doc.page_content for doc in docs]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupIndex(DedupConfig.from_config({}, str(tmp_path / "state.db")))
+    yield index
+    index.close()
+
+
+class TestDuplicates:
+    """Test what is skipped."""
+
+    def test_exact_duplicates_of_other_documents_are_skipped(self, index):
+        index.filter([_doc(RUNBOOK, "a"), _doc(FOOTER, "a")])
+
+        result = index.filter(
+            [_doc("Intro of b.", "b"), _doc("  " + FOOTER.upper(), "b")]
+        )
+
+        assert _texts(result.kept) == ["Intro of b."]
+        assert (result.exact, result.near) == (1, 0)
+
+    def test_near_duplicates_are_skipped(self, index):
+        index.filter([_doc(RUNBOOK, "a")])
+        edited = RUNBOOK.replace("then confirm", "and then confirm")
+
+        result = index.filter(
+            [_doc(edited, "b"), _doc("Quarterly revenue grew in every region.", "b")]
+        )
+
+        assert result.near == 1
+        assert _texts(result.kept) == ["Quarterly revenue grew in every region."]
+
+    def test_repeats_within_a_document_are_dropped(self, index):
+        result = index.filter(
+            [_doc(FOOTER, "a"), _doc("Body.", "a"), _doc(FOOTER, "a")]
+        )
+
+        assert _texts(result.kept) == [FOOTER, "Body."]
+        assert result.exact == 1
+
+    def test_short_chunks_only_match_exactly(self, index):
+        index.filter([_doc("Status: open", "a")])
+
+        result = index.filter([_doc("Status: closed", "b")])
+
+        assert result.skipped == 0
+
+    def test_chunks_without_document_id_pass_through(self, index):
+        docs = [Document(page_content=FOOTER), Document(page_content=FOOTER)]
+
+        assert len(index.filter(docs).kept) == 2
+
+
+class TestReingest:
+    """Test documents changing and disappearing."""
+
+    def test_reingested_documents_keep_their_chunks(self, index):
+        index.filter([_doc(RUNBOOK, "a"), _doc(FOOTER, "a")])
+
+        result = index.filter([_doc(RUNBOOK, "a"), _doc(FOOTER + " Updated.", "a")])
+
+        assert result.skipped == 0
+        assert len(result.kept) == 2
+
+    def test_duplicate_is_promoted_when_canonical_is_dropped(self, index):
+        index.filter([_doc(RUNBOOK, "a")])
+        index.filter([_doc(RUNBOOK, "b")])
+
+        result = index.filter([_doc("A rewritten page.", "a")])
+
+        assert [(d.page_content, d.metadata) for d in result.promoted] == [
+            (RUNBOOK, {"document_id": "b"})
+        ]
+        # b's copy is now canonical: c is linked to it
+        assert index.filter([_doc(RUNBOOK, "c")]).exact == 1
+
+    def test_deleted_documents_promote_their_duplicates(self, index):
+        index.filter([_doc(RUNBOOK, "a")])
+        index.filter([_doc(RUNBOOK, "b")])
+        index.filter([_doc(RUNBOOK, "c")])
+
+        promoted = index.forget_documents(["a"])
+
+        assert [d.metadata["document_id"] for d in promoted] == ["b"]
+        assert index.stats()["canonical_chunks"] == 1
+        assert index.stats()["duplicate_chunks"] == 1
+
+
+class TestStats:
+    """Test reporting and persistence."""
+
+    def test_ratios_are_reported_per_source(self, index):
+        index.filter([_doc(RUNBOOK, "a"), _doc(FOOTER, "a")], namespace="file")
+        index.filter([_doc(FOOTER, "p1"), _doc("Page.", "p1")], namespace="confluence")
+
+        sources = index.stats()["sources"]
+
+        assert sources["file"]["dedup_ratio"] == 0.0
+        assert sources["confluence"] == {
+            "chunks": 2,
+            "exact_duplicates": 1,
+            "near_duplicates": 0,
+            "dedup_ratio": 0.5,
+        }
+
+    def test_index_survives_reopening(self, tmp_path):
+        config = DedupConfig.from_config({}, str(tmp_path / "state.db"))
+        first = DedupIndex(config)
+        first.filter([_doc(RUNBOOK, "a")])
+        first.close()
+
+        reopened = DedupIndex(config)
+        edited = RUNBOOK.replace("Restart", "First restart")
+
+        assert reopened.filter([_doc(edited, "b")]).near == 1
+        reopened.close()
+
+    def test_bands_must_divide_permutations(self):
+        with pytest.raises(ValueError):
+            DedupConfig.from_config({"num_perm": 64, "bands": 10})
+
+
+class TestPipelineStage:
+    """Test deduplication inside the ingestion pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_only_unique_chunks_are_embedded(self, index):
+        store = Mock()
+        store.supports_precomputed_embeddings.return_value = False
+        store.supports_chunk_diff.return_value = False
+        store.save_and_embed = AsyncMock()
+        pages = {"a": [RUNBOOK, FOOTER], "b": ["Intro.", FOOTER]}
+
+        pipeline = IngestionPipeline.for_vector_store(
+            store,
+            EmbeddingType.DEFAULT,
+            fetch=lambda key: key,
+            chunk=lambda key: [_doc(text, key) for text in pages[key]],
+            dedup=index,
+            config=PipelineConfig(batch_wait_seconds=0.01, chunk_concurrency=1),
+            name="file",
+        )
+        result = await pipeline.run([("a", "a"), ("b", "b")])
+
+        stored = [
+            text
+            for call in store.save_and_embed.await_args_list
+            for text in _texts(call.args[1])
+        ]
+        assert sorted(result.succeeded) == ["a", "b"]
+        assert sorted(stored) == sorted([RUNBOOK, FOOTER, "Intro."])
+        assert index.stats()["sources"]["file"]["exact_duplicates"] == 1
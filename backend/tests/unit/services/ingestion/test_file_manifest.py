@@ -0,0 +1,273 @@
+"""
+Unit tests for the file manifest and skip-unchanged file ingestion.
+
+Covers:
+- Change detection by size/mtime with a content-hash fallback
+- Detection of files removed from a source folder
+- Recursive discovery in FileIngestionService
+- Unchanged files are not parsed on re-runs
+- Unsupported file types are skipped and remembered
+- Process-pool parsing of CPU-heavy formats
+"""
+
+import os
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.constants import EmbeddingType
+from app.infrastructure.ingestion import file_ingestion_service
+from app.infrastructure.ingestion.file_data_source_util import (
+    FileType,
+    _construct_mapping,
+    load_file,
+)
+from app.infrastructure.ingestion.file_ingestion_service import (
+    FILE_DEFAULTS,
+    FileIngestionService,
+)
+from app.infrastructure.ingestion.file_manifest import (
+    FileFingerprint,
+    FileManifest,
+    file_document_id,
+)
+from app.infrastructure.ingestion.pipeline import PipelineConfig
+from app.infrastructure.ingestion.sync_state import SyncStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SyncStateStore(path=str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "docs"
+    (root / "nested" / "deeper").mkdir(parents=True)
+    (root / ".hidden").mkdir()
+    (root / "a.txt").write_text("alpha document")
+    (root / "nested" / "b.txt").write_text("beta document")
+    (root / "nested" / "deeper" / "c.txt").write_text("gamma document")
+    (root / ".hidden" / "secret.txt").write_text("skip me")
+    (root / ".dotfile").write_text("skip me too")
+    return root
+
+
+def _ingest_all(manifest, paths):
+    changed, _ = manifest.diff(paths)
+    for fingerprint, _ in changed:
+        manifest.mark_ingested(fingerprint)
+
+
+class TestFileManifest:
+    """Test manifest change detection."""
+
+    def test_new_files_are_changed(self, store, corpus):
+        manifest = FileManifest(store)
+        changed, unchanged = manifest.diff([str(corpus / "a.txt")])
+        assert unchanged == 0
+        fingerprint, record = changed[0]
+        assert record is None
+        assert fingerprint.content_hash is not None
+
+    def test_unchanged_files_are_skipped(self, store, corpus):
+        manifest = FileManifest(store)
+        path = str(corpus / "a.txt")
+        _ingest_all(manifest, [path])
+
+        with patch("app.infrastructure.ingestion.file_manifest.hash_file") as mock_hash:
+            changed, unchanged = manifest.diff([path])
+
+        assert changed == [] and unchanged == 1
+        mock_hash.assert_not_called()
+
+    def test_touched_file_with_same_content_is_skipped(self, store, corpus):
+        manifest = FileManifest(store)
+        path = str(corpus / "a.txt")
+        _ingest_all(manifest, [path])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        changed, unchanged = manifest.diff([path])
+
+        assert changed == [] and unchanged == 1
+        # The refreshed record lets the next run skip hashing again
+        assert (
+            store.get("file", path).version == FileFingerprint.from_path(path).version
+        )
+
+    def test_modified_file_is_changed_with_previous_record(self, store, corpus):
+        manifest = FileManifest(store)
+        path = str(corpus / "a.txt")
+        _ingest_all(manifest, [path])
+        (corpus / "a.txt").write_text("alpha document, second edition")
+
+        changed, _ = manifest.diff([path])
+
+        fingerprint, record = changed[0]
+        assert record.document_id == file_document_id(path)
+        assert fingerprint.content_hash != record.content_hash
+
+    def test_removed_files_are_reported(self, store, corpus):
+        manifest = FileManifest(store)
+        paths = [str(corpus / "a.txt"), str(corpus / "nested" / "b.txt")]
+        _ingest_all(manifest, paths)
+
+        removed = manifest.removed(str(corpus), paths[:1])
+
+        assert list(removed) == [paths[1]]
+        assert manifest.removed(str(corpus / "nested" / "deeper"), []) == {}
+
+
+@pytest.fixture
+def service(store):
+    """Build the service without loading application config."""
+    svc = FileIngestionService.__new__(FileIngestionService)
+    svc._processed_files = {}
+    svc._loader_mapping = _construct_mapping()
+    svc._vector_store = Mock()
+    svc._vector_store.get_connection = AsyncMock()
+    svc._vector_store.close_connection = AsyncMock()
+    svc._vector_store.supports_precomputed_embeddings.return_value = False
+    svc._vector_store.supports_chunk_diff.return_value = False
+    svc._vector_store.save_and_embed = AsyncMock(return_value=["id"])
+    svc._vector_store.delete_by_document_id = AsyncMock(return_value=True)
+    svc._embedding_type = EmbeddingType.DEFAULT
+    svc._pipeline_config = PipelineConfig(
+        batch_wait_seconds=0.01, max_retries=0, retry_backoff_seconds=0
+    )
+    svc._file_config = {**FILE_DEFAULTS, "parse_workers": -1}
+    svc._manifest = FileManifest(store)
+    svc._process_pool = None
+    svc.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+    return svc
+
+
+def _saved_sources(service):
+    return sorted(
+        doc.metadata["source"]
+        for call in service._vector_store.save_and_embed.await_args_list
+        for doc in call.args[1]
+    )
+
+
+class TestFileIngestionServiceManifest:
+    """Test recursive, skip-unchanged folder ingestion."""
+
+    def test_discovery_is_recursive_and_skips_hidden(self, service, corpus):
+        files = service._discover_files(str(corpus))
+        assert [os.path.relpath(f, corpus.resolve()) for f in files] == [
+            "a.txt",
+            os.path.join("nested", "b.txt"),
+            os.path.join("nested", "deeper", "c.txt"),
+        ]
+
+    def test_discovery_can_be_limited_to_top_level(self, service, corpus):
+        service._file_config["recursive"] = False
+        assert len(service._discover_files(str(corpus))) == 1
+
+    @pytest.mark.asyncio
+    async def test_rerun_over_unchanged_corpus_parses_nothing(self, service, corpus):
+        assert await service._process_files_in_folder(str(corpus)) is True
+        assert len(_saved_sources(service)) == 3
+        chunks = service._vector_store.save_and_embed.await_args_list[0].args[1]
+        assert all(c.metadata["document_id"] for c in chunks)
+
+        service._vector_store.save_and_embed.reset_mock()
+        with patch.object(service, "_load_document") as mock_load:
+            assert await service._process_files_in_folder(str(corpus)) is True
+
+        mock_load.assert_not_called()
+        service._vector_store.save_and_embed.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changed_file_replaces_its_chunks(self, service, corpus):
+        await service._process_files_in_folder(str(corpus))
+        service._vector_store.save_and_embed.reset_mock()
+        (corpus / "nested" / "b.txt").write_text("beta document, revised")
+
+        await service._process_files_in_folder(str(corpus))
+
+        changed = str((corpus / "nested" / "b.txt").resolve())
+        assert _saved_sources(service) == [changed]
+        service._vector_store.delete_by_document_id.assert_awaited_once_with(
+            file_document_id(changed)
+        )
+
+    @pytest.mark.asyncio
+    async def test_parse_failure_keeps_old_chunks(self, service, corpus):
+        await service._process_files_in_folder(str(corpus))
+        (corpus / "nested" / "b.txt").write_text("beta document, revised")
+
+        with patch.object(
+            service, "_load_document", side_effect=RuntimeError("parser crashed")
+        ):
+            assert await service._process_files_in_folder(str(corpus)) is False
+
+        service._vector_store.delete_by_document_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_file_type_is_detected_once_per_file(self, service, corpus):
+        with patch.object(
+            service, "_detect_file_type", wraps=service._detect_file_type
+        ) as detect:
+            await service._process_files_in_folder(str(corpus))
+
+        assert detect.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_unsupported_files_are_skipped_once(self, service, corpus, store):
+        stray = corpus / "nested" / "image.bin"
+        stray.write_bytes(bytes(range(256)) * 4)
+
+        assert await service._process_files_in_folder(str(corpus)) is True
+
+        assert len(_saved_sources(service)) == 3
+        record = store.get("file", str(stray.resolve()))
+        assert "Unsupported MIME type" in record.extra["skipped"]
+        assert record.document_id is None
+        with patch.object(service, "_detect_file_type") as detect:
+            assert await service._process_files_in_folder(str(corpus)) is True
+        detect.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_deleted_file_chunks_are_removed(self, service, corpus, store):
+        await service._process_files_in_folder(str(corpus))
+        deleted = str((corpus / "a.txt").resolve())
+        os.remove(deleted)
+
+        await service._process_files_in_folder(str(corpus))
+
+        service._vector_store.delete_by_document_id.assert_awaited_once_with(
+            file_document_id(deleted)
+        )
+        assert store.get("file", deleted) is None
+
+    @pytest.mark.asyncio
+    async def test_heavy_formats_are_parsed_in_process_pool(self, service, corpus):
+        service._file_config["parse_workers"] = 1
+        try:
+            with (
+                patch.object(
+                    file_ingestion_service,
+                    "PROCESS_POOL_FILE_TYPES",
+                    frozenset({FileType.TXT}),
+                ),
+                patch.object(service, "_load_document") as mock_load,
+            ):
+                assert await service._process_files_in_folder(str(corpus)) is True
+            mock_load.assert_not_called()
+            assert len(_saved_sources(service)) == 3
+        finally:
+            await service.close()
+        assert service._process_pool is None
+
+
+def test_load_file_uses_mapped_loader(tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("plain text")
+    docs = load_file(str(path), FileType.TXT.value)
+    assert docs[0].page_content == "plain text"
@@ -0,0 +1,223 @@
+"""
+Unit tests for background ingestion jobs.
+
+Covers:
+- Submitting, de-duplicating and running jobs off the caller's loop
+- Each job ingests and closes its stores on a loop of its own
+- Progress counters, throughput and item errors
+- Cancellation of running jobs
+- Resuming interrupted jobs from their item checkpoints
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from langchain.schema import Document
+
+from app.core.utils.background_loop import shared_loop
+from app.infrastructure.ingestion.jobs import (
+    IngestionJob,
+    IngestionJobManager,
+    JobConfig,
+    JobStatus,
+    JobStore,
+)
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
+from app.infrastructure.ingestion.rag_data_provider import RagDataProvider
+
+
+class FakeProvider:
+    """Ingests ``items`` through a real pipeline into ``upserted``."""
+
+    items = ["a", "b", "c"]
+    upserted = []
+    gate = None
+
+    async def ingest(self):
+        def chunk(payload):
+            if payload == "bad":
+                raise ValueError("unparseable")
+            return [Document(page_content=f"{payload} {n}") for n in range(2)]
+
+        async def upsert(docs, _vectors):
+            if FakeProvider.gate is not None:
+                await asyncio.to_thread(FakeProvider.gate.wait, 5)
+            FakeProvider.upserted.extend(doc.page_content for doc in docs)
+
+        pipeline = IngestionPipeline(
+            fetch=lambda source: source,
+            chunk=chunk,
+            upsert=upsert,
+            config=PipelineConfig(batch_wait_seconds=0.01, max_retries=0),
+            name="fake",
+        )
+        result = await pipeline.run((item, item) for item in self.items)
+        return result.success
+
+
+@pytest.fixture
+def provider():
+    FakeProvider.items = ["a", "b", "c"]
+    FakeProvider.upserted = []
+    FakeProvider.gate = None
+    with patch.dict(RagDataProvider._registry, {"fake": FakeProvider}):
+        yield FakeProvider
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+def _manager(store, **config):
+    return IngestionJobManager(store=store, config=JobConfig(**config))
+
+
+class TestJobs:
+    """Test submitting and running jobs."""
+
+    def test_job_runs_in_the_background_and_reports_progress(self, provider, store):
+        manager = _manager(store)
+
+        job = manager.submit("fake")
+        assert job.status == JobStatus.QUEUED
+
+        job = manager.wait(job.id, timeout=5)
+        report = job.to_dict()
+
+        assert job.status == JobStatus.SUCCEEDED
+        assert report["items"] == {
+            "total": 3,
+            "done": 3,
+            "failed": 0,
+            "skipped": 0,
+            "remaining": 0,
+        }
+        assert report["chunks_embedded"] == 6
+        assert report["eta_seconds"] is None
+        assert store.done_items(job.id) == {"fake:a", "fake:b", "fake:c"}
+        assert sorted(provider.upserted) == sorted(
+            f"{item} {n}" for item in "abc" for n in range(2)
+        )
+
+    def test_one_active_job_per_data_source(self, provider, store):
+        provider.gate = threading.Event()
+        manager = _manager(store)
+
+        first = manager.submit("fake")
+        second = manager.submit("fake")
+        provider.gate.set()
+        manager.wait(first.id, timeout=5)
+
+        assert second.id == first.id
+        assert len(store.list()) == 1
+
+    def test_params_are_passed_to_the_service(self, provider, store):
+        built = []
+
+        class ParamProvider(FakeProvider):
+            def __init__(self, upload_id):
+                built.append(upload_id)
+
+        manager = _manager(store)
+        with patch.dict(RagDataProvider._registry, {"fake": ParamProvider}):
+            first = manager.submit("fake", {"upload_id": "u1"})
+            second = manager.submit("fake", {"upload_id": "u2"})
+            manager.wait(first.id, timeout=5)
+            manager.wait(second.id, timeout=5)
+
+        assert first.id != second.id
+        assert sorted(built) == ["u1", "u2"]
+        assert store.get(first.id).params == {"upload_id": "u1"}
+
+    def test_each_job_runs_and_closes_on_its_own_loop(self, provider, store):
+        seen = {}
+
+        class ClosingProvider(FakeProvider):
+            async def ingest(self):
+                seen["ingest"] = threading.current_thread().name
+                seen["loop"] = asyncio.get_running_loop()
+                return await super().ingest()
+
+            async def close(self):
+                seen["close_loop"] = asyncio.get_running_loop()
+
+        manager = _manager(store)
+        with patch.dict(RagDataProvider._registry, {"fake": ClosingProvider}):
+            job = manager.wait(manager.submit("fake").id, timeout=5)
+
+        assert job.status == JobStatus.SUCCEEDED
+        assert seen["ingest"] == f"ingestion-job-{job.id[:8]}"
+        assert seen["ingest"] != shared_loop.name
+        # Stores are closed on the job's loop, which then shuts down
+        assert seen["close_loop"] is seen["loop"]
+        for _ in range(100):
+            if seen["loop"].is_closed():
+                break
+            threading.Event().wait(0.01)
+        assert seen["loop"].is_closed()
+
+    def test_unknown_data_sources_are_rejected(self, store):
+        with pytest.raises(ValueError):
+            _manager(store).submit("nowhere")
+
+    def test_item_errors_fail_the_job(self, provider, store):
+        provider.items = ["a", "bad"]
+        manager = _manager(store)
+
+        job = manager.wait(manager.submit("fake").id, timeout=5)
+
+        assert job.status == JobStatus.FAILED
+        assert job.items_done == 1
+        assert job.errors == [{"item": "fake:bad", "error": "chunk: unparseable"}]
+
+    def test_running_jobs_can_be_cancelled(self, provider, store):
+        provider.gate = threading.Event()
+        manager = _manager(store)
+        job = manager.submit("fake")
+
+        manager.cancel(job.id)
+        job = manager.wait(job.id, timeout=5)
+        provider.gate.set()
+
+        assert job.status == JobStatus.CANCELLED
+        assert job.cancel_requested
+        assert manager.cancel("missing") is None
+
+
+class TestResume:
+    """Test resuming interrupted jobs."""
+
+    def test_finished_items_are_skipped(self, provider, store):
+        # A job whose process died after checkpointing item "a"
+        job = IngestionJob(
+            id="j1", data_source="fake", status=JobStatus.RUNNING, attempts=1
+        )
+        store.save(job)
+        store.checkpoint(job, "fake:a", "done", chunks=2)
+
+        manager = _manager(store)
+        assert manager.resume() == ["j1"]
+        job = manager.wait("j1", timeout=5)
+
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.attempts == 2
+        assert (job.items_done, job.items_skipped) == (2, 1)
+        assert not any(text.startswith("a ") for text in provider.upserted)
+
+    def test_finished_jobs_are_not_resumed(self, provider, store):
+        store.save(IngestionJob(id="j1", data_source="fake", status=JobStatus.FAILED))
+
+        assert _manager(store).resume() == []
+
+    def test_queued_jobs_without_a_worker_cancel_immediately(self, store):
+        store.save(IngestionJob(id="j1", data_source="fake"))
+
+        job = _manager(store).cancel("j1")
+
+        assert job.status == JobStatus.CANCELLED
+        assert store.get("j1").finished_at is not None
@@ -0,0 +1,327 @@
+"""
+Unit tests for the staged ingestion pipeline.
+
+Covers:
+- Items flow through fetch, chunk, embed and upsert
+- Chunks are re-batched for the embedding provider and vector store
+- Per-item retries and failure isolation
+- Stage concurrency and metrics
+- Vector store wiring with and without precomputed embeddings
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from langchain.schema import Document
+
+from app.core.constants import EmbeddingType
+from app.infrastructure.ingestion.pipeline import IngestionPipeline, PipelineConfig
+
+
+def _config(**overrides):
+    values = dict(
+        fetch_concurrency=2,
+        chunk_concurrency=2,
+        embed_concurrency=2,
+        upsert_concurrency=2,
+        queue_size=4,
+        embed_batch_size=3,
+        upsert_batch_size=4,
+        batch_wait_seconds=0.01,
+        max_retries=2,
+        retry_backoff_seconds=0,
+    )
+    values.update(overrides)
+    return PipelineConfig(**values)
+
+
+def _chunk(payload):
+    """Split 'name:n' payloads into n documents."""
+    name, count = payload.split(":")
+    return [
+        Document(page_content=f"{name}-{i}", metadata={"source": name})
+        for i in range(int(count))
+    ]
+
+
+class Recorder:
+    """Collects embed/upsert calls."""
+
+    def __init__(self):
+        self.embed_batches = []
+        self.upserts = []
+
+    def embed(self, texts):
+        self.embed_batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    async def upsert(self, docs, vectors):
+        self.upserts.append((list(docs), vectors))
+        return [d.page_content for d in docs]
+
+
+class TestIngestionPipelineFlow:
+    """Test the happy path and batching."""
+
+    @pytest.mark.asyncio
+    async def test_all_chunks_reach_the_store(self):
+        rec = Recorder()
+        completed = []
+        pipeline = IngestionPipeline(
+            fetch=lambda source: source,
+            chunk=_chunk,
+            embed=rec.embed,
+            upsert=rec.upsert,
+            config=_config(),
+            on_item_complete=lambda item: completed.append((item.key, item.chunks)),
+        )
+
+        result = await pipeline.run(
+            [("a", "a:5"), ("b", "b:2"), ("c", "c:0"), ("d", "d:4")]
+        )
+
+        assert result.success
+        assert sorted(result.succeeded) == ["a", "b", "d"]
+        assert result.empty == ["c"]
+        assert result.chunks == 11
+        assert sorted(completed) == [("a", 5), ("b", 2), ("c", 0), ("d", 4)]
+        stored = sorted(d.page_content for docs, _ in rec.upserts for d in docs)
+        assert len(stored) == 11
+        assert all(len(batch) <= 3 for batch in rec.embed_batches)
+        assert all(len(docs) <= 4 for docs, _ in rec.upserts)
+        # Vectors stay aligned with their documents
+        for docs, vectors in rec.upserts:
+            assert vectors == [[float(len(d.page_content))] for d in docs]
+
+    @pytest.mark.asyncio
+    async def test_without_embed_stage_upsert_gets_no_vectors(self):
+        rec = Recorder()
+        pipeline = IngestionPipeline(
+            fetch=lambda source: source,
+            chunk=_chunk,
+            upsert=rec.upsert,
+            config=_config(),
+        )
+
+        result = await pipeline.run([("a", "a:3")])
+
+        assert result.succeeded == ["a"]
+        assert "embed" not in result.stages
+        assert all(vectors is None for _, vectors in rec.upserts)
+
+    @pytest.mark.asyncio
+    async def test_accepts_async_iterables(self):
+        rec = Recorder()
+
+        async def sources():
+            for name in "xyz":
+                yield name, f"{name}:1"
+
+        pipeline = IngestionPipeline(
+            fetch=lambda source: source,
+            chunk=_chunk,
+            upsert=rec.upsert,
+            config=_config(),
+        )
+        result = await pipeline.run(sources())
+        assert sorted(result.succeeded) == ["x", "y", "z"]
+
+    @pytest.mark.asyncio
+    async def test_fetch_stage_runs_concurrently(self):
+        active = 0
+        peak = 0
+
+        async def fetch(source):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return source
+
+        pipeline = IngestionPipeline(
+            fetch=fetch,
+            chunk=_chunk,
+            upsert=Recorder().upsert,
+            config=_config(fetch_concurrency=4),
+        )
+        await pipeline.run([(str(i), f"s{i}:1") for i in range(8)])
+        assert peak == 4
+
+
+class TestIngestionPipelineFailures:
+    """Test retries and failure isolation."""
+
+    @pytest.mark.asyncio
+    async def test_transient_fetch_errors_are_retried(self):
+        attempts = {}
+
+        def fetch(source):
+            attempts[source] = attempts.get(source, 0) + 1
+            if attempts[source] < 2:
+                raise ConnectionError("flaky")
+            return source
+
+        pipeline = IngestionPipeline(
+            fetch=fetch, chunk=_chunk, upsert=Recorder().upsert, config=_config()
+        )
+        result = await pipeline.run([("a", "a:1")])
+
+        assert result.succeeded == ["a"]
+        assert result.stages["fetch"]["retries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failing_item_does_not_stop_others(self):
+        failed = []
+
+        def fetch(source):
+            if source.startswith("bad"):
+                raise ValueError("unreadable")
+            return source
+
+        pipeline = IngestionPipeline(
+            fetch=fetch,
+            chunk=_chunk,
+            upsert=Recorder().upsert,
+            config=_config(max_retries=0),
+            on_item_failed=lambda item: failed.append(item.key),
+        )
+        result = await pipeline.run([("ok", "ok:2"), ("bad", "bad:2")])
+
+        assert result.succeeded == ["ok"]
+        assert "unreadable" in result.failed["bad"]
+        assert failed == ["bad"]
+        assert not result.success
+
+    @pytest.mark.asyncio
+    async def test_upsert_failure_fails_every_item_in_batch_once(self):
+        upsert = AsyncMock(side_effect=RuntimeError("store down"))
+        failed = []
+        pipeline = IngestionPipeline(
+            fetch=lambda source: source,
+            chunk=_chunk,
+            upsert=upsert,
+            config=_config(max_retries=1, upsert_batch_size=10),
+            on_item_failed=lambda item: failed.append(item.key),
+        )
+
+        result = await pipeline.run([("a", "a:3"), ("b", "b:2")])
+
+        assert result.succeeded == []
+        assert sorted(failed) == ["a", "b"]
+        assert result.stages["upsert"]["retries"] >= 1
+        assert result.stages["upsert"]["failed"] == 5
+
+    @pytest.mark.asyncio
+    async def test_bad_chunk_fails_only_its_own_item(self):
+        recorder = Recorder()
+
+        def embed(texts):
+            if any(t.startswith("bad") for t in texts):
+                raise ValueError("token limit exceeded")
+            return recorder.embed(texts)
+
+        pipeline = IngestionPipeline(
+            fetch=lambda source: source,
+            chunk=_chunk,
+            embed=embed,
+            upsert=recorder.upsert,
+            config=_config(max_retries=0, embed_batch_size=10, batch_wait_seconds=0.2),
+        )
+
+        result = await pipeline.run([("a", "a:2"), ("bad", "bad:1"), ("b", "b:2")])
+
+        assert sorted(result.succeeded) == ["a", "b"]
+        assert list(result.failed) == ["bad"]
+        assert result.stages["embed"]["failed"] == 1
+        upserted = sorted(d.page_content for docs, _ in recorder.upserts for d in docs)
+        assert upserted == ["a-0", "a-1", "b-0", "b-1"]
+
+
+class TestIngestionPipelineMetrics:
+    """Test per-stage metrics."""
+
+    @pytest.mark.asyncio
+    async def test_stage_metrics_are_reported(self):
+        rec = Recorder()
+        pipeline = IngestionPipeline(
+            fetch=lambda source: source,
+            chunk=_chunk,
+            embed=rec.embed,
+            upsert=rec.upsert,
+            config=_config(),
+        )
+        result = await pipeline.run([("a", "a:4"), ("b", "b:4")])
+
+        stages = result.stages
+        assert set(stages) == {"fetch", "chunk", "embed", "upsert"}
+        assert stages["fetch"]["processed"] == 2
+        assert stages["chunk"]["processed"] == 2
+        assert stages["embed"]["processed"] == 8
+        assert stages["upsert"]["processed"] == 8
+        assert stages["embed"]["batches"] == len(rec.embed_batches)
+        assert stages["fetch"]["max_queue_depth"] >= 1
+        assert stages["upsert"]["throughput_per_second"] > 0
+
+    def test_config_from_settings_applies_overrides(self):
+        with patch(
+            "app.core.config.framework.settings.settings.get_section",
+            return_value={"embed_batch_size": 16, "unknown": 1},
+        ):
+            config = PipelineConfig.from_settings(max_retries=0)
+        assert config.embed_batch_size == 16
+        assert config.max_retries == 0
+
+
+class TestIngestionPipelineVectorStore:
+    """Test wiring into VectorDB implementations."""
+
+    @pytest.mark.asyncio
+    async def test_store_with_precomputed_embeddings_gets_embed_stage(self):
+        store = Mock()
+        store.supports_precomputed_embeddings.return_value = True
+        store.supports_chunk_diff.return_value = False
+        store.add_embedded_documents = AsyncMock(return_value=["id"])
+        model = Mock()
+        model.embed_documents.side_effect = lambda texts: [[0.1] for _ in texts]
+
+        with patch(
+            "app.db.vector.embeddings.embedding.EmbeddingFactory.get_embedding_model",
+            return_value=model,
+        ):
+            pipeline = IngestionPipeline.for_vector_store(
+                store,
+                EmbeddingType.DEFAULT,
+                fetch=lambda source: source,
+                chunk=_chunk,
+                config=_config(),
+            )
+        result = await pipeline.run([("a", "a:2")])
+
+        assert result.succeeded == ["a"]
+        model.embed_documents.assert_called_once()
+        docs, vectors = store.add_embedded_documents.await_args.args
+        assert len(docs) == 2 and vectors == [[0.1], [0.1]]
+        store.save_and_embed.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_other_stores_use_save_and_embed(self):
+        store = Mock()
+        store.supports_precomputed_embeddings.return_value = False
+        store.supports_chunk_diff.return_value = False
+        store.save_and_embed = AsyncMock(return_value=["id"])
+
+        pipeline = IngestionPipeline.for_vector_store(
+            store,
+            EmbeddingType.DEFAULT,
+            fetch=lambda source: source,
+            chunk=_chunk,
+            config=_config(),
+        )
+        result = await pipeline.run([("a", "a:2")])
+
+        assert result.succeeded == ["a"]
+        embedding_type, docs = store.save_and_embed.await_args.args
+        assert embedding_type == EmbeddingType.DEFAULT
+        assert len(docs) == 2
@@ -0,0 +1,316 @@
+"""
+Unit tests for incremental Jira ingestion.
+
+Covers:
+- First sync embeds every issue with its description and comments
+- Incremental sync uses the JQL watermark and skips unchanged issues
+- Issues deleted upstream or moved out of the project are removed
+- Closed issues are refreshed, or removed when configured
+- Failed issues hold the watermark back
+- JQL pagination and ADF text extraction on JiraClient
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.constants import EmbeddingType
+from app.infrastructure.ingestion.jira_ingestion_service import (
+    SYNC_DEFAULTS,
+    JiraIngestionService,
+)
+from app.infrastructure.ingestion.pipeline import PipelineConfig
+from app.infrastructure.ingestion.sync_state import SyncStateStore
+from app.services.external.jira_service import JiraClient, adf_to_text
+
+
+def _adf(text):
+    return {
+        "type": "doc",
+        "version": 1,
+        "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}],
+    }
+
+
+def _issue(issue_id, updated="2024-05-01T10:00:00.000+0000", status="Open", **extra):
+    category = "done" if status == "Done" else "new"
+    return {
+        "id": issue_id,
+        "key": f"OPS-{issue_id}",
+        "fields": {
+            "summary": f"Incident {issue_id}",
+            "description": _adf(f"Checkout latency spiked ({issue_id})"),
+            "status": {"name": status, "statusCategory": {"key": category}},
+            "project": {"key": "OPS"},
+            "updated": updated,
+            "comment": {"comments": [], "total": 0},
+            **extra,
+        },
+    }
+
+
+def _saved_docs(service):
+    """Documents written to the vector store across all batches."""
+    return [
+        doc
+        for call in service._vector_store.save_and_embed.await_args_list
+        for doc in call.args[1]
+    ]
+
+
+def _client():
+    client = JiraClient.__new__(JiraClient)
+    client._connection_manager = Mock(config={"jira_base_url": "https://x.net/"})
+    client._jira_client = Mock()
+    return client
+
+
+@pytest.fixture
+def state(tmp_path):
+    store = SyncStateStore(path=str(tmp_path / "sync.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def service(state):
+    """Build the service without loading application config."""
+    svc = JiraIngestionService.__new__(JiraIngestionService)
+    svc.config = Mock(sources=["OPS"])
+    svc._jira = Mock()
+    svc._jira.extract_issue_content.side_effect = _client().extract_issue_content
+    svc._processed_issues = {}
+    svc._vector_store = Mock()
+    svc._vector_store.get_connection = AsyncMock()
+    svc._vector_store.save_and_embed = AsyncMock(side_effect=lambda t, d: ["id"])
+    svc._vector_store.delete_by_document_id = AsyncMock(return_value=True)
+    svc._vector_store.supports_precomputed_embeddings.return_value = False
+    svc._vector_store.supports_chunk_diff.return_value = False
+    svc._embedding_type = EmbeddingType.DEFAULT
+    svc._sync_state = state
+    svc._sync_config = dict(SYNC_DEFAULTS)
+    svc._sync_stats = {}
+    svc._pipeline_config = PipelineConfig(
+        batch_wait_seconds=0.01, max_retries=0, retry_backoff_seconds=0
+    )
+    svc.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+    return svc
+
+
+class TestJiraFullSync:
+    """Test the first, full sync of a project."""
+
+    @pytest.mark.asyncio
+    async def test_first_sync_embeds_all_issues(self, service, state):
+        comments = {
+            "comments": [
+                {
+                    "author": {"displayName": "Ada"},
+                    "created": "2024-05-01",
+                    "body": _adf("Rolled back the cache change."),
+                }
+            ],
+            "total": 1,
+        }
+        service._jira.list_issues_updated_since.return_value = [
+            _issue("1", comment=comments),
+            _issue("2"),
+        ]
+
+        assert await service.ingest() is True
+
+        args = service._jira.list_issues_updated_since.call_args.args
+        assert args[:2] == ("OPS", None)
+        service._jira.list_issue_versions.assert_not_called()
+        docs = _saved_docs(service)
+        assert [d.metadata["issue_key"] for d in docs] == ["OPS-1", "OPS-2"]
+        assert "Checkout latency spiked (1)" in docs[0].page_content
+        assert "Comment by Ada" in docs[0].page_content
+        assert "Rolled back the cache change." in docs[0].page_content
+        assert docs[0].metadata["url"] == "https://x.net/browse/OPS-1"
+        assert docs[0].metadata["document_id"] == service.issue_document_id("OPS", "1")
+        records = state.get_all("jira:OPS")
+        assert records["2"].version == "2024-05-01T10:00:00.000+0000"
+        assert state.get_watermark("jira:OPS") is not None
+
+
+class TestJiraIncrementalSync:
+    """Test watermark-driven incremental syncs."""
+
+    @pytest.fixture(autouse=True)
+    def _first_sync(self, service, state):
+        service._jira.list_issues_updated_since.return_value = [
+            _issue("1"),
+            _issue("2"),
+            _issue("3"),
+        ]
+        asyncio.run(service.sync_project("OPS"))
+        service._vector_store.save_and_embed.reset_mock()
+        service._jira.list_issues_updated_since.reset_mock()
+        self.watermark = state.get_watermark("jira:OPS")
+
+    @pytest.mark.asyncio
+    async def test_only_updated_issues_are_reembedded(self, service, state):
+        jira = service._jira
+        jira.list_issues_updated_since.return_value = [
+            _issue("1"),  # returned by the overlap window, not updated
+            _issue("2", updated="2024-05-02T08:00:00.000+0000"),
+        ]
+        jira.list_issue_versions.return_value = {"1": "", "2": "", "3": ""}
+
+        assert await service.sync_project("OPS") is True
+
+        since = jira.list_issues_updated_since.call_args.args[1]
+        assert since == self.watermark - timedelta(
+            minutes=SYNC_DEFAULTS["watermark_overlap_minutes"]
+        )
+        assert [d.metadata["issue_key"] for d in _saved_docs(service)] == ["OPS-2"]
+        service._vector_store.delete_by_document_id.assert_awaited_once_with(
+            service.issue_document_id("OPS", "2")
+        )
+        stats = service.get_sync_stats()["OPS"]
+        assert (stats["unchanged"], stats["embedded"]) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_deleted_and_moved_issues_are_removed(self, service, state):
+        service._jira.list_issues_updated_since.return_value = []
+        service._jira.list_issue_versions.return_value = {"1": ""}
+
+        assert await service.sync_project("OPS") is True
+
+        deleted = {
+            call.args[0]
+            for call in service._vector_store.delete_by_document_id.await_args_list
+        }
+        assert deleted == {
+            service.issue_document_id("OPS", "2"),
+            service.issue_document_id("OPS", "3"),
+        }
+        assert set(state.get_all("jira:OPS")) == {"1"}
+
+    @pytest.mark.asyncio
+    async def test_closed_issues_are_refreshed_by_default(self, service, state):
+        service._jira.list_issues_updated_since.return_value = [
+            _issue("2", updated="2024-05-03T08:00:00.000+0000", status="Done")
+        ]
+        service._jira.list_issue_versions.return_value = {"1": "", "2": "", "3": ""}
+
+        await service.sync_project("OPS")
+
+        [doc] = _saved_docs(service)
+        assert doc.metadata["status_category"] == "done"
+        assert state.get("jira:OPS", "2").extra["status"] == "Done"
+
+    @pytest.mark.asyncio
+    async def test_closed_issues_can_be_removed(self, service, state):
+        service._sync_config["delete_closed"] = True
+        service._jira.list_issues_updated_since.return_value = [
+            _issue("2", updated="2024-05-03T08:00:00.000+0000", status="Done")
+        ]
+        service._jira.list_issue_versions.return_value = {"1": "", "2": "", "3": ""}
+
+        assert await service.sync_project("OPS") is True
+
+        service._vector_store.save_and_embed.assert_not_called()
+        service._vector_store.delete_by_document_id.assert_awaited_once_with(
+            service.issue_document_id("OPS", "2")
+        )
+        assert set(state.get_all("jira:OPS")) == {"1", "3"}
+
+    @pytest.mark.asyncio
+    async def test_failed_issue_holds_watermark(self, service, state):
+        service._jira.list_issues_updated_since.return_value = [
+            _issue("2", updated="2024-05-02T08:00:00.000+0000")
+        ]
+        service._jira.list_issue_versions.return_value = {"1": "", "2": "", "3": ""}
+        service._vector_store.save_and_embed.side_effect = RuntimeError("down")
+
+        assert await service.sync_project("OPS") is False
+
+        assert state.get_watermark("jira:OPS") == self.watermark
+        assert state.get("jira:OPS", "2").version == "2024-05-01T10:00:00.000+0000"
+
+    @pytest.mark.asyncio
+    async def test_failed_extraction_keeps_previous_chunks(self, service, state):
+        service._jira.list_issues_updated_since.return_value = [
+            _issue("2", updated="2024-05-02T08:00:00.000+0000")
+        ]
+        service._jira.list_issue_versions.return_value = {"1": "", "2": "", "3": ""}
+        service._jira.extract_issue_content.side_effect = RuntimeError("timeout")
+
+        assert await service.sync_project("OPS") is False
+
+        service._vector_store.delete_by_document_id.assert_not_called()
+        assert state.get("jira:OPS", "2").version == "2024-05-01T10:00:00.000+0000"
+
+
+class TestJiraClientQueries:
+    """Test the JQL queries and content extraction on JiraClient."""
+
+    def test_updated_since_follows_next_page_token(self):
+        client = _client()
+        client._connection_manager.search_issues.side_effect = [
+            {"issues": [{"id": "1"}, {"id": "2"}], "nextPageToken": "t1"},
+            {"issues": [{"id": "3"}], "isLast": True},
+        ]
+
+        issues = client.list_issues_updated_since(
+            "OPS", datetime(2024, 5, 1, 9, 5, tzinfo=timezone.utc), page_size=2
+        )
+
+        assert [i["id"] for i in issues] == ["1", "2", "3"]
+        first, second = client._connection_manager.search_issues.call_args_list
+        assert first.args[0] == (
+            'project = "OPS" AND updated >= "2024-05-01 09:05" ORDER BY updated ASC'
+        )
+        assert first.kwargs["next_page_token"] is None
+        assert second.kwargs["next_page_token"] == "t1"
+
+    def test_truncated_comments_are_fetched(self):
+        client = _client()
+        client._connection_manager.get_issue.return_value = {
+            "fields": {
+                "comment": {
+                    "comments": [{"body": "first"}, {"body": "second"}],
+                }
+            }
+        }
+        issue = _issue("1", comment={"comments": [{"body": "first"}], "total": 2})
+
+        content, _ = client.extract_issue_content(issue)
+
+        assert "second" in content
+        client._connection_manager.get_issue.assert_called_once_with(
+            "OPS-1", fields="comment"
+        )
+
+    def test_adf_is_flattened_to_text(self):
+        doc = {
+            "type": "doc",
+            "content": [
+                {"type": "heading", "content": [{"type": "text", "text": "Impact"}]},
+                {
+                    "type": "bulletList",
+                    "content": [
+                        {
+                            "type": "listItem",
+                            "content": [
+                                {
+                                    "type": "paragraph",
+                                    "content": [
+                                        {"type": "mention", "attrs": {"text": "@Ada"}},
+                                        {"type": "text", "text": " paged"},
+                                    ],
+                                }
+                            ],
+                        }
+                    ],
+                },
+            ],
+        }
+
+        assert adf_to_text(doc) == "Impact\n- @Ada paged\n"
+        assert adf_to_text("plain server text") == "plain server text"
@@ -0,0 +1,86 @@
+"""
+Unit tests for the ingestion sync state store.
+
+Covers:
+- Record upsert, lookup and deletion per namespace
+- Watermark persistence
+- Durability across store instances
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.infrastructure.ingestion.sync_state import SyncRecord, SyncStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SyncStateStore(path=str(tmp_path / "state" / "sync.db"))
+    yield store
+    store.close()
+
+
+class TestSyncStateRecords:
+    """Test per-item records."""
+
+    def test_upsert_and_get(self, store):
+        store.upsert(
+            "confluence:ENG",
+            [SyncRecord(item_id="1", version=3, document_id="doc-1", extra={"a": 1})],
+        )
+
+        record = store.get("confluence:ENG", "1")
+        assert record.version == "3"
+        assert record.document_id == "doc-1"
+        assert record.extra == {"a": 1}
+        assert record.synced_at is not None
+        assert store.get("confluence:ENG", "2") is None
+
+    def test_upsert_replaces_existing_record(self, store):
+        store.upsert("ns", [SyncRecord(item_id="1", version="1")])
+        store.upsert("ns", [SyncRecord(item_id="1", version="2")])
+        assert store.get("ns", "1").version == "2"
+        assert len(store.get_all("ns")) == 1
+
+    def test_namespaces_are_isolated(self, store):
+        store.upsert("a", [SyncRecord(item_id="1")])
+        store.upsert("b", [SyncRecord(item_id="1"), SyncRecord(item_id="2")])
+
+        assert set(store.get_all("b")) == {"1", "2"}
+        assert set(store.namespaces()) == {"a", "b"}
+
+        store.clear("b")
+        assert store.get_all("b") == {}
+        assert store.get("a", "1") is not None
+
+    def test_delete(self, store):
+        store.upsert("ns", [SyncRecord(item_id="1"), SyncRecord(item_id="2")])
+        assert store.delete("ns", ["1"]) == 1
+        assert set(store.get_all("ns")) == {"2"}
+
+
+class TestSyncStateWatermarks:
+    """Test namespace watermarks."""
+
+    def test_watermark_round_trip(self, store):
+        assert store.get_watermark("ns") is None
+        mark = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        store.set_watermark("ns", mark)
+        assert store.get_watermark("ns") == mark
+
+    def test_naive_watermark_is_treated_as_utc(self, store):
+        store.set_watermark("ns", datetime(2024, 5, 1, 12, 30))
+        assert store.get_watermark("ns").tzinfo == timezone.utc
+
+    def test_state_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "sync.db")
+        first = SyncStateStore(path=path)
+        first.upsert("ns", [SyncRecord(item_id="1", version="7")])
+        first.set_watermark("ns", datetime(2024, 1, 1, tzinfo=timezone.utc))
+        first.close()
+
+        second = SyncStateStore(path=path)
+        assert second.get("ns", "1").version == "7"
+        assert second.get_watermark("ns") is not None
+        second.close()
@@ -0,0 +1,186 @@
+"""
+Unit tests for the token-sized, structure-aware text splitter.
+
+Covers:
+- Chunks stay within the token budget and fill up evenly
+- Headings, code blocks and tables are split along their structure
+- Overlap repeats whole trailing sentences
+- Parallel splitting matches in-process splitting
+- Splitter selection from configuration
+"""
+
+import pytest
+from langchain.schema import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.infrastructure.ingestion.token_splitter import (
+    ApproximateTokenizer,
+    SplitterConfig,
+    StructuredTokenSplitter,
+    create_text_splitter,
+    get_tokenizer,
+    shutdown_pool,
+)
+
+# Not a tiktoken encoding: every process uses the deterministic approximation
+ENCODING = "test-approximate"
+
+SENTENCE = "The payment worker retries failed invoices every five minutes."
+
+
+def _splitter(**kwargs):
+    kwargs.setdefault("chunk_size", 40)
+    kwargs.setdefault("chunk_overlap", 0)
+    kwargs.setdefault("min_chunk_tokens", 10)
+    return StructuredTokenSplitter(encoding=ENCODING, **kwargs)
+
+
+def _prose(sentences):
+    return " ".join(f"{SENTENCE[:-1]} ({n})." for n in range(sentences))
+
+
+class TestSizing:
+    """Test token budgets."""
+
+    def test_unknown_encodings_fall_back_to_approximate_counts(self):
+        tokenizer = get_tokenizer(ENCODING)
+
+        assert isinstance(tokenizer, ApproximateTokenizer)
+        assert tokenizer.count_many(["Restart it, then wait."]) == [6]
+
+    def test_chunks_stay_within_the_token_budget(self):
+        splitter = _splitter()
+
+        chunks = splitter.split_text(_prose(30))
+
+        assert len(chunks) > 1
+        assert all(splitter.count_tokens(chunk) <= 40 for chunk in chunks)
+        # Sentences are packed whole, so chunks fill up evenly
+        assert all(chunk.endswith(").") for chunk in chunks)
+        assert all(splitter.count_tokens(chunk) > 20 for chunk in chunks[:-1])
+
+    def test_oversized_sentences_are_cut_into_windows(self):
+        splitter = _splitter(chunk_size=10)
+        words = " ".join(f"word{n}" for n in range(35))
+
+        chunks = splitter.split_text(words)
+
+        assert [splitter.count_tokens(chunk) for chunk in chunks] == [10, 10, 10, 5]
+        assert " ".join(chunks) == words
+
+    def test_empty_text_has_no_chunks(self):
+        assert _splitter().split_text("\n\n  \n") == []
+
+
+class TestStructure:
+    """Test headings, code blocks and tables."""
+
+    def test_headings_start_new_chunks(self):
+        text = f"# Retries\n\n{_prose(2)}\n\n# Alerts\n\nPage the on-call engineer."
+
+        chunks = _splitter(chunk_size=200).split_text(text)
+
+        assert [chunk.split("\n")[0] for chunk in chunks] == ["# Retries", "# Alerts"]
+
+    def test_headings_move_on_with_their_content(self):
+        text = f"{_prose(2)}\n\n## Limits\n\n{_prose(1)}"
+
+        chunks = _splitter(chunk_size=30, min_chunk_tokens=100).split_text(text)
+
+        assert chunks[-1].startswith("## Limits\n\n")
+
+    def test_long_code_blocks_repeat_their_fence(self):
+        code = "\n".join(f"x{n} = call({n})" for n in range(20))
+        text = f"```python\n{code}\n```"
+        splitter = _splitter()
+
+        chunks = splitter.split_text(text)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith("```python\n") and chunk.endswith("\n```")
+            assert splitter.count_tokens(chunk) <= 40
+        lines = [line for c in chunks for line in c.split("\n")[1:-1]]
+        assert lines == code.split("\n")
+
+    def test_long_tables_repeat_their_header(self):
+        header = "| key | value |\n|-----|-------|"
+        rows = [f"| k{n} | v{n} |" for n in range(20)]
+        splitter = _splitter()
+
+        chunks = splitter.split_text(header + "\n" + "\n".join(rows))
+
+        assert len(chunks) > 1
+        assert all(chunk.startswith(header + "\n") for chunk in chunks)
+        assert [line for c in chunks for line in c.split("\n")[2:]] == rows
+
+    def test_short_code_blocks_stay_whole(self):
+        text = f"{_prose(1)}\n\n```\nmake test\nmake lint\n```"
+
+        chunks = _splitter(chunk_size=200).split_text(text)
+
+        assert chunks == [text]
+
+
+class TestOverlap:
+    """Test overlap between chunks."""
+
+    def test_trailing_sentences_are_repeated(self):
+        splitter = _splitter(chunk_size=30, chunk_overlap=12)
+
+        chunks = splitter.split_text(_prose(6))
+
+        for previous, chunk in zip(chunks, chunks[1:]):
+            last_sentence = previous.split(". ")[-1]
+            assert chunk.startswith(last_sentence.rstrip("."))
+            assert splitter.count_tokens(chunk) <= 30
+
+
+class TestDocuments:
+    """Test splitting document batches."""
+
+    def test_parallel_split_matches_in_process_split(self):
+        docs = [
+            Document(page_content=_prose(n + 5), metadata={"page": n}) for n in range(8)
+        ]
+        serial = _splitter().split_documents(docs)
+
+        try:
+            parallel = _splitter(
+                parallel_workers=2, parallel_min_chars=0
+            ).split_documents(docs)
+        finally:
+            shutdown_pool()
+
+        assert [(d.page_content, d.metadata) for d in parallel] == [
+            (d.page_content, d.metadata) for d in serial
+        ]
+
+    def test_small_batches_are_split_in_process(self, monkeypatch):
+        monkeypatch.setattr(
+            "app.infrastructure.ingestion.token_splitter._get_pool",
+            lambda workers: pytest.fail("pool used"),
+        )
+        docs = [Document(page_content=_prose(3)) for _ in range(3)]
+
+        assert _splitter(parallel_workers=2).split_documents(docs)
+
+
+class TestConfig:
+    """Test choosing the splitter."""
+
+    def test_token_strategy_is_the_default(self):
+        splitter = create_text_splitter(SplitterConfig(chunk_tokens=128))
+
+        assert isinstance(splitter, StructuredTokenSplitter)
+        assert splitter._chunk_size == 128
+
+    def test_character_strategy_keeps_the_recursive_splitter(self):
+        splitter = create_text_splitter(SplitterConfig(strategy="character"))
+
+        assert isinstance(splitter, RecursiveCharacterTextSplitter)
+        assert (splitter._chunk_size, splitter._chunk_overlap) == (1000, 200)
+
+    def test_unknown_strategies_are_rejected(self):
+        with pytest.raises(ValueError):
+            create_text_splitter(SplitterConfig(strategy="semantic"))
@@ -0,0 +1,247 @@
+"""
+Unit tests for streaming upload ingestion.
+
+Covers:
+- Multipart bodies are streamed to staging, whatever the chunk boundaries
+- Type detection from the first bytes, size caps and the concurrency limit
+- Failed uploads leave no staged files behind
+- Upload jobs ingest staged files under stable document ids
+"""
+
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.core.constants import DataSourceType
+from app.core.exceptions import (
+    PayloadTooLargeError,
+    RateLimitError,
+    UnsupportedMediaTypeError,
+    ValidationError,
+)
+from app.infrastructure.ingestion.pipeline import PipelineConfig
+from app.infrastructure.ingestion.rag_data_provider import RagDataProvider
+from app.infrastructure.ingestion.upload import (
+    UploadConfig,
+    UploadReceiver,
+    safe_filename,
+)
+from app.infrastructure.ingestion.upload_ingestion_service import UploadIngestionService
+
+BOUNDARY = "test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+TEXT = b"Release checklist for the billing service.\n"
+
+
+def _body(*parts):
+    """Multipart body from (field, filename, content) parts."""
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (
+            f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode()
+            + content
+            + b"\r\n"
+        )
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+async def _stream(body, chunk_size=7):
+    for start in range(0, len(body), chunk_size):
+        yield body[start : start + chunk_size]
+
+
+def _receiver(tmp_path, **config):
+    return UploadReceiver(UploadConfig(staging_path=str(tmp_path), **config))
+
+
+def _staged(tmp_path):
+    return [p for p in Path(tmp_path).rglob("*") if p.is_file()]
+
+
+class TestReceive:
+    """Test streaming bodies to staging."""
+
+    @pytest.mark.asyncio
+    async def test_files_are_streamed_to_staging(self, tmp_path):
+        notes = b"Deployment notes for the payment service.\n" * 200
+        body = _body(
+            ("comment", None, b"ignored form field"),
+            ("files", "../etc/notes.txt", notes),
+            ("files", "notes.txt", b"A second file with the same name.\n"),
+        )
+
+        upload = await _receiver(tmp_path).receive(CONTENT_TYPE, _stream(body))
+
+        assert [(f.name, f.size, f.content_type) for f in upload.files] == [
+            ("notes.txt", len(notes), "text/plain"),
+            ("notes-1.txt", 34, "text/plain"),
+        ]
+        assert Path(upload.files[0].path).read_bytes() == notes
+        assert Path(upload.path).parent == tmp_path
+
+    @pytest.mark.asyncio
+    async def test_unsupported_types_are_rejected(self, tmp_path):
+        body = _body(("files", "tool.bin", b"\x7fELF\x02\x01\x01" + b"\x00" * 64))
+
+        with pytest.raises(UnsupportedMediaTypeError):
+            await _receiver(tmp_path).receive(CONTENT_TYPE, _stream(body))
+        assert _staged(tmp_path) == []
+
+    @pytest.mark.asyncio
+    async def test_non_multipart_bodies_are_rejected(self, tmp_path):
+        with pytest.raises(UnsupportedMediaTypeError):
+            await _receiver(tmp_path).receive("application/json", _stream(b"{}"))
+
+    @pytest.mark.asyncio
+    async def test_uploads_without_files_are_rejected(self, tmp_path):
+        body = _body(("comment", None, b"just a field"))
+
+        with pytest.raises(ValidationError):
+            await _receiver(tmp_path).receive(CONTENT_TYPE, _stream(body))
+
+    def test_filenames_lose_their_path(self):
+        assert safe_filename("C:\\docs\\q3 report.pdf") == "q3 report.pdf"
+        assert safe_filename("../../..") == "upload"
+
+
+class TestLimits:
+    """Test size caps and concurrency."""
+
+    @pytest.mark.asyncio
+    async def test_oversized_files_abort_the_upload(self, tmp_path):
+        body = _body(("files", "big.txt", b"x" * 4096))
+        receiver = _receiver(tmp_path, max_file_mb=1024 / (1024 * 1024))
+
+        with pytest.raises(PayloadTooLargeError):
+            await receiver.receive(CONTENT_TYPE, _stream(body, chunk_size=512))
+        assert _staged(tmp_path) == []
+        assert receiver.active_uploads == 0
+
+    @pytest.mark.asyncio
+    async def test_declared_length_is_checked_before_reading(self, tmp_path):
+        async def unread_stream():
+            raise AssertionError("body was read")
+            yield b""
+
+        with pytest.raises(PayloadTooLargeError):
+            await _receiver(tmp_path, max_upload_mb=1).receive(
+                CONTENT_TYPE, unread_stream(), content_length=2 * 1024**2
+            )
+
+    @pytest.mark.asyncio
+    async def test_too_many_files_are_rejected(self, tmp_path):
+        body = _body(*[("files", f"{n}.txt", TEXT) for n in range(3)])
+
+        with pytest.raises(ValidationError):
+            await _receiver(tmp_path, max_files=2).receive(CONTENT_TYPE, _stream(body))
+
+    @pytest.mark.asyncio
+    async def test_concurrent_uploads_are_limited(self, tmp_path):
+        receiver = _receiver(tmp_path, max_concurrent_uploads=1)
+        release = asyncio.Event()
+
+        async def slow_stream():
+            yield _body(("files", "a.txt", TEXT))[:20]
+            await release.wait()
+
+        first = asyncio.create_task(receiver.receive(CONTENT_TYPE, slow_stream()))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(RateLimitError):
+            await receiver.receive(CONTENT_TYPE, _stream(_body(("f", "b.txt", TEXT))))
+        release.set()
+        with pytest.raises(ValidationError):
+            await first
+
+
+class TestUploadIngestion:
+    """Test ingesting staged uploads."""
+
+    @staticmethod
+    def _store():
+        store = Mock()
+        store.get_connection = AsyncMock()
+        store.supports_chunk_diff.return_value = False
+        store.supports_precomputed_embeddings.return_value = False
+        store.delete_by_document_id = AsyncMock(return_value=True)
+        store.save_and_embed = AsyncMock()
+        return store
+
+    @staticmethod
+    async def _ingest(tmp_path, upload, store):
+        with (
+            patch(
+                "app.infrastructure.ingestion.upload_ingestion_service.UploadConfig"
+                ".from_settings",
+                return_value=UploadConfig(staging_path=str(tmp_path)),
+            ),
+            patch(
+                "app.infrastructure.ingestion.file_ingestion_service.VectorStoreFactory"
+            ) as factory,
+            patch(
+                "app.infrastructure.ingestion.file_ingestion_service.PipelineConfig"
+                ".from_settings",
+                return_value=PipelineConfig(batch_wait_seconds=0.01, max_retries=0),
+            ),
+            patch(
+                "app.infrastructure.ingestion.file_ingestion_service.FileIngestionService"
+                "._load_section",
+                return_value={"parse_workers": -1},
+            ),
+        ):
+            factory.get_default_vector_store.return_value = store
+            service = RagDataProvider.get_class(DataSourceType.UPLOAD)(
+                upload_id=upload.upload_id
+            )
+            assert isinstance(service, UploadIngestionService)
+            return service, await service.ingest()
+
+    @pytest.mark.asyncio
+    async def test_staged_files_are_ingested_and_removed(self, tmp_path):
+        upload = await _receiver(tmp_path).receive(
+            CONTENT_TYPE,
+            _stream(_body(("files", "runbook.txt", b"Restart the worker.\n"))),
+        )
+        store = self._store()
+
+        service, success = await self._ingest(tmp_path, upload, store)
+
+        assert success
+        chunks = store.save_and_embed.await_args.args[1]
+        assert [c.metadata["source"] for c in chunks] == ["runbook.txt"]
+        assert chunks[0].metadata["document_id"] == service._document_id(
+            str(Path(upload.files[0].path).resolve())
+        )
+        # The previous upload of the same name is replaced
+        store.delete_by_document_id.assert_awaited_once_with(
+            chunks[0].metadata["document_id"]
+        )
+        assert not Path(upload.path).exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_parse_keeps_the_previous_upload(self, tmp_path):
+        upload = await _receiver(tmp_path).receive(
+            CONTENT_TYPE,
+            _stream(_body(("files", "runbook.txt", b"Restart the worker.\n"))),
+        )
+        store = self._store()
+
+        with patch.object(
+            UploadIngestionService,
+            "_load_document",
+            side_effect=RuntimeError("parser crashed"),
+        ):
+            _, success = await self._ingest(tmp_path, upload, store)
+
+        assert not success
+        store.delete_by_document_id.assert_not_called()
+        store.save_and_embed.assert_not_called()
+
+    def test_unknown_upload_ids_are_rejected(self):
+        with pytest.raises(ValueError):
+            UploadIngestionService(upload_id="../../etc")